@@ -0,0 +1,382 @@
+"""
+WinSW 图形化管理工具的命令行入口，供部署流水线等自动化场景使用。
+与图形界面共用 core 中的模块，不会导入 tkinter；requests 等较重的依赖只在需要下载 WinSW 时才导入。
+
+用法示例:
+    python cli.py list --json
+    python cli.py show my-service
+    python cli.py save path/to/my-service.xml --overwrite
+    python cli.py start --all --parallel 4 --json
+    python cli.py status my-service other-service --json
+    python cli.py history --service my-service --since 2025-01-01
+    python cli.py logs --rotate --json
+    python cli.py serve --port 8765 --token secret
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import xml.etree.ElementTree as ET
+
+from core.app_paths import set_app_dir
+from core.audit_log import AuditLog
+from core.config_history import ConfigHistory
+from core.config_manager import ConfigManager, service_xml_path
+from core.config_repository import ConfigRepository
+
+# 返回码
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+
+SERVICE_COMMANDS = ('install', 'uninstall', 'start', 'stop', 'restart', 'refresh')
+
+
+def log_to_stderr(message):
+    """日志输出到 stderr，stdout 只用于结果，便于脚本解析。"""
+    print(message, file=sys.stderr, flush=True)
+
+
+def write_json(data, output, indent=2):
+    json.dump(data, output, ensure_ascii=False, indent=indent)
+    output.write("\n")
+
+
+def print_table(rows, columns, output):
+    for row in rows:
+        output.write("\t".join("" if row.get(column) is None else str(row.get(column)) for column in columns) + "\n")
+
+
+def select_configs(repository, args) -> dict:
+    """
+    根据命令行参数选择服务，返回 {文件名: 配置}。
+    服务可以用服务ID或文件名指定，--all 选择全部服务。
+    """
+    configs = repository.load_all()
+    if args.all:
+        return configs
+    if not args.services:
+        raise SystemExit("错误: 请指定服务ID，或使用 --all 选择全部服务。")
+
+    by_id = {(config.get('id') or '').lower(): filename for filename, config in configs.items()}
+    selected = {}
+    for name in args.services:
+        filename = name if name in configs else by_id.get(name.lower()) or (
+            f"{name}.xml" if f"{name}.xml" in configs else None)
+        if filename is None:
+            raise SystemExit(f"错误: 找不到服务 '{name}'。")
+        selected[filename] = configs[filename]
+    return selected
+
+
+def config_error(repository, filename):
+    """返回没有服务ID的配置文件无法使用的原因：无法解析，或确实缺少 <id>。"""
+    try:
+        ET.parse(os.path.join(repository.service_dir, filename))
+    except (ET.ParseError, OSError) as e:
+        return f"无法解析: {e}"
+    return "缺少服务ID"
+
+
+def cmd_list(args, repository):
+    rows = []
+    for filename, config in repository.load_all().items():
+        if config.get('id'):
+            rows.append({'file': filename, 'id': config.get('id'), 'name': config.get('name'),
+                         'executable': config.get('executable'), 'depend': config.get('depend'), 'error': None})
+        else:
+            # 无法解析的文件不作为服务列出（否则会显示为ID为空的默认配置），而是作为错误行
+            rows.append({'file': filename, 'id': None, 'name': None, 'executable': None, 'depend': None,
+                         'error': config_error(repository, filename)})
+    if args.json:
+        write_json(rows, args.output)
+    else:
+        print_table([row for row in rows if not row['error']], ('file', 'id', 'name', 'executable'), args.output)
+        for row in rows:
+            if row['error']:
+                log_to_stderr(f"错误: {row['file']}: {row['error']}")
+    return EXIT_FAILED if any(row['error'] for row in rows) else EXIT_OK
+
+
+def cmd_show(args, repository):
+    selected = select_configs(repository, args)
+    if args.json:
+        write_json(selected, args.output)
+    else:
+        for filename in selected:
+            with open(os.path.join(repository.service_dir, filename), encoding='utf-8') as f:
+                args.output.write(f.read())
+            args.output.write("\n")
+    return EXIT_OK
+
+
+def cmd_save(args, repository):
+    """校验XML并保存到 services/<id>.xml，原样保留文件内容。"""
+    config_manager = repository.config_manager
+    try:
+        if args.source == '-':
+            xml_string = sys.stdin.read()
+        else:
+            with open(args.source, encoding='utf-8') as f:
+                xml_string = f.read()
+        document = config_manager.document_from_xml_string(xml_string)
+    except Exception as e:
+        log_to_stderr(f"错误: 无法读取或解析 {args.source}: {e}")
+        return EXIT_FAILED
+
+    service_id = document.to_config().get('id')
+    os.makedirs(repository.service_dir, exist_ok=True)
+    try:
+        dest_path = service_xml_path(repository.service_dir, service_id)
+    except ValueError as e:
+        log_to_stderr(f"错误: {e}。")
+        return EXIT_FAILED
+    if os.path.exists(dest_path) and not args.overwrite:
+        log_to_stderr(f"错误: {dest_path} 已存在，使用 --overwrite 覆盖。")
+        return EXIT_FAILED
+
+    changed = config_manager.save_document(document, dest_path)
+    result = {'id': service_id, 'file': dest_path, 'changed': changed}
+    if args.json:
+        write_json(result, args.output, indent=None)
+    else:
+        args.output.write(dest_path + "\n")
+    return EXIT_OK
+
+
+@contextlib.contextmanager
+def status_backend(configs_by_id):
+    """
+    服务状态查询后端。Windows 上只需要 sc 查询，不加载 WinSW 管理和下载相关的模块，保证启动足够快；
+    其他平台逐个调用 winsw status，结束时关闭执行命令的线程池。
+    """
+    from core.status_poller import default_status_backend
+
+    managers = []
+
+    def create_manager():
+        from core.settings_manager import SettingsManager
+        from core.winsw_manager import WinSWManager
+
+        managers.append(WinSWManager(log_to_stderr, SettingsManager()))
+        return managers[-1]
+
+    try:
+        yield default_status_backend(create_manager, lambda: configs_by_id)
+    finally:
+        for manager in managers:
+            manager.shutdown()
+
+
+def cmd_status(args, repository):
+    selected = select_configs(repository, args)
+    service_ids = [config.get('id') or os.path.splitext(filename)[0] for filename, config in selected.items()]
+    with status_backend({config.get('id'): config for config in selected.values() if config.get('id')}) as backend:
+        statuses = backend.query(service_ids)
+    rows = [{'id': service_id, 'status': statuses.get(service_id)} for service_id in service_ids]
+    if args.json:
+        write_json(rows, args.output)
+    else:
+        print_table(rows, ('id', 'status'), args.output)
+    return EXIT_OK
+
+
+def cmd_service(args, repository):
+    """按依赖顺序对选中的服务并发执行 WinSW 命令。"""
+    from core.fleet_executor import FleetExecutor
+    from core.settings_manager import SettingsManager
+    from core.winsw_manager import WinSWManager
+
+    selected = select_configs(repository, args)
+    settings_manager = SettingsManager()
+    parallel = args.parallel or settings_manager.get('max_parallel_commands') or 8
+    # 执行命令的线程数按 max_parallel_commands 创建，否则更大的 --parallel 会被它限制（只在本次运行中生效，不保存）
+    settings_manager.set('max_parallel_commands', parallel)
+    winsw_manager = WinSWManager(log_to_stderr, settings_manager, repository.config_manager.audit_log)
+    executor = FleetExecutor(winsw_manager, max_concurrency=parallel, max_per_host=parallel,
+                             log_callback=log_to_stderr)
+    future = executor.run(args.command, list(selected.values()))
+    try:
+        results = future.result()
+    except KeyboardInterrupt:
+        future.cancel()
+        log_to_stderr("已取消。")
+        return EXIT_FAILED
+    finally:
+        winsw_manager.shutdown()
+
+    rows = [{'id': r.service_id, 'command': r.command, 'status': r.status, 'returncode': r.returncode,
+             'duration': None if r.duration is None else round(r.duration, 3), 'ok': r.status == '成功',
+             'message': r.message} for r in results]
+    if args.json:
+        write_json(rows, args.output)
+    else:
+        print_table(rows, ('id', 'command', 'status', 'returncode', 'duration', 'message'), args.output)
+    return EXIT_OK if all(row['ok'] for row in rows) else EXIT_FAILED
+
+
+def cmd_serve(args, repository):
+    """运行控制守护进程，通过 HTTP/JSON-RPC 接受远程管理。"""
+    from core.control_daemon import ControlDaemon
+    from core.settings_manager import SettingsManager
+    from core.winsw_manager import WinSWManager
+
+    settings_manager = SettingsManager()
+    token = args.token if args.token is not None else settings_manager.get('control_daemon_token')
+    if args.host not in ('127.0.0.1', 'localhost', '::1') and not token:
+        log_to_stderr("警告: 守护进程监听在非本机地址且未设置访问令牌，任何能访问该端口的人都可以控制服务。")
+    winsw_manager = WinSWManager(log_to_stderr, settings_manager, repository.config_manager.audit_log)
+    daemon = ControlDaemon(winsw_manager, repository.config_manager,
+                           host=args.host, port=args.port, token=token, service_dir=repository.service_dir)
+    daemon.run()
+    return EXIT_OK
+
+
+def parse_date(text):
+    """解析 YYYY-MM-DD 或 YYYY-MM-DDTHH:MM:SS 格式的本地时间，返回时间戳。"""
+    from datetime import datetime
+
+    try:
+        return datetime.fromisoformat(text).timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"无效的日期: {text}")
+
+
+def cmd_history(args, repository):
+    """查询审计日志中的命令和配置修改记录。"""
+    import time
+
+    entries = repository.config_manager.audit_log.query(
+        service_id=args.service, action=args.action, result=args.result, since=args.since, until=args.until,
+        limit=args.limit)
+    if args.json:
+        write_json(entries, args.output)
+    else:
+        for entry in entries:
+            entry['time'] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry['ts']))
+        print_table(entries, ('time', 'user', 'service_id', 'action', 'result', 'returncode', 'config_hash'),
+                    args.output)
+    return EXIT_OK
+
+
+def cmd_logs(args, repository):
+    """统计各服务的日志磁盘占用；--rotate 时先按策略轮转（只轮转已停止的服务）和清理日志，适合放在计划任务中运行。"""
+    from core.log_archive import LogMaintenance
+    from core.settings_manager import SettingsManager
+
+    if args.services or args.all:
+        configs = list(select_configs(repository, args).values())
+    else:
+        configs = list(repository.load_all().values())
+    maintenance = LogMaintenance(SettingsManager(), lambda: configs, log_to_stderr)
+    summary = None
+    if args.rotate:
+        # 只轮转已停止的服务的日志
+        with status_backend({config.get('id'): config for config in configs if config.get('id')}) as backend:
+            maintenance.status_query = backend.query
+            summary = maintenance.run_once()
+    for error in (summary or {}).get('errors', []):
+        log_to_stderr(f"错误: {error}")
+    rows = maintenance.disk_usage(configs)
+    if args.json:
+        write_json({'maintenance': summary, 'services': rows}, args.output)
+    else:
+        print_table(rows, ('id', 'active_bytes', 'archived_bytes', 'segments', 'log_dir'), args.output)
+    return EXIT_FAILED if summary and summary['errors'] else EXIT_OK
+
+
+def positive_int(text):
+    try:
+        value = int(text)
+    except ValueError:
+        value = 0
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"应为正整数: {text}")
+    return value
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="WinSW 服务配置与控制的命令行工具")
+    parser.add_argument('--root', help="程序目录，包含 services、bin、deploy、metrics 和 audit 等目录；"
+                                       "默认 services 位于当前目录，其他目录位于 cli.py 所在的目录")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    def add_selection(subparser):
+        subparser.add_argument('services', nargs='*', help="服务ID或配置文件名")
+        subparser.add_argument('--all', action='store_true', help="选择全部服务")
+
+    list_parser = subparsers.add_parser('list', help="列出所有服务配置")
+    list_parser.add_argument('--json', action='store_true', help="以JSON格式输出")
+    list_parser.set_defaults(handler=cmd_list)
+
+    show_parser = subparsers.add_parser('show', help="显示服务配置（XML，或 --json 时为解析后的字段）")
+    add_selection(show_parser)
+    show_parser.add_argument('--json', action='store_true', help="以JSON格式输出")
+    show_parser.set_defaults(handler=cmd_show)
+
+    save_parser = subparsers.add_parser('save', help="校验XML配置并保存到 services 目录")
+    save_parser.add_argument('source', help="XML文件路径，'-' 表示从标准输入读取")
+    save_parser.add_argument('--overwrite', action='store_true', help="覆盖已存在的同ID配置")
+    save_parser.add_argument('--json', action='store_true', help="以JSON格式输出")
+    save_parser.set_defaults(handler=cmd_save)
+
+    status_parser = subparsers.add_parser('status', help="查询服务状态")
+    add_selection(status_parser)
+    status_parser.add_argument('--json', action='store_true', help="以JSON格式输出")
+    status_parser.set_defaults(handler=cmd_status)
+
+    for command in SERVICE_COMMANDS:
+        service_parser = subparsers.add_parser(command, help=f"对选中的服务执行 WinSW {command}")
+        add_selection(service_parser)
+        service_parser.add_argument('--parallel', type=positive_int,
+                                    help="最大并发数，默认使用设置中的 max_parallel_commands")
+        service_parser.add_argument('--json', action='store_true', help="以JSON格式输出")
+        service_parser.set_defaults(handler=cmd_service)
+
+    history_parser = subparsers.add_parser('history', help="查询操作历史（审计日志）")
+    history_parser.add_argument('--service', help="服务ID")
+    history_parser.add_argument('--action', help="操作，例如 start、uninstall、save、delete")
+    history_parser.add_argument('--result', help="结果: ok、failed、cancelled、timeout、error")
+    history_parser.add_argument('--since', type=parse_date, help="起始时间，例如 2025-01-01")
+    history_parser.add_argument('--until', type=parse_date, help="结束时间（不含）")
+    history_parser.add_argument('--limit', type=int, default=100, help="最多返回的记录数，默认 100")
+    history_parser.add_argument('--json', action='store_true', help="以JSON格式输出")
+    history_parser.set_defaults(handler=cmd_history)
+
+    logs_parser = subparsers.add_parser('logs', help="统计日志磁盘占用，--rotate 时按策略轮转和清理日志")
+    add_selection(logs_parser)
+    logs_parser.add_argument('--rotate', action='store_true', help="先按策略轮转、压缩并清理过期归档")
+    logs_parser.add_argument('--json', action='store_true', help="以JSON格式输出")
+    logs_parser.set_defaults(handler=cmd_logs)
+
+    serve_parser = subparsers.add_parser('serve', help="运行控制守护进程（HTTP/JSON-RPC）")
+    serve_parser.add_argument('--host', default='127.0.0.1', help="监听地址，默认只监听本机")
+    serve_parser.add_argument('--port', type=int, default=8765, help="监听端口，默认 8765")
+    serve_parser.add_argument('--token', help="访问令牌，默认使用设置中的 control_daemon_token")
+    serve_parser.set_defaults(handler=cmd_serve)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.root:
+        # services 和 settings.json 相对于当前目录，bin、deploy、metrics 和 audit 等相对于程序目录，两者都指向 root
+        set_app_dir(args.root)
+        os.chdir(args.root)
+    # 结果写入 stdout；core 模块中用 print 输出的提示信息在执行期间改为输出到 stderr，保证 --json 的输出可以直接解析
+    args.output = sys.stdout
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            repository = ConfigRepository(ConfigManager(AuditLog(), ConfigHistory(), log_callback=log_to_stderr))
+            return args.handler(args, repository)
+    except SystemExit as e:
+        if isinstance(e.code, str):
+            log_to_stderr(e.code)
+            return EXIT_USAGE
+        raise
+
+
+if __name__ == "__main__":
+    sys.exit(main())
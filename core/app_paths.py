@@ -0,0 +1,17 @@
+import os
+import sys
+
+_app_dir = None
+
+
+def app_dir() -> str:
+    """
+    程序目录，bin、deploy、metrics 和 audit 等目录都位于其中。
+    默认为启动脚本所在的目录；命令行工具的 --root 参数通过 set_app_dir() 修改。
+    """
+    return _app_dir or os.path.abspath(os.path.dirname(sys.argv[0]))
+
+
+def set_app_dir(path):
+    global _app_dir
+    _app_dir = os.path.abspath(path) if path else None
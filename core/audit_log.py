@@ -0,0 +1,163 @@
+import hashlib
+import os
+import threading
+import time
+
+from core.app_paths import app_dir
+from core.command_metrics import CommandRecord
+
+# 记录类型
+KIND_COMMAND = 'command'
+KIND_CONFIG = 'config'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS audit (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    user TEXT,
+    host TEXT,
+    kind TEXT NOT NULL,
+    service_id TEXT,
+    action TEXT NOT NULL,
+    result TEXT,
+    returncode INTEGER,
+    duration REAL,
+    previous_hash TEXT,
+    config_hash TEXT,
+    detail TEXT
+);
+CREATE INDEX IF NOT EXISTS audit_ts ON audit (ts);
+CREATE INDEX IF NOT EXISTS audit_service_ts ON audit (service_id, ts);
+CREATE INDEX IF NOT EXISTS audit_service_action_ts ON audit (service_id, action, ts);
+CREATE INDEX IF NOT EXISTS audit_action_ts ON audit (action, ts);
+CREATE INDEX IF NOT EXISTS audit_result_ts ON audit (result, ts);
+CREATE TRIGGER IF NOT EXISTS audit_no_update BEFORE UPDATE ON audit
+BEGIN SELECT RAISE(ABORT, 'audit log is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS audit_no_delete BEFORE DELETE ON audit
+BEGIN SELECT RAISE(ABORT, 'audit log is append-only'); END;
+"""
+
+COLUMNS = ('id', 'ts', 'user', 'host', 'kind', 'service_id', 'action', 'result', 'returncode', 'duration',
+           'previous_hash', 'config_hash', 'detail')
+
+
+def default_audit_path():
+    """审计数据库的默认位置：程序目录下的 audit/audit.db。"""
+    return os.path.join(app_dir(), "audit", "audit.db")
+
+
+def file_hash(path):
+    """返回文件内容的 sha256，文件不存在时返回 None。"""
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+class AuditLog:
+    """
+    只追加的审计日志，保存在 SQLite 数据库（WAL 模式）中，记录所有 WinSW 命令和配置文件的保存与删除。
+    配置记录包含修改前后文件内容的 sha256，可以据此判断两次修改之间配置是否被改动过。
+    按服务、操作、结果和时间都有索引，一年、数百个服务的记录也能在毫秒级内查询。
+    数据库在第一次使用时才打开，可以在任意线程中调用。
+    """
+
+    def __init__(self, path=None):
+        self.path = path or default_audit_path()
+        self.user = None
+        self.host = None
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        # sqlite3 等模块只在第一次读写时导入，不影响命令行工具的启动速度
+        import getpass
+        import socket
+        import sqlite3
+
+        if self._connection is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(_SCHEMA)
+            self._connection = connection
+            self.user = getpass.getuser()
+            self.host = socket.gethostname()
+        return self._connection
+
+    def _append(self, **values):
+        import sqlite3
+
+        values.setdefault('ts', time.time())
+        try:
+            with self._lock:
+                connection = self._connect()
+                values.setdefault('user', self.user)
+                values.setdefault('host', self.host)
+                names = ', '.join(values)
+                placeholders = ', '.join('?' for _ in values)
+                with connection:
+                    connection.execute(f"INSERT INTO audit ({names}) VALUES ({placeholders})", list(values.values()))
+        except (sqlite3.Error, OSError) as e:
+            print(f"警告: 无法写入审计日志 {self.path}: {e}")
+
+    def record_command(self, command, result):
+        """记录一条已执行的 WinSW 命令（CommandResult）。"""
+        record = CommandRecord.from_result(command, result)
+        detail = None if result.error is None else str(result.error)
+        self._append(ts=record.finished_at or time.time(), kind=KIND_COMMAND, service_id=record.service_id,
+                     action=command, result=record.status, returncode=record.returncode, duration=record.duration,
+                     detail=detail)
+
+    def record_config(self, action, service_id, previous_hash, config_hash, detail=None):
+        """记录一次配置文件的保存或删除。"""
+        self._append(kind=KIND_CONFIG, service_id=service_id, action=action, result='ok',
+                     previous_hash=previous_hash, config_hash=config_hash, detail=detail)
+
+    def query(self, service_id=None, action=None, result=None, since=None, until=None, kind=None,
+              limit=1000) -> list:
+        """按条件查询，按时间倒序返回最多 limit 条记录（字典）。since/until 为时间戳。"""
+        conditions, params = [], []
+        for column, value in (('service_id', service_id), ('action', action), ('result', result), ('kind', kind)):
+            if value:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            conditions.append("ts >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("ts < ?")
+            params.append(until)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        sql = f"SELECT {', '.join(COLUMNS)} FROM audit {where} ORDER BY ts DESC LIMIT ?"
+        with self._lock:
+            rows = self._connect().execute(sql, params + [limit]).fetchall()
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+    def distinct(self, column) -> list:
+        """返回某一列（service_id 或 action）出现过的所有值，用于筛选下拉框。"""
+        if column not in ('service_id', 'action', 'result'):
+            raise ValueError(f"不支持的列: {column}")
+        # 逐个跳到下一个不同的值，只访问索引中的少数几页，比 SELECT DISTINCT 扫描整张表快得多
+        index_hint = {'service_id': 'audit_service_ts', 'action': 'audit_action_ts', 'result': 'audit_result_ts'}
+        values = []
+        with self._lock:
+            connection = self._connect()
+            sql = (f"SELECT {column} FROM audit INDEXED BY {index_hint[column]} "
+                   f"WHERE {column} > ? ORDER BY {column} LIMIT 1")
+            value = ''
+            while True:
+                row = connection.execute(sql, (value,)).fetchone()
+                if row is None:
+                    break
+                value = row[0]
+                values.append(value)
+        return values
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
@@ -0,0 +1,300 @@
+import csv
+import json
+import math
+import os
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+# 记录的结果类型
+OK = 'ok'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+TIMED_OUT = 'timeout'
+ERROR = 'error'
+
+
+class CommandRecord:
+    """
+    一次 WinSW 调用的耗时记录。时间均为 time.time() 的时间戳：
+    submitted_at 为提交时间，started_at 为启动子进程的时间，finished_at 为子进程退出的时间。
+    提交到启动之间是排队和准备（解析、下载或部署 WinSW）的时间，启动到退出之间才是 WinSW 本身的耗时。
+    """
+
+    FIELDS = ('service_id', 'command', 'submitted_at', 'started_at', 'finished_at', 'returncode',
+              'stdout_bytes', 'stderr_bytes', 'status')
+
+    def __init__(self, service_id, command, submitted_at=None, started_at=None, finished_at=None, returncode=None,
+                 stdout_bytes=0, stderr_bytes=0, status=OK):
+        self.service_id = service_id
+        self.command = command
+        self.submitted_at = submitted_at
+        self.started_at = started_at
+        self.finished_at = finished_at
+        self.returncode = returncode
+        self.stdout_bytes = stdout_bytes
+        self.stderr_bytes = stderr_bytes
+        self.status = status
+
+    @classmethod
+    def from_result(cls, command, result):
+        """从 CommandResult 生成记录。"""
+        if result.error is not None:
+            status = ERROR
+        elif result.cancelled:
+            status = CANCELLED
+        elif result.timed_out:
+            status = TIMED_OUT
+        else:
+            status = OK if result.returncode == 0 else FAILED
+        return cls(result.service_id, command, getattr(result, 'submitted_at', None), result.started_at,
+                   result.finished_at, result.returncode,
+                   len((result.stdout or '').encode('utf-8', 'replace')),
+                   len((result.stderr or '').encode('utf-8', 'replace')), status)
+
+    @property
+    def duration(self):
+        """WinSW 进程的运行时间（秒）。"""
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+    @property
+    def wait_time(self):
+        """从提交到启动进程的时间（秒）。"""
+        if self.submitted_at is None or self.started_at is None:
+            return None
+        return self.started_at - self.submitted_at
+
+    def to_dict(self) -> dict:
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(**{field: data.get(field) for field in cls.FIELDS})
+
+
+def percentile(sorted_values, fraction):
+    """最近秩法求百分位数，sorted_values 必须已排序且非空。"""
+    index = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(records) -> dict:
+    """按命令类型统计 {命令: {'count', 'failures', 'p50', 'p95', 'max'}}，耗时单位为秒。"""
+    durations = {}
+    failures = {}
+    for record in records:
+        durations.setdefault(record.command, [])
+        failures.setdefault(record.command, 0)
+        if record.status != OK:
+            failures[record.command] += 1
+        if record.duration is not None:
+            durations[record.command].append(record.duration)
+
+    summary = {}
+    for command, values in durations.items():
+        values.sort()
+        summary[command] = {
+            'count': len(values),
+            'failures': failures[command],
+            'p50': percentile(values, 0.5) if values else None,
+            'p95': percentile(values, 0.95) if values else None,
+            'max': values[-1] if values else None,
+        }
+    return summary
+
+
+@contextmanager
+def _file_lock(path):
+    """
+    在 <path>.lock 上加跨进程的排他锁：GUI、CLI 和守护进程会同时追加和压缩同一个文件。
+    锁文件无法创建时（例如目录只读）不加锁照常执行。
+    """
+    try:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        lock_file = open(f"{path}.lock", 'a+b')
+    except OSError:
+        yield
+        return
+    try:
+        if os.name == 'nt':
+            import msvcrt
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            yield  # 关闭文件时释放锁
+    finally:
+        lock_file.close()
+
+
+class CommandMetrics:
+    """
+    命令耗时的环形缓冲区，最多在内存中保留 capacity 条记录。
+    每条记录同时以 JSON 行追加到 path 中；历史记录在第一次读取或记录时才从文件加载，
+    文件行数超过 capacity 的两倍时会被压缩为文件中最近的 capacity 条（包括其他进程追加的记录），
+    追加和压缩都在跨进程的文件锁内进行。
+    另外按服务和命令累计本进程中记录的次数、耗时总和和失败次数，它们不受环形缓冲区淘汰的影响，
+    用作 Prometheus 中单调递增的计数。
+    """
+
+    def __init__(self, path=None, capacity=2000):
+        self.path = path
+        self.capacity = capacity
+        self._records = deque(maxlen=capacity)
+        self._loaded = path is None
+        self._file_lines = 0  # 文件中的行数，加载后才准确
+        self._totals = {}  # {(服务ID, 命令): [有耗时的次数, 耗时总和, 失败次数]}
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """注册 callback(record)，每条新记录在记录它的线程中回调。"""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def record(self, command, result) -> CommandRecord:
+        """记录一条 CommandResult。"""
+        record = CommandRecord.from_result(command, result)
+        line = json.dumps(record.to_dict(), ensure_ascii=False, separators=(',', ':')) + '\n'
+        with self._lock:
+            # 先加载历史，才能知道文件有多少行，需要时在这里压缩，文件不会无限增长
+            if not self._loaded:
+                self._load()
+            self._records.append(record)
+            totals = self._totals.setdefault((record.service_id, record.command), [0, 0.0, 0])
+            if record.duration is not None:
+                totals[0] += 1
+                totals[1] += record.duration
+            if record.status != OK:
+                totals[2] += 1
+            if self.path:
+                try:
+                    with _file_lock(self.path):
+                        with open(self.path, 'a', encoding='utf-8') as f:
+                            f.write(line)
+                        self._file_lines += 1
+                        if self._file_lines > self.capacity * 2:
+                            self._compact()
+                except OSError as e:
+                    print(f"警告: 无法写入命令耗时记录 {self.path}: {e}")
+        for callback in list(self._listeners):
+            callback(record)
+        return record
+
+    def records(self, service_id=None) -> list:
+        """按时间顺序返回记录，可只返回某个服务的记录。"""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            records = list(self._records)
+        if service_id is not None:
+            records = [record for record in records if record.service_id == service_id]
+        return records
+
+    def summary(self, service_id=None) -> dict:
+        return summarize(self.records(service_id))
+
+    def _load(self):
+        """从文件加载最近的 capacity 条记录。"""
+        self._loaded = True
+        try:
+            with _file_lock(self.path):
+                with open(self.path, encoding='utf-8') as f:
+                    lines = deque(f, maxlen=self.capacity * 2 + 1)
+                self._file_lines = len(lines)
+                if len(lines) > self.capacity * 2:
+                    self._compact()
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            print(f"警告: 无法读取命令耗时记录 {self.path}: {e}")
+            return
+
+        for line in lines:
+            try:
+                self._records.append(CommandRecord.from_dict(json.loads(line)))
+            except (ValueError, TypeError):
+                continue
+
+    def _compact(self):
+        """
+        在文件锁内调用：重新读取文件末尾的 capacity 行写入临时文件后原子替换。
+        以文件而不是本进程的环形缓冲区为准，其他进程追加的记录不会丢失。
+        """
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                lines = deque(f, maxlen=self.capacity)
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.writelines(lines)
+            os.replace(temp_path, self.path)
+            self._file_lines = len(lines)
+        except OSError as e:
+            print(f"警告: 无法压缩命令耗时记录 {self.path}: {e}")
+
+    # --- 导出 ---
+
+    def export(self, path, service_id=None):
+        """按扩展名导出：.csv 为表格，.prom/.txt 为 Prometheus 文本格式，其他为 JSON 行。"""
+        records = self.records(service_id)
+        extension = os.path.splitext(path)[1].lower()
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            if extension == '.csv':
+                writer = csv.writer(f)
+                writer.writerow(CommandRecord.FIELDS + ('duration', 'wait_time'))
+                for record in records:
+                    writer.writerow([getattr(record, field) for field in CommandRecord.FIELDS] +
+                                    [record.duration, record.wait_time])
+            elif extension in ('.prom', '.txt'):
+                f.write(self.to_prometheus(service_id))
+            else:
+                for record in records:
+                    f.write(json.dumps(record.to_dict(), ensure_ascii=False) + '\n')
+
+    def to_prometheus(self, service_id=None) -> str:
+        """
+        以 Prometheus 文本格式输出每个服务、每种命令的耗时分位数、次数、耗时总和和失败次数。
+        分位数取自环形缓冲区中最近的记录；_count、_sum 和失败次数为本进程中的累计值，只增不减。
+        """
+        records = self.records(service_id)
+        with self._lock:
+            totals = {key: list(value) for key, value in self._totals.items()
+                      if service_id is None or key[0] == service_id}
+        by_key = {}
+        for record in records:
+            by_key.setdefault((record.service_id, record.command), []).append(record)
+
+        # 同一指标族的样本必须连续输出：先输出全部耗时样本，再输出失败次数
+        keys = sorted(set(by_key) | set(totals))
+        labels = {key: f'service="{_escape_label(key[0])}",command="{_escape_label(key[1])}"' for key in keys}
+        lines = ["# HELP winsw_command_duration_seconds WinSW process run time per service and command.",
+                 "# TYPE winsw_command_duration_seconds summary"]
+        for key in keys:
+            stats = summarize(by_key.get(key, [])).get(key[1], {})
+            count, duration_sum, _ = totals.get(key, (0, 0.0, 0))
+            for quantile, name in (('0.5', 'p50'), ('0.95', 'p95')):
+                if stats.get(name) is not None:
+                    lines.append(f'winsw_command_duration_seconds{{{labels[key]},quantile="{quantile}"}} '
+                                 f'{stats[name]:.6f}')
+            lines.append(f"winsw_command_duration_seconds_sum{{{labels[key]}}} {duration_sum:.6f}")
+            lines.append(f"winsw_command_duration_seconds_count{{{labels[key]}}} {count}")
+        lines += ["# HELP winsw_command_failures_total WinSW invocations that did not exit with code 0.",
+                  "# TYPE winsw_command_failures_total counter"]
+        for key in keys:
+            lines.append(f"winsw_command_failures_total{{{labels[key]}}} {totals.get(key, (0, 0.0, 0))[2]}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -0,0 +1,220 @@
+import subprocess
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Windows下隐藏子进程控制台窗口；在其他平台上该常量不存在，使用0即可
+CREATE_NO_WINDOW = getattr(subprocess, 'CREATE_NO_WINDOW', 0)
+
+
+class CommandResult:
+    """一次命令执行的结果。"""
+
+    def __init__(self, service_id, command_parts):
+        self.service_id = service_id
+        self.command_parts = command_parts
+        self.returncode = None
+        self.stdout = ''
+        self.stderr = ''
+        self.submitted_at = None  # 提交时间；到 started_at 之间为排队和准备的时间
+        self.started_at = None
+        self.finished_at = None
+        self.cancelled = False
+        self.timed_out = False
+        self.error = None
+
+    @property
+    def output(self) -> str:
+        """合并后的标准输出和错误输出，与旧版 _run_command 的返回值保持一致。"""
+        if self.error is not None:
+            return f"Error running command: {self.error}"
+        return self.stdout + self.stderr
+
+    @property
+    def duration(self):
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and not self.cancelled and not self.timed_out and self.error is None
+
+
+class _CommandTask:
+    """排队中或正在运行的命令。"""
+
+    def __init__(self, service_id, command_parts, output_callback, timeout):
+        self.service_id = service_id
+        self.command_parts = command_parts
+        self.output_callback = output_callback
+        self.timeout = timeout
+        self.submitted_at = time.time()
+        self.future = Future()
+        self.cancel_event = threading.Event()
+        self.process = None
+
+
+class CommandRunner:
+    """
+    在后台线程池中执行WinSW命令。
+    - 每次提交返回一个 Future，结果为 CommandResult。
+    - 同一服务的命令严格按提交顺序串行执行，不同服务之间并行。
+    - 输出按行通过 output_callback(stream, line) 实时回传（在工作线程中调用）。
+    - 支持超时和取消（会终止正在运行的子进程）。
+    """
+
+    POLL_INTERVAL = 0.1
+
+    def __init__(self, max_workers=4):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='winsw-cmd')
+        self._lock = threading.Lock()
+        self._service_queues = {}  # service_id -> deque[_CommandTask]，队首为正在执行的任务
+        self._tasks = {}  # Future -> _CommandTask
+
+    def submit(self, service_id, command_parts, output_callback=None, timeout=None) -> Future:
+        """
+        提交一条命令。command_parts 可以是参数列表，也可以是一个在工作线程中调用、
+        返回参数列表（或None表示放弃执行）的函数，便于把耗时的准备工作移出UI线程。
+        """
+        task = _CommandTask(service_id, command_parts, output_callback, timeout)
+        with self._lock:
+            self._tasks[task.future] = task
+            queue = self._service_queues.setdefault(service_id, deque())
+            queue.append(task)
+            should_dispatch = len(queue) == 1
+        if should_dispatch:
+            self._dispatch(task)
+        return task.future
+
+    def cancel(self, future) -> bool:
+        """取消一条命令：排队中的直接取消，运行中的终止其子进程。"""
+        with self._lock:
+            task = self._tasks.get(future)
+        if task is None:
+            return False
+        if future.cancel():
+            return True
+        task.cancel_event.set()
+        process = task.process
+        if process is not None and process.poll() is None:
+            process.kill()
+        return not future.done()
+
+    def is_busy(self, service_id) -> bool:
+        """指定服务当前是否有命令在运行或排队。"""
+        with self._lock:
+            return bool(self._service_queues.get(service_id))
+
+    def shutdown(self, cancel_pending=True):
+        """关闭线程池。排队中的命令被取消，正在运行的命令会执行完毕，不会被强行终止。"""
+        if cancel_pending:
+            with self._lock:
+                futures = list(self._tasks)
+            for future in futures:
+                future.cancel()
+        self._executor.shutdown(wait=False)
+
+    def _dispatch(self, task):
+        try:
+            self._executor.submit(self._run_task, task)
+        except RuntimeError as e:
+            # 线程池已关闭
+            if task.future.set_running_or_notify_cancel():
+                task.future.set_exception(e)
+            self._finish(task)
+
+    def _finish(self, task):
+        """任务结束后从服务队列中移除，并调度该服务的下一条命令。"""
+        next_task = None
+        with self._lock:
+            self._tasks.pop(task.future, None)
+            queue = self._service_queues.get(task.service_id)
+            if queue and queue[0] is task:
+                queue.popleft()
+            if queue:
+                next_task = queue[0]
+            else:
+                self._service_queues.pop(task.service_id, None)
+        if next_task is not None:
+            self._dispatch(next_task)
+
+    def _run_task(self, task):
+        try:
+            if not task.future.set_running_or_notify_cancel():
+                return
+            try:
+                task.future.set_result(self._run_process(task))
+            except BaseException as e:
+                task.future.set_exception(e)
+        finally:
+            self._finish(task)
+
+    def _run_process(self, task) -> CommandResult:
+        command_parts = task.command_parts
+        if callable(command_parts):
+            command_parts = command_parts()
+        result = CommandResult(task.service_id, command_parts)
+        result.submitted_at = task.submitted_at
+        if not command_parts:
+            result.error = "命令准备失败"
+            return result
+        if task.cancel_event.is_set():
+            result.cancelled = True
+            return result
+
+        result.started_at = time.time()
+        try:
+            task.process = subprocess.Popen(
+                command_parts, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                text=True, encoding='utf-8', errors='replace', creationflags=CREATE_NO_WINDOW
+            )
+        except OSError as e:
+            result.error = e
+            result.finished_at = time.time()
+            return result
+
+        stdout_lines, stderr_lines = [], []
+        readers = [
+            threading.Thread(target=self._pump, args=(task, task.process.stdout, 'stdout', stdout_lines), daemon=True),
+            threading.Thread(target=self._pump, args=(task, task.process.stderr, 'stderr', stderr_lines), daemon=True),
+        ]
+        for reader in readers:
+            reader.start()
+
+        deadline = None if task.timeout is None else time.monotonic() + task.timeout
+        while True:
+            try:
+                task.process.wait(timeout=self.POLL_INTERVAL)
+                break
+            except subprocess.TimeoutExpired:
+                pass
+            if task.cancel_event.is_set():
+                result.cancelled = True
+                task.process.kill()
+            elif deadline is not None and time.monotonic() >= deadline:
+                result.timed_out = True
+                task.process.kill()
+
+        for reader in readers:
+            reader.join()
+        result.finished_at = time.time()
+        result.returncode = task.process.returncode
+        result.stdout = ''.join(stdout_lines)
+        result.stderr = ''.join(stderr_lines)
+        if task.cancel_event.is_set():
+            result.cancelled = True
+        return result
+
+    @staticmethod
+    def _pump(task, stream, stream_name, sink):
+        """逐行读取子进程输出，收集并回传。"""
+        with stream:
+            for line in stream:
+                sink.append(line)
+                if task.output_callback:
+                    try:
+                        task.output_callback(stream_name, line)
+                    except Exception:
+                        pass
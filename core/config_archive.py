@@ -0,0 +1,280 @@
+import io
+import os
+import tarfile
+import xml.etree.ElementTree as ET
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from core.config_manager import check_service_id
+from core.log_paths import resolve_log_paths
+from core.xml_document import ServiceDocument, parse_element_tree
+
+# 导入结果
+IMPORTED = '导入'
+OVERWRITTEN = '覆盖'
+SKIPPED = '跳过'
+CONFLICT = '冲突'
+INVALID = '无效'
+
+
+class ImportResult:
+    """批量导入中单个XML文件的处理结果。"""
+
+    def __init__(self, source, service_id=None, status=INVALID, message=''):
+        self.source = source  # 目录中的相对路径或压缩包中的成员名
+        self.service_id = service_id
+        self.status = status
+        self.message = message
+        self.data = None  # 校验通过的原始文件内容
+
+    @property
+    def filename(self):
+        return f"{self.service_id}.xml" if self.service_id else None
+
+
+def _is_tar(path):
+    try:
+        return tarfile.is_tarfile(path)
+    except OSError:
+        return False
+
+
+def read_sources(path) -> list:
+    """
+    列出待导入的XML文件，返回 [(来源名称, 读取函数)]。
+    path 可以是目录（递归查找）、zip 或 tar（含 .tar.gz / .tar.bz2 / .tar.xz）压缩包。
+    目录中的文件在工作线程中读取；压缩包不支持并发读取，成员内容在这里依次读出。
+    """
+    if os.path.isdir(path):
+        sources = []
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                if filename.lower().endswith(".xml"):
+                    file_path = os.path.join(dirpath, filename)
+
+                    def load(file_path=file_path):
+                        with open(file_path, "rb") as f:
+                            return f.read()
+
+                    sources.append((os.path.relpath(file_path, path), load))
+        return sources
+
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            return [(info.filename, lambda data=archive.read(info): data) for info in archive.infolist()
+                    if not info.is_dir() and info.filename.lower().endswith(".xml")]
+
+    if _is_tar(path):
+        sources = []
+        with tarfile.open(path) as archive:
+            for member in archive:
+                if member.isfile() and member.name.lower().endswith(".xml"):
+                    data = archive.extractfile(member).read()
+                    sources.append((member.name, lambda data=data: data))
+        return sources
+
+    raise ValueError(f"不支持的导入来源: {path}")
+
+
+class ConfigArchive:
+    """
+    服务配置的批量导入和导出。
+    - 导入：并发读取和校验所有XML，检测服务ID冲突后把原始内容写入 services 目录，返回每个文件的结果；
+    - 导出：把 services 下的所有配置（可选附带当前日志）以流的方式直接写入一个 zip 或 tar.gz 压缩包，
+      不在磁盘上暂存副本。
+    """
+
+    def __init__(self, config_manager, service_dir="services", max_workers=8):
+        self.config_manager = config_manager
+        self.service_dir = service_dir
+        self.max_workers = max_workers
+
+    # --- 导入 ---
+
+    def _validate(self, source, load) -> ImportResult:
+        result = ImportResult(source)
+        try:
+            data = load()
+            document = ServiceDocument(self.config_manager, parse_element_tree(io.BytesIO(data)))
+        except (OSError, ET.ParseError) as e:
+            result.message = f"无法解析: {e}"
+            return result
+        if document.root.tag != 'service':
+            result.message = f"根元素应为 <service>，实际为 <{document.root.tag}>"
+            return result
+        service_id = document.to_config().get('id')
+        error = check_service_id(service_id)
+        if error:
+            result.message = error
+            return result
+        result.service_id = service_id
+        result.status = IMPORTED
+        result.data = data
+        return result
+
+    def _existing_ids(self, executor) -> dict:
+        """返回 {小写服务ID: 文件名}，Windows 服务名不区分大小写。"""
+        try:
+            filenames = sorted(f for f in os.listdir(self.service_dir) if f.endswith(".xml"))
+        except FileNotFoundError:
+            return {}
+        configs = executor.map(lambda name: self.config_manager.load_from_xml(os.path.join(self.service_dir, name)),
+                               filenames)
+        return {(config.get('id') or os.path.splitext(filename)[0]).lower(): filename
+                for filename, config in zip(filenames, configs)}
+
+    def _write(self, result: ImportResult) -> ImportResult:
+        dest_path = os.path.join(self.service_dir, result.filename)
+        try:
+            self.config_manager.save_xml_bytes(result.data, dest_path, detail=f"导入自 {result.source}")
+        except OSError as e:
+            result.status = INVALID
+            result.message = f"写入失败: {e}"
+        result.data = None
+        return result
+
+    def import_from(self, path, overwrite=False) -> list:
+        """
+        从目录或压缩包批量导入，返回按来源排序的 ImportResult 列表。
+        - 同一批中ID重复的文件全部标记为冲突；
+        - 与已有服务ID相同时，overwrite 为 True 则覆盖，否则跳过；
+        - 已有服务的文件名与其ID不一致时无法安全覆盖，标记为冲突。
+        """
+        sources = read_sources(path)
+        os.makedirs(self.service_dir, exist_ok=True)
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='config-import') as executor:
+            results = list(executor.map(lambda source: self._validate(*source), sources))
+
+            by_id = {}
+            for result in results:
+                if result.service_id:
+                    by_id.setdefault(result.service_id.lower(), []).append(result)
+            existing = self._existing_ids(executor)
+
+            to_write = []
+            for key, group in by_id.items():
+                if len(group) > 1:
+                    others = ", ".join(r.source for r in group)
+                    for result in group:
+                        result.status, result.message = CONFLICT, f"ID重复: {others}"
+                    continue
+                result = group[0]
+                existing_filename = existing.get(key)
+                if existing_filename is None:
+                    to_write.append(result)
+                elif existing_filename != result.filename:
+                    result.status = CONFLICT
+                    result.message = f"已被 {existing_filename} 使用"
+                elif overwrite:
+                    result.status, result.message = OVERWRITTEN, f"覆盖 {existing_filename}"
+                    to_write.append(result)
+                else:
+                    result.status, result.message = SKIPPED, f"{existing_filename} 已存在"
+
+            list(executor.map(self._write, to_write))
+
+        for result in results:
+            result.data = None
+        return sorted(results, key=lambda r: r.source)
+
+    # --- 导出 ---
+
+    def export_to(self, path, include_logs=False, progress_callback=None) -> int:
+        """
+        导出所有配置到 path（.zip，或 .tar.gz/.tgz），include_logs 为 True 时同时导出每个服务的当前日志。
+        正在写入的日志只导出开始时的长度，保证内容一致。返回写入的文件数量。
+        """
+        entries = []  # (压缩包中的名称, 文件路径)
+        try:
+            filenames = sorted(f for f in os.listdir(self.service_dir) if f.endswith(".xml"))
+        except FileNotFoundError:
+            filenames = []
+        for filename in filenames:
+            file_path = os.path.join(self.service_dir, filename)
+            entries.append((f"services/{filename}", file_path))
+            if include_logs:
+                config = self.config_manager.load_from_xml(file_path)
+                for log_path in resolve_log_paths(config).values():
+                    if os.path.isfile(log_path):
+                        entries.append((f"logs/{config['id']}/{os.path.basename(log_path)}", log_path))
+
+        lower = path.lower()
+        if lower.endswith(".tar.gz") or lower.endswith(".tgz"):
+            writer = self._export_tar
+        else:
+            writer = self._export_zip
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            count = writer(temp_path, entries, progress_callback)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return count
+
+    @staticmethod
+    def _copy_limited(src, dest, size, chunk_size=1024 * 1024):
+        while size > 0:
+            chunk = src.read(min(chunk_size, size))
+            if not chunk:
+                break
+            dest.write(chunk)
+            size -= len(chunk)
+
+    def _export_zip(self, path, entries, progress_callback) -> int:
+        count = 0
+        with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED, allowZip64=True) as archive:
+            for arcname, file_path in entries:
+                try:
+                    with open(file_path, "rb") as src:
+                        stat = os.fstat(src.fileno())
+                        info = zipfile.ZipInfo.from_file(file_path, arcname)
+                        info.compress_type = zipfile.ZIP_DEFLATED
+                        info.file_size = stat.st_size
+                        with archive.open(info, "w", force_zip64=stat.st_size >= zipfile.ZIP64_LIMIT) as dest:
+                            self._copy_limited(src, dest, stat.st_size)
+                except OSError as e:
+                    print(f"警告: 无法导出 {file_path}: {e}")
+                    continue
+                count += 1
+                if progress_callback:
+                    progress_callback(arcname)
+        return count
+
+    def _export_tar(self, path, entries, progress_callback) -> int:
+        count = 0
+        with tarfile.open(path, "w:gz") as archive:
+            for arcname, file_path in entries:
+                try:
+                    with open(file_path, "rb") as src:
+                        info = archive.gettarinfo(arcname=arcname, fileobj=src)
+                        # tar 头中的长度必须与内容一致，只读取开始时的长度
+                        archive.addfile(info, io.BufferedReader(_LimitedReader(src, info.size)))
+                except OSError as e:
+                    print(f"警告: 无法导出 {file_path}: {e}")
+                    continue
+                count += 1
+                if progress_callback:
+                    progress_callback(arcname)
+        return count
+
+
+class _LimitedReader(io.RawIOBase):
+    """最多读取 size 字节的只读文件包装。"""
+
+    def __init__(self, file, size):
+        self.file = file
+        self.remaining = size
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self.remaining <= 0:
+            return 0
+        data = self.file.read(min(len(buffer), self.remaining))
+        buffer[:len(data)] = data
+        self.remaining -= len(data)
+        return len(data)
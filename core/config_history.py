@@ -0,0 +1,187 @@
+import gzip
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+import xml.etree.ElementTree as ET
+
+from core.xml_document import parse_element_tree
+
+HISTORY_DIR_NAME = ".history"
+
+# 版本的来源
+SAVE = 'save'
+DELETE = 'delete'
+ROLLBACK = 'rollback'
+EXTERNAL = 'external'  # 保存前发现文件被其他程序修改过，先记录下修改后的内容
+
+# 比较时使用真实值，显示时隐藏的配置项
+SECRET_KEYS = ('serviceaccount.password',)
+MASK = '******'
+
+
+class ConfigVersion:
+    """某个服务配置的一个历史版本。number 从 1 开始按时间递增。"""
+
+    def __init__(self, service_id, number, sha256, timestamp, action, size):
+        self.service_id = service_id
+        self.number = number
+        self.sha256 = sha256
+        self.timestamp = timestamp
+        self.action = action
+        self.size = size
+
+
+def flatten_config(config: dict) -> dict:
+    """
+    把配置字典展开为 {路径: 值}，便于逐项比较。
+    环境变量按名称、依赖按服务名展开，与顺序无关；失败操作保持顺序。
+    密码等敏感项保留真实值以便比较，显示前需用 mask_secret() 隐藏。
+    """
+    flat = {}
+    for key, value in config.items():
+        if key == 'environments':
+            for env in value:
+                flat[f"env.{env.get('name', '')}"] = env.get('value', '')
+        elif key == 'depend':
+            for dependency in value:
+                flat[f"depend.{dependency}"] = True
+        elif key == 'onfailure':
+            for index, item in enumerate(value, 1):
+                flat[f"onfailure[{index}]"] = f"{item.get('action', '')} {item.get('delay', '')}".strip()
+        elif key == 'serviceaccount':
+            for name, item in (value or {}).items():
+                flat[f"serviceaccount.{name}"] = item
+        elif value not in ('', None, False):
+            flat[key] = value
+    return flat
+
+
+def mask_secret(key, value):
+    """隐藏敏感配置项的值，空值保持不变。"""
+    return MASK if key in SECRET_KEYS and value else value
+
+
+class ConfigHistory:
+    """
+    services 目录下配置文件的版本库，保存在 services/.history 中：
+    - objects/<sha256前两位>/<sha256>.xml.gz：按内容寻址的 gzip 压缩快照，相同内容只保存一份；
+    - index/<服务ID>.jsonl：每个服务的版本列表，每行一个版本。
+    与上一个版本内容相同（sha256 相同）时不会产生新版本。删除配置时也记录一个版本，因此删除可以撤销。
+    """
+
+    def __init__(self, service_dir="services"):
+        self.service_dir = service_dir
+        self.root = os.path.join(service_dir, HISTORY_DIR_NAME)
+        self.objects_dir = os.path.join(self.root, "objects")
+        self.index_dir = os.path.join(self.root, "index")
+        self._lock = threading.Lock()
+
+    # --- 写入 ---
+
+    def _object_path(self, sha256):
+        return os.path.join(self.objects_dir, sha256[:2], f"{sha256}.xml.gz")
+
+    def _index_path(self, service_id):
+        return os.path.join(self.index_dir, f"{service_id}.jsonl")
+
+    def record(self, service_id, data: bytes, action=SAVE, sha256=None):
+        """记录一个版本，返回 ConfigVersion；与最新版本内容相同时不记录，返回 None。"""
+        sha256 = sha256 or hashlib.sha256(data).hexdigest()
+        with self._lock:
+            versions = self._read_index(service_id)
+            latest = versions[-1] if versions else None
+            if latest is not None and latest.sha256 == sha256 and latest.action != DELETE and action != DELETE:
+                return None
+
+            object_path = self._object_path(sha256)
+            if not os.path.exists(object_path):
+                os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                temp_path = f"{object_path}.{os.getpid()}.tmp"
+                with open(temp_path, 'wb') as f:
+                    # mtime 固定为 0，相同内容的压缩结果也完全相同
+                    f.write(gzip.compress(data, compresslevel=9, mtime=0))
+                os.replace(temp_path, object_path)
+
+            version = ConfigVersion(service_id, len(versions) + 1, sha256, time.time(), action, len(data))
+            os.makedirs(self.index_dir, exist_ok=True)
+            entry = {'ts': version.timestamp, 'sha256': sha256, 'action': action, 'size': version.size}
+            with open(self._index_path(service_id), 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + '\n')
+            return version
+
+    # --- 读取 ---
+
+    def _read_index(self, service_id) -> list:
+        try:
+            with open(self._index_path(service_id), encoding='utf-8') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return []
+        versions = []
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            versions.append(ConfigVersion(service_id, len(versions) + 1, entry['sha256'], entry['ts'],
+                                          entry.get('action', SAVE), entry.get('size')))
+        return versions
+
+    def versions(self, service_id) -> list:
+        """返回服务的所有版本，按时间从旧到新排列。"""
+        with self._lock:
+            return self._read_index(service_id)
+
+    def latest(self, service_id):
+        versions = self.versions(service_id)
+        return versions[-1] if versions else None
+
+    def services(self) -> list:
+        """返回所有有历史记录的服务ID（包括已删除的服务）。"""
+        try:
+            return sorted(os.path.splitext(name)[0] for name in os.listdir(self.index_dir) if name.endswith('.jsonl'))
+        except FileNotFoundError:
+            return []
+
+    def is_deleted(self, service_id) -> bool:
+        latest = self.latest(service_id)
+        return latest is not None and latest.action == DELETE
+
+    def read(self, sha256) -> bytes:
+        """读取某个版本的内容，文件缺失时抛出 OSError。"""
+        with open(self._object_path(sha256), 'rb') as f:
+            return gzip.decompress(f.read())
+
+    # --- 比较 ---
+
+    @staticmethod
+    def _load_config(config_manager, data: bytes) -> dict:
+        return config_manager._from_xml_root(parse_element_tree(io.BytesIO(data)))
+
+    def diff(self, config_manager, old_data: bytes, new_data: bytes) -> list:
+        """
+        比较两个版本解析后的配置，返回 [(配置项, 旧值, 新值)]，只包含有变化的项。
+        不在界面支持范围内的元素和注释以 '(其他元素)' 一项表示是否有变化。
+        """
+        try:
+            old_config = flatten_config(self._load_config(config_manager, old_data))
+            new_config = flatten_config(self._load_config(config_manager, new_data))
+        except ET.ParseError as e:
+            return [('(XML无法解析)', '', str(e))]
+
+        changes = []
+        for key in sorted(set(old_config) | set(new_config)):
+            old_value, new_value = old_config.get(key), new_config.get(key)
+            if old_value == new_value:
+                continue
+            old_value, new_value = mask_secret(key, old_value), mask_secret(key, new_value)
+            if old_value == new_value:
+                # 两个密码都被隐藏后看起来相同，需要注明已修改
+                new_value = f"{MASK}（已修改）"
+            changes.append((key, old_value, new_value))
+        if not changes and old_data != new_data:
+            changes.append(('(其他元素)', '', '内容不同，解析后的配置相同（例如注释或界面不支持的元素）'))
+        return changes
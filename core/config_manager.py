@@ -1,6 +1,36 @@
+import hashlib
+import io
 import os
+import re
 import xml.etree.ElementTree as ET
-from xml.dom import minidom
+
+from core.config_history import DELETE, EXTERNAL, ROLLBACK
+from core.xml_document import ServiceDocument
+from core.xml_writer import write_pretty_xml
+
+# 服务ID会作为文件名使用，不能包含 Windows 文件名中的非法字符
+_INVALID_ID_RE = re.compile(r'[\\/:*?"<>|\x00-\x1f]')
+
+
+def check_service_id(service_id):
+    """检查服务ID能否安全地用作 services 下的文件名，不能时返回错误说明，否则返回 None。"""
+    if not service_id:
+        return "缺少服务ID"
+    if _INVALID_ID_RE.search(service_id) or '..' in service_id:
+        return f"服务ID '{service_id}' 包含非法字符"
+    return None
+
+
+def service_xml_path(service_dir, service_id) -> str:
+    """返回服务配置文件 <service_dir>/<id>.xml 的路径；ID 非法或路径不在 service_dir 内时抛出 ValueError。"""
+    error = check_service_id(service_id)
+    if error:
+        raise ValueError(error)
+    path = os.path.join(service_dir, f"{service_id}.xml")
+    base = os.path.realpath(service_dir)
+    if os.path.dirname(os.path.realpath(path)) != base:
+        raise ValueError(f"服务ID '{service_id}' 指向 {service_dir} 之外的路径")
+    return path
 
 
 class ConfigManager:
@@ -14,6 +44,13 @@ class ConfigManager:
         'logpath'
     ]
 
+    def __init__(self, audit_log=None, history=None, log_callback=print):
+        # 设置后，配置文件的每次保存和删除都会写入审计日志和历史版本库
+        self.audit_log = audit_log
+        self.history = history
+        # 解析或写入失败时的提示；命令行中输出到 stderr，避免混入 --json 的结果
+        self.log = log_callback
+
     def get_default_config(self) -> dict:
         """返回一个新服务的默认配置字典。"""
         config = {tag: '' for tag in self.SIMPLE_TAGS}
@@ -26,6 +63,7 @@ class ConfigManager:
         config['interactive'] = False
         config['serviceaccount'] = {}
         config['environments'] = []
+        config['depend'] = []
         return config
 
     def _from_xml_root(self, root) -> dict:
@@ -50,6 +88,8 @@ class ConfigManager:
         config['environments'] = [{'name': el.get('name', ''), 'value': el.get('value', '')} for el in
                                   root.findall('env')]
 
+        config['depend'] = [el.text.strip() for el in root.findall('depend') if el.text and el.text.strip()]
+
         sa_element = root.find('serviceaccount')
         if sa_element is not None:
             username_el, password_el, allow_logon_el = sa_element.find('username'), sa_element.find(
@@ -67,7 +107,7 @@ class ConfigManager:
             tree = ET.parse(file_path)
             return self._from_xml_root(tree.getroot())
         except (ET.ParseError, FileNotFoundError) as e:
-            print(f"错误: 处理XML文件 {file_path} 时出错: {e}")
+            self.log(f"错误: 处理XML文件 {file_path} 时出错: {e}")
             return self.get_default_config()
 
     def load_from_xml_string(self, xml_string: str) -> dict:
@@ -75,6 +115,95 @@ class ConfigManager:
         root = ET.fromstring(xml_string)
         return self._from_xml_root(root)
 
+    def load_document(self, file_path: str) -> ServiceDocument:
+        """从XML文件加载完整的服务文档，保留界面不支持的元素和注释。"""
+        try:
+            return ServiceDocument.from_file(self, file_path)
+        except (ET.ParseError, FileNotFoundError) as e:
+            self.log(f"错误: 处理XML文件 {file_path} 时出错: {e}")
+            return self.new_document(self.get_default_config())
+
+    def document_from_xml_string(self, xml_string: str) -> ServiceDocument:
+        """从XML字符串解析服务文档，解析失败时抛出 ET.ParseError。"""
+        return ServiceDocument.from_string(self, xml_string)
+
+    def new_document(self, config: dict) -> ServiceDocument:
+        """根据配置字典新建服务文档。"""
+        return ServiceDocument.from_config(self, config)
+
+    def save_document(self, document: ServiceDocument, file_path: str):
+        """将服务文档保存为XML文件。返回是否写入了文件：内容没有变化时为 False，写入失败时为 None。"""
+        try:
+            return self.save_xml_bytes(self._encode_for_disk(document.to_string()), file_path)
+        except IOError as e:
+            self.log(f"错误: 无法写入文件 {file_path}: {e}")
+            return None
+
+    @staticmethod
+    def _encode_for_disk(text: str) -> bytes:
+        """按文本模式写入时的方式转换换行符并编码，得到的字节与以前直接用文本模式写入的文件相同。"""
+        return text.replace('\n', os.linesep).encode('utf-8')
+
+    def save_xml_bytes(self, data: bytes, file_path: str, detail=None, action='save'):
+        """
+        原样写入XML文件内容（先写临时文件再替换），写入失败时抛出 OSError。
+        通过比较 sha256 判断内容是否变化，没有变化时不写入文件、不产生新版本，返回 False。
+        """
+        previous_data = self._read_bytes(file_path)
+        previous_hash = None if previous_data is None else hashlib.sha256(previous_data).hexdigest()
+        config_hash = hashlib.sha256(data).hexdigest()
+        if config_hash == previous_hash:
+            return False
+
+        service_id = os.path.splitext(os.path.basename(file_path))[0]
+        if self.history is not None and previous_data is not None:
+            # 文件被其他程序修改过时，先把修改后的内容记为一个版本，覆盖后仍可找回
+            latest = self.history.latest(service_id)
+            if latest is None or latest.sha256 != previous_hash:
+                self.history.record(service_id, previous_data, EXTERNAL, previous_hash)
+
+        temp_path = f"{file_path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, file_path)
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        if self.history is not None:
+            self.history.record(service_id, data, action, config_hash)
+        if self.audit_log is not None:
+            self.audit_log.record_config(action, service_id, previous_hash, config_hash, detail)
+        return True
+
+    def delete_xml(self, file_path: str):
+        """删除配置文件，失败时抛出 OSError。删除前的内容会记入历史版本，可以恢复。"""
+        previous_data = self._read_bytes(file_path)
+        previous_hash = None if previous_data is None else hashlib.sha256(previous_data).hexdigest()
+        service_id = os.path.splitext(os.path.basename(file_path))[0]
+        if self.history is not None and previous_data is not None:
+            self.history.record(service_id, previous_data, DELETE, previous_hash)
+        os.remove(file_path)
+        if self.audit_log is not None:
+            self.audit_log.record_config('delete', service_id, previous_hash, None)
+
+    def restore_version(self, service_id: str, sha256: str, service_dir="services"):
+        """把服务配置恢复为历史版本的内容（也用于撤销删除），恢复本身记为一个新版本。"""
+        data = self.history.read(sha256)
+        os.makedirs(service_dir, exist_ok=True)
+        return self.save_xml_bytes(data, os.path.join(service_dir, f"{service_id}.xml"),
+                                   detail=f"恢复到 {sha256[:10]}", action=ROLLBACK)
+
+    @staticmethod
+    def _read_bytes(file_path):
+        try:
+            with open(file_path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
     def _to_xml_root(self, config: dict) -> ET.Element:
         """将配置字典转换为一个XML Element根节点。"""
         root = ET.Element("service")
@@ -90,6 +219,9 @@ class ConfigManager:
             for env in config['environments']:
                 if env.get('name'): ET.SubElement(root, 'env', attrib=env)
 
+        for dependency in config.get('depend', []):
+            if dependency: ET.SubElement(root, 'depend').text = dependency
+
         # --- 关键修正处 ---
         # 1. logpath现在作为顶级元素处理
         # 2. log只处理mode属性
@@ -123,19 +255,20 @@ class ConfigManager:
 
         return root
 
+    def write_xml(self, config: dict, file):
+        """将配置字典以格式化的XML直接写入文件对象。"""
+        write_pretty_xml(self._to_xml_root(config), file)
+
     def save_to_xml_string(self, config: dict) -> str:
         """将配置字典转换为格式化的XML字符串。"""
-        root = self._to_xml_root(config)
-        xml_string = ET.tostring(root, 'utf-8')
-        parsed_string = minidom.parseString(xml_string)
-        # 移除空行
-        return os.linesep.join([s for s in parsed_string.toprettyxml(indent="  ").splitlines() if s.strip()])
+        buffer = io.StringIO()
+        self.write_xml(config, buffer)
+        return buffer.getvalue()
 
     def save_to_xml(self, config: dict, file_path: str):
-        """将配置字典保存为XML文件。"""
-        pretty_xml = self.save_to_xml_string(config)
+        """将配置字典保存为XML文件。返回值与 save_document 相同。"""
         try:
-            with open(file_path, "w", encoding="utf-8") as f:
-                f.write(pretty_xml)
+            return self.save_xml_bytes(self._encode_for_disk(self.save_to_xml_string(config)), file_path)
         except IOError as e:
-            print(f"错误: 无法写入文件 {file_path}: {e}")
+            self.log(f"错误: 无法写入文件 {file_path}: {e}")
+            return None
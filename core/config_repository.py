@@ -0,0 +1,87 @@
+import copy
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ConfigRepository:
+    """
+    ConfigManager 之上的配置缓存层。
+    - 以文件路径为键，(mtime_ns, size) 未变化时直接返回缓存的解析结果（服务文档和配置字典）；
+    - 按LRU淘汰，最多保留 max_entries 个配置；
+    - 缓存中的对象不会被交给调用方，每次返回深拷贝，界面修改不会污染缓存。
+    """
+
+    def __init__(self, config_manager, service_dir="services", max_entries=1024):
+        self.config_manager = config_manager
+        self.service_dir = service_dir
+        self.max_entries = max_entries
+        self._cache = OrderedDict()  # path -> (stamp, document, config)
+        self._lock = threading.Lock()
+
+    def _path(self, filename):
+        return filename if os.path.dirname(filename) else os.path.join(self.service_dir, filename)
+
+    @staticmethod
+    def _stamp(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self, filename) -> dict:
+        """返回配置的副本；filename 可以是 services 下的文件名或完整路径。"""
+        return copy.deepcopy(self._get_cached(self._path(filename))[1])
+
+    def get_document(self, filename):
+        """返回服务文档的副本，用于在保留未知元素的前提下修改并保存。"""
+        return self._get_cached(self._path(filename))[0].copy()
+
+    def _get_cached(self, path):
+        stamp = self._stamp(path)
+        with self._lock:
+            entry = self._cache.get(path)
+            if entry is not None and stamp is not None and entry[0] == stamp:
+                self._cache.move_to_end(path)
+                return entry[1:]
+
+        document = self.config_manager.load_document(path)
+        config = document.to_config()
+        if stamp is None:
+            return document, config
+        with self._lock:
+            self._cache[path] = (stamp, document, config)
+            self._cache.move_to_end(path)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return document, config
+
+    def list_filenames(self) -> list:
+        try:
+            return sorted(f for f in os.listdir(self.service_dir) if f.endswith(".xml"))
+        except FileNotFoundError:
+            return []
+
+    def load_all(self, max_workers=8) -> dict:
+        """并发加载 services 目录下的所有配置，返回 {文件名: 配置副本}。"""
+        filenames = self.list_filenames()
+        if not filenames:
+            return {}
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='config-load') as executor:
+            entries = list(executor.map(lambda name: self._get_cached(self._path(name)), filenames))
+        return {filename: copy.deepcopy(entry[1]) for filename, entry in zip(filenames, entries)}
+
+    def invalidate(self, filenames=None):
+        """使指定文件（默认全部）的缓存失效。"""
+        with self._lock:
+            if filenames is None:
+                self._cache.clear()
+                return
+            for filename in filenames:
+                self._cache.pop(self._path(filename), None)
+
+    def on_directory_changed(self, added, removed, modified):
+        """目录监视器报告变化时调用。"""
+        self.invalidate(list(removed) + list(modified))
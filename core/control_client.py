@@ -0,0 +1,206 @@
+import itertools
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote, urlencode
+
+from core.app_paths import app_dir
+from core.command_metrics import CommandMetrics
+from core.command_runner import CommandResult
+from core.status_poller import UNKNOWN
+
+
+class ControlClientError(RuntimeError):
+    """调用控制守护进程失败，code 为 JSON-RPC 错误码（网络错误时为 None）。"""
+
+    def __init__(self, message, code=None):
+        super().__init__(message)
+        self.code = code
+
+
+class ControlClient:
+    """控制守护进程的 JSON-RPC 客户端，只使用标准库，可在任意线程中调用。"""
+
+    def __init__(self, url, token=None, timeout=30):
+        # url 形如 http://host:8765，也可以带上 /rpc
+        self.base_url = url.rstrip('/')
+        if self.base_url.endswith('/rpc'):
+            self.base_url = self.base_url[:-len('/rpc')]
+        self.token = token or None
+        self.timeout = timeout
+        self._ids = itertools.count(1)
+        self._ids_lock = threading.Lock()
+
+    def _headers(self):
+        headers = {'Content-Type': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f"Bearer {self.token}"
+        return headers
+
+    def call(self, method, http_timeout=None, **params):
+        """
+        调用一个远程方法并返回结果；远程返回错误时抛出 ControlClientError。
+        http_timeout 为等待响应的秒数，默认使用构造时的 timeout。
+        """
+        with self._ids_lock:
+            request_id = next(self._ids)
+        body = json.dumps({'jsonrpc': '2.0', 'id': request_id, 'method': method, 'params': params}).encode('utf-8')
+        request = urllib.request.Request(f"{self.base_url}/rpc", data=body, headers=self._headers(), method='POST')
+        try:
+            with urllib.request.urlopen(request, timeout=http_timeout or self.timeout) as response:
+                payload = json.loads(response.read().decode('utf-8'))
+        except urllib.error.HTTPError as e:
+            raise ControlClientError(f"HTTP {e.code}: {e.reason}")
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            raise ControlClientError(f"无法连接控制守护进程 {self.base_url}: {e}")
+        if 'error' in payload:
+            error = payload['error']
+            raise ControlClientError(error.get('message', ''), error.get('code'))
+        return payload.get('result')
+
+    def tail_log(self, service, suffix='out.log', follow=False, initial_bytes=64 * 1024, chunk_size=64 * 1024):
+        """逐块返回日志内容（bytes）的生成器；follow 为 True 时持续跟踪，直到调用方停止迭代。"""
+        query = urlencode({'suffix': suffix, 'follow': int(follow), 'initial_bytes': initial_bytes})
+        request = urllib.request.Request(f"{self.base_url}/logs/{quote(service)}?{query}", headers=self._headers())
+        try:
+            response = urllib.request.urlopen(request, timeout=None if follow else self.timeout)
+        except urllib.error.HTTPError as e:
+            raise ControlClientError(f"HTTP {e.code}: {e.reason}")
+        except (urllib.error.URLError, OSError) as e:
+            raise ControlClientError(f"无法连接控制守护进程 {self.base_url}: {e}")
+        with response:
+            while True:
+                data = response.read1(chunk_size)
+                if not data:
+                    break
+                yield data
+
+
+class RemoteWinSWManager:
+    """
+    与 WinSWManager 接口相同的远程实现：命令通过控制守护进程在目标主机上执行。
+    执行前会先把本地的配置文件推送到守护进程，返回的 Future 结果同样是 CommandResult，
+    因此图形界面和 FleetExecutor 无需区分本地和远程。
+    """
+
+    def __init__(self, client: ControlClient, log_callback, max_workers=8, audit_log=None):
+        self.client = client
+        self.log = log_callback
+        self.audit_log = audit_log
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='winsw-remote')
+        self._future_ids = {}  # Future -> service_id
+        # 远程命令的耗时包含网络往返，与守护进程本机的记录分开保存
+        self.metrics = CommandMetrics(os.path.join(app_dir(), "metrics", "remote_commands.jsonl"))
+        self._lock = threading.Lock()
+
+    def _execute(self, command, config, output_callback=None, timeout=None):
+        service_id = config.get('id')
+        if not service_id:
+            self.log(f"错误: 服务ID为空，无法执行'{command}'命令。")
+            return None
+        xml_path = os.path.join("services", f"{service_id}.xml")
+        if not os.path.exists(xml_path):
+            self.log(f"错误: 找不到配置文件 '{os.path.abspath(xml_path)}'。请先保存配置。")
+            return None
+
+        submitted_at = time.time()
+
+        def run():
+            result = CommandResult(service_id, [command, service_id])
+            result.submitted_at = submitted_at
+            try:
+                with open(xml_path, encoding='utf-8') as f:
+                    self.client.call('save_xml', xml=f.read(), overwrite=True)
+                self.log(f"正在远程运行命令: '{command} {service_id}' ({self.client.base_url})")
+                # 命令可能运行很久，HTTP 等待时间要比命令超时更长
+                remote = self.client.call(command, http_timeout=3600 if timeout is None else timeout + 30,
+                                          service=service_id, timeout=timeout)
+            except ControlClientError as e:
+                result.error = e
+                self.log(f"错误: 远程执行 '{command}' 失败: {e}")
+                return result
+            for key in ('command_parts', 'returncode', 'stdout', 'stderr', 'started_at', 'finished_at',
+                        'cancelled', 'timed_out', 'error'):
+                setattr(result, key, remote.get(key))
+            for stream_name in ('stdout', 'stderr'):
+                for line in (remote.get(stream_name) or '').splitlines():
+                    self.log(f"[{service_id}] {line}")
+                    if output_callback:
+                        output_callback(stream_name, line + '\n')
+            self.log(f"远程命令结束 (退出码 {result.returncode}): '{command} {service_id}'")
+            return result
+
+        future = self._executor.submit(run)
+        with self._lock:
+            self._future_ids[future] = service_id
+        future.add_done_callback(self._forget)
+        future.add_done_callback(lambda f: self._record_metrics(command, f))
+        return future
+
+    def _record_metrics(self, command, future):
+        if future.cancelled() or future.exception() is not None:
+            return
+        self.metrics.record(command, future.result())
+        if self.audit_log is not None:
+            self.audit_log.record_command(command, future.result())
+
+    def _forget(self, future):
+        with self._lock:
+            self._future_ids.pop(future, None)
+
+    def cancel(self, future):
+        """未开始的命令直接取消；已发送的命令请求守护进程取消该服务的命令。"""
+        if future.cancel():
+            return True
+        with self._lock:
+            service_id = self._future_ids.get(future)
+        if service_id is None:
+            return False
+        try:
+            return bool(self.client.call('cancel', service=service_id))
+        except ControlClientError as e:
+            self.log(f"错误: 取消远程命令失败: {e}")
+            return False
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def install(self, config, **kwargs):
+        return self._execute('install', config, **kwargs)
+
+    def uninstall(self, config, **kwargs):
+        return self._execute('uninstall', config, **kwargs)
+
+    def start(self, config, **kwargs):
+        return self._execute('start', config, **kwargs)
+
+    def stop(self, config, **kwargs):
+        return self._execute('stop', config, **kwargs)
+
+    def restart(self, config, **kwargs):
+        return self._execute('restart', config, **kwargs)
+
+    def status(self, config, **kwargs):
+        return self._execute('status', config, **kwargs)
+
+    def refresh(self, config, **kwargs):
+        return self._execute('refresh', config, **kwargs)
+
+
+class RemoteStatusBackend:
+    """StatusPoller 的后端：一次 RPC 查询守护进程所在主机上所有服务的状态。"""
+
+    def __init__(self, client: ControlClient):
+        self.client = client
+
+    def query(self, service_ids) -> dict:
+        try:
+            statuses = self.client.call('query_status', services=list(service_ids))
+        except ControlClientError as e:
+            print(f"警告: 查询远程服务状态失败: {e}")
+            statuses = {}
+        return {service_id: statuses.get(service_id, UNKNOWN) for service_id in service_ids}
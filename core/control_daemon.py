@@ -0,0 +1,388 @@
+import asyncio
+import hmac
+import json
+import os
+import threading
+from urllib.parse import urlsplit, parse_qs, unquote
+
+from core.config_manager import service_xml_path
+from core.config_repository import ConfigRepository
+from core.log_paths import LOG_SUFFIXES, resolve_log_paths
+from core.log_tailer import LogTailer
+from core.status_poller import default_status_backend
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# JSON-RPC 2.0 错误码
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+SERVER_ERROR = -32000
+
+SERVICE_COMMANDS = ('install', 'uninstall', 'start', 'stop', 'restart', 'status', 'refresh')
+MAX_BODY_SIZE = 16 * 1024 * 1024
+
+
+class RpcError(Exception):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def command_result_to_dict(result) -> dict:
+    """把 CommandResult 转换为可序列化的字典，字段名与 CommandResult 的属性一致。"""
+    return {
+        'service_id': result.service_id, 'command_parts': result.command_parts, 'returncode': result.returncode,
+        'stdout': result.stdout, 'stderr': result.stderr, 'started_at': result.started_at,
+        'finished_at': result.finished_at, 'cancelled': result.cancelled, 'timed_out': result.timed_out,
+        'error': None if result.error is None else str(result.error), 'ok': result.ok,
+    }
+
+
+class ControlDaemon:
+    """
+    本机控制守护进程，通过 HTTP 提供 JSON-RPC 2.0 接口，便于远程批量管理。
+    - POST /rpc：调用 WinSWManager 的服务命令和配置的增删改查，支持批量请求；
+    - GET /logs/<服务ID>?suffix=out.log&follow=1&initial_bytes=65536：以 chunked 响应流式输出日志；
+    - GET /metrics：Prometheus 文本格式的命令耗时统计。
+    基于 asyncio，可同时服务多个客户端；同一服务的命令由 CommandRunner 按提交顺序串行执行。
+    配置了 token 时，请求必须携带 "Authorization: Bearer <token>" 头。
+    """
+
+    LOG_POLL_INTERVAL = 0.5
+
+    def __init__(self, winsw_manager, config_manager, host=DEFAULT_HOST, port=DEFAULT_PORT, token=None,
+                 service_dir="services"):
+        self.winsw_manager = winsw_manager
+        self.config_manager = config_manager
+        self.repository = ConfigRepository(config_manager, service_dir)
+        self.service_dir = service_dir
+        self.host = host
+        self.port = port
+        self.token = token or None
+        self.server = None
+        self._futures = {}  # service_id -> 尚未结束的命令 Future
+        self._futures_lock = threading.Lock()
+        self.status_backend = default_status_backend(lambda: winsw_manager, self._configs_by_id)
+        self._methods = {
+            'ping': self.rpc_ping,
+            'list_services': self.rpc_list_services,
+            'get_config': self.rpc_get_config,
+            'get_xml': self.rpc_get_xml,
+            'save_xml': self.rpc_save_xml,
+            'delete_service': self.rpc_delete_service,
+            'query_status': self.rpc_query_status,
+            'cancel': self.rpc_cancel,
+        }
+        for command in SERVICE_COMMANDS:
+            self._methods[command] = lambda service, timeout=None, command=command: self.rpc_command(
+                command, service, timeout)
+
+    # --- 启动与停止 ---
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        sockets = self.server.sockets or []
+        if sockets:
+            self.port = sockets[0].getsockname()[1]
+        print(f"控制守护进程已启动: http://{self.host}:{self.port}/rpc")
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    def run(self):
+        """阻塞运行，直到进程被中断。"""
+        try:
+            asyncio.run(self.serve_forever())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.winsw_manager.shutdown()
+            print("控制守护进程已停止。")
+
+    # --- HTTP ---
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, target, headers, body = request
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                if self.token and not self._authorized(headers):
+                    await self._send_json(writer, 401, {'error': 'unauthorized'}, keep_alive)
+                elif method == 'POST' and urlsplit(target).path == '/rpc':
+                    await self._send_json(writer, 200, await self._handle_rpc_body(body), keep_alive)
+                elif method == 'GET' and urlsplit(target).path == '/metrics':
+                    await self._send_metrics(writer, keep_alive)
+                elif method == 'GET' and urlsplit(target).path.startswith('/logs/'):
+                    # 日志流结束后关闭连接
+                    await self._stream_log(reader, writer, target)
+                    break
+                else:
+                    await self._send_json(writer, 404, {'error': 'not found'}, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except ValueError as e:
+            await self._send_json(writer, 400, {'error': str(e)}, False)
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    def _authorized(self, headers) -> bool:
+        # 头部按 latin-1 解码，还原为原始字节后做常量时间比较，避免通过响应时间逐字节猜出令牌
+        received = headers.get('authorization', '').encode('latin-1')
+        return hmac.compare_digest(received, f"Bearer {self.token}".encode('utf-8'))
+
+    @staticmethod
+    async def _read_request(reader):
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        parts = request_line.decode('latin-1').split()
+        if len(parts) != 3:
+            raise ValueError("无效的请求行")
+        method, target, _ = parts
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get('content-length') or 0)
+        if length > MAX_BODY_SIZE:
+            raise ValueError("请求体过大")
+        body = await reader.readexactly(length) if length else b''
+        return method.upper(), target, headers, body
+
+    @staticmethod
+    async def _send_json(writer, status, payload, keep_alive=True):
+        body = b'' if payload is None else json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        reason = {200: 'OK', 204: 'No Content', 400: 'Bad Request', 401: 'Unauthorized', 404: 'Not Found'}[status]
+        if payload is None:
+            status, reason = 204, 'No Content'
+        head = (f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+    async def _send_metrics(self, writer, keep_alive=True):
+        """以 Prometheus 文本格式输出命令耗时统计，供监控系统抓取。"""
+        text = await self._in_thread(self.winsw_manager.metrics.to_prometheus)
+        body = text.encode('utf-8')
+        head = (f"HTTP/1.1 200 OK\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+    # --- JSON-RPC ---
+
+    async def _handle_rpc_body(self, body):
+        try:
+            payload = json.loads(body.decode('utf-8'))
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            return self._error_response(None, PARSE_ERROR, f"解析请求失败: {e}")
+        if isinstance(payload, list):
+            if not payload:
+                return self._error_response(None, INVALID_REQUEST, "空的批量请求")
+            responses = await asyncio.gather(*(self._handle_rpc(item) for item in payload))
+            return [response for response in responses if response is not None] or None
+        return await self._handle_rpc(payload)
+
+    @staticmethod
+    def _error_response(request_id, code, message):
+        return {'jsonrpc': '2.0', 'id': request_id, 'error': {'code': code, 'message': message}}
+
+    async def _handle_rpc(self, request):
+        if not isinstance(request, dict) or not isinstance(request.get('method'), str):
+            return self._error_response(None, INVALID_REQUEST, "无效的请求")
+        request_id = request.get('id')
+        is_notification = 'id' not in request
+        method = self._methods.get(request['method'])
+        params = request.get('params') or {}
+        try:
+            if method is None:
+                raise RpcError(METHOD_NOT_FOUND, f"未知的方法: {request['method']}")
+            try:
+                call = (lambda: method(*params)) if isinstance(params, list) else (lambda: method(**params))
+                result = call()
+            except TypeError as e:
+                raise RpcError(INVALID_PARAMS, str(e))
+            if asyncio.iscoroutine(result):
+                result = await result
+        except RpcError as e:
+            return None if is_notification else self._error_response(request_id, e.code, e.message)
+        except Exception as e:
+            return None if is_notification else self._error_response(request_id, SERVER_ERROR, str(e))
+        return None if is_notification else {'jsonrpc': '2.0', 'id': request_id, 'result': result}
+
+    @staticmethod
+    async def _in_thread(func, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    def _resolve(self, service) -> str:
+        """把服务ID或文件名解析为 services 下的文件名。"""
+        filenames = self.repository.list_filenames()
+        if service in filenames:
+            return service
+        if f"{service}.xml" in filenames:
+            return f"{service}.xml"
+        for filename in filenames:
+            if (self.repository.get(filename).get('id') or '').lower() == service.lower():
+                return filename
+        raise RpcError(INVALID_PARAMS, f"找不到服务 '{service}'")
+
+    def _configs_by_id(self) -> dict:
+        return {config.get('id'): config for config in self.repository.load_all().values() if config.get('id')}
+
+    async def rpc_ping(self):
+        return 'pong'
+
+    async def rpc_list_services(self):
+        configs = await self._in_thread(self.repository.load_all)
+        return [{'file': filename, 'id': config.get('id'), 'name': config.get('name'), 'depend': config.get('depend')}
+                for filename, config in configs.items()]
+
+    async def rpc_get_config(self, service):
+        return await self._in_thread(lambda: self.repository.get(self._resolve(service)))
+
+    async def rpc_get_xml(self, service):
+        def read():
+            with open(os.path.join(self.service_dir, self._resolve(service)), encoding='utf-8') as f:
+                return f.read()
+
+        return await self._in_thread(read)
+
+    async def rpc_save_xml(self, xml, overwrite=False):
+        """校验XML并保存为 services/<id>.xml，保留原有内容和注释。"""
+
+        def save():
+            try:
+                document = self.config_manager.document_from_xml_string(xml)
+            except Exception as e:
+                raise RpcError(INVALID_PARAMS, f"无法解析XML: {e}")
+            service_id = document.to_config().get('id')
+            os.makedirs(self.service_dir, exist_ok=True)
+            try:
+                # 服务ID会成为文件名，必须拒绝 ../ 等会写到 services 目录之外的ID
+                path = service_xml_path(self.service_dir, service_id)
+            except ValueError as e:
+                raise RpcError(INVALID_PARAMS, str(e))
+            filename = os.path.basename(path)
+            if os.path.exists(path) and not overwrite:
+                raise RpcError(INVALID_PARAMS, f"{filename} 已存在")
+            changed = self.config_manager.save_document(document, path)
+            self.repository.invalidate([filename])
+            return {'id': service_id, 'file': filename, 'changed': changed}
+
+        return await self._in_thread(save)
+
+    async def rpc_delete_service(self, service):
+        def delete():
+            filename = self._resolve(service)
+            self.config_manager.delete_xml(os.path.join(self.service_dir, filename))
+            self.repository.invalidate([filename])
+            return {'file': filename}
+
+        return await self._in_thread(delete)
+
+    async def rpc_query_status(self, services=None):
+        def query():
+            configs = self._configs_by_id()
+            service_ids = list(services) if services else list(configs)
+            return self.status_backend.query(service_ids)
+
+        return await self._in_thread(query)
+
+    async def rpc_command(self, command, service, timeout=None):
+        """执行一条 WinSW 命令并等待结束；同一服务的命令按到达顺序串行执行。"""
+        config = await self._in_thread(lambda: self.repository.get(self._resolve(service)))
+        # _execute 会校验配置并记录日志，不在事件循环中执行
+        future = await self._in_thread(lambda: self.winsw_manager._execute(command, config, timeout=timeout))
+        if future is None:
+            raise RpcError(SERVER_ERROR, "配置无效或配置文件不存在")
+        service_id = config['id']
+        with self._futures_lock:
+            self._futures.setdefault(service_id, set()).add(future)
+        try:
+            result = await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # 守护进程停止时取消尚未开始或正在运行的命令
+            self.winsw_manager.cancel(future)
+            raise
+        finally:
+            with self._futures_lock:
+                self._futures.get(service_id, set()).discard(future)
+        return command_result_to_dict(result)
+
+    async def rpc_cancel(self, service):
+        """取消某个服务排队中和正在运行的所有命令，返回取消的数量。"""
+        with self._futures_lock:
+            futures = [future for service_id, pending in self._futures.items()
+                       if service_id.lower() == service.lower() for future in pending]
+        return sum(1 for future in futures if self.winsw_manager.cancel(future))
+
+    # --- 日志流 ---
+
+    async def _stream_log(self, reader, writer, target):
+        parts = urlsplit(target)
+        query = parse_qs(parts.query)
+        service = unquote(parts.path[len('/logs/'):])
+        suffix = query.get('suffix', ['out.log'])[0]
+        follow = query.get('follow', ['0'])[0] not in ('0', 'false', '')
+        try:
+            initial_bytes = int(query.get('initial_bytes', [64 * 1024])[0])
+        except ValueError:
+            initial_bytes = -1
+        if initial_bytes < 0:
+            await self._send_json(writer, 400, {'error': "initial_bytes 必须是非负整数"}, False)
+            return
+        if suffix not in LOG_SUFFIXES:
+            await self._send_json(writer, 400, {'error': f"未知的日志类型: {suffix}"}, False)
+            return
+        try:
+            config = await self._in_thread(lambda: self.repository.get(self._resolve(service)))
+        except RpcError as e:
+            await self._send_json(writer, 404, {'error': e.message}, False)
+            return
+        log_path = resolve_log_paths(config or {}).get(suffix)
+        if not log_path:
+            await self._send_json(writer, 404, {'error': f"服务 {service} 没有可用的日志路径"}, False)
+            return
+
+        tailer = LogTailer(log_path, initial_bytes=initial_bytes)
+        # 客户端不再发送数据，读到 EOF 说明连接已被关闭，此时停止跟踪
+        disconnected = asyncio.ensure_future(reader.read())
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/plain; charset=utf-8\r\n"
+                     b"Transfer-Encoding: chunked\r\nConnection: close\r\n\r\n")
+        try:
+            while True:
+                chunk = await self._in_thread(tailer.poll)
+                if chunk is not None and chunk.data:
+                    writer.write(f"{len(chunk.data):x}\r\n".encode('ascii') + chunk.data + b"\r\n")
+                    await writer.drain()
+                    if chunk.has_more:
+                        continue
+                if not follow:
+                    break
+                if disconnected.done() or writer.is_closing():
+                    return
+                await asyncio.sleep(self.LOG_POLL_INTERVAL)
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+        finally:
+            disconnected.cancel()
+            tailer.close()
@@ -0,0 +1,61 @@
+import os
+
+
+def scan_directory(directory, suffix='.xml') -> dict:
+    """返回目录快照 {文件名: (mtime_ns, size)}，只包含指定后缀的文件。"""
+    snapshot = {}
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if not entry.name.endswith(suffix):
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                snapshot[entry.name] = (stat.st_mtime_ns, stat.st_size)
+    except FileNotFoundError:
+        # 目录可能不存在
+        pass
+    return snapshot
+
+
+def diff_snapshots(old: dict, new: dict):
+    """比较两个快照，返回 (新增, 删除, 修改) 三个已排序的文件名列表。"""
+    added = sorted(name for name in new if name not in old)
+    removed = sorted(name for name in old if name not in new)
+    modified = sorted(name for name in new if name in old and new[name] != old[name])
+    return added, removed, modified
+
+
+class DirectoryWatcher:
+    """
+    通过定期 stat 轮询监视目录变化。
+    没有变化时轮询间隔按 backoff 倍数逐步放慢到 max_interval，发现变化后恢复为 min_interval。
+    """
+
+    def __init__(self, directory, suffix='.xml', min_interval=1.0, max_interval=10.0, backoff=2.0):
+        self.directory = directory
+        self.suffix = suffix
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.interval = min_interval
+        self.snapshot = {}
+
+    def check(self):
+        """重新扫描目录并与上次快照比较，返回 (新增, 删除, 修改)。"""
+        new_snapshot = scan_directory(self.directory, self.suffix)
+        changes = diff_snapshots(self.snapshot, new_snapshot)
+        self.snapshot = new_snapshot
+        if any(changes):
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * self.backoff, self.max_interval)
+        return changes
+
+    def reset_interval(self):
+        """本程序刚修改过目录时调用，恢复快速轮询。"""
+        self.interval = self.min_interval
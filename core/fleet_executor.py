@@ -0,0 +1,228 @@
+import threading
+import time
+from concurrent.futures import Future
+
+
+class FleetResult:
+    """批量操作中单个服务、单个命令的执行结果。"""
+
+    def __init__(self, service_id, command, status, returncode=None, duration=None, message=''):
+        self.service_id = service_id
+        self.command = command
+        self.status = status  # '成功' / '失败' / '跳过' / '取消'
+        self.returncode = returncode
+        self.duration = duration
+        self.message = message
+
+
+class FleetFuture(Future):
+    """
+    FleetExecutor.run() 返回的 Future，结果为 FleetResult 列表。
+    每次批量操作各自有取消标志和正在执行的命令：cancel() 只停止调度这一次操作中尚未开始的服务，
+    并尝试取消其中正在执行的命令，不影响同时进行的其他批量操作。
+    取消后 Future 仍会正常完成，未执行的服务在结果中标记为取消。
+    """
+
+    def __init__(self, winsw_manager):
+        super().__init__()
+        self._winsw_manager = winsw_manager
+        self._cancel_event = threading.Event()
+        self._running_futures = set()
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        """请求取消；操作已经结束时返回 False。"""
+        if self.done():
+            return False
+        self._cancel_event.set()
+        with self._lock:
+            futures = list(self._running_futures)
+        for future in futures:
+            self._winsw_manager.cancel(future)
+        return True
+
+    def cancel_requested(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def _add_running(self, future):
+        with self._lock:
+            self._running_futures.add(future)
+        # 提交和登记之间被取消时，刚提交的命令也要取消
+        if self._cancel_event.is_set():
+            self._winsw_manager.cancel(future)
+
+    def _discard_running(self, future):
+        with self._lock:
+            self._running_futures.discard(future)
+
+
+class FleetExecutor:
+    """
+    把同一个命令分发到多个服务上并发执行。
+    - 全局并发数和每台主机的并发数均有上限。
+    - 按 <depend> 依赖关系分层执行：启动类命令先依赖后被依赖，停止类命令反之。
+    - restart 拆分为"按逆序停止"和"按正序启动"两个阶段。
+    """
+
+    # 依赖方必须在被依赖方之后执行的命令
+    FORWARD_COMMANDS = ('install', 'start', 'refresh', 'status')
+    # 依赖方必须在被依赖方之前执行的命令
+    REVERSE_COMMANDS = ('stop', 'uninstall')
+
+    def __init__(self, winsw_manager, max_concurrency=8, max_per_host=4, host_key=None, log_callback=print):
+        self.winsw_manager = winsw_manager
+        self.log = log_callback
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_per_host = max(1, max_per_host)
+        # 目前所有服务都在本机，保留该扩展点以便远程管理时按主机限流
+        self.host_key = host_key or (lambda config: 'localhost')
+
+    def run(self, command, configs, progress_callback=None) -> FleetFuture:
+        """
+        在后台线程中执行批量命令，立即返回一个 FleetFuture，结果为 FleetResult 列表。
+        progress_callback(result) 在每个服务完成时于工作线程中调用。
+        """
+        fleet_future = FleetFuture(self.winsw_manager)
+        fleet_future.set_running_or_notify_cancel()
+
+        def coordinator():
+            try:
+                fleet_future.set_result(self._run_phases(fleet_future, command, configs, progress_callback))
+            except BaseException as e:
+                fleet_future.set_exception(e)
+
+        threading.Thread(target=coordinator, name='winsw-fleet', daemon=True).start()
+        return fleet_future
+
+    def _run_phases(self, fleet_future, command, configs, progress_callback):
+        levels = self.dependency_levels(configs, self.log)
+        # 没有服务ID的配置无法参与依赖排序，也无法执行，每个阶段都记为失败，不能悄悄丢掉
+        invalid = [config for config in configs if not config.get('id')]
+        if command == 'restart':
+            phases = [('stop', list(reversed(levels))), ('start', levels)]
+        elif command in self.REVERSE_COMMANDS:
+            phases = [(command, list(reversed(levels)))]
+        else:
+            phases = [(command, levels)]
+
+        results = []
+        for phase_command, phase_levels in phases:
+            for config in invalid:
+                name = config.get('name')
+                result = FleetResult('', phase_command, '失败',
+                                     message=f"配置缺少服务ID（名称: {name}）" if name else "配置缺少服务ID")
+                results.append(result)
+                if progress_callback:
+                    progress_callback(result)
+            failed_ids = set()
+            for level in phase_levels:
+                results.extend(self._run_level(fleet_future, phase_command, level, failed_ids, progress_callback))
+        return results
+
+    def _run_level(self, fleet_future, command, configs, failed_ids, progress_callback):
+        """并发执行同一依赖层中的所有服务，返回该层的结果。"""
+        global_slots = threading.BoundedSemaphore(self.max_concurrency)
+        host_slots = {}
+        finished = threading.Semaphore(0)  # 每个已提交的服务记录完结果后释放一次
+        submitted = 0
+        results = []
+        results_lock = threading.Lock()
+
+        def record(result):
+            with results_lock:
+                results.append(result)
+                if result.status != '成功':
+                    failed_ids.add(result.service_id)
+            if progress_callback:
+                progress_callback(result)
+
+        for config in configs:
+            service_id = config.get('id', '')
+            if fleet_future.cancel_requested():
+                record(FleetResult(service_id, command, '取消', message='批量操作已取消'))
+                continue
+
+            # 启动类命令中，依赖项失败的服务直接跳过
+            if command in self.FORWARD_COMMANDS:
+                failed_deps = [dep for dep in config.get('depend', []) if dep in failed_ids]
+                if failed_deps:
+                    record(FleetResult(service_id, command, '跳过', message=f"依赖服务失败: {', '.join(failed_deps)}"))
+                    continue
+
+            host = self.host_key(config)
+            host_slot = host_slots.setdefault(host, threading.BoundedSemaphore(self.max_per_host))
+            global_slots.acquire()
+            host_slot.acquire()
+
+            started_at = time.time()
+            future = getattr(self.winsw_manager, command)(config)
+            if future is None:
+                host_slot.release()
+                global_slots.release()
+                record(FleetResult(service_id, command, '跳过', message='配置无效或配置文件不存在'))
+                continue
+
+            fleet_future._add_running(future)
+            future.add_done_callback(
+                lambda f, sid=service_id, hs=host_slot, t0=started_at: self._on_done(
+                    fleet_future, f, sid, command, t0, (hs, global_slots), record, finished))
+            submitted += 1
+
+        for _ in range(submitted):
+            finished.acquire()
+        return results
+
+    def _on_done(self, fleet_future, future, service_id, command, started_at, slots, record, finished):
+        fleet_future._discard_running(future)
+        for slot in slots:
+            slot.release()
+        try:
+            record(self._to_fleet_result(future, service_id, command, started_at))
+        finally:
+            finished.release()
+
+    @staticmethod
+    def _to_fleet_result(future, service_id, command, started_at) -> FleetResult:
+        """把单个命令的 Future 转换为汇总表中的一行。"""
+        duration = time.time() - started_at
+        if future.cancelled():
+            return FleetResult(service_id, command, '取消', duration=duration)
+        try:
+            result = future.result()
+        except Exception as e:
+            return FleetResult(service_id, command, '失败', duration=duration, message=str(e))
+
+        if result.ok:
+            status = '成功'
+        elif result.cancelled:
+            status = '取消'
+        else:
+            status = '失败'
+        message = result.output.strip().splitlines()[-1] if result.output.strip() else ''
+        if result.timed_out:
+            message = '命令超时'
+        return FleetResult(service_id, command, status, result.returncode, result.duration or duration, message)
+
+    @staticmethod
+    def dependency_levels(configs, log_callback=print) -> list:
+        """
+        按 <depend> 对服务分层：每层中的服务只依赖前面各层中的服务。
+        不在本次选择范围内的依赖会被忽略；存在循环依赖的服务放在最后一层，并通过 log_callback 给出警告。
+        """
+        by_id = {config.get('id'): config for config in configs if config.get('id')}
+        remaining = {
+            service_id: {dep for dep in config.get('depend', []) if dep in by_id and dep != service_id}
+            for service_id, config in by_id.items()
+        }
+        levels = []
+        while remaining:
+            ready = sorted(service_id for service_id, deps in remaining.items() if not deps)
+            if not ready:
+                log_callback(f"警告: 检测到循环依赖，以下服务将不按依赖顺序执行: {', '.join(sorted(remaining))}")
+                ready = sorted(remaining)
+            levels.append([by_id[service_id] for service_id in ready])
+            for service_id in ready:
+                remaining.pop(service_id)
+            for deps in remaining.values():
+                deps.difference_update(ready)
+        return levels
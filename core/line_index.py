@@ -0,0 +1,320 @@
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from itertools import accumulate, islice
+
+from core.log_archive import LogSegment, list_segments
+from core.log_tailer import LogTailer, TailChunk
+
+_plus_one = (1).__add__
+
+
+class LineIndex:
+    """
+    单个日志文件的行偏移索引：offsets[i] 为第 i 行在文件中的起始字节偏移。
+    索引由 LogIndexer 在后台线程中按块增量构建，界面只按需读取可见范围内的行，
+    因此无论文件多大，滚动到任意一行都只需一次定位读取。
+    轮转产生的压缩归档段可以通过 add_segment() 接在当前文件之前，此时所有偏移都是逻辑偏移：
+    已加载的归档段（从旧到新）和当前文件依次拼接，base 为当前文件在其中的起点。
+    """
+
+    # 单次读取窗口的字节上限，防止超长行占用过多内存
+    MAX_WINDOW_BYTES = 4 * 1024 * 1024
+    SEGMENT_READ_SIZE = 4 * 1024 * 1024
+    # 解压后缓存在内存中的归档段个数，滚动跨过两个归档段的边界时不必重复解压
+    SEGMENT_CACHE_SIZE = 2
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._offsets = array('Q', [0])
+        self._indexed_end = 0
+        self._parts = []  # 已加载的归档段 [(逻辑起点, 解压后长度, 归档段路径)]
+        self.base = 0  # 当前文件的逻辑起点
+        self._segment_cache = OrderedDict()  # 归档段路径 -> 解压后的内容
+        self._cache_lock = threading.Lock()
+        self.generation = 0  # 每次重置加一，界面据此判断是否需要整体刷新
+        # 增量数据监听器 listener(index, chunk)，在索引线程中调用，chunk.offset 为逻辑偏移
+        self.chunk_listeners = []
+
+    @property
+    def indexed_end(self):
+        return self._indexed_end
+
+    def line_count(self) -> int:
+        """已索引的行数（最后一行可能尚未以换行结束）。"""
+        with self._lock:
+            count = len(self._offsets)
+            return count if self._indexed_end > self._offsets[-1] else count - 1
+
+    def line_offset(self, line_no) -> int:
+        with self._lock:
+            return self._offsets[line_no]
+
+    def line_for_offset(self, offset) -> int:
+        """返回包含指定字节偏移的行号。"""
+        with self._lock:
+            lo, hi = 0, len(self._offsets)
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if self._offsets[mid] <= offset:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            return max(0, lo - 1)
+
+    @property
+    def segment_paths(self) -> list:
+        """已加载的归档段路径，从旧到新排列。"""
+        with self._lock:
+            return [path for _, _, path in self._parts]
+
+    def reset(self, offset=0):
+        """清空索引（包括已加载的归档段），从 offset 处重新开始。"""
+        with self._lock:
+            self._offsets = array('Q', [offset])
+            self._indexed_end = offset
+            self._parts = []
+            self.base = 0
+            self.generation += 1
+
+    def rewind_active(self):
+        """丢弃当前文件部分的索引，保留已加载的归档段。文件被截断、轮转或删除时调用。"""
+        with self._lock:
+            del self._offsets[bisect_right(self._offsets, self.base):]
+            if not self._offsets:
+                self._offsets.append(self.base)
+            self._indexed_end = self.base
+            self.generation += 1
+
+    def _append(self, offset, data):
+        parts = data.split(b'\n')
+        with self._lock:
+            if len(parts) > 1:
+                # 每个换行符之后都是新一行的起点
+                starts = accumulate(map(_plus_one, map(len, parts[:-1])), initial=offset)
+                self._offsets.extend(islice(starts, 1, None))
+            self._indexed_end = offset + len(data)
+
+    def feed(self, chunk):
+        """把 LogTailer 读取的一块新数据加入索引。"""
+        if chunk.reset:
+            self.rewind_active()
+        offset = self.base + chunk.offset
+        if offset != self._indexed_end:
+            # 数据不连续，无法接在已有内容之后
+            self.reset(chunk.offset)
+            offset = chunk.offset
+        if chunk.data:
+            self._append(offset, chunk.data)
+        if self.chunk_listeners:
+            self._notify(chunk._replace(offset=offset))
+
+    def _notify(self, chunk):
+        for listener in self.chunk_listeners:
+            try:
+                listener(self, chunk)
+            except Exception as e:
+                print(f"日志索引监听器出错: {e}")
+
+    def add_segment(self, segment: LogSegment, stop_event=None) -> bool:
+        """
+        把一个归档段接在已加载的内容之后、当前文件之前，需要在当前文件部分为空时调用
+        （刚创建或 rewind_active() 之后）。读取失败时不改变索引并返回 False。
+        """
+        with self._lock:
+            if self._indexed_end != self.base:
+                return False
+            start = self.base
+            # 先登记归档段，加载过程中界面读取已索引的行也能找到对应的数据
+            self._parts.append((start, 0, segment.path))
+        position = start
+        try:
+            with segment.open() as f:
+                while stop_event is None or not stop_event.is_set():
+                    data = f.read(self.SEGMENT_READ_SIZE)
+                    if not data:
+                        break
+                    self._append(position, data)
+                    if self.chunk_listeners:
+                        self._notify(TailChunk(position, data, False, True))
+                    position += len(data)
+                    with self._lock:
+                        self._parts[-1] = (start, position - start, segment.path)
+                        self.base = position
+        except Exception as e:
+            print(f"警告: 无法读取日志归档 {segment.path}: {e}")
+            with self._lock:
+                self._parts.pop()
+                self.base = start
+            self.rewind_active()
+            return False
+        return True
+
+    def logical_offset(self, path, offset):
+        """把当前文件或已加载归档段中的字节偏移换算为逻辑偏移，归档段未加载时返回 None。"""
+        key = os.path.normcase(os.path.abspath(path))
+        with self._lock:
+            if key == os.path.normcase(os.path.abspath(self.path)):
+                return self.base + offset
+            for start, _, part_path in self._parts:
+                if key == os.path.normcase(os.path.abspath(part_path)):
+                    return start + offset
+        return None
+
+    def _segment_data(self, path):
+        with self._cache_lock:
+            data = self._segment_cache.get(path)
+            if data is not None:
+                self._segment_cache.move_to_end(path)
+                return data
+        segment = LogSegment.from_path(path)
+        if segment is None:
+            return None
+        data = segment.read_all()
+        with self._cache_lock:
+            self._segment_cache[path] = data
+            while len(self._segment_cache) > self.SEGMENT_CACHE_SIZE:
+                self._segment_cache.popitem(last=False)
+        return data
+
+    def _read_range(self, begin, end, parts, base) -> bytes:
+        """读取逻辑范围 [begin, end) 的数据，可能跨越多个归档段和当前文件。"""
+        pieces = []
+        for start, length, path in parts:
+            if begin >= start + length or end <= start:
+                continue
+            data = self._segment_data(path)
+            if data is None:
+                return b''
+            pieces.append(data[max(begin, start) - start:min(end, start + length) - start])
+        if end > base:
+            position = max(begin, base)
+            with open(self.path, 'rb') as f:
+                f.seek(position - base)
+                pieces.append(f.read(end - position))
+        return b''.join(pieces)
+
+    def read_lines(self, start, count) -> list:
+        """读取从第 start 行开始的最多 count 行文本。"""
+        with self._lock:
+            total = len(self._offsets)
+            if start < 0 or start >= total or count <= 0:
+                return []
+            begin = self._offsets[start]
+            end_line = start + count
+            end = self._offsets[end_line] if end_line < total else self._indexed_end
+            parts = list(self._parts)
+            base = self.base
+        length = min(end - begin, self.MAX_WINDOW_BYTES)
+        if length <= 0:
+            return []
+        try:
+            data = self._read_range(begin, begin + length, parts, base)
+        except Exception:
+            # 文件被删除，或归档段已被清理
+            return []
+        lines = data.decode('utf-8', errors='replace').split('\n')
+        if lines and lines[-1] == '':
+            lines.pop()
+        return [line.rstrip('\r') for line in lines[:count]]
+
+
+class LogIndexer:
+    """
+    在一个后台线程中为一组日志文件构建并维护 LineIndex。
+    首先加载最近的归档段（解压后合计不超过 HISTORY_BYTES），然后从当前文件开头按块读取完成索引，
+    之后持续跟踪追加的数据；文件被轮转或截断时保留已加载的内容，接上新产生的归档段后重新索引当前文件。
+    """
+
+    CHUNK_SIZE = 4 * 1024 * 1024
+    IDLE_INTERVAL = 0.5
+    HISTORY_BYTES = 64 * 1024 * 1024
+    # 检查是否产生了新归档段的间隔（秒）。轮转后日志很快又增长到原来的大小时，仅凭文件大小无法发现截断
+    SEGMENT_CHECK_INTERVAL = 5.0
+
+    def __init__(self, paths: dict):
+        self.indexes = {key: LineIndex(path) for key, path in paths.items()}
+        self._tailers = {key: LogTailer(path, initial_bytes=None, chunk_size=self.CHUNK_SIZE)
+                         for key, path in paths.items()}
+        self._known_segments = {key: set() for key in paths}  # 已加载或已跳过的归档段路径
+        self._last_segment_check = 0.0
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='log-indexer', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+        for tailer in self._tailers.values():
+            tailer.close()
+
+    def _load_history(self):
+        """加载每个日志最近的归档段，较早的归档段只记录下来，不再加载。"""
+        for key, index in self.indexes.items():
+            segments = list_segments(index.path)
+            self._known_segments[key].update(segment.path for segment in segments)
+            selected, budget = [], self.HISTORY_BYTES
+            for segment in reversed(segments):
+                size = segment.size or segment.compressed_size
+                if selected and size > budget:
+                    break
+                selected.append(segment)
+                budget -= size
+            for segment in reversed(selected):
+                if self._stop_event.is_set():
+                    return
+                index.add_segment(segment, self._stop_event)
+
+    def _add_new_segments(self, key) -> bool:
+        """文件被轮转后接上新产生的归档段，返回是否有新归档段。"""
+        index = self.indexes[key]
+        known = self._known_segments[key]
+        new_segments = [segment for segment in list_segments(index.path) if segment.path not in known]
+        if not new_segments:
+            return False
+        known.update(segment.path for segment in new_segments)
+        index.rewind_active()
+        for segment in new_segments:
+            index.add_segment(segment, self._stop_event)
+        return True
+
+    def _run(self):
+        self._load_history()
+        while not self._stop_event.is_set():
+            backlog = False
+            check_segments = time.monotonic() - self._last_segment_check >= self.SEGMENT_CHECK_INTERVAL
+            if check_segments:
+                self._last_segment_check = time.monotonic()
+            for key, tailer in self._tailers.items():
+                if self._stop_event.is_set():
+                    break
+                index = self.indexes[key]
+                if check_segments and self._add_new_segments(key):
+                    # 当前文件已被截断并归档，从头重新读取
+                    tailer.position = 0
+                try:
+                    chunk = tailer.poll()
+                except OSError:
+                    continue
+                if chunk is None:
+                    # 文件被删除（或被改名轮转），保留已加载的归档段
+                    if index.indexed_end > index.base:
+                        index.rewind_active()
+                        self._add_new_segments(key)
+                    continue
+                if chunk.reset:
+                    index.rewind_active()
+                    self._add_new_segments(key)
+                if chunk.data or chunk.reset:
+                    index.feed(chunk)
+                backlog = backlog or chunk.has_more
+            if not backlog:
+                self._stop_event.wait(self.IDLE_INTERVAL)
@@ -0,0 +1,555 @@
+import gzip
+import os
+import re
+import struct
+import sys
+import threading
+import time
+import zlib
+
+from core.log_parsing import AUTO as AUTO_FORMAT, create_parser
+from core.log_paths import LOG_SUFFIXES, resolve_log_dir, resolve_log_paths
+from core.status_poller import NOT_INSTALLED, STOPPED
+
+# 归档段的压缩格式
+GZIP = 'gzip'
+ZSTD = 'zstd'
+AUTO = 'auto'  # 安装了 zstandard 时使用 zstd，否则使用 gzip
+CODEC_EXTENSIONS = {GZIP: '.gz', ZSTD: '.zst'}
+
+ARCHIVE_DIR_NAME = 'archive'  # 归档段保存在日志目录下的 archive 子目录中
+COPY_CHUNK_SIZE = 1024 * 1024
+# gzip 头 FEXTRA 中记录原始大小（8 字节小端整数）的子字段 ID；尾部的 ISIZE 只有 32 位，超过 4GB 会回绕
+GZIP_SIZE_FIELD = b'WS'
+FIRST_RECORD_SCAN_BYTES = 64 * 1024  # 判断日志年龄时，在文件开头的这些字节中查找第一条带时间的记录
+MB = 1024 * 1024
+DAY = 24 * 3600
+# 只有处于这些状态的服务才会轮转日志，运行中的 WinSW 一直在写日志，无法安全地截断
+ROTATABLE_STATUSES = (STOPPED, NOT_INSTALLED)
+
+# 全局默认策略，settings.json 中的 log_rotation 和 log_rotation_overrides[服务ID] 依次覆盖其中的项
+DEFAULT_POLICY = {
+    'enabled': True,
+    'max_size_mb': 50,  # 日志超过该大小时轮转，0 表示不按大小轮转
+    'max_age_days': 7,  # 当前日志累积超过该天数时轮转，0 表示不按时间轮转
+    'keep_days': 90,  # 删除早于该天数的归档段，0 表示不按时间删除
+    'keep_segments': 0,  # 每个日志文件最多保留的归档段数，0 表示不限制
+    'max_total_mb': 2048,  # 每个服务的归档段压缩后总大小上限，超出时从最旧的开始删除，0 表示不限制
+    'compression': AUTO,
+}
+
+# <日志文件名>.<YYYYmmdd-HHMMSS>[-序号].gz|.zst
+_SEGMENT_RE = re.compile(r'^(?P<log>.+\.(?:%s))\.(?P<stamp>\d{8}-\d{6})(?:-(?P<seq>\d+))?(?P<ext>\.gz|\.zst)$'
+                         % '|'.join(re.escape(suffix) for suffix in LOG_SUFFIXES))
+_STAMP_FORMAT = '%Y%m%d-%H%M%S'
+_zstd_warning_printed = False
+
+
+def _zstd():
+    """zstandard 是可选依赖，未安装时返回 None。"""
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def resolve_codec(name) -> str:
+    """把策略中的压缩格式解析为 GZIP 或 ZSTD；要求 zstd 但未安装 zstandard 时回退到 gzip。"""
+    global _zstd_warning_printed
+    if name == GZIP:
+        return GZIP
+    if _zstd() is not None:
+        return ZSTD
+    if name == ZSTD and not _zstd_warning_printed:
+        _zstd_warning_printed = True
+        print("警告: 未安装 zstandard，日志归档改用 gzip 压缩。")
+    return GZIP
+
+
+class LogSegment:
+    """一个压缩后的日志归档段，内容是某次轮转时日志文件的完整副本。"""
+
+    def __init__(self, path, log_name, created, seq=0):
+        self.path = path
+        self.log_name = log_name  # 所属日志的文件名，例如 my-service.out.log
+        self.created = created  # 轮转时间（时间戳）
+        self.seq = seq  # 同一秒内多次轮转时的序号
+        self.codec = ZSTD if path.endswith(CODEC_EXTENSIONS[ZSTD]) else GZIP
+        self._size = None
+
+    @classmethod
+    def from_path(cls, path):
+        """按文件名解析归档段，不是归档段时返回 None。"""
+        match = _SEGMENT_RE.match(os.path.basename(path))
+        if match is None:
+            return None
+        try:
+            created = time.mktime(time.strptime(match.group('stamp'), _STAMP_FORMAT))
+        except (ValueError, OverflowError):
+            return None
+        return cls(path, match.group('log'), created, int(match.group('seq') or 0))
+
+    def __repr__(self):
+        return f"LogSegment({self.path!r})"
+
+    @property
+    def compressed_size(self) -> int:
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    @property
+    def size(self):
+        """解压后的大小，从 gzip 尾部或 zstd 帧头读取，无法确定时返回 None。"""
+        if self._size is None:
+            try:
+                self._size = self._read_size()
+            except OSError:
+                return None
+        return self._size
+
+    def _read_size(self):
+        with open(self.path, 'rb') as f:
+            if self.codec == GZIP:
+                size = _gzip_recorded_size(f)
+                if size is not None:
+                    return size
+                # 旧版本生成的归档段只有尾部的 ISIZE，是原始大小对 2^32 取模的结果
+                f.seek(-4, os.SEEK_END)
+                return struct.unpack('<I', f.read(4))[0]
+            zstandard = _zstd()
+            if zstandard is None:
+                return None
+            try:
+                size = zstandard.frame_content_size(f.read(18))
+            except zstandard.ZstdError:
+                return None
+            return size if size >= 0 else None
+
+    def open(self):
+        """以二进制流的方式读取解压后的内容。"""
+        if self.codec == GZIP:
+            return gzip.open(self.path, 'rb')
+        zstandard = _zstd()
+        if zstandard is None:
+            raise OSError(f"读取 {os.path.basename(self.path)} 需要安装 zstandard")
+        f = open(self.path, 'rb')
+        try:
+            return zstandard.ZstdDecompressor().stream_reader(f)
+        except Exception:
+            f.close()
+            raise
+
+    def read_all(self) -> bytes:
+        with self.open() as f:
+            return f.read()
+
+
+def archive_dir(log_path) -> str:
+    return os.path.join(os.path.dirname(log_path), ARCHIVE_DIR_NAME)
+
+
+def is_segment_path(path) -> bool:
+    return os.path.basename(os.path.dirname(path)) == ARCHIVE_DIR_NAME and \
+        _SEGMENT_RE.match(os.path.basename(path)) is not None
+
+
+def list_segments(log_path) -> list:
+    """返回日志文件的所有归档段，从旧到新排列。"""
+    log_name = os.path.basename(log_path)
+    directory = archive_dir(log_path)
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return []
+    segments = []
+    for name in names:
+        if name.startswith(log_name + '.'):
+            segment = LogSegment.from_path(os.path.join(directory, name))
+            if segment is not None and segment.log_name == log_name:
+                segments.append(segment)
+    segments.sort(key=lambda segment: (segment.created, segment.seq))
+    return segments
+
+
+def _new_segment_path(log_path, created, codec):
+    stamp = time.strftime(_STAMP_FORMAT, time.localtime(created))
+    base = os.path.join(archive_dir(log_path), f"{os.path.basename(log_path)}.{stamp}")
+    extension = CODEC_EXTENSIONS[codec]
+    path, seq = base + extension, 0
+    while os.path.exists(path):
+        seq += 1
+        path = f"{base}-{seq}{extension}"
+    return path
+
+
+def _gzip_recorded_size(f):
+    """从 gzip 头的 FEXTRA 中读取压缩时记录的原始大小，没有记录时返回 None。"""
+    header = f.read(12)
+    if len(header) < 12 or header[:3] != b'\x1f\x8b\x08' or not header[3] & 0x04:
+        return None
+    extra = f.read(struct.unpack('<H', header[10:12])[0])
+    position = 0
+    while position + 4 <= len(extra):
+        field_id, field_length = extra[position:position + 2], struct.unpack('<H', extra[position + 2:position + 4])[0]
+        data = extra[position + 4:position + 4 + field_length]
+        if field_id == GZIP_SIZE_FIELD and len(data) == 8:
+            return struct.unpack('<Q', data)[0]
+        position += 4 + field_length
+    return None
+
+
+def _compress_gzip(src, dst, length, created) -> int:
+    """
+    以 gzip 格式压缩，压缩时统计原始字节数并写入头部的 FEXTRA（先占位，压缩完成后回填），
+    解压时 gzip 模块会跳过该字段。返回原始字节数。
+    """
+    header_start = dst.tell()
+    # ID1 ID2 CM FLG(FEXTRA) MTIME XFL OS，XLEN 和记录原始大小的子字段
+    dst.write(b'\x1f\x8b\x08\x04' + struct.pack('<I', int(created)) + b'\x00\xff'
+              + struct.pack('<H', 12) + GZIP_SIZE_FIELD + struct.pack('<HQ', 8, 0))
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS)
+    crc, total, remaining = 0, 0, length
+    while remaining > 0:
+        data = src.read(min(COPY_CHUNK_SIZE, remaining))
+        if not data:
+            break
+        crc = zlib.crc32(data, crc)
+        total += len(data)
+        remaining -= len(data)
+        dst.write(compressor.compress(data))
+    dst.write(compressor.flush())
+    dst.write(struct.pack('<II', crc, total & 0xFFFFFFFF))
+    end = dst.tell()
+    dst.seek(header_start + 16)
+    dst.write(struct.pack('<Q', total))
+    dst.seek(end)
+    return total
+
+
+def _compress(src, dst, length, codec, created) -> int:
+    """把 src 开头的 length 字节压缩写入 dst，返回压缩时统计的原始字节数。"""
+    if codec == ZSTD:
+        compressor = _zstd().ZstdCompressor(level=3)
+        # 提供原始大小，帧头中会记录解压后的大小
+        read, _ = compressor.copy_stream(src, dst, size=length, read_size=COPY_CHUNK_SIZE)
+        return read
+    return _compress_gzip(src, dst, length, created)
+
+
+def rotate_log(log_path, codec=AUTO, now=None):
+    """
+    把日志文件轮转为一个压缩归档段并清空日志，返回新的 LogSegment；文件不存在或为空时返回 None。
+    先把当前内容压缩到临时文件并改名为归档段，再截断日志。
+    只能在没有程序写入该日志时调用（服务已停止）：WinSW 以自己维护的写入位置写日志（不是 O_APPEND），
+    截断后它仍从原来的位置继续写，文件会恢复原来的大小并在开头留下一段空字节。
+    压缩期间日志长度发生变化时说明仍在被写入，此时删除归档段、保留日志不变并抛出 OSError。
+    """
+    try:
+        length = os.path.getsize(log_path)
+    except OSError:
+        return None
+    if length == 0:
+        return None
+    codec = resolve_codec(codec)
+    created = time.time() if now is None else now
+    os.makedirs(archive_dir(log_path), exist_ok=True)
+    segment_path = _new_segment_path(log_path, created, codec)
+    tmp_path = segment_path + '.tmp'
+    try:
+        with open(log_path, 'rb') as src, open(tmp_path, 'wb') as dst:
+            original_size = _compress(src, dst, length, codec, created)
+        os.replace(tmp_path, segment_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    try:
+        with open(log_path, 'r+b') as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() != length:
+                raise OSError(f"{os.path.basename(log_path)} 在压缩期间仍在被写入，服务可能正在运行")
+            f.truncate(0)
+    except OSError:
+        # 没有截断时删除刚生成的归档段，避免同一段内容在下次轮转时重复归档
+        try:
+            os.remove(segment_path)
+        except OSError:
+            pass
+        raise
+    segment = LogSegment.from_path(segment_path)
+    segment._size = original_size
+    return segment
+
+
+def policy_for(settings_manager, service_id) -> dict:
+    """返回服务的轮转和保留策略：默认值 → log_rotation → log_rotation_overrides[服务ID]。"""
+    policy = dict(DEFAULT_POLICY)
+    if settings_manager is not None:
+        policy.update(settings_manager.get('log_rotation') or {})
+        policy.update((settings_manager.get('log_rotation_overrides') or {}).get(service_id) or {})
+    return policy
+
+
+def rotatable_logs(config) -> dict:
+    """
+    返回需要由本程序轮转的日志 {后缀: 路径}。wrapper.log 总是需要；
+    out.log 和 err.log 只在 append 和 reset 模式下需要，roll 模式由 WinSW 自己滚动，ignore 模式不产生文件。
+    """
+    paths = resolve_log_paths(config)
+    if (config.get('log_mode') or 'append') not in ('append', 'reset'):
+        paths = {suffix: path for suffix, path in paths.items() if suffix == 'wrapper.log'}
+    return paths
+
+
+def _creation_time(stat):
+    birth_time = getattr(stat, 'st_birthtime', None)
+    if birth_time is not None:
+        return birth_time
+    # Windows 上 st_ctime 是创建时间，其他系统上是元数据修改时间，不能用来判断日志的年龄
+    return stat.st_ctime if sys.platform == 'win32' else None
+
+
+def _first_record_time(log_path):
+    """返回日志开头第一条带时间的记录的时间，没有可识别的时间时返回 None。"""
+    try:
+        with open(log_path, 'rb') as f:
+            head = f.read(FIRST_RECORD_SCAN_BYTES)
+    except OSError:
+        return None
+    parser = create_parser(AUTO_FORMAT)
+    # 最后一行可能被截断，不参与判断
+    for line in head.split(b'\n')[:-1]:
+        result = parser.parse(line.rstrip(b'\r'))
+        if result is not None and result[0] is not None:
+            return result[0]
+    return None
+
+
+def rotation_reason(log_path, policy, segments, now):
+    """判断日志是否需要轮转，返回原因（'size' 或 'age'），不需要时返回 None。"""
+    try:
+        stat = os.stat(log_path)
+    except OSError:
+        return None
+    if stat.st_size == 0:
+        return None
+    max_size = (policy.get('max_size_mb') or 0) * MB
+    if max_size and stat.st_size >= max_size:
+        return 'size'
+    max_age = (policy.get('max_age_days') or 0) * DAY
+    if max_age:
+        # 当前日志从上一次轮转（或文件创建）开始累积；没有归档段且系统不提供创建时间时（例如 Linux），
+        # 以日志中第一条记录的时间为准
+        started = segments[-1].created if segments else _creation_time(stat)
+        if started is None:
+            started = _first_record_time(log_path)
+        if started is not None and now - started >= max_age:
+            return 'age'
+    return None
+
+
+def expired_segments(segments, policy, now) -> list:
+    """按保留策略返回一个服务中应删除的归档段。segments 为该服务所有日志的归档段。"""
+    expired = set()
+    keep_days = policy.get('keep_days') or 0
+    if keep_days:
+        expired.update(segment for segment in segments if now - segment.created > keep_days * DAY)
+
+    keep_segments = policy.get('keep_segments') or 0
+    if keep_segments:
+        by_log = {}
+        for segment in segments:
+            by_log.setdefault(segment.log_name, []).append(segment)
+        for log_segments in by_log.values():
+            log_segments.sort(key=lambda segment: (segment.created, segment.seq))
+            expired.update(log_segments[:-keep_segments])
+
+    max_total = (policy.get('max_total_mb') or 0) * MB
+    if max_total:
+        remaining = sorted((segment for segment in segments if segment not in expired),
+                           key=lambda segment: (segment.created, segment.seq))
+        total = sum(segment.compressed_size for segment in remaining)
+        for segment in remaining:
+            if total <= max_total:
+                break
+            expired.add(segment)
+            total -= segment.compressed_size
+    return sorted(expired, key=lambda segment: (segment.created, segment.seq))
+
+
+def format_size(size) -> str:
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+class LogMaintenance:
+    """
+    后台日志维护：定期按大小和时间把各服务的日志轮转为压缩归档段，按保留策略删除旧的归档段，
+    并统计每个服务的磁盘占用。策略见 DEFAULT_POLICY，可在 settings.json 中全局或按服务覆盖。
+    日志查看和搜索会透明地读取归档段（见 core.line_index 和 core.log_search）。
+    只轮转已停止（或未安装）的服务的日志：status_query(服务ID列表) 返回 {服务ID: 状态}，
+    未提供或查询不到状态时不轮转。运行中服务的 out/err 日志应使用 WinSW 自己的滚动（roll）模式。
+    """
+
+    INTERVAL = 300  # 两次维护之间的间隔（秒）
+
+    def __init__(self, settings_manager, configs_provider, log_callback=print, interval=None, status_query=None):
+        self.settings_manager = settings_manager
+        self.configs_provider = configs_provider  # 返回所有服务配置的函数
+        self.log_callback = log_callback
+        self.interval = interval or self.INTERVAL
+        self.status_query = status_query
+        self._lock = threading.Lock()  # 同一时间只进行一次维护
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='log-maintenance', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                self.log_callback(f"日志维护出错: {e}")
+            self._stop_event.wait(self.interval)
+
+    @staticmethod
+    def _new_summary() -> dict:
+        # deferred: 达到轮转条件、但服务没有停止而推迟轮转的日志数
+        return {'rotated': 0, 'deferred': 0, 'removed': 0, 'freed': 0, 'errors': []}
+
+    def _statuses(self, configs) -> dict:
+        service_ids = [config.get('id') for config in configs if config.get('id')]
+        if self.status_query is None or not service_ids:
+            return {}
+        try:
+            return self.status_query(service_ids)
+        except Exception as e:
+            self.log_callback(f"警告: 查询服务状态失败，本次不轮转日志: {e}")
+            return {}
+
+    def run_once(self, now=None) -> dict:
+        """对所有服务进行一次维护，返回汇总 {'rotated', 'deferred', 'removed', 'freed', 'errors'}。"""
+        summary = self._new_summary()
+        configs = list(self.configs_provider())
+        statuses = self._statuses(configs)
+        for config in configs:
+            if self._stop_event.is_set():
+                break
+            self._maintain(config, summary, now, force=False, status=statuses.get(config.get('id')))
+        if summary['rotated'] or summary['removed']:
+            self.log_callback(f"日志维护: 轮转 {summary['rotated']} 个日志，删除 {summary['removed']} 个过期归档，"
+                              f"释放 {format_size(summary['freed'])}。")
+        return summary
+
+    def rotate_now(self, config) -> dict:
+        """立即轮转一个已停止服务的所有非空日志（不论策略是否启用），然后按策略清理归档。"""
+        summary = self._new_summary()
+        status = self._statuses([config]).get(config.get('id'))
+        if config.get('id') and status not in ROTATABLE_STATUSES:
+            summary['errors'].append(f"服务 '{config['id']}' 没有停止（状态: {status or '未知'}），"
+                                     f"请先停止服务再归档日志")
+        self._maintain(config, summary, None, force=True, status=status)
+        return summary
+
+    def _maintain(self, config, summary, now, force, status=None):
+        service_id = config.get('id')
+        if not service_id:
+            return
+        policy = policy_for(self.settings_manager, service_id)
+        if not policy.get('enabled') and not force:
+            return
+        now = time.time() if now is None else now
+        with self._lock:
+            for path in (rotatable_logs(config) if not force else resolve_log_paths(config)).values():
+                reason = 'manual' if force else rotation_reason(path, policy, list_segments(path), now)
+                if reason is None:
+                    continue
+                if status not in ROTATABLE_STATUSES:
+                    summary['deferred'] += 1
+                    continue
+                try:
+                    size = os.path.getsize(path) if os.path.exists(path) else 0
+                    if rotate_log(path, policy.get('compression', AUTO), now) is not None:
+                        summary['rotated'] += 1
+                        summary['freed'] += size
+                except OSError as e:
+                    summary['errors'].append(f"轮转 {os.path.basename(path)} 失败: {e}")
+                    self.log_callback(f"警告: 轮转日志 {path} 失败: {e}")
+
+            segments = self.segments_of(config)
+            for segment in expired_segments(segments, policy, now):
+                size = segment.compressed_size
+                try:
+                    os.remove(segment.path)
+                except OSError as e:
+                    summary['errors'].append(f"删除 {os.path.basename(segment.path)} 失败: {e}")
+                    continue
+                summary['removed'] += 1
+                summary['freed'] += size
+
+    @staticmethod
+    def segments_of(config) -> list:
+        """返回一个服务所有日志的归档段。"""
+        segments = []
+        for path in resolve_log_paths(config).values():
+            segments.extend(list_segments(path))
+        return segments
+
+    def delete_archives(self, config) -> int:
+        """删除一个服务的所有归档段，返回删除的数量。"""
+        removed = 0
+        with self._lock:
+            for segment in self.segments_of(config):
+                try:
+                    os.remove(segment.path)
+                    removed += 1
+                except OSError as e:
+                    self.log_callback(f"警告: 删除归档 {segment.path} 失败: {e}")
+        return removed
+
+    def disk_usage(self, configs) -> list:
+        """
+        统计每个服务的日志磁盘占用，返回 [{'id', 'log_dir', 'active_bytes', 'archived_bytes',
+        'original_bytes', 'segments', 'oldest', 'policy'}]，按总占用从大到小排列。
+        original_bytes 为归档段解压后的大小，用于计算压缩率。
+        """
+        rows = []
+        for config in configs:
+            service_id = config.get('id')
+            if not service_id:
+                continue
+            active = 0
+            for path in resolve_log_paths(config).values():
+                try:
+                    active += os.path.getsize(path)
+                except OSError:
+                    pass
+            segments = self.segments_of(config)
+            rows.append({
+                'id': service_id,
+                'log_dir': resolve_log_dir(config),
+                'active_bytes': active,
+                'archived_bytes': sum(segment.compressed_size for segment in segments),
+                'original_bytes': sum(segment.size or 0 for segment in segments),
+                'segments': len(segments),
+                'oldest': min((segment.created for segment in segments), default=None),
+                'policy': policy_for(self.settings_manager, service_id),
+            })
+        rows.sort(key=lambda row: row['active_bytes'] + row['archived_bytes'], reverse=True)
+        return rows
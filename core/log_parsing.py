@@ -0,0 +1,480 @@
+import calendar
+import json
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from itertools import chain
+
+# 日志级别，数字越大越严重；续行（例如异常堆栈）继承所属记录的级别
+UNKNOWN, TRACE, DEBUG, INFO, WARN, ERROR, FATAL = range(7)
+LEVEL_NAMES = ('', 'TRACE', 'DEBUG', 'INFO', 'WARN', 'ERROR', 'FATAL')
+_LEVEL_ALIASES = {
+    'trace': TRACE, 'trce': TRACE, 'vrb': TRACE, 'verbose': TRACE, 'finest': TRACE, 'finer': TRACE,
+    'debug': DEBUG, 'dbug': DEBUG, 'dbg': DEBUG, 'fine': DEBUG, 'config': DEBUG,
+    'info': INFO, 'inf': INFO, 'information': INFO, 'notice': INFO,
+    'warn': WARN, 'warning': WARN, 'wrn': WARN,
+    'error': ERROR, 'err': ERROR, 'fail': ERROR, 'severe': ERROR,
+    'fatal': FATAL, 'ftl': FATAL, 'crit': FATAL, 'critical': FATAL, 'emerg': FATAL, 'alert': FATAL, 'panic': FATAL,
+}
+
+# 解析器预设
+AUTO = 'auto'
+PYTHON = 'python'
+JAVA = 'java'
+DOTNET = 'dotnet'
+JSON_LINES = 'json'
+PRESET_NAMES = {AUTO: "自动识别", PYTHON: "Python", JAVA: "Java", DOTNET: ".NET", JSON_LINES: "JSON"}
+
+_TIMESTAMP_RE = re.compile(
+    rb'(\d{4})-(\d{2})-(\d{2})[ T](\d{2}):(\d{2}):(\d{2})(?:[.,](\d{1,9}))?\s?(Z|[+-]\d{2}:?\d{2})?')
+_BLANK_BYTES = b' \t'
+# 各预设中时间戳部分的正则
+_TS = rb'\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(?:[.,]\d{1,9})?'
+_TZ = rb'(?:\s?(?:Z|[+-]\d{2}:?\d{2}))?'
+
+
+_level_cache = {}  # 原始字节串 -> 级别代码，日志中出现的写法很少，缓存后不必每次转换大小写
+
+
+def level_code(value) -> int:
+    """把级别名称（不区分大小写）转换为级别代码，无法识别时返回 UNKNOWN。"""
+    if isinstance(value, bytes):
+        code = _level_cache.get(value)
+        if code is None:
+            code = level_code(value.decode('ascii', errors='ignore'))
+            if len(_level_cache) < 1024:
+                _level_cache[value] = code
+        return code
+    if not isinstance(value, str):
+        return UNKNOWN
+    return _LEVEL_ALIASES.get(value.strip().lower(), UNKNOWN)
+
+
+@lru_cache(maxsize=4096)
+def _local_hour_start(year, month, day, hour):
+    return time.mktime((year, month, day, hour, 0, 0, 0, 0, -1))
+
+
+_second_cache = {}  # "YYYY-MM-DD HH:MM:SS" -> 本地时间戳，相邻的行大多在同一秒内
+
+
+def parse_timestamp(value):
+    """
+    解析 YYYY-MM-DD HH:MM:SS[.fff][时区] 格式的时间，返回时间戳；没有时区时按本地时间处理。
+    也接受数字（秒或毫秒）。无法解析时返回 None。
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value / 1000 if value > 1e11 else float(value)
+    if isinstance(value, str):
+        value = value.encode('ascii', errors='ignore')
+    if not value:
+        return None
+    # 快速路径：没有时区的本地时间，按秒缓存，只需另外解析小数部分
+    rest = value[19:]
+    if not rest or (rest[:1] in (b'.', b',') and rest[1:].isdigit()):
+        base = _second_cache.get(value[:19])
+        if base is None:
+            base = _parse_timestamp(value[:19])
+            if base is None:
+                return None
+            if len(_second_cache) >= 65536:
+                _second_cache.clear()
+            _second_cache[value[:19]] = base
+        return base + int(rest[1:]) / 10 ** (len(rest) - 1) if len(rest) > 1 else base
+    return _parse_timestamp(value)
+
+
+def _parse_timestamp(value):
+    m = _TIMESTAMP_RE.match(value)
+    if m is None:
+        return None
+    year, month, day, hour, minute, second = map(int, m.groups()[:6])
+    fraction = m.group(7)
+    seconds = minute * 60 + second + (int(fraction) / 10 ** len(fraction) if fraction else 0.0)
+    zone = m.group(8)
+    try:
+        if zone is None:
+            return _local_hour_start(year, month, day, hour) + seconds
+        utc = calendar.timegm((year, month, day, hour, 0, 0)) + seconds
+    except (OverflowError, ValueError):
+        return None
+    if zone != b'Z':
+        sign = -1 if zone[:1] == b'-' else 1
+        digits = zone[1:].replace(b':', b'')
+        utc -= sign * (int(digits[:2]) * 3600 + int(digits[2:4]) * 60)
+    return utc
+
+
+class RegexLineParser:
+    """
+    用正则表达式识别一条日志记录的首行。正则必须包含命名分组 level，可以包含 ts（时间）；
+    不匹配的行视为上一条记录的续行。
+    """
+
+    def __init__(self, name, pattern, flags=0):
+        self.name = name
+        self.regex = re.compile(pattern, flags)
+        self._has_ts = 'ts' in self.regex.groupindex
+
+    def parse(self, line: bytes):
+        """返回 (时间戳或 None, 级别)，不是记录首行时返回 None。"""
+        m = self.regex.match(line)
+        if m is None:
+            return None
+        ts = m.group('ts') if self._has_ts else None
+        return (parse_timestamp(ts) if ts else None), level_code(m.group('level'))
+
+
+class JsonLineParser:
+    """JSON Lines 格式：每行一个 JSON 对象，从常见的字段名中取时间和级别。"""
+
+    name = JSON_LINES
+    LEVEL_KEYS = ('level', 'lvl', 'severity', 'levelname', 'loglevel', '@l', 'log.level')
+    TIME_KEYS = ('timestamp', 'time', '@timestamp', 'ts', 'asctime', 'datetime', '@t', 'date')
+
+    def parse(self, line: bytes):
+        line = line.strip()
+        if not line.startswith(b'{') or not line.endswith(b'}'):
+            return None
+        try:
+            record = json.loads(line)
+        except ValueError:
+            return None
+        if not isinstance(record, dict):
+            return None
+        level = next((level_code(record[key]) for key in self.LEVEL_KEYS if key in record), UNKNOWN)
+        ts = next((parse_timestamp(record[key]) for key in self.TIME_KEYS if key in record), None)
+        return ts, level
+
+
+class ChainParser:
+    """
+    依次尝试多个解析器，第一个能识别的结果即为该行的结果。
+    adaptive 为 True 时把最近一次成功的解析器移到最前面，同一个文件的格式通常固定，大部分行只需尝试一次。
+    """
+
+    def __init__(self, name, parsers, adaptive=False):
+        self.name = name
+        self.parsers = list(parsers)
+        self.adaptive = adaptive
+        self.matched_name = None  # 最近一次识别出记录的解析器名称
+
+    def parse(self, line: bytes):
+        # 以空白开头的行（异常堆栈等）不会是任何预设格式的首行
+        if not line or line[0] in _BLANK_BYTES:
+            return None
+        for position, parser in enumerate(self.parsers):
+            result = parser.parse(line)
+            if result is not None:
+                if self.adaptive and position:
+                    self.parsers.insert(0, self.parsers.pop(position))
+                self.matched_name = parser.name
+                return result
+        return None
+
+
+def _preset_parsers():
+    levels = rb'(?P<level>TRACE|DEBUG|INFO|WARN|WARNING|ERROR|FATAL|SEVERE|CRITICAL)\b'
+    return {
+        # logging 模块："2024-01-02 03:04:05,123 - name - ERROR - ..."、"... ERROR ..." 和 basicConfig 的 "ERROR:root:..."
+        PYTHON: [
+            RegexLineParser(PYTHON, rb'^\[?(?P<ts>' + _TS + rb')\]?\s*(?:[-|:]\s*)?(?:\[?[\w.\-]+\]?\s*[-|:]\s*)?'
+                            rb'(?P<level>DEBUG|INFO|WARNING|ERROR|CRITICAL)\b'),
+            RegexLineParser(PYTHON, rb'^(?P<level>DEBUG|INFO|WARNING|ERROR|CRITICAL):[\w.]*:'),
+        ],
+        # log4j/logback/Spring Boot，以及 WinSW 自身的 wrapper.log（log4net）："2024-01-02 03:04:05.123 [main] ERROR ..."
+        JAVA: [
+            RegexLineParser(JAVA, rb'^\[?(?P<ts>' + _TS + _TZ + rb')\]?\s+(?:\[[^\]]*\]\s+)?' + levels),
+        ],
+        # Serilog、NLog 和 Microsoft.Extensions.Logging 控制台格式
+        DOTNET: [
+            RegexLineParser(DOTNET, rb'^\[?(?P<ts>' + _TS + _TZ + rb')\]?\s*\[(?P<level>VRB|DBG|INF|WRN|ERR|FTL)\]'),
+            RegexLineParser(DOTNET, rb'^\[\d{2}:\d{2}:\d{2} (?P<level>VRB|DBG|INF|WRN|ERR|FTL)\]'),
+            RegexLineParser(DOTNET, rb'^(?P<ts>' + _TS + rb')\|(?P<level>TRACE|DEBUG|INFO|WARN|ERROR|FATAL)\|'),
+            RegexLineParser(DOTNET, rb'^(?:(?P<ts>' + _TS + _TZ + rb')\s+)?(?P<level>trce|dbug|info|warn|fail|crit): '),
+        ],
+        JSON_LINES: [JsonLineParser()],
+    }
+
+
+def create_parser(preset=AUTO) -> ChainParser:
+    """按预设名称创建解析器；AUTO 尝试所有预设并自动适应文件的格式。"""
+    presets = _preset_parsers()
+    if preset in presets:
+        return ChainParser(preset, presets[preset])
+    # Java 的格式最通用（WinSW 自身的 wrapper.log 也是这种格式），放在最前面
+    order = (JAVA, PYTHON, DOTNET, JSON_LINES)
+    return ChainParser(AUTO, chain.from_iterable(presets[name] for name in order), adaptive=True)
+
+
+def _bisect_rows(rows, times, value):
+    """rows 按时间有序，返回第一个时间不小于 value 的位置。"""
+    lo, hi = 0, len(rows)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if times[rows[mid]] < value:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+class LogColumnStore:
+    """
+    一个日志文件解析结果的列式存储，每行在各个 array 中占一项：
+    starts（行的逻辑起始偏移，与 LineIndex 一致）、times（时间戳，续行继承所属记录，未知为 0）、
+    levels（级别，续行继承）和 records（是否为一条记录的首行）。
+    另外按级别保存行号列表、按分钟保存记录数、警告数和错误数，
+    因此按级别和时间范围筛选只需二分查找和合并，错误率图只需汇总分钟计数，不必逐行扫描。
+    作为 LineIndex 的 chunk_listener 在索引线程中增量解析新数据。
+    """
+
+    # 没有换行的超长行只保留开头这么多字节用于解析
+    MAX_LINE_BYTES = 64 * 1024
+
+    def __init__(self, parser):
+        self.parser = parser
+        self._lock = threading.Lock()
+        self.generation = 0  # 已有的行被丢弃（文件截断或轮转）时加一
+        self.version = 0  # 每次有变化时加一，界面据此判断是否需要重绘
+        self._clear()
+
+    def _clear(self):
+        self.starts = array('Q')
+        self.times = array('d')
+        self.levels = array('B')
+        self.records = array('B')
+        self._level_rows = [array('I') for _ in LEVEL_NAMES]
+        self._buckets = {}  # 分钟 -> [记录数, 警告数, 错误数]
+        self.time_sorted = True  # 时间是否单调不减，是时时间范围可以二分查找
+        self._end = None  # 已处理数据的逻辑结束偏移
+        self._carry = b''  # 尚未结束的最后一行（只保留开头部分）
+        self._carry_start = 0
+        self._carry_len = 0
+        self._last_time = 0.0
+        self._last_level = UNKNOWN
+
+    # --- 写入（索引线程） ---
+
+    def on_chunk(self, index, chunk):
+        """LineIndex 的 chunk_listener。"""
+        self.feed(chunk.offset, chunk.data)
+
+    def feed(self, offset, data):
+        with self._lock:
+            if self._end is None:
+                self._end = self._carry_start = offset
+            elif offset != self._end:
+                self._truncate(offset)
+        if data:
+            self._ingest(offset, data)
+
+    def _truncate(self, offset):
+        """数据从 offset 处重新开始：丢弃起点在 offset 之后的行。调用时持有锁。"""
+        if self._carry_start <= offset <= self._carry_start + self._carry_len:
+            # 只回退了尚未结束的最后一行
+            self._carry_len = offset - self._carry_start
+            self._carry = self._carry[:self._carry_len]
+        else:
+            self._carry, self._carry_len, self._carry_start = b'', 0, offset
+            keep = bisect_left(self.starts, offset)
+            if keep < len(self.starts):
+                self._drop_rows(keep)
+        self._end = offset
+
+    def _drop_rows(self, keep):
+        for row in range(keep, len(self.starts)):
+            if self.records[row]:
+                self._count(self.times[row], self.levels[row], -1)
+        for column in (self.starts, self.times, self.levels, self.records):
+            del column[keep:]
+        for rows in self._level_rows:
+            del rows[bisect_left(rows, keep):]
+        self._last_time = self.times[-1] if keep else 0.0
+        self._last_level = self.levels[-1] if keep else UNKNOWN
+        self.generation += 1
+        self.version += 1
+
+    def _count(self, ts, level, delta):
+        if ts <= 0:
+            return
+        bucket = self._buckets.setdefault(int(ts // 60), [0, 0, 0])
+        bucket[0] += delta
+        if level == WARN:
+            bucket[1] += delta
+        elif level >= ERROR:
+            bucket[2] += delta
+
+    def _ingest(self, offset, data):
+        # 先在锁外解析，再一次性追加，避免解析大块数据时阻塞界面的查询
+        starts, times, levels, records = array('Q'), array('d'), array('B'), array('B')
+        parse = self.parser.parse
+        last_time, last_level = self._last_time, self._last_level
+        sorted_so_far = True
+
+        def add(start, line):
+            nonlocal last_time, last_level, sorted_so_far
+            result = parse(line) if line else None
+            if result is None:
+                records.append(0)
+            else:
+                ts, last_level = result
+                if ts is not None:
+                    if ts < last_time:
+                        sorted_so_far = False
+                    last_time = ts
+                records.append(1)
+            starts.append(start)
+            times.append(last_time)
+            levels.append(last_level)
+
+        position = 0
+        newline = data.find(b'\n')
+        if self._carry_len:
+            # 接上一块中未结束的行
+            if newline < 0:
+                self._carry += data[:max(0, self.MAX_LINE_BYTES - len(self._carry))]
+                self._carry_len += len(data)
+                self._end = offset + len(data)
+                return
+            add(self._carry_start, (self._carry + data[:newline])[:self.MAX_LINE_BYTES])
+            position = newline + 1
+        last_newline = data.rfind(b'\n')
+        if last_newline >= position:
+            start = offset + position
+            for line in data[position:last_newline].split(b'\n'):
+                add(start, line[:self.MAX_LINE_BYTES])
+                start += len(line) + 1
+            position = last_newline + 1
+
+        with self._lock:
+            if self._end != offset:
+                return  # 解析期间被截断（不会发生：写入只在索引线程中进行）
+            first_row = len(self.starts)
+            self.starts.extend(starts)
+            self.times.extend(times)
+            self.levels.extend(levels)
+            self.records.extend(records)
+            for row, (ts, level, record) in enumerate(zip(times, levels, records), first_row):
+                if level:
+                    self._level_rows[level].append(row)
+                if record:
+                    self._count(ts, level, 1)
+            self.time_sorted = self.time_sorted and sorted_so_far
+            self._last_time, self._last_level = last_time, last_level
+            self._carry_start = offset + position
+            self._carry = data[position:position + self.MAX_LINE_BYTES]
+            self._carry_len = len(data) - position
+            self._end = offset + len(data)
+            if starts:
+                self.version += 1
+
+    # --- 查询（界面线程） ---
+
+    def __len__(self):
+        with self._lock:
+            return len(self.starts)
+
+    def select(self, min_level=UNKNOWN, start_time=None, end_time=None, from_row=0):
+        """
+        返回 (从第 from_row 行开始满足条件的行的起始偏移 array('Q'), 当前总行数)。
+        min_level 以上的级别；时间范围为 [start_time, end_time)，设置了时间范围时不包括时间未知的行。
+        """
+        with self._lock:
+            total = len(self.starts)
+            if min_level > UNKNOWN:
+                lists = [rows[bisect_left(rows, from_row):] for rows in self._level_rows[min_level:]]
+                lists = [rows for rows in lists if rows]
+                if len(lists) == 1:
+                    rows = lists[0]
+                else:
+                    rows = array('I', sorted(chain.from_iterable(lists)))
+            else:
+                rows = range(from_row, total)
+
+            if start_time is not None or end_time is not None:
+                times = self.times
+                low = start_time if start_time is not None else 1.0
+                if self.time_sorted:
+                    lo = _bisect_rows(rows, times, low)
+                    hi = _bisect_rows(rows, times, end_time) if end_time is not None else len(rows)
+                    rows = rows[lo:max(lo, hi)]
+                else:
+                    rows = [row for row in rows
+                            if times[row] >= low and (end_time is None or times[row] < end_time)]
+
+            if isinstance(rows, range):
+                return self.starts[rows.start:rows.stop], total
+            return array('Q', map(self.starts.__getitem__, rows)), total
+
+    def rate_buckets(self, bucket_seconds=60):
+        """按 bucket_seconds（60 的整数倍）汇总记录数，返回 [(起始时间, 记录数, 警告数, 错误数)]，按时间排序。"""
+        factor = max(1, int(bucket_seconds // 60))
+        merged = {}
+        with self._lock:
+            for minute, (count, warnings, errors) in self._buckets.items():
+                if count <= 0:
+                    continue
+                entry = merged.setdefault(minute // factor, [0, 0, 0])
+                entry[0] += count
+                entry[1] += warnings
+                entry[2] += errors
+        return [(key * factor * 60, *merged[key]) for key in sorted(merged)]
+
+    def record_count(self) -> int:
+        with self._lock:
+            return sum(bucket[0] for bucket in self._buckets.values())
+
+
+class FilteredLines:
+    """
+    VirtualLogView 的数据来源：只包含 LogColumnStore 中满足筛选条件的行，行内容仍从 LineIndex 读取。
+    新数据到来时只检查新增的行；存储被截断时整体重建。
+    """
+
+    def __init__(self, index, store, min_level=UNKNOWN, start_time=None, end_time=None):
+        self.index = index
+        self.store = store
+        self.criteria = (min_level, start_time, end_time)
+        self.generation = 0
+        self._offsets = array('Q')
+        self._scanned = 0
+        self._store_generation = store.generation
+
+    def _update(self):
+        if self.store.generation != self._store_generation:
+            self._store_generation = self.store.generation
+            self._offsets = array('Q')
+            self._scanned = 0
+            self.generation += 1
+        offsets, self._scanned = self.store.select(*self.criteria, from_row=self._scanned)
+        self._offsets.extend(offsets)
+
+    def line_count(self) -> int:
+        self._update()
+        return len(self._offsets)
+
+    def line_for_offset(self, offset) -> int:
+        """返回起点不超过 offset 的最后一个匹配行。"""
+        return max(0, bisect_right(self._offsets, offset) - 1)
+
+    def read_lines(self, start, count) -> list:
+        if start < 0 or count <= 0:
+            return []
+        line_numbers = [self.index.line_for_offset(offset) for offset in self._offsets[start:start + count]]
+        lines = []
+        # 连续的行一次读取
+        run_start = None
+        run_length = 0
+        for line_no in line_numbers + [None]:
+            if run_start is not None and line_no == run_start + run_length:
+                run_length += 1
+                continue
+            if run_start is not None:
+                chunk = self.index.read_lines(run_start, run_length)
+                lines.extend(chunk + [''] * (run_length - len(chunk)))
+            run_start, run_length = line_no, 1
+        return lines
@@ -0,0 +1,28 @@
+import os
+
+from core.app_paths import app_dir
+
+# 日志类型 -> WinSW 生成的日志文件后缀
+LOG_SUFFIXES = ("wrapper.log", "out.log", "err.log")
+
+
+def resolve_log_dir(config: dict):
+    """根据服务配置确定日志目录；logpath 未设置或不存在时回退到 deploy/<id>。"""
+    service_id = config.get('id')
+    if not service_id:
+        return None
+
+    log_dir = config.get('logpath')
+    if not log_dir or not os.path.isdir(log_dir):
+        base_deploy_dir = os.path.join(app_dir(), "deploy")
+        log_dir = os.path.join(base_deploy_dir, service_id)
+    return log_dir
+
+
+def resolve_log_paths(config: dict) -> dict:
+    """返回 {日志后缀: 日志文件路径}，服务ID为空时返回空字典。"""
+    log_dir = resolve_log_dir(config)
+    if not log_dir:
+        return {}
+    service_id = config['id']
+    return {suffix: os.path.join(log_dir, f"{service_id}.{suffix}") for suffix in LOG_SUFFIXES}
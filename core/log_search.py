@@ -0,0 +1,394 @@
+import hashlib
+import os
+import re
+import struct
+import threading
+import zlib
+
+from core.log_archive import LogSegment, is_segment_path
+
+try:
+    import re._parser as _re_parser  # Python 3.11+
+except ImportError:  # pragma: no cover
+    import sre_parse as _re_parser
+
+_WORD_RE = re.compile(rb'\w{3,}')
+
+
+def _trigrams_of_words(words):
+    """返回一组单词（小写字节串）中出现的所有三元组。"""
+    return {word[i:i + 3] for word in words for i in range(len(word) - 2)}
+
+
+def required_trigrams(pattern, is_regex) -> set:
+    """
+    提取任何匹配都必然包含的三元组（小写），用于过滤数据块。
+    只考虑顶层（及顶层分组内）连续的字面字符，无法确定时返回空集合，表示不做过滤。
+    """
+    if not is_regex:
+        literals = [pattern]
+    else:
+        try:
+            parsed = _re_parser.parse(pattern)
+        except (re.error, Exception):
+            return set()
+        literals = []
+        _collect_literals(parsed, literals)
+    words = set()
+    for literal in literals:
+        words.update(_WORD_RE.findall(literal.lower().encode('utf-8', errors='ignore')))
+    return _trigrams_of_words(words)
+
+
+def _collect_literals(items, literals):
+    run = []
+    for op, value in items:
+        if op is _re_parser.LITERAL:
+            run.append(chr(value))
+            continue
+        if run:
+            literals.append(''.join(run))
+            run = []
+        if op is _re_parser.SUBPATTERN:
+            _collect_literals(value[-1], literals)
+    if run:
+        literals.append(''.join(run))
+
+
+class BlockBloomIndex:
+    """
+    一个日志文件的持久化分块布隆过滤器索引，保存在日志目录下的 .search 子目录中。
+    文件按完整行切分为约 BLOCK_SIZE 大小的块，每块记录其中所有单词三元组的布隆过滤器；
+    搜索时只需读取可能包含查询三元组的块。新追加的数据增量建立索引。
+    """
+
+    MAGIC = b'WSIX1'
+    BLOCK_SIZE = 256 * 1024
+    BLOOM_BYTES = 4096
+    FINGERPRINT_BYTES = 4096
+    # magic, 布隆过滤器字节数, 指纹长度, 指纹(sha1)
+    HEADER = struct.Struct('<5sHI20s')
+    RECORD = struct.Struct('<QI')
+
+    def __init__(self, log_path):
+        self.log_path = log_path
+        log_dir, log_name = os.path.split(log_path)
+        self.index_path = os.path.join(log_dir, '.search', f"{log_name}.idx")
+        self.lock = threading.Lock()
+        self.blocks = []  # [(offset, length, bloom_int)]
+        self.indexed_end = 0
+        self._fingerprint = (0, b'\0' * 20)
+        self._bloom_shift = (self.BLOOM_BYTES * 8).bit_length() - 1
+        self._bloom_mask = (1 << self._bloom_shift) - 1
+        self._loaded = False
+
+    # ---------- 持久化 ----------
+
+    def _load(self):
+        self._loaded = True
+        self.blocks = []
+        self.indexed_end = 0
+        try:
+            with open(self.index_path, 'rb') as f:
+                header = f.read(self.HEADER.size)
+                if len(header) < self.HEADER.size:
+                    return
+                magic, bloom_bytes, fp_len, fp_hash = self.HEADER.unpack(header)
+                if magic != self.MAGIC or bloom_bytes != self.BLOOM_BYTES:
+                    return
+                self._fingerprint = (fp_len, fp_hash)
+                record_size = self.RECORD.size + self.BLOOM_BYTES
+                while True:
+                    record = f.read(record_size)
+                    if len(record) < record_size:
+                        break  # 忽略写入中断留下的不完整记录
+                    offset, length = self.RECORD.unpack_from(record)
+                    bloom = int.from_bytes(record[self.RECORD.size:], 'little')
+                    self.blocks.append((offset, length, bloom))
+                    self.indexed_end = offset + length
+        except OSError:
+            self.blocks = []
+            self.indexed_end = 0
+
+    def _write_all(self):
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(self.HEADER.pack(self.MAGIC, self.BLOOM_BYTES, *self._fingerprint))
+            for offset, length, bloom in self.blocks:
+                f.write(self.RECORD.pack(offset, length))
+                f.write(bloom.to_bytes(self.BLOOM_BYTES, 'little'))
+        os.replace(tmp_path, self.index_path)
+
+    def _append_blocks(self, new_blocks, existing_count):
+        if not os.path.exists(self.index_path):
+            self._write_all()
+            return
+        with open(self.index_path, 'r+b') as f:
+            # 指纹可能随文件增长而更新，头部长度固定，可原地覆盖
+            f.write(self.HEADER.pack(self.MAGIC, self.BLOOM_BYTES, *self._fingerprint))
+            f.seek(self.HEADER.size + existing_count * (self.RECORD.size + self.BLOOM_BYTES))
+            f.truncate()
+            for offset, length, bloom in new_blocks:
+                f.write(self.RECORD.pack(offset, length))
+                f.write(bloom.to_bytes(self.BLOOM_BYTES, 'little'))
+
+    # ---------- 建立索引 ----------
+
+    def _read_fingerprint(self, f, length):
+        f.seek(0)
+        return hashlib.sha1(f.read(length)).digest()
+
+    def update(self, max_bytes=None) -> int:
+        """为新追加的完整块建立索引，返回本次索引的字节数。文件被轮转或截断时重建。"""
+        with self.lock:
+            if not self._loaded:
+                self._load()
+            try:
+                f = open(self.log_path, 'rb')
+            except OSError:
+                return 0
+            with f:
+                size = os.fstat(f.fileno()).st_size
+                fp_len, fp_hash = self._fingerprint
+                if size < self.indexed_end or (fp_len and self._read_fingerprint(f, fp_len) != fp_hash):
+                    self.blocks = []
+                    self.indexed_end = 0
+                    self._fingerprint = (0, b'\0' * 20)
+                    self._write_all()
+
+                new_blocks = []
+                position = self.indexed_end
+                budget = max_bytes if max_bytes is not None else size
+                while size - position >= self.BLOCK_SIZE and budget > 0:
+                    f.seek(position)
+                    data = f.read(self.BLOCK_SIZE)
+                    # 块在最后一个换行处结束，保证一行不会跨块
+                    cut = data.rfind(b'\n') + 1
+                    if cut <= 0:
+                        cut = len(data)
+                    new_blocks.append((position, cut, self._bloom_of(data[:cut])))
+                    position += cut
+                    budget -= cut
+
+                if not new_blocks:
+                    return 0
+                fp_target = min(size, self.FINGERPRINT_BYTES)
+                if fp_target > self._fingerprint[0]:
+                    self._fingerprint = (fp_target, self._read_fingerprint(f, fp_target))
+            existing_count = len(self.blocks)
+            self.blocks.extend(new_blocks)
+            self.indexed_end = position
+            try:
+                self._append_blocks(new_blocks, existing_count)
+            except OSError as e:
+                print(f"警告: 无法写入搜索索引 {self.index_path}: {e}")
+            return sum(length for _, length, _ in new_blocks)
+
+    def _bloom_positions(self, trigram):
+        # 布隆过滤器位数为2的幂，用一次crc32的高低两段作为两个哈希位置
+        value = zlib.crc32(trigram)
+        return value & self._bloom_mask, (value >> self._bloom_shift) & self._bloom_mask
+
+    def _bloom_of(self, data) -> int:
+        bits = bytearray(self.BLOOM_BYTES)
+        mask, shift = self._bloom_mask, self._bloom_shift
+        words = set(_WORD_RE.findall(data.lower()))
+        for trigram in _trigrams_of_words(words):
+            value = zlib.crc32(trigram)
+            first, second = value & mask, (value >> shift) & mask
+            bits[first >> 3] |= 1 << (first & 7)
+            bits[second >> 3] |= 1 << (second & 7)
+        return int.from_bytes(bits, 'little')
+
+    def query_mask(self, trigrams) -> int:
+        mask = 0
+        for trigram in trigrams:
+            for position in self._bloom_positions(trigram):
+                mask |= 1 << position
+        return mask
+
+    def candidate_ranges(self, trigrams):
+        """返回可能包含全部三元组的 (offset, length) 列表，以及尚未建立索引的尾部起点。"""
+        with self.lock:
+            blocks = list(self.blocks)
+            tail_start = self.indexed_end
+        if not trigrams:
+            return [(offset, length) for offset, length, _ in blocks], tail_start
+        mask = self.query_mask(trigrams)
+        return [(offset, length) for offset, length, bloom in blocks if bloom & mask == mask], tail_start
+
+
+class SearchMatch:
+    """一条搜索结果。"""
+
+    def __init__(self, service_id, suffix, path, offset, line):
+        self.service_id = service_id
+        self.suffix = suffix
+        self.path = path  # 日志文件或归档段的路径
+        self.offset = offset  # 匹配行在文件中（归档段为解压后的内容中）的起始字节偏移
+        self.line = line
+
+
+class LogSearchEngine:
+    """
+    管理各日志文件的搜索索引：
+    - watch() 指定的文件由后台线程周期性增量索引；
+    - search() 在后台线程中执行查询，结果通过回调逐条回传。
+    压缩的归档段不建立索引，搜索时流式解压后逐块扫描。
+    """
+
+    WATCH_INTERVAL = 2.0
+    # 每次周期性更新最多索引的字节数，避免首次建立大文件索引时长时间占用磁盘
+    WATCH_BUDGET = 64 * 1024 * 1024
+    MAX_RESULTS = 5000
+    TAIL_READ_SIZE = 4 * 1024 * 1024
+
+    def __init__(self):
+        self._indexes = {}
+        self._lock = threading.Lock()
+        self._watched = []
+        self._stop_event = threading.Event()
+        self._watch_thread = None
+
+    def get_index(self, path) -> BlockBloomIndex:
+        key = os.path.normcase(os.path.abspath(path))
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is None:
+                index = self._indexes[key] = BlockBloomIndex(path)
+            return index
+
+    def watch(self, paths):
+        """设置需要在后台持续增量索引的日志文件。"""
+        self._watched = list(paths)
+        if self._watch_thread is None:
+            self._watch_thread = threading.Thread(target=self._watch_loop, name='log-search-index', daemon=True)
+            self._watch_thread.start()
+
+    def shutdown(self):
+        self._stop_event.set()
+
+    def _watch_loop(self):
+        while not self._stop_event.wait(self.WATCH_INTERVAL):
+            for path in list(self._watched):
+                if os.path.exists(path):
+                    try:
+                        self.get_index(path).update(self.WATCH_BUDGET)
+                    except OSError:
+                        pass
+
+    def search(self, targets, pattern, is_regex=False, ignore_case=True, result_callback=None,
+               done_callback=None, cancel_event=None):
+        """
+        在后台线程中搜索。targets 为 [(service_id, suffix, path)]。
+        result_callback(SearchMatch) 逐条回传结果；done_callback(count, error) 在结束时调用。
+        """
+        cancel_event = cancel_event or threading.Event()
+
+        def worker():
+            count, error = 0, None
+            try:
+                regex = self._compile(pattern, is_regex, ignore_case)
+                trigrams = required_trigrams(pattern, is_regex)
+                for service_id, suffix, path in targets:
+                    if cancel_event.is_set() or count >= self.MAX_RESULTS:
+                        break
+                    for match in self._search_file(service_id, suffix, path, regex, trigrams, cancel_event):
+                        if result_callback:
+                            result_callback(match)
+                        count += 1
+                        if count >= self.MAX_RESULTS:
+                            break
+            except re.error as e:
+                error = f"正则表达式无效: {e}"
+            except Exception as e:
+                error = str(e)
+            if done_callback:
+                done_callback(count, error)
+
+        threading.Thread(target=worker, name='log-search', daemon=True).start()
+        return cancel_event
+
+    @staticmethod
+    def _compile(pattern, is_regex, ignore_case):
+        source = pattern if is_regex else re.escape(pattern)
+        flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+        return re.compile(source.encode('utf-8'), flags)
+
+    def _search_file(self, service_id, suffix, path, regex, trigrams, cancel_event):
+        if not os.path.exists(path):
+            return
+        if is_segment_path(path):
+            yield from self._search_segment(service_id, suffix, path, regex, cancel_event)
+            return
+        index = self.get_index(path)
+        index.update()
+        ranges, tail_start = index.candidate_ranges(trigrams)
+        try:
+            f = open(path, 'rb')
+        except OSError:
+            return
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            position = tail_start
+            while position < size:
+                # 尾部尚未建立索引的部分直接扫描
+                length = min(self.TAIL_READ_SIZE, size - position)
+                f.seek(position)
+                data = f.read(length)
+                if position + len(data) < size:
+                    cut = data.rfind(b'\n') + 1
+                    data = data[:cut] if cut > 0 else data
+                ranges.append((position, len(data)))
+                position += max(1, len(data))
+
+            for offset, length in ranges:
+                if cancel_event.is_set():
+                    return
+                f.seek(offset)
+                yield from self._matches_in(service_id, suffix, path, f.read(length), offset, regex)
+
+    def _search_segment(self, service_id, suffix, path, regex, cancel_event):
+        """流式解压归档段，按完整行切块扫描。"""
+        segment = LogSegment.from_path(path)
+        try:
+            f = segment.open()
+        except OSError as e:
+            print(f"警告: 无法读取日志归档 {path}: {e}")
+            return
+        position, carry = 0, b''
+        try:
+            with f:
+                while not cancel_event.is_set():
+                    data = f.read(self.TAIL_READ_SIZE)
+                    block = carry + data
+                    if not block:
+                        break
+                    carry = b''
+                    if data:
+                        # 最后一行可能不完整，留到下一块
+                        cut = block.rfind(b'\n') + 1
+                        if 0 < cut < len(block):
+                            block, carry = block[:cut], block[cut:]
+                    yield from self._matches_in(service_id, suffix, path, block, position, regex)
+                    position += len(block)
+                    if not data:
+                        break
+        except Exception as e:
+            # 归档段损坏（例如写入中断）时跳过剩余部分
+            print(f"警告: 读取日志归档 {path} 时出错: {e}")
+
+    @staticmethod
+    def _matches_in(service_id, suffix, path, data, offset, regex):
+        """在一块完整行组成的数据中查找匹配，offset 为数据在文件中的起始偏移。"""
+        last_line_start = -1
+        for m in regex.finditer(data):
+            line_start = data.rfind(b'\n', 0, m.start()) + 1
+            if line_start == last_line_start:
+                continue  # 同一行只报告一次
+            last_line_start = line_start
+            line_end = data.find(b'\n', m.start())
+            line = data[line_start:line_end if line_end >= 0 else len(data)]
+            yield SearchMatch(service_id, suffix, path, offset + line_start,
+                              line.decode('utf-8', errors='replace').rstrip('\r'))
@@ -0,0 +1,84 @@
+import os
+from collections import namedtuple
+
+# offset: data 在文件中的起始字节偏移；reset: 本次读取前检测到文件轮转或截断，读取位置已重置
+TailChunk = namedtuple('TailChunk', ['offset', 'data', 'reset', 'has_more'])
+
+
+class LogTailer:
+    """
+    内存有界的日志跟踪读取器。
+    - 首次打开只读取文件最后 initial_bytes 字节（从下一个完整行开始）；initial_bytes 为 None 时从头读取。
+    - 之后每次 poll() 最多读取 chunk_size 字节新数据。
+    - 文件句柄在多次 poll() 之间保持打开；通过 inode/设备号和文件大小检测轮转与截断，
+      而不是每次都重新打开文件。
+    """
+
+    def __init__(self, path, initial_bytes=2 * 1024 * 1024, chunk_size=256 * 1024):
+        self.path = path
+        self.initial_bytes = initial_bytes
+        self.chunk_size = chunk_size
+        self._file = None
+        self._identity = None
+        self.position = 0
+
+    def poll(self):
+        """读取新数据，返回 TailChunk；文件不存在时返回 None。"""
+        reset = False
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            # 文件被删除或尚未创建
+            if self._file is not None:
+                self.close()
+            return None
+
+        if self._file is None:
+            self._open(from_start=False)
+        elif (stat.st_dev, stat.st_ino) != self._identity:
+            # 文件被轮转：路径指向了一个新文件，从头读取新文件
+            self.close()
+            self._open(from_start=True)
+            reset = True
+        elif stat.st_size < self.position:
+            # 文件被截断
+            self.position = 0
+            reset = True
+
+        if self._file is None:
+            return None
+
+        self._file.seek(self.position)
+        data = self._file.read(self.chunk_size)
+        offset = self.position
+        self.position += len(data)
+        return TailChunk(offset, data, reset, self.position < stat.st_size)
+
+    def close(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+        self._file = None
+        self._identity = None
+
+    def _open(self, from_start):
+        try:
+            self._file = open(self.path, 'rb')
+        except OSError:
+            self._file = None
+            return
+        fstat = os.fstat(self._file.fileno())
+        self._identity = (fstat.st_dev, fstat.st_ino)
+
+        size = fstat.st_size
+        if from_start or self.initial_bytes is None or size <= self.initial_bytes:
+            self.position = 0
+            return
+
+        # 只从文件末尾 initial_bytes 处开始，并跳到下一个完整行
+        start = size - self.initial_bytes
+        self._file.seek(start)
+        self._file.readline(self.chunk_size)
+        self.position = self._file.tell()
@@ -0,0 +1,224 @@
+import heapq
+import os
+import threading
+import time
+from collections import namedtuple
+
+from core.log_parsing import AUTO, create_parser
+from core.log_tailer import LogTailer
+
+# 合并时间线中的一行。ts 为所属记录的时间（续行继承），用于排序
+TimelineEntry = namedtuple('TimelineEntry', ['ts', 'service_id', 'suffix', 'text'])
+
+SUFFIX_LABELS = {'wrapper.log': 'wrapper', 'out.log': 'out', 'err.log': 'err'}
+
+
+class TimelineFile:
+    """
+    合并时间线中的一个日志文件：用 LogTailer 跟踪读取，逐行解析出时间，没有时间的行继承上一条记录的时间。
+    第一次读取只从文件末尾 history_bytes 处开始，之后只读取新追加的数据，文件不会被整个读入内存。
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, service_id, suffix, path, history_bytes, preset=AUTO):
+        self.service_id = service_id
+        self.suffix = suffix
+        self.path = path
+        self.parser = create_parser(preset)
+        self.tailer = LogTailer(path, initial_bytes=history_bytes, chunk_size=self.CHUNK_SIZE)
+        self.last_ts = None
+        self._carry = b''
+        self._pending = []  # 第一条记录之前的行，等确定时间后再输出
+
+    def _entries(self, data, fallback_ts):
+        """把新数据中的完整行转换为 TimelineEntry。fallback_ts 用于还没有出现任何记录时的行。"""
+        data = self._carry + data
+        cut = data.rfind(b'\n') + 1
+        self._carry = data[cut:]
+        entries = []
+        for line in data[:cut].split(b'\n')[:-1]:
+            result = self.parser.parse(line)
+            if result is not None and result[0] is not None:
+                self.last_ts = result[0]
+                if self._pending:
+                    entries.extend(entry._replace(ts=self.last_ts) for entry in self._pending)
+                    self._pending = []
+            text = line.decode('utf-8', errors='replace').rstrip('\r')
+            if self.last_ts is None and fallback_ts is None:
+                self._pending.append(TimelineEntry(0.0, self.service_id, self.suffix, text))
+            else:
+                ts = self.last_ts if self.last_ts is not None else fallback_ts
+                entries.append(TimelineEntry(ts, self.service_id, self.suffix, text))
+        return entries
+
+    def history(self):
+        """逐块读取文件末尾的历史部分，按文件中的顺序产生 TimelineEntry（生成器）。"""
+        while True:
+            try:
+                chunk = self.tailer.poll()
+            except OSError:
+                chunk = None
+            if chunk is None:
+                break
+            yield from self._entries(chunk.data, None)
+            if not chunk.has_more:
+                break
+        if self._pending:
+            # 历史中没有任何带时间的记录，使用文件的修改时间
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError:
+                mtime = 0.0
+            pending, self._pending = self._pending, []
+            yield from (entry._replace(ts=mtime) for entry in pending)
+
+    def poll(self) -> list:
+        """读取新追加的数据。还没有出现带时间的记录时，以读取时刻作为时间。"""
+        entries = []
+        while True:
+            try:
+                chunk = self.tailer.poll()
+            except OSError:
+                return entries
+            if chunk is None:
+                return entries
+            if chunk.reset:
+                self._carry = b''
+            entries.extend(self._entries(chunk.data, time.time()))
+            if not chunk.has_more:
+                return entries
+
+    def close(self):
+        self.tailer.close()
+
+
+class MergedTimeline:
+    """
+    合并后的时间线，作为 VirtualLogView 的数据来源。最多保留 max_entries 行，超出时成批丢弃最旧的行。
+    line_tags() 返回每行所属服务的标签名，用于按服务着色。
+    """
+
+    def __init__(self, max_entries=200000):
+        self.max_entries = max_entries
+        self._entries = []
+        self._lock = threading.Lock()
+        self.dropped = 0  # 因超出上限而丢弃的行数
+        self.late = 0  # 比已显示的行更早、无法按顺序插入的行数
+        self.label_width = 0
+        self._last_ts = None
+
+    @staticmethod
+    def tag_for(service_id) -> str:
+        return f"service:{service_id}"
+
+    def extend(self, entries):
+        if not entries:
+            return
+        with self._lock:
+            for entry in entries:
+                if self._last_ts is not None and entry.ts < self._last_ts:
+                    self.late += 1
+                else:
+                    self._last_ts = entry.ts
+            self._entries.extend(entries)
+            # 超出上限 10% 时一次丢弃，避免每追加一行都移动整个列表
+            if len(self._entries) > self.max_entries * 1.1:
+                excess = len(self._entries) - self.max_entries
+                del self._entries[:excess]
+                self.dropped += excess
+
+    def line_count(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    @property
+    def indexed_end(self) -> int:
+        """累计追加的行数。丢弃旧行后行数可能不变，VirtualLogView 用它判断内容是否变化。"""
+        with self._lock:
+            return self.dropped + len(self._entries)
+
+    def _slice(self, start, count):
+        with self._lock:
+            return self._entries[max(0, start):max(0, start + count)]
+
+    def read_lines(self, start, count) -> list:
+        width = self.label_width
+        lines = []
+        for entry in self._slice(start, count):
+            stamp = time.strftime("%m-%d %H:%M:%S", time.localtime(entry.ts)) if entry.ts else " " * 14
+            label = f"{entry.service_id}/{SUFFIX_LABELS.get(entry.suffix, entry.suffix)}"
+            lines.append(f"{stamp} {label:<{width}} | {entry.text}")
+        return lines
+
+    def line_tags(self, start, count) -> list:
+        return [self.tag_for(entry.service_id) for entry in self._slice(start, count)]
+
+
+class TimelineMerger:
+    """
+    在一个后台线程中把多个服务的日志按时间合并到 MergedTimeline：
+    - 先用 heapq.merge 对各文件末尾的历史做流式 k 路归并，每个文件同时只在内存中保留一块数据；
+    - 之后持续跟踪所有文件，新行先进入按时间排序的重排缓冲区，停留 REORDER_SECONDS 后再按时间顺序输出，
+      不同服务几乎同时写入的行也能按时间排列。
+    """
+
+    POLL_INTERVAL = 0.5
+    REORDER_SECONDS = 1.0
+    HISTORY_BYTES = 256 * 1024  # 每个文件加载的历史
+    BATCH_SIZE = 5000
+
+    def __init__(self, targets, timeline, presets=None, history_bytes=None):
+        """targets 为 [(service_id, suffix, path)]；presets 为 {服务ID: 日志格式预设}。"""
+        presets = presets or {}
+        history_bytes = self.HISTORY_BYTES if history_bytes is None else history_bytes
+        self.files = [TimelineFile(service_id, suffix, path, history_bytes, presets.get(service_id, AUTO))
+                      for service_id, suffix, path in targets]
+        self.timeline = timeline
+        timeline.label_width = max((len(f"{f.service_id}/{SUFFIX_LABELS.get(f.suffix, f.suffix)}")
+                                    for f in self.files), default=0)
+        self.history_loaded = False
+        self._buffer = []  # 重排缓冲区 [(ts, 序号, 到达时间, entry)]
+        self._sequence = 0
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='log-timeline', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _run(self):
+        try:
+            self._merge_history()
+            self.history_loaded = True
+            while not self._stop_event.wait(self.POLL_INTERVAL):
+                self._poll()
+        finally:
+            for timeline_file in self.files:
+                timeline_file.close()
+
+    def _merge_history(self):
+        batch = []
+        for entry in heapq.merge(*(f.history() for f in self.files), key=lambda entry: entry.ts):
+            if self._stop_event.is_set():
+                return
+            batch.append(entry)
+            if len(batch) >= self.BATCH_SIZE:
+                self.timeline.extend(batch)
+                batch = []
+        self.timeline.extend(batch)
+
+    def _poll(self):
+        now = time.time()
+        for timeline_file in self.files:
+            for entry in timeline_file.poll():
+                self._sequence += 1
+                heapq.heappush(self._buffer, (entry.ts, self._sequence, now, entry))
+        ready = []
+        # 缓冲区按时间排序；最早的行停留够久后连同之前到达的行一起输出
+        while self._buffer and self._buffer[0][2] <= now - self.REORDER_SECONDS:
+            ready.append(heapq.heappop(self._buffer)[3])
+        self.timeline.extend(ready)
@@ -0,0 +1,88 @@
+import os
+import shutil
+import threading
+
+
+class ServiceDeployer:
+    """
+    把服务部署到独立目录 deploy/<id>/，其中 <id>.exe 是缓存中 WinSW 的硬链接（无法链接时复制），
+    <id>.xml 是配置文件的副本，这也是 WinSW 原生的使用方式：直接运行 <id>.exe <命令>。
+    每个服务的部署结果会被缓存，配置文件和 WinSW 文件都没有变化时，执行命令不需要再次复制或链接。
+    """
+
+    def __init__(self, deploy_dir, log_callback):
+        self.deploy_dir = deploy_dir
+        self.log = log_callback
+        self._lock = threading.Lock()
+        self._deployments = {}  # service_id -> (WinSW文件标识, 配置文件的 (mtime_ns, size), exe路径)
+
+    def prepare(self, service_id, xml_path, binary_key, resolve_binary):
+        """
+        确保服务已部署并返回 <id>.exe 的路径，失败时返回 None。
+        binary_key 标识服务当前应使用的 WinSW 文件（其路径），变化时重新调用 resolve_binary() 获取文件并替换 <id>.exe。
+        """
+        try:
+            stat = os.stat(xml_path)
+        except OSError:
+            self.log(f"错误: 找不到配置文件 '{xml_path}'。请先保存配置。")
+            return None
+        stamp = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            cached = self._deployments.get(service_id)
+        if cached is not None and cached[0] == binary_key and cached[1] == stamp:
+            return cached[2]
+
+        service_dir = os.path.join(self.deploy_dir, service_id)
+        exe_path = os.path.join(service_dir, f"{service_id}.exe")
+        os.makedirs(service_dir, exist_ok=True)
+
+        if cached is None or cached[0] != binary_key or not os.path.exists(exe_path):
+            binary_path = resolve_binary()
+            if not binary_path:
+                return None
+            if not self._place_binary(binary_path, exe_path):
+                if not os.path.exists(exe_path):
+                    return None
+                # 正在运行的服务无法替换 exe，继续使用旧版本，下次执行命令时再尝试
+                binary_key = None
+
+        try:
+            self._copy_atomic(xml_path, os.path.join(service_dir, f"{service_id}.xml"))
+        except OSError as e:
+            self.log(f"错误: 无法部署配置文件到 '{service_dir}': {e}")
+            return None
+
+        with self._lock:
+            self._deployments[service_id] = (binary_key, stamp, exe_path)
+        return exe_path
+
+    def _place_binary(self, binary_path, exe_path) -> bool:
+        """用硬链接（跨磁盘时复制）把 WinSW 放到 exe_path，成功返回 True。"""
+        try:
+            if os.path.exists(exe_path) and os.path.samefile(binary_path, exe_path):
+                return True
+        except OSError:
+            pass
+
+        temp_path = f"{exe_path}.tmp"
+        try:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            try:
+                os.link(binary_path, temp_path)
+            except OSError:
+                shutil.copy2(binary_path, temp_path)
+            os.replace(temp_path, exe_path)
+            return True
+        except OSError as e:
+            self.log(f"警告: 无法更新 '{exe_path}'（服务是否正在运行？）: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return False
+
+    @staticmethod
+    def _copy_atomic(source, destination):
+        temp_path = f"{destination}.tmp"
+        shutil.copyfile(source, temp_path)
+        os.replace(temp_path, destination)
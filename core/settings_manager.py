@@ -17,9 +17,20 @@ class SettingsManager:
         return {
             'winsw_management_mode': 'auto',
             'winsw_custom_path': '',
+            'winsw_version': '',  # 自动管理时使用的WinSW版本号（如 v3.0.0-alpha.11），为空时使用最新的 v3 版本
+            'winsw_version_pins': {},  # 为单个服务固定WinSW版本 {服务ID: 版本号}，优先于 winsw_version
+            'winsw_mirror_dir': '',  # 离线镜像目录，结构为 <目录>/<版本号>/WinSW-x64.exe
+            'winsw_deploy_mode': 'global',  # global: 共用一个WinSW.exe；colocated: 每个服务部署到 deploy/<id>/
             'window_geometry': '1200x800+100+100',  # 窗口大小和位置
             'main_sash_pos': 300,  # 主左右分割条位置
-            'right_sash_pos': 500  # 右侧上下分割条位置
+            'right_sash_pos': 500,  # 右侧上下分割条位置
+            'max_parallel_commands': 8,  # 同时执行的WinSW命令数上限
+            'fleet_max_per_host': 8,  # 批量操作时每台主机的并发上限
+            'console_max_lines': 5000,  # 程序输出控制台保留的最大行数
+            'control_daemon_url': '',  # 控制守护进程地址，例如 http://host:8765；为空时在本机直接执行命令
+            'control_daemon_token': '',  # 控制守护进程的访问令牌，守护进程和客户端共用
+            'log_rotation': {},  # 日志轮转和保留策略，覆盖 core.log_archive.DEFAULT_POLICY 中的项
+            'log_rotation_overrides': {}  # 为单个服务覆盖日志策略 {服务ID: {策略项: 值}}，优先于 log_rotation
         }
 
     def load_settings(self):
@@ -0,0 +1,104 @@
+import builtins
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+PROFILE_ARGUMENT = "--profile-startup"
+PROFILE_ENV = "WINSW_GUI_PROFILE_STARTUP"
+
+
+class StartupProfiler:
+    """
+    启动耗时分析。启用后记录每个模块的导入耗时和各个启动阶段的耗时，启动完成后输出汇总。
+    打包后的程序无法使用 python -X importtime，因此通过替换 __import__ 自行计时。
+    未启用时所有方法都不做任何事情，可以放心在代码中调用。
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.started_at = time.perf_counter()
+        self.imports = {}  # 模块名 -> (累计耗时, 自身耗时)，只记录第一次导入
+        self.import_total = 0.0  # 最外层导入的耗时之和
+        self.phases = []  # [(阶段名, 耗时)]
+        self.reported = False
+        self._original_import = None
+
+    @classmethod
+    def from_command_line(cls, argv=None):
+        """命令行带 --profile-startup 或设置了环境变量 WINSW_GUI_PROFILE_STARTUP=1 时启用并开始记录导入。"""
+        argv = sys.argv if argv is None else argv
+        enabled = PROFILE_ARGUMENT in argv or os.environ.get(PROFILE_ENV, '') not in ('', '0')
+        if PROFILE_ARGUMENT in argv:
+            argv.remove(PROFILE_ARGUMENT)
+        profiler = cls(enabled)
+        if enabled:
+            profiler.install_import_hook()
+        return profiler
+
+    def install_import_hook(self):
+        if self._original_import is not None:
+            return
+        original_import = self._original_import = builtins.__import__
+        local = threading.local()  # 每个线程各自的导入栈，记录每层导入中子模块的累计耗时，用于计算自身耗时
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if level or name in sys.modules:
+                return original_import(name, globals, locals, fromlist, level)
+            stack = local.__dict__.setdefault('stack', [])
+            started = time.perf_counter()
+            stack.append(0.0)
+            try:
+                return original_import(name, globals, locals, fromlist, level)
+            finally:
+                elapsed = time.perf_counter() - started
+                children = stack.pop()
+                self.imports.setdefault(name, (elapsed, elapsed - children))
+                if stack:
+                    stack[-1] += elapsed
+                else:
+                    self.import_total += elapsed
+
+        builtins.__import__ = timed_import
+
+    def remove_import_hook(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    @contextmanager
+    def phase(self, name):
+        """记录一个启动阶段的耗时。"""
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def record(self, name, seconds):
+        """记录一项耗时。启动汇总已经输出后（例如稍后才创建的选项卡）直接输出这一项。"""
+        if not self.enabled:
+            return
+        self.phases.append((name, seconds))
+        if self.reported:
+            print(f"[启动分析] {name}: {seconds * 1000:.1f} 毫秒")
+
+    def report(self, top=15):
+        """输出启动耗时汇总：从程序开始到现在的总时间、最慢的导入和各阶段耗时。"""
+        if not self.enabled or self.reported:
+            return
+        self.reported = True
+        self.remove_import_hook()
+        total = time.perf_counter() - self.started_at
+        print(f"[启动分析] 启动总耗时 {total * 1000:.1f} 毫秒，其中导入模块 {self.import_total * 1000:.1f} 毫秒")
+        print(f"[启动分析] 最慢的 {top} 个导入（累计 / 自身，毫秒）:")
+        slowest = sorted(self.imports.items(), key=lambda item: item[1][0], reverse=True)[:top]
+        for name, (cumulative, own) in slowest:
+            print(f"[启动分析]   {cumulative * 1000:8.1f} / {own * 1000:8.1f}  {name}")
+        print("[启动分析] 各阶段耗时（毫秒）:")
+        for name, seconds in self.phases:
+            print(f"[启动分析]   {seconds * 1000:8.1f}  {name}")
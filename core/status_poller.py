@@ -0,0 +1,211 @@
+import os
+import re
+import subprocess
+import threading
+import time
+
+from core.command_runner import CREATE_NO_WINDOW
+
+RUNNING = 'Running'
+STOPPED = 'Stopped'
+STARTING = 'Starting'
+STOPPING = 'Stopping'
+NOT_INSTALLED = 'NotInstalled'
+UNKNOWN = 'Unknown'
+
+
+class ScQueryStatusBackend:
+    """
+    通过一次 `sc queryex type= service state= all` 查询本机所有服务的状态。
+    无论选中多少个服务，每次轮询只启动一个进程。
+    """
+
+    # sc 输出中的状态码
+    STATE_CODES = {1: STOPPED, 2: STARTING, 3: STOPPING, 4: RUNNING, 5: STARTING, 6: STOPPING, 7: STOPPED}
+    _NAME_RE = re.compile(r'^\s*SERVICE_NAME:\s*(.+?)\s*$')
+    _STATE_RE = re.compile(r'^\s*STATE\s*:\s*(\d+)')
+
+    def query(self, service_ids) -> dict:
+        try:
+            result = subprocess.run(
+                ['sc', 'queryex', 'type=', 'service', 'state=', 'all'], capture_output=True,
+                check=False, timeout=30, creationflags=CREATE_NO_WINDOW
+            )
+        except (OSError, subprocess.TimeoutExpired) as e:
+            print(f"警告: 查询服务状态失败: {e}")
+            return {service_id: UNKNOWN for service_id in service_ids}
+
+        states = {}
+        current_name = None
+        for line in result.stdout.decode('mbcs' if os.name == 'nt' else 'utf-8', errors='replace').splitlines():
+            name_match = self._NAME_RE.match(line)
+            if name_match:
+                current_name = name_match.group(1).lower()
+                continue
+            state_match = self._STATE_RE.match(line)
+            if state_match and current_name is not None:
+                states[current_name] = self.STATE_CODES.get(int(state_match.group(1)), UNKNOWN)
+                current_name = None
+        # Windows 服务名不区分大小写
+        return {service_id: states.get(service_id.lower(), NOT_INSTALLED) for service_id in service_ids}
+
+
+class WinSWStatusBackend:
+    """
+    逐个服务调用 `winsw status`。每个服务一个进程，仅在无法使用 sc 时作为后备。
+    使用静默的 query_status()，轮询不会刷屏，也不计入命令耗时和审计日志。
+    """
+
+    def __init__(self, winsw_manager, configs_provider):
+        self.winsw_manager = winsw_manager
+        # configs_provider() 返回 {service_id: config}
+        self.configs_provider = configs_provider
+
+    def query(self, service_ids) -> dict:
+        configs = self.configs_provider()
+        futures = {service_id: self.winsw_manager.query_status(configs[service_id])
+                   for service_id in service_ids if service_id in configs}
+        statuses = {service_id: UNKNOWN for service_id in service_ids}
+        for service_id, future in futures.items():
+            if future is None:
+                continue
+            try:
+                statuses[service_id] = self.parse_status(future.result(timeout=60).output)
+            except Exception:
+                pass
+        return statuses
+
+    @staticmethod
+    def parse_status(output) -> str:
+        text = output.lower()
+        if 'nonexistent' in text:
+            return NOT_INSTALLED
+        if 'active (running)' in text or 'started' in text:
+            return RUNNING
+        if 'inactive (stopped)' in text or 'stopped' in text:
+            return STOPPED
+        return UNKNOWN
+
+
+class FakeStatusBackend:
+    """测试使用的后端：返回预设的状态，并记录查询次数。"""
+
+    def __init__(self, statuses=None):
+        self.statuses = dict(statuses or {})
+        self.query_count = 0
+
+    def query(self, service_ids) -> dict:
+        self.query_count += 1
+        return {service_id: self.statuses.get(service_id, UNKNOWN) for service_id in service_ids}
+
+
+def default_status_backend(winsw_manager_factory, configs_provider):
+    """
+    Windows 上使用 sc 批量查询；其他平台（例如用假的 winsw 脚本测试）逐个调用 winsw status。
+    winsw_manager_factory() 只在需要时调用，Windows 上不必创建 WinSWManager；configs_provider() 返回 {service_id: config}。
+    """
+    if os.name == 'nt':
+        return ScQueryStatusBackend()
+    return WinSWStatusBackend(winsw_manager_factory(), configs_provider)
+
+
+class StatusPoller:
+    """
+    后台批量轮询服务状态并缓存结果。
+    - 每轮用一次 backend.query() 查询所有服务；
+    - 状态有变化或刚执行过命令时以 min_interval 快速轮询，稳定后逐步放慢到 max_interval；
+    - 结果带时间戳缓存，get_status() 只返回未超过 ttl 的结果。
+    状态变化时在轮询线程中调用 callback({service_id: status})。
+    pause() 后暂停轮询（例如窗口最小化时），resume() 后立即恢复。
+    """
+
+    def __init__(self, backend, callback=None, min_interval=1.0, max_interval=30.0, ttl=60.0, backoff=1.5):
+        self.backend = backend
+        self.callback = callback
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.ttl = ttl
+        self.backoff = backoff
+        self.interval = min_interval
+        self._service_ids = []
+        self._cache = {}  # service_id -> (status, timestamp)
+        self._lock = threading.Lock()
+        self._wake_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._resume_event = threading.Event()
+        self._resume_event.set()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='status-poller', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake_event.set()
+        self._resume_event.set()
+
+    def pause(self):
+        """暂停轮询，正在进行的一轮查询不受影响（线程安全）。"""
+        self._resume_event.clear()
+
+    def resume(self):
+        """恢复轮询并立即查询一次（线程安全）。"""
+        self._resume_event.set()
+        self.bump()
+
+    def set_services(self, service_ids):
+        """设置需要轮询的服务，并立即轮询一次。"""
+        with self._lock:
+            self._service_ids = sorted(set(service_ids))
+        self.bump()
+
+    def bump(self):
+        """刚执行过命令或列表变化时调用，恢复快速轮询（线程安全）。"""
+        self.interval = self.min_interval
+        self._wake_event.set()
+
+    def get_status(self, service_id):
+        """返回缓存中未过期的状态，没有时返回 None。"""
+        with self._lock:
+            entry = self._cache.get(service_id)
+        if entry is None or time.monotonic() - entry[1] > self.ttl:
+            return None
+        return entry[0]
+
+    def poll_once(self) -> dict:
+        """执行一轮查询，返回状态发生变化的服务。"""
+        with self._lock:
+            service_ids = list(self._service_ids)
+        if not service_ids:
+            return {}
+        try:
+            statuses = self.backend.query(service_ids)
+        except Exception as e:
+            print(f"警告: 查询服务状态失败: {e}")
+            statuses = {service_id: UNKNOWN for service_id in service_ids}
+
+        now = time.monotonic()
+        changes = {}
+        with self._lock:
+            for service_id, status in statuses.items():
+                previous = self._cache.get(service_id)
+                if previous is None or previous[0] != status:
+                    changes[service_id] = status
+                self._cache[service_id] = (status, now)
+        return changes
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self._resume_event.wait()
+            if self._stop_event.is_set():
+                break
+            self._wake_event.clear()
+            changes = self.poll_once()
+            if changes:
+                self.interval = self.min_interval
+                if self.callback:
+                    self.callback(changes)
+            else:
+                self.interval = min(self.interval * self.backoff, self.max_interval)
+            self._wake_event.wait(self.interval)
@@ -1,60 +1,44 @@
-import json
 import os
-import subprocess
-import sys
 
-import requests
+from core.app_paths import app_dir
+from core.command_metrics import CommandMetrics
+from core.command_runner import CommandRunner
+from core.service_deployer import ServiceDeployer
+from core.winsw_provisioner import LATEST, WinSWProvisioner
 
 
 class WinSWManager:
     """
     负责下载WinSW、部署服务以及执行所有服务控制命令。
-    采用全局WinSW.exe管理模式。
+    默认使用全局WinSW.exe并以XML路径作为参数；独立部署模式（winsw_deploy_mode 为 colocated）下
+    每个服务在 deploy/<id>/ 中有自己的 <id>.exe 和 <id>.xml。
     """
 
-    def __init__(self, log_callback, settings_manager):
+    def __init__(self, log_callback, settings_manager, audit_log=None):
         self.log = log_callback
         self.settings_manager = settings_manager
-        self.base_dir = os.path.abspath(os.path.dirname(sys.argv[0]))
+        self.audit_log = audit_log  # 设置后，每条执行过的命令都会写入审计日志
+        self.base_dir = app_dir()
         self.bin_dir = os.path.join(self.base_dir, "bin")
-        self.managed_winsw_path = os.path.join(self.bin_dir, "winsw-x64.exe")
-        self.github_api_url = "https://api.github.com/repos/winsw/winsw/releases"
-        self.target_asset_name = "WinSW-x64.exe"
-
-        os.makedirs(self.bin_dir, exist_ok=True)
-
-    def _get_latest_winsw_download_url(self):
-        """通过GitHub API获取最新的WinSW v3.x x64下载链接。"""
-        self.log(f"正在从GitHub API获取所有版本信息以查找最新的v3.x...")
-        try:
-            response = requests.get(self.github_api_url, timeout=10)
-            response.raise_for_status()
-            all_releases_data = response.json()
-
-            for release in all_releases_data:
-                tag_name = release.get("tag_name", "")
-                if tag_name.lower().startswith("v3"):
-                    self.log(f"找到最新的v3版本: {tag_name}")
-                    for asset in release.get("assets", []):
-                        asset_name_lower = asset.get("name", "").lower()
-                        if "winsw" in asset_name_lower and ".exe" in asset_name_lower and (
-                                "x64" in asset_name_lower or "amd64" in asset_name_lower):
-                            download_url = asset.get("browser_download_url")
-                            found_asset_name = asset.get("name")
-                            self.log(f"成功找到匹配的64位可执行文件 '{found_asset_name}'。")
-                            return download_url
-                    self.log(f"警告: 在版本 {tag_name} 中未找到任何64位可执行文件，继续查找下一个版本...")
-                    continue
-            self.log(f"错误: 在所有版本中均未找到任何有效的v3.x版本及64位可执行文件。")
-            return None
-        except requests.exceptions.RequestException as e:
-            self.log(f"错误: 请求GitHub API失败。{e}")
-            return None
-        except json.JSONDecodeError:
-            self.log("错误: 解析GitHub API响应失败。")
-            return None
-
-    def get_winsw_path(self):
+        # 旧版本直接下载到这里，没有版本和校验信息，只在无法获取时作为后备
+        self.legacy_winsw_path = os.path.join(self.bin_dir, "winsw-x64.exe")
+        # 日志回调可能在创建后被替换（例如图形界面重定向输出），这里总是转发到当前的 self.log
+        self.provisioner = WinSWProvisioner(lambda message: self.log(message), os.path.join(self.bin_dir, "cache"),
+                                            mirror_dir=settings_manager.get('winsw_mirror_dir') or None)
+        self.deployer = ServiceDeployer(os.path.join(self.base_dir, "deploy"), lambda message: self.log(message))
+        # 独立部署模式下已解析的 WinSW 路径 {(模式, 自定义路径或版本号): 路径}。键包含相关设置，
+        # 设置或固定的版本变化时自然使用新的键；获取到新的最新版本时由 provisioner 通知清空
+        self._binary_paths = {}
+        self.provisioner.add_listener(self.invalidate_winsw_cache)
+        self.metrics = CommandMetrics(os.path.join(self.base_dir, "metrics", "commands.jsonl"))
+        self.runner = CommandRunner(max_workers=settings_manager.get('max_parallel_commands') or 8)
+
+    def get_pinned_version(self, service_id=None):
+        """返回服务使用的WinSW版本：服务单独固定的版本优先，其次是全局设置，默认为最新的 v3 版本。"""
+        pins = self.settings_manager.get('winsw_version_pins') or {}
+        return pins.get(service_id) or self.settings_manager.get('winsw_version') or LATEST
+
+    def get_winsw_path(self, service_id=None):
         """根据设置获取有效的WinSW.exe路径，如果需要则下载。"""
         mode = self.settings_manager.get('winsw_management_mode')
 
@@ -66,87 +50,155 @@ class WinSWManager:
                 self.log(f"错误: 自定义WinSW路径无效: {custom_path}")
                 return None
 
-        if not os.path.exists(self.managed_winsw_path):
-            download_url = self._get_latest_winsw_download_url()
-            if not download_url:
-                self.log("无法获取下载链接，请检查网络或稍后重试。")
-                return None
+        # 多个后台命令可能同时触发首次下载，由 provisioner 的锁保证只下载一次
+        self.provisioner.mirror_dir = self.settings_manager.get('winsw_mirror_dir') or None
+        path = self.provisioner.get_path(self.get_pinned_version(service_id))
+        if path is None and os.path.exists(self.legacy_winsw_path):
+            self.log(f"警告: 使用旧版本程序下载的 '{self.legacy_winsw_path}'。")
+            return self.legacy_winsw_path
+        return path
 
-            self.log(f"WinSW executable not found. Downloading from {download_url}...")
-            try:
-                with requests.get(download_url, stream=True, timeout=30) as r:
-                    r.raise_for_status()
-                    with open(self.managed_winsw_path, 'wb') as f:
-                        for chunk in r.iter_content(chunk_size=8192):
-                            f.write(chunk)
-                self.log(f"WinSW downloaded successfully to '{self.managed_winsw_path}'.")
-            except requests.exceptions.RequestException as e:
-                self.log(f"错误: 下载WinSW失败。{e}")
-                return None
+    def _resolve_winsw_path(self, service_id):
+        winsw_path = self.get_winsw_path(service_id)
+        if not winsw_path:
+            self.log("错误: 无法找到或下载 WinSW.exe。请检查设置和网络连接。")
+        return winsw_path
+
+    def _binary_selector(self, service_id):
+        """标识服务当前应使用的 WinSW：自定义路径，或自动管理时固定的版本号。"""
+        if self.settings_manager.get('winsw_management_mode') == 'custom':
+            return 'custom', self.settings_manager.get('winsw_custom_path')
+        return 'auto', self.get_pinned_version(service_id)
+
+    def invalidate_winsw_cache(self):
+        """清空独立部署模式下已解析的 WinSW 路径，下次执行命令时重新解析（例如获取到新版本之后）。"""
+        self._binary_paths.clear()
 
-        return self.managed_winsw_path
+    def _stream_output(self, service_id, output_callback):
+        """返回一个把子进程输出逐行写入日志的回调（在工作线程中调用）。"""
 
-    def _run_command(self, command_parts: list):
-        """运行WinSW命令并返回输出。"""
+        def on_output(stream_name, line):
+            self.log(f"[{service_id}] {line.rstrip()}")
+            if output_callback:
+                output_callback(stream_name, line)
+
+        return on_output
+
+    def _on_command_done(self, future):
+        """命令结束后记录退出状态。"""
+        if future.cancelled():
+            return
         try:
-            self.log(f"正在运行命令: '{' '.join(command_parts)}'")
-            result = subprocess.run(
-                command_parts, capture_output=True, text=True,
-                check=False, encoding='utf-8', creationflags=subprocess.CREATE_NO_WINDOW
-            )
-            output = result.stdout + result.stderr
-            self.log(f"命令输出:\n---\n{output.strip()}\n---")
-            return output
+            result = future.result()
         except Exception as e:
             self.log(f"运行命令时出错: {e}")
-            return f"Error running command: {e}"
-
-    def _execute(self, command, config):
-        """执行命令的统一入口。"""
-        # 1. 获取WinSW.exe的路径
-        winsw_path = self.get_winsw_path()
-        if not winsw_path:
-            self.log("错误: 无法找到或下载 WinSW.exe。请检查设置和网络连接。")
             return
-
-        # 2. 获取服务ID和XML文件路径
+        command_line = ' '.join(result.command_parts or [])
+        if result.error is not None:
+            self.log(f"运行命令时出错: {result.error}")
+        elif result.cancelled:
+            self.log(f"命令已取消: '{command_line}'")
+        elif result.timed_out:
+            self.log(f"命令超时已终止: '{command_line}'")
+        else:
+            self.log(f"命令结束 (退出码 {result.returncode}, 耗时 {result.duration:.2f} 秒): '{command_line}'")
+
+    def _execute(self, command, config, output_callback=None, timeout=None, quiet=False):
+        """
+        执行命令的统一入口。命令在后台线程中执行，返回一个 Future（结果为 CommandResult），
+        参数校验失败时返回 None。
+        quiet=True 时不在控制台输出命令和结果，也不记录耗时和审计日志（供状态轮询使用）。
+        """
+        log = (lambda message: None) if quiet else self.log
+        # 1. 获取服务ID和XML文件路径
         service_id = config.get('id')
         if not service_id:
-            self.log(f"错误: 服务ID为空，无法执行'{command}'命令。")
-            return
+            log(f"错误: 服务ID为空，无法执行'{command}'命令。")
+            return None
 
         xml_path = os.path.join("services", f"{service_id}.xml")
         # 确保XML文件是绝对路径，以避免相对路径问题
         abs_xml_path = os.path.abspath(xml_path)
 
-        if not os.path.exists(abs_xml_path):
-            self.log(f"错误: 找不到配置文件 '{abs_xml_path}'。请先保存配置。")
+        if self.settings_manager.get('winsw_deploy_mode') == 'colocated':
+            # 2a. 独立部署模式：运行 deploy/<id>/<id>.exe，配置文件是否存在由部署时的 stat 检查，
+            #     WinSW 的路径按设置缓存，只在第一次或缓存被清空后才重新解析，解析出的文件变化时重新部署
+            def prepare():
+                selector = self._binary_selector(service_id)
+                winsw_path = self._binary_paths.get(selector)
+                if winsw_path is None:
+                    winsw_path = self._resolve_winsw_path(service_id)
+                    if not winsw_path:
+                        return None
+                    self._binary_paths[selector] = winsw_path
+                exe_path = self.deployer.prepare(service_id, abs_xml_path, winsw_path, lambda: winsw_path)
+                if not exe_path:
+                    # 缓存的文件可能已被删除，下次重新解析
+                    self._binary_paths.pop(selector, None)
+                    return None
+                command_parts = [exe_path, command]
+                log(f"正在运行命令: '{' '.join(command_parts)}'")
+                return command_parts
+        else:
+            if not os.path.exists(abs_xml_path):
+                log(f"错误: 找不到配置文件 '{abs_xml_path}'。请先保存配置。")
+                return None
+
+            # 2b. WinSW.exe的路径在工作线程中解析，首次下载不会阻塞UI
+            def prepare():
+                winsw_path = self._resolve_winsw_path(service_id)
+                if not winsw_path:
+                    return None
+                # 对所有命令，都使用XML文件路径作为参数
+                command_parts = [winsw_path, command, abs_xml_path]
+                log(f"正在运行命令: '{' '.join(command_parts)}'")
+                return command_parts
+
+        # 3. 提交到后台执行，输出逐行回传
+        if quiet:
+            return self.runner.submit(service_id, prepare, output_callback, timeout)
+        future = self.runner.submit(service_id, prepare, self._stream_output(service_id, output_callback), timeout)
+        future.add_done_callback(self._on_command_done)
+        future.add_done_callback(lambda f: self._record_metrics(command, f))
+        return future
+
+    def _record_metrics(self, command, future):
+        """记录已执行命令的耗时和审计日志；排队中被取消的命令没有启动过进程，不记录。"""
+        if future.cancelled() or future.exception() is not None:
             return
+        self.metrics.record(command, future.result())
+        if self.audit_log is not None:
+            self.audit_log.record_command(command, future.result())
+
+    def cancel(self, future):
+        """取消一条已提交的命令。"""
+        return self.runner.cancel(future)
 
-        # --- 关键修正处 ---
-        # 3. 对所有命令，都使用XML文件路径作为参数
-        command_parts = [winsw_path, command, abs_xml_path]
+    def shutdown(self):
+        """关闭后台命令执行线程池。"""
+        self.runner.shutdown()
 
-        # 4. 执行命令
-        return self._run_command(command_parts)
+    def install(self, config, **kwargs):
+        return self._execute("install", config, **kwargs)
 
-    def install(self, config):
-        return self._execute("install", config)
+    def uninstall(self, config, **kwargs):
+        return self._execute("uninstall", config, **kwargs)
 
-    def uninstall(self, config):
-        return self._execute("uninstall", config)
+    def start(self, config, **kwargs):
+        return self._execute("start", config, **kwargs)
 
-    def start(self, config):
-        return self._execute("start", config)
+    def stop(self, config, **kwargs):
+        return self._execute("stop", config, **kwargs)
 
-    def stop(self, config):
-        return self._execute("stop", config)
+    def restart(self, config, **kwargs):
+        return self._execute("restart", config, **kwargs)
 
-    def restart(self, config):
-        return self._execute("restart", config)
+    def status(self, config, **kwargs):
+        return self._execute("status", config, **kwargs)
 
-    def status(self, config):
-        return self._execute("status", config)
+    def refresh(self, config, **kwargs):
+        return self._execute("refresh", config, **kwargs)
 
-    def refresh(self, config):
-        return self._execute("refresh", config)
+    def query_status(self, config, timeout=60):
+        """静默执行 status 命令，供状态轮询使用：不输出到控制台，也不记录耗时和审计日志。"""
+        return self._execute("status", config, timeout=timeout, quiet=True)
@@ -0,0 +1,447 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+LATEST = 'latest'
+RELEASES_API_URL = "https://api.github.com/repos/winsw/winsw/releases"
+INDEX_MAX_AGE = 3600  # 发布索引的缓存时间（秒），过期后用 ETag 条件请求刷新
+CHUNK_SIZE = 64 * 1024
+
+
+class ProvisionError(RuntimeError):
+    """无法获取或校验指定版本的 WinSW。"""
+
+
+class WinSWRelease:
+    """某个版本中匹配的 WinSW 64位可执行文件。sha256 为 None 表示发布方没有提供校验值。"""
+
+    def __init__(self, tag, asset_name, url, sha256=None, size=None):
+        self.tag = tag
+        self.asset_name = asset_name
+        self.url = url
+        self.sha256 = sha256
+        self.size = size
+
+
+def is_x64_asset(name) -> bool:
+    """判断发布文件是否是 WinSW 的64位可执行文件。"""
+    name = (name or '').lower()
+    return "winsw" in name and name.endswith(".exe") and ("x64" in name or "amd64" in name)
+
+
+def parse_digest(digest):
+    """解析 GitHub 发布文件的 digest 字段（形如 'sha256:<hex>'），不是 sha256 时返回 None。"""
+    if digest and digest.lower().startswith("sha256:"):
+        return digest[len("sha256:"):].strip().lower()
+    return None
+
+
+def version_key(tag):
+    """版本号排序键：先比较主版本号，同一版本的正式版排在预览版之后。"""
+    numbers = [int(n) for n in re.findall(r'\d+', tag)]
+    return tuple(numbers[:3]), '-' not in tag, tuple(numbers[3:])
+
+
+def file_sha256(path) -> str:
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class WinSWProvisioner:
+    """
+    WinSW 可执行文件的本地缓存。
+    文件按 SHA-256 存放在 objects/<sha256>.exe，index.json 记录版本到文件的映射以及 GitHub API 的响应缓存。
+    获取顺序为：本地缓存 -> 离线镜像目录 -> 下载；下载中断后下次会用 Range 请求继续，
+    校验通过后才原子地移动到缓存中，因此缓存里不会出现不完整的文件。
+    离线镜像目录的结构为 <镜像目录>/<版本号>/WinSW-x64.exe，可以附带同名的 .sha256 文件。
+    最新版本（LATEST）确定后记录在索引中，之后直接使用缓存的文件，不再访问网络；
+    记录超过 index_max_age 后在后台线程中刷新（refresh()），执行命令的线程不会等待网络请求。
+    """
+
+    def __init__(self, log_callback, cache_dir, mirror_dir=None, api_url=RELEASES_API_URL,
+                 index_max_age=INDEX_MAX_AGE):
+        self.log = log_callback
+        self.cache_dir = cache_dir
+        self.objects_dir = os.path.join(cache_dir, "objects")
+        self.partial_dir = os.path.join(cache_dir, "partial")
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.mirror_dir = mirror_dir
+        self.api_url = api_url.rstrip('/')
+        self.index_max_age = index_max_age
+        self._lock = threading.Lock()
+        self._verified = set()  # 本进程中已校验过内容的缓存文件
+        self._refresh_thread = None
+        self._listeners = []  # 最新版本变化时的回调
+
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.partial_dir, exist_ok=True)
+        self._index = self._load_index()
+
+    # --- 索引 ---
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, encoding='utf-8') as f:
+                index = json.load(f)
+        except FileNotFoundError:
+            index = {}
+        except (OSError, ValueError) as e:
+            print(f"警告: 无法读取WinSW缓存索引 {self.index_path}，将重新建立。错误: {e}")
+            index = {}
+        index.setdefault('installed', {})  # 版本号 -> {'sha256', 'asset'}
+        index.setdefault('http', {})  # URL -> {'etag', 'fetched_at', 'data', 'next'}
+        # 'latest' 为当前作为最新版本使用的版本号，'latest_checked_at' 为最近一次确定它的时间
+        return index
+
+    def _save_index(self):
+        temp_path = f"{self.index_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f, indent=2)
+        os.replace(temp_path, self.index_path)
+
+    def installed_versions(self) -> dict:
+        """返回缓存中已有的版本 {版本号: sha256}。"""
+        with self._lock:
+            return {tag: entry['sha256'] for tag, entry in self._index['installed'].items()
+                    if os.path.exists(self._object_path(entry['sha256']))}
+
+    def _object_path(self, sha256):
+        return os.path.join(self.objects_dir, f"{sha256}.exe")
+
+    def _installed_path(self, tag):
+        """返回缓存中该版本的文件路径；文件缺失或内容被改动时删除记录并返回 None。"""
+        entry = self._index['installed'].get(tag)
+        if not entry:
+            return None
+        path = self._object_path(entry['sha256'])
+        if path not in self._verified:
+            if not os.path.exists(path):
+                del self._index['installed'][tag]
+                self._save_index()
+                return None
+            if file_sha256(path) != entry['sha256']:
+                self.log(f"警告: 缓存的WinSW {tag} 校验失败，已删除并重新获取。")
+                os.remove(path)
+                del self._index['installed'][tag]
+                self._save_index()
+                return None
+            self._verified.add(path)
+        return path
+
+    # --- 获取 ---
+
+    def add_listener(self, callback):
+        """注册 callback()，作为最新版本使用的文件发生变化时调用（在获取或刷新的线程中）。"""
+        self._listeners.append(callback)
+
+    def get_path(self, version=LATEST):
+        """返回指定版本（默认最新的 v3 版本）WinSW 的本地路径，需要时下载；失败时返回 None。"""
+        version = version or LATEST
+        path = self._cached_path(version)
+        if path is None:
+            with self._lock:
+                try:
+                    path = self._provision(version)
+                except ProvisionError as e:
+                    self.log(f"错误: {e}")
+                    return None
+        if version == LATEST:
+            self._refresh_if_stale()
+        return path
+
+    def refresh(self):
+        """
+        重新确定最新版本：发布索引用 ETag 条件请求重新验证，有新版本时下载。
+        返回最新版本的路径，失败时返回 None。
+        """
+        with self._lock:
+            for cached in self._index['http'].values():
+                cached['fetched_at'] = 0
+            try:
+                return self._provision(LATEST, refresh=True)
+            except ProvisionError as e:
+                self.log(f"错误: {e}")
+                return None
+
+    def _refresh_if_stale(self):
+        """最新版本的记录过期时在后台线程中刷新，同一时间只有一个刷新线程。"""
+        if time.time() - self._index.get('latest_checked_at', 0) < self.index_max_age:
+            return
+        if self._refresh_thread is not None and self._refresh_thread.is_alive():
+            return
+        self._refresh_thread = threading.Thread(target=self.refresh, name='winsw-refresh', daemon=True)
+        self._refresh_thread.start()
+
+    def _cached_path(self, version):
+        """不加锁、不访问网络地返回本进程中已校验过的缓存文件，没有时返回 None。"""
+        tag = self._index.get('latest') if version == LATEST else version
+        entry = self._index['installed'].get(tag) if tag else None
+        if entry:
+            path = self._object_path(entry['sha256'])
+            if path in self._verified:
+                return path
+        return None
+
+    def _provision(self, version, refresh=False):
+        if version == LATEST:
+            if not refresh and self._index.get('latest'):
+                path = self._installed_path(self._index['latest'])
+                if path:
+                    return path
+            path = self._provision_latest()
+            self._remember_latest(path)
+            return path
+
+        path = self._installed_path(version)
+        if path:
+            return path
+        path = self._from_mirror(version)
+        if path:
+            return path
+        release = self._resolve(version)
+        if release is not None:
+            return self._installed_path(release.tag) or self._download(release)
+        raise ProvisionError(f"无法获取 WinSW {version}，请检查网络连接或离线镜像目录。")
+
+    def _provision_latest(self):
+        # 配置了离线镜像时优先使用镜像，避免在隔离网络中等待请求超时
+        path = self._from_mirror(LATEST)
+        if path:
+            return path
+
+        release = self._resolve(LATEST)
+        if release is not None:
+            return self._installed_path(release.tag) or self._download(release)
+
+        if self._index['installed']:
+            # 无法访问网络时退回到缓存中最新的版本
+            for tag in sorted(self._index['installed'], key=version_key, reverse=True):
+                path = self._installed_path(tag)
+                if path:
+                    self.log(f"警告: 无法获取最新版本信息，使用缓存中的 WinSW {tag}。")
+                    return path
+        raise ProvisionError(f"无法获取 WinSW {LATEST}，请检查网络连接或离线镜像目录。")
+
+    def _remember_latest(self, path):
+        """记录作为最新版本使用的版本号和确定的时间，版本变化时通知监听器。"""
+        sha256 = os.path.splitext(os.path.basename(path))[0]
+        tags = [tag for tag, entry in self._index['installed'].items() if entry['sha256'] == sha256]
+        if not tags:
+            return
+        previous = self._index.get('latest')
+        self._index['latest'] = max(tags, key=version_key)
+        self._index['latest_checked_at'] = time.time()
+        self._save_index()
+        if previous is not None and previous != self._index['latest']:
+            self.log(f"WinSW 最新版本已更新为 {self._index['latest']}。")
+            for callback in list(self._listeners):
+                callback()
+
+    def _from_mirror(self, version):
+        """从离线镜像目录中取出指定版本（latest 时为镜像中最新的 v3 版本）并放入缓存。"""
+        if not self.mirror_dir or not os.path.isdir(self.mirror_dir):
+            return None
+        if version == LATEST:
+            tags = sorted((name for name in os.listdir(self.mirror_dir)
+                           if name.lower().startswith("v3") and os.path.isdir(os.path.join(self.mirror_dir, name))),
+                          key=version_key, reverse=True)
+        else:
+            tags = [version]
+
+        for tag in tags:
+            tag_dir = os.path.join(self.mirror_dir, tag)
+            if not os.path.isdir(tag_dir):
+                continue
+            asset_name = next((name for name in sorted(os.listdir(tag_dir)) if is_x64_asset(name)), None)
+            if asset_name is None:
+                continue
+            path = self._installed_path(tag)
+            if path:
+                return path
+            source = os.path.join(tag_dir, asset_name)
+            self.log(f"正在从离线镜像导入 WinSW {tag}: {source}")
+            return self._import_file(source, tag, asset_name, self._mirror_checksum(source, tag))
+        return None
+
+    def _mirror_checksum(self, source, tag):
+        """镜像文件的期望校验值：优先使用同名 .sha256 文件，其次是发布索引中记录的 digest。"""
+        try:
+            with open(f"{source}.sha256", encoding='utf-8') as f:
+                return f.read().split()[0].lower()
+        except (OSError, IndexError):
+            pass
+        release = self._cached_release(tag)
+        return release.sha256 if release else None
+
+    def _import_file(self, source, tag, asset_name, expected_sha256):
+        hasher = hashlib.sha256()
+        temp_path = os.path.join(self.partial_dir, f"{self._safe_name(tag)}-{asset_name}.import")
+        try:
+            with open(source, 'rb') as src, open(temp_path, 'wb') as dst:
+                for chunk in iter(lambda: src.read(CHUNK_SIZE), b''):
+                    hasher.update(chunk)
+                    dst.write(chunk)
+        except OSError as e:
+            raise ProvisionError(f"读取离线镜像文件 {source} 失败: {e}")
+        return self._commit(temp_path, hasher.hexdigest(), expected_sha256, tag, asset_name)
+
+    # --- 发布索引 ---
+
+    def _get_json(self, url):
+        """
+        带缓存的 GET 请求，返回 (数据, 下一页URL)。
+        缓存未过期时直接使用；过期后带 If-None-Match 请求，304 时沿用缓存的数据。
+        """
+        import requests
+
+        cached = self._index['http'].get(url)
+        if cached and time.time() - cached.get('fetched_at', 0) < self.index_max_age:
+            return cached['data'], cached.get('next')
+
+        headers = {'Accept': 'application/vnd.github+json'}
+        if cached and cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        response = requests.get(url, headers=headers, timeout=10)
+        if response.status_code == 304 and cached:
+            cached['fetched_at'] = time.time()
+            self._save_index()
+            return cached['data'], cached.get('next')
+        if response.status_code == 404:
+            return None, None
+        response.raise_for_status()
+
+        data = response.json()
+        next_url = response.links.get('next', {}).get('url')
+        self._index['http'][url] = {'etag': response.headers.get('ETag'), 'fetched_at': time.time(),
+                                    'data': data, 'next': next_url}
+        self._save_index()
+        return data, next_url
+
+    def _iter_releases(self):
+        """按页遍历发布列表，只请求实际用到的页。"""
+        url = f"{self.api_url}?per_page=100"
+        while url:
+            releases, url = self._get_json(url)
+            yield from releases or []
+
+    @staticmethod
+    def _release_from(release_data):
+        tag = release_data.get("tag_name", "")
+        for asset in release_data.get("assets", []):
+            if is_x64_asset(asset.get("name")):
+                return WinSWRelease(tag, asset.get("name"), asset.get("browser_download_url"),
+                                    parse_digest(asset.get("digest")), asset.get("size"))
+        return None
+
+    def _cached_release(self, tag):
+        """只在已缓存的 API 响应中查找版本，不访问网络。"""
+        for cached in self._index['http'].values():
+            data = cached.get('data')
+            for release_data in data if isinstance(data, list) else [data]:
+                if isinstance(release_data, dict) and release_data.get("tag_name") == tag:
+                    return self._release_from(release_data)
+        return None
+
+    def _resolve(self, version):
+        """查找版本对应的下载信息；网络不可用时返回 None。"""
+        import requests
+
+        try:
+            if version == LATEST:
+                self.log("正在查找最新的 WinSW v3 版本...")
+                for release_data in self._iter_releases():
+                    tag = release_data.get("tag_name", "")
+                    if not tag.lower().startswith("v3"):
+                        continue
+                    release = self._release_from(release_data)
+                    if release:
+                        return release
+                    self.log(f"警告: 在版本 {tag} 中未找到任何64位可执行文件，继续查找下一个版本...")
+                self.log("错误: 在所有版本中均未找到任何有效的v3.x版本及64位可执行文件。")
+                return None
+
+            release = self._cached_release(version)
+            if release:
+                return release
+            release_data, _ = self._get_json(f"{self.api_url}/tags/{version}")
+            if release_data is None:
+                raise ProvisionError(f"WinSW 版本 {version} 不存在。")
+            release = self._release_from(release_data)
+            if release is None:
+                raise ProvisionError(f"WinSW 版本 {version} 中没有64位可执行文件。")
+            return release
+        except requests.exceptions.RequestException as e:
+            self.log(f"警告: 请求GitHub API失败。{e}")
+            return None
+        except ValueError:
+            self.log("警告: 解析GitHub API响应失败。")
+            return None
+
+    # --- 下载 ---
+
+    @staticmethod
+    def _safe_name(tag):
+        return re.sub(r'[^A-Za-z0-9._-]', '_', tag)
+
+    def _download(self, release: WinSWRelease):
+        """下载到 partial 目录，已有部分内容时用 Range 请求继续，校验通过后放入缓存。"""
+        import requests
+
+        partial_path = os.path.join(self.partial_dir, f"{self._safe_name(release.tag)}-{release.asset_name}.part")
+        offset = os.path.getsize(partial_path) if os.path.exists(partial_path) else 0
+        if release.size and offset > release.size:
+            os.remove(partial_path)
+            offset = 0
+
+        headers = {'Range': f"bytes={offset}-"} if offset else {}
+        self.log(f"正在下载 WinSW {release.tag}: {release.url}" + (f" (从 {offset} 字节处继续)" if offset else ""))
+        try:
+            with requests.get(release.url, headers=headers, stream=True, timeout=30) as response:
+                if response.status_code == 416:
+                    # 服务器不接受这个范围，说明已下载的部分已经完整或者已失效，交给校验判断
+                    response.close()
+                elif response.status_code == 206:
+                    self._write_response(response, partial_path, 'ab')
+                else:
+                    response.raise_for_status()
+                    self._write_response(response, partial_path, 'wb')
+        except requests.exceptions.RequestException as e:
+            raise ProvisionError(f"下载 WinSW {release.tag} 失败（已下载的部分会在下次继续）: {e}")
+
+        if release.size and os.path.getsize(partial_path) != release.size:
+            size = os.path.getsize(partial_path)
+            if size > release.size:
+                os.remove(partial_path)
+            raise ProvisionError(f"下载 WinSW {release.tag} 不完整: {size}/{release.size} 字节。")
+        return self._commit(partial_path, file_sha256(partial_path), release.sha256, release.tag, release.asset_name)
+
+    @staticmethod
+    def _write_response(response, path, mode):
+        with open(path, mode) as f:
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                f.write(chunk)
+
+    def _commit(self, temp_path, actual_sha256, expected_sha256, tag, asset_name):
+        """校验临时文件后原子地移动到 objects/<sha256>.exe，并记录版本。"""
+        if expected_sha256 and actual_sha256 != expected_sha256:
+            os.remove(temp_path)
+            raise ProvisionError(f"WinSW {tag} 校验失败: 期望 sha256 {expected_sha256}，实际为 {actual_sha256}。")
+        if not expected_sha256:
+            self.log(f"警告: WinSW {tag} 没有可用的 sha256 校验值，以实际内容 {actual_sha256} 缓存。")
+
+        object_path = self._object_path(actual_sha256)
+        if os.path.exists(object_path):
+            os.remove(temp_path)
+        else:
+            os.replace(temp_path, object_path)
+        self._verified.add(object_path)
+        self._index['installed'][tag] = {'sha256': actual_sha256, 'asset': asset_name}
+        self._save_index()
+        self.log(f"WinSW {tag} 已缓存到 '{object_path}'。")
+        return object_path
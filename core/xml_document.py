@@ -0,0 +1,219 @@
+import copy
+import io
+import xml.etree.ElementTree as ET
+
+from core.xml_writer import write_pretty_xml
+
+# 新建元素时使用的推荐顺序，与 ConfigManager._to_xml_root 生成的顺序一致
+CANONICAL_ORDER = [
+    'id', 'name', 'description', 'executable', 'arguments', 'workingdirectory',
+    'env', 'depend', 'resetfailure', 'priority', 'stoptimeout', 'logpath',
+    'interactive', 'log', 'onfailure', 'serviceaccount'
+]
+SERVICEACCOUNT_ORDER = ['username', 'password', 'allowservicelogon']
+
+
+def parse_element_tree(source) -> ET.Element:
+    """
+    解析XML（文件路径或文件对象）并保留根元素内的注释。
+    只含空白的 text/tail 是原有的缩进，写出时会重新缩进，因此在这里清除。
+    """
+    parser = ET.XMLParser(target=ET.TreeBuilder(insert_comments=True))
+    root = ET.parse(source, parser).getroot()
+    for element in root.iter():
+        if element.text is not None and not element.text.strip() and (len(element) or element.tag is not ET.Comment):
+            element.text = None
+        element.tail = None
+    return root
+
+
+def normalize_value(key, value):
+    """将配置项转换为与 ConfigManager._from_xml_root 解析结果可比较的形式。"""
+    if key == 'environments':
+        return [{'name': env.get('name', ''), 'value': env.get('value', '')} for env in value if env.get('name')]
+    if key == 'onfailure':
+        return [{'action': item.get('action', ''), 'delay': item.get('delay', '') or ''}
+                for item in value if item.get('action')]
+    if key == 'depend':
+        return [dependency.strip() for dependency in value if dependency and dependency.strip()]
+    if key == 'serviceaccount':
+        if not value or not value.get('username'):
+            return {}
+        return {'username': value['username'].strip(), 'password': (value.get('password') or '').strip(),
+                'allowservicelogon': bool(value.get('allowservicelogon'))}
+    if key == 'interactive':
+        return bool(value)
+    return (value or '').strip() if isinstance(value, str) else value
+
+
+class ServiceDocument:
+    """
+    无损的服务配置文档。
+    保存解析得到的完整XML树，包括界面不认识的元素（<download>、<startarguments> 等）、
+    注释和元素顺序。修改通过 update() 以最小补丁的方式应用：只有值发生变化的
+    配置项对应的节点会被修改，其余节点原样保留。
+    """
+
+    def __init__(self, config_manager, root: ET.Element):
+        self.config_manager = config_manager
+        self.root = root
+
+    @classmethod
+    def from_string(cls, config_manager, xml_string: str):
+        return cls(config_manager, parse_element_tree(io.StringIO(xml_string)))
+
+    @classmethod
+    def from_file(cls, config_manager, file_path: str):
+        return cls(config_manager, parse_element_tree(file_path))
+
+    @classmethod
+    def from_config(cls, config_manager, config: dict):
+        return cls(config_manager, config_manager._to_xml_root(config))
+
+    def copy(self):
+        return ServiceDocument(self.config_manager, copy.deepcopy(self.root))
+
+    def to_config(self) -> dict:
+        return self.config_manager._from_xml_root(self.root)
+
+    def to_string(self) -> str:
+        buffer = io.StringIO()
+        self.write(buffer)
+        return buffer.getvalue()
+
+    def write(self, file):
+        write_pretty_xml(self.root, file)
+
+    # --- 补丁 ---
+
+    def update(self, config: dict) -> list:
+        """
+        将 config 应用到文档，返回实际发生变化的配置项。
+        config 中没有的键不受影响，因此只包含部分配置项的字典也可以使用。
+        """
+        current = self.to_config()
+        changed = []
+        for key, value in config.items():
+            patch = self._PATCHERS.get(key)
+            if patch is None or key not in current:
+                continue
+            if normalize_value(key, value) == normalize_value(key, current[key]):
+                continue
+            patch(self, key, value)
+            changed.append(key)
+        return changed
+
+    @staticmethod
+    def _insert_index(parent, tag, order) -> int:
+        """按推荐顺序计算新元素的插入位置：放在顺序靠前的最后一个已有元素之后。"""
+        rank = order.index(tag)
+        index = None
+        for i, child in enumerate(parent):
+            if child.tag in order and order.index(child.tag) <= rank:
+                index = i + 1
+        if index is not None:
+            return index
+        for i, child in enumerate(parent):
+            if child.tag in order and order.index(child.tag) > rank:
+                return i
+        return len(parent)
+
+    def _ensure(self, parent, tag, order) -> ET.Element:
+        element = parent.find(tag)
+        if element is None:
+            element = ET.Element(tag)
+            parent.insert(self._insert_index(parent, tag, order), element)
+        return element
+
+    @staticmethod
+    def _remove_all(parent, tag):
+        for element in parent.findall(tag):
+            parent.remove(element)
+
+    def _set_text(self, parent, tag, value, order):
+        if value:
+            self._ensure(parent, tag, order).text = value
+        else:
+            self._remove_all(parent, tag)
+
+    def _patch_simple(self, key, value):
+        self._set_text(self.root, key, value, CANONICAL_ORDER)
+
+    def _patch_interactive(self, key, value):
+        if value:
+            self._ensure(self.root, 'interactive', CANONICAL_ORDER).text = 'true'
+        else:
+            self._remove_all(self.root, 'interactive')
+
+    def _patch_log_mode(self, key, value):
+        log_element = self.root.find('log')
+        if value:
+            self._ensure(self.root, 'log', CANONICAL_ORDER).set('mode', value)
+        elif log_element is not None:
+            log_element.attrib.pop('mode', None)
+            # 没有其他设置时整个删除，与新建配置的输出一致
+            if not log_element.attrib and not len(log_element):
+                self.root.remove(log_element)
+
+    def _patch_list(self, tag, items, fill):
+        """逐个复用已有的同名元素，多余的删除，不足的紧接在最后一个同名元素之后插入。"""
+        elements = self.root.findall(tag)
+        for element, item in zip(elements, items):
+            fill(element, item)
+        for element in elements[len(items):]:
+            self.root.remove(element)
+        for item in items[len(elements):]:
+            element = ET.Element(tag)
+            fill(element, item)
+            existing = self.root.findall(tag)
+            if existing:
+                index = list(self.root).index(existing[-1]) + 1
+            else:
+                index = self._insert_index(self.root, tag, CANONICAL_ORDER)
+            self.root.insert(index, element)
+
+    def _patch_environments(self, key, value):
+        def fill(element, env):
+            if element.get('name') != env['name'] or element.get('value') != env['value']:
+                element.set('name', env['name'])
+                element.set('value', env['value'])
+
+        self._patch_list('env', normalize_value(key, value), fill)
+
+    def _patch_depend(self, key, value):
+        def fill(element, dependency):
+            if (element.text or '').strip() != dependency:
+                element.text = dependency
+
+        self._patch_list('depend', normalize_value(key, value), fill)
+
+    def _patch_onfailure(self, key, value):
+        def fill(element, item):
+            element.set('action', item['action'])
+            if item['delay']:
+                element.set('delay', item['delay'])
+            else:
+                element.attrib.pop('delay', None)
+
+        self._patch_list('onfailure', normalize_value(key, value), fill)
+
+    def _patch_serviceaccount(self, key, value):
+        account = normalize_value(key, value)
+        if not account:
+            self._remove_all(self.root, 'serviceaccount')
+            return
+        # 保留 <domain> 等界面不支持的子元素
+        sa_element = self._ensure(self.root, 'serviceaccount', CANONICAL_ORDER)
+        self._set_text(sa_element, 'username', account['username'], SERVICEACCOUNT_ORDER)
+        self._set_text(sa_element, 'password', account['password'], SERVICEACCOUNT_ORDER)
+        self._set_text(sa_element, 'allowservicelogon', 'true' if account['allowservicelogon'] else '',
+                       SERVICEACCOUNT_ORDER)
+
+    _PATCHERS = {
+        'id': _patch_simple, 'name': _patch_simple, 'description': _patch_simple,
+        'executable': _patch_simple, 'arguments': _patch_simple, 'workingdirectory': _patch_simple,
+        'resetfailure': _patch_simple, 'priority': _patch_simple, 'stoptimeout': _patch_simple,
+        'logpath': _patch_simple, 'interactive': _patch_interactive, 'log_mode': _patch_log_mode,
+        'environments': _patch_environments, 'depend': _patch_depend, 'onfailure': _patch_onfailure,
+        'serviceaccount': _patch_serviceaccount,
+    }
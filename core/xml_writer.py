@@ -0,0 +1,63 @@
+import io
+import os
+import re
+import xml.etree.ElementTree as ET
+
+XML_HEADER = '<?xml version="1.0" ?>'
+
+# 与 str.splitlines() 相同的换行符集合
+_LINE_BREAK_RE = re.compile('\r\n|[\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]')
+
+
+def _join_lines(data, newline):
+    """
+    统一值中的换行符，并去掉中间的空白行。
+    第一段和最后一段分别与标签连在同一行，因此总是保留。
+    """
+    if _LINE_BREAK_RE.search(data) is None:
+        return data
+    segments = _LINE_BREAK_RE.split(data)
+    kept = [segments[0]] + [s for s in segments[1:-1] if s.strip()] + [segments[-1]]
+    return newline.join(kept)
+
+
+def _escape(data, newline):
+    # 与 minidom 的转义规则一致：文本和属性都转义 & < " >
+    data = data.replace("&", "&amp;").replace("<", "&lt;").replace("\"", "&quot;").replace(">", "&gt;")
+    return _join_lines(data, newline)
+
+
+def _write_element(write, element, prefix, indent, newline):
+    if element.tag is ET.Comment:
+        write(f"{newline}{prefix}<!--{_join_lines(element.text or '', newline)}-->")
+        return
+
+    write(f"{newline}{prefix}<{element.tag}")
+    for name, value in element.attrib.items():
+        write(f" {name}=\"{_escape(value, newline)}\"")
+
+    if len(element):
+        write(">")
+        for child in element:
+            _write_element(write, child, prefix + indent, indent, newline)
+        write(f"{newline}{prefix}</{element.tag}>")
+    elif element.text:
+        write(f">{_escape(element.text, newline)}</{element.tag}>")
+    else:
+        write("/>")
+
+
+def write_pretty_xml(root, file, indent="  ", newline=os.linesep):
+    """
+    将 Element 树以缩进格式直接写入文件对象，一次遍历完成。
+    输出与 minidom.toprettyxml() 去掉空行后再用 newline 拼接的结果逐字节相同：
+    只有文本的元素写在一行，空元素写成 <tag/>，注释保留为 <!--...-->。
+    """
+    file.write(XML_HEADER)
+    _write_element(file.write, root, "", indent, newline)
+
+
+def to_pretty_xml_string(root, indent="  ", newline=os.linesep) -> str:
+    buffer = io.StringIO()
+    write_pretty_xml(root, buffer, indent, newline)
+    return buffer.getvalue()
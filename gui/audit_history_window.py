@@ -0,0 +1,125 @@
+import time
+import tkinter as tk
+from datetime import datetime, timedelta
+from tkinter import ttk, messagebox
+
+ANY = "全部"
+RESULTS = (ANY, "ok", "failed", "cancelled", "timeout", "error")
+
+
+class AuditHistoryWindow(tk.Toplevel):
+    """
+    操作历史窗口：按服务、操作、结果和时间范围查询审计日志。
+    日期格式为 YYYY-MM-DD，结束日期当天的记录也包含在内。
+    """
+
+    COLUMNS = (("time", "时间", 150), ("user", "用户", 90), ("host", "主机", 110), ("service", "服务", 140),
+               ("action", "操作", 80), ("result", "结果", 70), ("returncode", "退出码", 60),
+               ("duration", "耗时(秒)", 70), ("hash", "配置哈希（修改前 → 修改后）", 200), ("detail", "信息", 200))
+    LIMIT = 1000
+
+    def __init__(self, parent, audit_log):
+        super().__init__(parent)
+        self.title("操作历史")
+        self.transient(parent)
+        self.geometry("1200x560")
+        self.audit_log = audit_log
+
+        self.create_widgets()
+        self.load_filter_values()
+        self.run_query()
+
+    def create_widgets(self):
+        main_frame = ttk.Frame(self, padding=10)
+        main_frame.pack(expand=True, fill="both")
+        main_frame.rowconfigure(1, weight=1)
+        main_frame.columnconfigure(0, weight=1)
+
+        filter_frame = ttk.Frame(main_frame)
+        filter_frame.grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0, 5))
+
+        self.service_var = tk.StringVar(value=ANY)
+        self.action_var = tk.StringVar(value=ANY)
+        self.result_var = tk.StringVar(value=ANY)
+        self.since_var = tk.StringVar(value=(datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d"))
+        self.until_var = tk.StringVar()
+
+        ttk.Label(filter_frame, text="服务:").pack(side="left")
+        self.service_combo = ttk.Combobox(filter_frame, textvariable=self.service_var, width=20)
+        self.service_combo.pack(side="left", padx=(2, 8))
+        self.service_combo.bind("<Return>", lambda e: self.run_query())
+        ttk.Label(filter_frame, text="操作:").pack(side="left")
+        self.action_combo = ttk.Combobox(filter_frame, textvariable=self.action_var, state="readonly", width=10)
+        self.action_combo.pack(side="left", padx=(2, 8))
+        ttk.Label(filter_frame, text="结果:").pack(side="left")
+        ttk.Combobox(filter_frame, textvariable=self.result_var, values=RESULTS, state="readonly",
+                     width=10).pack(side="left", padx=(2, 8))
+        ttk.Label(filter_frame, text="从:").pack(side="left")
+        ttk.Entry(filter_frame, textvariable=self.since_var, width=11).pack(side="left", padx=(2, 8))
+        ttk.Label(filter_frame, text="到:").pack(side="left")
+        ttk.Entry(filter_frame, textvariable=self.until_var, width=11).pack(side="left", padx=(2, 8))
+        ttk.Button(filter_frame, text="查询", command=self.run_query).pack(side="left")
+
+        self.tree = ttk.Treeview(main_frame, columns=[c[0] for c in self.COLUMNS], show="headings")
+        for column, text, width in self.COLUMNS:
+            self.tree.heading(column, text=text)
+            self.tree.column(column, width=width, anchor="w")
+        v_scroll = ttk.Scrollbar(main_frame, orient="vertical", command=self.tree.yview)
+        self.tree.config(yscrollcommand=v_scroll.set)
+        self.tree.grid(row=1, column=0, sticky="nsew")
+        v_scroll.grid(row=1, column=1, sticky="ns")
+        self.tree.tag_configure("failed", foreground="red")
+        self.tree.tag_configure("error", foreground="red")
+        self.tree.tag_configure("timeout", foreground="red")
+        self.tree.tag_configure("cancelled", foreground="gray")
+
+        bottom_frame = ttk.Frame(main_frame)
+        bottom_frame.grid(row=2, column=0, columnspan=2, sticky="ew", pady=(10, 0))
+        self.summary_var = tk.StringVar()
+        ttk.Label(bottom_frame, textvariable=self.summary_var).pack(side="left")
+        ttk.Button(bottom_frame, text="关闭", command=self.destroy).pack(side="right")
+
+    def load_filter_values(self):
+        self.service_combo.config(values=[ANY] + self.audit_log.distinct('service_id'))
+        self.action_combo.config(values=[ANY] + self.audit_log.distinct('action'))
+
+    @staticmethod
+    def _parse_date(text, end_of_day=False):
+        text = text.strip()
+        if not text:
+            return None
+        moment = datetime.strptime(text, "%Y-%m-%d")
+        if end_of_day:
+            moment += timedelta(days=1)
+        return moment.timestamp()
+
+    def run_query(self):
+        try:
+            since = self._parse_date(self.since_var.get())
+            until = self._parse_date(self.until_var.get(), end_of_day=True)
+        except ValueError:
+            messagebox.showerror("日期无效", "日期格式应为 YYYY-MM-DD。", parent=self)
+            return
+
+        def value_of(var):
+            value = var.get().strip()
+            return None if value in ('', ANY) else value
+
+        started = time.perf_counter()
+        entries = self.audit_log.query(service_id=value_of(self.service_var), action=value_of(self.action_var),
+                                       result=value_of(self.result_var), since=since, until=until, limit=self.LIMIT)
+        elapsed = (time.perf_counter() - started) * 1000
+
+        self.tree.delete(*self.tree.get_children())
+        for entry in entries:
+            if entry['previous_hash'] or entry['config_hash']:
+                hashes = f"{(entry['previous_hash'] or '-')[:10]} → {(entry['config_hash'] or '-')[:10]}"
+            else:
+                hashes = ""
+            self.tree.insert("", "end", tags=(entry['result'],), values=(
+                time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry['ts'])), entry['user'] or "",
+                entry['host'] or "", entry['service_id'] or "", entry['action'], entry['result'] or "",
+                "" if entry['returncode'] is None else entry['returncode'],
+                "" if entry['duration'] is None else f"{entry['duration']:.2f}", hashes, entry['detail'] or ""))
+        more = f"（只显示最近的 {self.LIMIT} 条）" if len(entries) >= self.LIMIT else ""
+        self.summary_var.set(f"共 {len(entries)} 条记录{more}，查询耗时 {elapsed:.1f} 毫秒")
@@ -0,0 +1,184 @@
+import time
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+
+from core.command_metrics import CANCELLED, ERROR, FAILED, OK, TIMED_OUT, summarize
+
+ALL_SERVICES = "全部服务"
+
+
+class CommandTimelineWindow(tk.Toplevel):
+    """
+    命令耗时窗口：上方按命令类型统计 p50/p95，下方按服务画出每次调用的时间线。
+    时间线中细的灰线是排队和准备的时间，粗的色块是 WinSW 进程的运行时间，鼠标悬停可查看详情。
+    """
+
+    COLUMNS = (("command", "命令", 100), ("count", "次数", 60), ("failures", "失败", 60),
+               ("p50", "p50(秒)", 90), ("p95", "p95(秒)", 90), ("max", "最长(秒)", 90))
+    STATUS_COLORS = {OK: "#4caf50", FAILED: "#e53935", TIMED_OUT: "#fb8c00", CANCELLED: "#9e9e9e",
+                     ERROR: "#8e24aa"}
+    LABEL_WIDTH = 150
+    ROW_HEIGHT = 24
+    MAX_RECORDS = 500  # 时间线最多显示最近的这么多条记录
+    REFRESH_DELAY_MS = 300
+
+    def __init__(self, parent, metrics, call_in_ui):
+        super().__init__(parent)
+        self.title("命令耗时")
+        self.transient(parent)
+        self.geometry("960x600")
+        self.metrics = metrics
+        self.call_in_ui = call_in_ui
+        self._refresh_job = None
+        self._bar_info = {}  # 画布元素ID -> 详情文字
+
+        self.create_widgets()
+        self.refresh()
+
+        self.metrics.add_listener(self._on_record)
+        self.bind("<Destroy>", self._on_destroy)
+
+    def create_widgets(self):
+        main_frame = ttk.Frame(self, padding=10)
+        main_frame.pack(expand=True, fill="both")
+        main_frame.rowconfigure(2, weight=1)
+        main_frame.columnconfigure(0, weight=1)
+
+        top_frame = ttk.Frame(main_frame)
+        top_frame.grid(row=0, column=0, sticky="ew", pady=(0, 5))
+        ttk.Label(top_frame, text="服务:").pack(side="left")
+        self.service_var = tk.StringVar(value=ALL_SERVICES)
+        self.service_combo = ttk.Combobox(top_frame, textvariable=self.service_var, state="readonly", width=30)
+        self.service_combo.pack(side="left", padx=5)
+        self.service_combo.bind("<<ComboboxSelected>>", lambda e: self.refresh())
+        ttk.Button(top_frame, text="关闭", command=self.destroy).pack(side="right")
+        ttk.Button(top_frame, text="导出...", command=self.export).pack(side="right", padx=5)
+
+        self.tree = ttk.Treeview(main_frame, columns=[c[0] for c in self.COLUMNS], show="headings", height=6)
+        for column, text, width in self.COLUMNS:
+            self.tree.heading(column, text=text)
+            self.tree.column(column, width=width, anchor="w")
+        self.tree.grid(row=1, column=0, sticky="ew")
+
+        canvas_frame = ttk.Frame(main_frame)
+        canvas_frame.grid(row=2, column=0, sticky="nsew", pady=(10, 0))
+        canvas_frame.rowconfigure(0, weight=1)
+        canvas_frame.columnconfigure(0, weight=1)
+        self.canvas = tk.Canvas(canvas_frame, background="white", highlightthickness=0)
+        v_scroll = ttk.Scrollbar(canvas_frame, orient="vertical", command=self.canvas.yview)
+        self.canvas.config(yscrollcommand=v_scroll.set)
+        self.canvas.grid(row=0, column=0, sticky="nsew")
+        v_scroll.grid(row=0, column=1, sticky="ns")
+        self.canvas.bind("<Configure>", lambda e: self._schedule_refresh())
+
+        self.detail_var = tk.StringVar()
+        ttk.Label(main_frame, textvariable=self.detail_var, foreground="gray").grid(row=3, column=0, sticky="w",
+                                                                                   pady=(5, 0))
+
+    # --- 数据更新 ---
+
+    def _on_record(self, record):
+        """新命令记录在工作线程中回调，交给UI线程合并刷新。"""
+        self.call_in_ui(self._schedule_refresh)
+
+    def _schedule_refresh(self):
+        if self._refresh_job is None and self.winfo_exists():
+            self._refresh_job = self.after(self.REFRESH_DELAY_MS, self.refresh)
+
+    def _on_destroy(self, event):
+        if event.widget is self:
+            self.metrics.remove_listener(self._on_record)
+
+    def refresh(self):
+        self._refresh_job = None
+        records = self.metrics.records()
+        services = sorted({record.service_id for record in records if record.service_id})
+        self.service_combo.config(values=[ALL_SERVICES] + services)
+        selected = self.service_var.get()
+        if selected != ALL_SERVICES:
+            records = [record for record in records if record.service_id == selected]
+
+        self._show_summary(records)
+        self._draw_timeline(records[-self.MAX_RECORDS:])
+
+    def _show_summary(self, records):
+        self.tree.delete(*self.tree.get_children())
+        for command, stats in sorted(summarize(records).items()):
+            values = [command, stats['count'], stats['failures']]
+            values += ["" if stats[key] is None else f"{stats[key]:.3f}" for key in ('p50', 'p95', 'max')]
+            self.tree.insert("", "end", values=values)
+
+    def _draw_timeline(self, records):
+        self.canvas.delete("all")
+        self._bar_info.clear()
+        records = [record for record in records if record.started_at is not None and record.service_id]
+        if not records:
+            self.canvas.create_text(10, 10, anchor="nw", text="还没有命令记录。", fill="gray")
+            return
+
+        start = min(record.submitted_at or record.started_at for record in records)
+        end = max(record.finished_at or record.started_at for record in records)
+        span = max(end - start, 0.001)
+        width = max(self.canvas.winfo_width(), self.LABEL_WIDTH + 200)
+        plot_width = width - self.LABEL_WIDTH - 20
+
+        def x_of(timestamp):
+            return self.LABEL_WIDTH + (timestamp - start) / span * plot_width
+
+        # 时间轴
+        axis_y = 15
+        for i in range(5):
+            timestamp = start + span * i / 4
+            x = x_of(timestamp)
+            self.canvas.create_line(x, axis_y + 5, x, axis_y + 10, fill="gray")
+            self.canvas.create_text(x, axis_y, text=time.strftime("%H:%M:%S", time.localtime(timestamp)),
+                                    fill="gray", anchor="n" if 0 < i < 4 else ("nw" if i == 0 else "ne"))
+
+        rows = {service_id: index for index, service_id in
+                enumerate(sorted({record.service_id for record in records}))}
+        top = axis_y + 20
+        for service_id, index in rows.items():
+            y = top + index * self.ROW_HEIGHT
+            if index % 2:
+                self.canvas.create_rectangle(0, y, width, y + self.ROW_HEIGHT, fill="#f5f5f5", outline="")
+            self.canvas.create_text(5, y + self.ROW_HEIGHT / 2, text=service_id, anchor="w")
+
+        for record in records:
+            y = top + rows[record.service_id] * self.ROW_HEIGHT
+            finished_at = record.finished_at or record.started_at
+            if record.submitted_at is not None and record.started_at > record.submitted_at:
+                self.canvas.create_line(x_of(record.submitted_at), y + self.ROW_HEIGHT / 2,
+                                        x_of(record.started_at), y + self.ROW_HEIGHT / 2, fill="#bdbdbd")
+            x0 = x_of(record.started_at)
+            x1 = max(x_of(finished_at), x0 + 2)
+            bar = self.canvas.create_rectangle(x0, y + 5, x1, y + self.ROW_HEIGHT - 5, outline="",
+                                               fill=self.STATUS_COLORS.get(record.status, "#9e9e9e"))
+            self._bar_info[bar] = self._describe(record)
+            self.canvas.tag_bind(bar, "<Enter>", lambda e, item=bar: self.detail_var.set(self._bar_info[item]))
+            self.canvas.tag_bind(bar, "<Leave>", lambda e: self.detail_var.set(""))
+
+        self.canvas.config(scrollregion=(0, 0, width, top + len(rows) * self.ROW_HEIGHT + 10))
+
+    @staticmethod
+    def _describe(record):
+        started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(record.started_at))
+        duration = "" if record.duration is None else f"运行 {record.duration:.3f} 秒"
+        wait = "" if record.wait_time is None else f"，排队和准备 {record.wait_time:.3f} 秒"
+        return (f"{record.service_id} {record.command}  {started}  {duration}{wait}  "
+                f"退出码 {record.returncode}  输出 {record.stdout_bytes}/{record.stderr_bytes} 字节  [{record.status}]")
+
+    # --- 导出 ---
+
+    def export(self):
+        path = filedialog.asksaveasfilename(
+            parent=self, title="导出命令耗时记录", defaultextension=".jsonl",
+            filetypes=[("JSON Lines", "*.jsonl"), ("CSV", "*.csv"), ("Prometheus 文本格式", "*.prom")])
+        if not path:
+            return
+        selected = self.service_var.get()
+        try:
+            self.metrics.export(path, None if selected == ALL_SERVICES else selected)
+        except OSError as e:
+            messagebox.showerror("导出失败", str(e), parent=self)
+            return
+        messagebox.showinfo("导出完成", f"已导出到 {path}", parent=self)
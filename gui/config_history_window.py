@@ -0,0 +1,184 @@
+import os
+import time
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+from core.config_history import DELETE, EXTERNAL, ROLLBACK, SAVE
+
+ACTION_NAMES = {SAVE: "保存", DELETE: "删除", ROLLBACK: "回滚", EXTERNAL: "外部修改"}
+DELETED_SUFFIX = " (已删除)"
+
+
+class ConfigHistoryWindow(tk.Toplevel):
+    """
+    配置历史窗口：列出服务配置的所有版本，比较任意两个版本解析后的配置，并可一键回滚。
+    只选中一个版本时与当前文件比较；选中两个版本时比较这两个版本。
+    已删除的服务也会列出，回滚到删除前的版本即可恢复。
+    """
+
+    VERSION_COLUMNS = (("number", "#", 40), ("time", "时间", 140), ("action", "来源", 70),
+                       ("sha", "内容哈希", 100), ("size", "大小(字节)", 80))
+    DIFF_COLUMNS = (("key", "配置项", 180), ("old", "旧值", 260), ("new", "新值", 260))
+
+    def __init__(self, parent, history, config_manager, service_id=None, on_restored=None):
+        super().__init__(parent)
+        self.title("配置历史")
+        self.transient(parent)
+        self.geometry("1000x560")
+        self.history = history
+        self.config_manager = config_manager
+        self.on_restored = on_restored
+        self._versions = []
+
+        self.create_widgets()
+        self.load_services(service_id)
+
+    def create_widgets(self):
+        main_frame = ttk.Frame(self, padding=10)
+        main_frame.pack(expand=True, fill="both")
+        main_frame.rowconfigure(1, weight=1)
+        main_frame.columnconfigure(0, weight=2)
+        main_frame.columnconfigure(1, weight=3)
+
+        top_frame = ttk.Frame(main_frame)
+        top_frame.grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0, 5))
+        ttk.Label(top_frame, text="服务:").pack(side="left")
+        self.service_var = tk.StringVar()
+        self.service_combo = ttk.Combobox(top_frame, textvariable=self.service_var, state="readonly", width=35)
+        self.service_combo.pack(side="left", padx=5)
+        self.service_combo.bind("<<ComboboxSelected>>", lambda e: self.load_versions())
+
+        version_frame = ttk.Frame(main_frame)
+        version_frame.grid(row=1, column=0, sticky="nsew", padx=(0, 5))
+        version_frame.rowconfigure(0, weight=1)
+        version_frame.columnconfigure(0, weight=1)
+        self.version_tree = ttk.Treeview(version_frame, columns=[c[0] for c in self.VERSION_COLUMNS],
+                                         show="headings", selectmode="extended")
+        for column, text, width in self.VERSION_COLUMNS:
+            self.version_tree.heading(column, text=text)
+            self.version_tree.column(column, width=width, anchor="w")
+        v_scroll = ttk.Scrollbar(version_frame, orient="vertical", command=self.version_tree.yview)
+        self.version_tree.config(yscrollcommand=v_scroll.set)
+        self.version_tree.grid(row=0, column=0, sticky="nsew")
+        v_scroll.grid(row=0, column=1, sticky="ns")
+        self.version_tree.tag_configure(DELETE, foreground="gray")
+        self.version_tree.bind("<<TreeviewSelect>>", lambda e: self.show_diff())
+
+        diff_frame = ttk.Frame(main_frame)
+        diff_frame.grid(row=1, column=1, sticky="nsew")
+        diff_frame.rowconfigure(1, weight=1)
+        diff_frame.columnconfigure(0, weight=1)
+        self.diff_title_var = tk.StringVar(value="选择一个版本与当前文件比较，或选择两个版本互相比较。")
+        ttk.Label(diff_frame, textvariable=self.diff_title_var).grid(row=0, column=0, sticky="w", pady=(0, 3))
+        self.diff_tree = ttk.Treeview(diff_frame, columns=[c[0] for c in self.DIFF_COLUMNS], show="headings")
+        for column, text, width in self.DIFF_COLUMNS:
+            self.diff_tree.heading(column, text=text)
+            self.diff_tree.column(column, width=width, anchor="w")
+        diff_scroll = ttk.Scrollbar(diff_frame, orient="vertical", command=self.diff_tree.yview)
+        self.diff_tree.config(yscrollcommand=diff_scroll.set)
+        self.diff_tree.grid(row=1, column=0, sticky="nsew")
+        diff_scroll.grid(row=1, column=1, sticky="ns")
+        self.diff_tree.tag_configure("added", foreground="green")
+        self.diff_tree.tag_configure("removed", foreground="red")
+
+        bottom_frame = ttk.Frame(main_frame)
+        bottom_frame.grid(row=2, column=0, columnspan=2, sticky="ew", pady=(10, 0))
+        self.rollback_button = ttk.Button(bottom_frame, text="回滚到所选版本", command=self.rollback,
+                                          state="disabled")
+        self.rollback_button.pack(side="left")
+        ttk.Button(bottom_frame, text="关闭", command=self.destroy).pack(side="right")
+
+    # --- 数据加载 ---
+
+    def _current_path(self, service_id):
+        return os.path.join(self.history.service_dir, f"{service_id}.xml")
+
+    def _selected_service(self):
+        value = self.service_var.get()
+        return value[:-len(DELETED_SUFFIX)] if value.endswith(DELETED_SUFFIX) else value
+
+    def load_services(self, service_id=None):
+        labels = [service + DELETED_SUFFIX if self.history.is_deleted(service) else service
+                  for service in self.history.services()]
+        self.service_combo.config(values=labels)
+        if not labels:
+            self.diff_title_var.set("还没有任何配置历史。保存配置后会自动记录版本。")
+            return
+        selected = next((label for label in labels if label in (service_id, f"{service_id}{DELETED_SUFFIX}")),
+                        labels[0])
+        self.service_var.set(selected)
+        self.load_versions()
+
+    def load_versions(self):
+        self._versions = self.history.versions(self._selected_service())
+        self.version_tree.delete(*self.version_tree.get_children())
+        # 最新的版本排在最上面
+        for index in range(len(self._versions) - 1, -1, -1):
+            version = self._versions[index]
+            self.version_tree.insert("", "end", iid=str(index), tags=(version.action,), values=(
+                version.number, time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(version.timestamp)),
+                ACTION_NAMES.get(version.action, version.action), version.sha256[:10],
+                "" if version.size is None else version.size))
+        self.diff_tree.delete(*self.diff_tree.get_children())
+        self.rollback_button.config(state="disabled")
+
+    def _selected_versions(self):
+        """返回选中的版本，按时间从旧到新排列。"""
+        return [self._versions[int(iid)] for iid in sorted(self.version_tree.selection(), key=int)]
+
+    # --- 比较 ---
+
+    def show_diff(self):
+        selected = self._selected_versions()
+        self.rollback_button.config(state="normal" if len(selected) == 1 else "disabled")
+        self.diff_tree.delete(*self.diff_tree.get_children())
+        if not selected or len(selected) > 2:
+            self.diff_title_var.set("选择一个版本与当前文件比较，或选择两个版本互相比较。")
+            return
+
+        try:
+            old_data = self.history.read(selected[0].sha256)
+            if len(selected) == 2:
+                new_data = self.history.read(selected[1].sha256)
+                title = f"版本 #{selected[0].number} → 版本 #{selected[1].number}"
+            else:
+                with open(self._current_path(selected[0].service_id), 'rb') as f:
+                    new_data = f.read()
+                title = f"版本 #{selected[0].number} → 当前文件"
+        except FileNotFoundError:
+            self.diff_title_var.set("当前没有该服务的配置文件（已删除），可以回滚到所选版本来恢复。")
+            return
+        except OSError as e:
+            self.diff_title_var.set(f"无法读取版本内容: {e}")
+            return
+
+        changes = self.history.diff(self.config_manager, old_data, new_data)
+        self.diff_title_var.set(f"{title}：{len(changes)} 项不同" if changes else f"{title}：内容相同")
+        for key, old_value, new_value in changes:
+            tag = "added" if old_value is None else ("removed" if new_value is None else "")
+            self.diff_tree.insert("", "end", tags=(tag,), values=(
+                key, "" if old_value is None else old_value, "" if new_value is None else new_value))
+
+    # --- 回滚 ---
+
+    def rollback(self):
+        selected = self._selected_versions()
+        if len(selected) != 1:
+            return
+        version = selected[0]
+        if not messagebox.askyesno("确认回滚", f"将服务 '{version.service_id}' 的配置恢复为版本 #{version.number}？\n"
+                                              "当前内容会保留在历史中，可以再次回滚。", parent=self):
+            return
+        try:
+            changed = self.config_manager.restore_version(version.service_id, version.sha256,
+                                                          self.history.service_dir)
+        except OSError as e:
+            messagebox.showerror("回滚失败", str(e), parent=self)
+            return
+        if changed:
+            print(f"已将 '{version.service_id}' 的配置恢复为版本 #{version.number}。")
+        else:
+            print(f"'{version.service_id}' 的当前配置与版本 #{version.number} 相同，无需回滚。")
+        if self.on_restored is not None:
+            self.on_restored(version.service_id)
+        self.load_services(version.service_id)
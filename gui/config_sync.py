@@ -0,0 +1,165 @@
+import threading
+from tkinter import messagebox
+
+from core.xml_document import normalize_value
+
+
+class ConfigSync:
+    """
+    表单选项卡与XML源码选项卡之间的双向自动同步。
+    - 表单字段修改后空闲 FORM_DELAY_MS 毫秒，只收集发生修改的选项卡，
+      把与上次快照不同的配置项以补丁方式应用到当前文档，再刷新XML文本
+      （只替换变化的行，光标和滚动位置不变）；
+    - XML文本修改后空闲 XML_DELAY_MS 毫秒，在后台线程中解析，
+      解析结果回到界面线程后只对字段值确实不同的选项卡调用 set_data()。
+    每次同步都会增加 generation，过期的后台解析结果会被丢弃。
+    """
+
+    FORM_DELAY_MS = 300
+    XML_DELAY_MS = 500
+
+    def __init__(self, main_window, form_tabs, xml_tab):
+        self.main_window = main_window
+        self.form_tabs = form_tabs
+        self.xml_tab = xml_tab
+        self._dirty_tabs = set()
+        self._form_snapshot = {}  # 最近一次与文档一致的界面字段值
+        self._xml_text = None  # 最近一次与文档一致的XML文本
+        self._form_after_id = None
+        self._xml_after_id = None
+        self._generation = 0
+
+        for tab in form_tabs:
+            tab.bind_change(lambda tab=tab: self._on_form_changed(tab))
+        xml_tab.bind_change(self._on_xml_changed)
+
+    def reset(self):
+        """切换或保存服务后调用：以当前界面和文档为基准，刷新XML文本。"""
+        self._cancel_timers()
+        self._generation += 1
+        self._dirty_tabs.clear()
+        self._form_snapshot = self.main_window._get_current_config_from_ui()
+        document = self.main_window.current_document
+        if document is None:
+            document = self.main_window._apply_config_to_document(self._form_snapshot)
+        self._show_document(document)
+        self.xml_tab.set_status("XML源码与界面字段自动同步")
+
+    def on_tab_created(self, tab):
+        """
+        延迟创建的表单选项卡创建后调用：以控件实际显示的值为基准，
+        控件对数据的规范化（例如去掉首尾空白）不算作修改，不会写回XML。
+        """
+        self._form_snapshot.update(tab.get_data())
+        self._dirty_tabs.discard(tab)
+
+    def flush(self) -> bool:
+        """
+        立即完成所有待处理的同步（保存前调用）。
+        XML文本有未解析的修改且无法解析时提示错误并返回 False。
+        """
+        self._cancel_timers()
+        if self.xml_tab.get_text() != self._xml_text:
+            self._generation += 1
+            text = self.xml_tab.get_text()
+            try:
+                document = self.main_window.config_manager.document_from_xml_string(text)
+            except Exception as e:
+                self.xml_tab.set_status(f"XML解析失败: {e}", error=True)
+                messagebox.showerror("解析失败", f"XML源码有语法错误，请先修正。\n错误: {e}")
+                return False
+            self._apply_document(text, document, document.to_config())
+        self.sync_form()
+        return True
+
+    def _cancel_timers(self):
+        for after_id in (self._form_after_id, self._xml_after_id):
+            if after_id:
+                self.xml_tab.after_cancel(after_id)
+        self._form_after_id = self._xml_after_id = None
+
+    # --- 表单 -> XML ---
+
+    def _on_form_changed(self, tab):
+        self._dirty_tabs.add(tab)
+        if self._form_after_id:
+            self.xml_tab.after_cancel(self._form_after_id)
+        self._form_after_id = self.xml_tab.after(self.FORM_DELAY_MS, self.sync_form)
+
+    def sync_form(self):
+        self._form_after_id = None
+        if not self._dirty_tabs:
+            return
+        values = {}
+        for tab in self._dirty_tabs:
+            values.update(tab.get_data())
+        self._dirty_tabs.clear()
+
+        changed = {key: value for key, value in values.items() if self._form_snapshot.get(key) != value}
+        self._form_snapshot.update(values)
+        if not changed:
+            return
+        # 表单的修改优先，正在后台解析的XML结果作废
+        self._generation += 1
+        self._show_document(self.main_window._apply_config_to_document(changed))
+        self.xml_tab.set_status(f"已将 {len(changed)} 项修改同步到XML")
+
+    def _show_document(self, document):
+        self._xml_text = document.to_string()
+        self.xml_tab.set_text(self._xml_text)
+
+    # --- XML -> 表单 ---
+
+    def _on_xml_changed(self):
+        if self._xml_after_id:
+            self.xml_tab.after_cancel(self._xml_after_id)
+        self._xml_after_id = self.xml_tab.after(self.XML_DELAY_MS, self._parse_xml)
+
+    def _parse_xml(self):
+        self._xml_after_id = None
+        text = self.xml_tab.get_text()
+        if text == self._xml_text:
+            # 由程序写入的文本，无需解析
+            return
+        self._generation += 1
+        generation = self._generation
+        self.xml_tab.set_status("正在解析XML...")
+        config_manager = self.main_window.config_manager
+
+        def worker():
+            try:
+                document = config_manager.document_from_xml_string(text)
+                result = (document, document.to_config(), None)
+            except Exception as e:
+                result = (None, None, e)
+            self.main_window.call_in_ui(self._on_parsed, generation, text, *result)
+
+        threading.Thread(target=worker, name='xml-parse', daemon=True).start()
+
+    def _on_parsed(self, generation, text, document, config, error):
+        if generation != self._generation:
+            return
+        if error is not None:
+            self.xml_tab.set_status(f"XML解析失败: {error}", error=True)
+            return
+        updated = self._apply_document(text, document, config)
+        if updated:
+            self.xml_tab.set_status(f"已从XML更新 {updated} 个选项卡")
+        else:
+            self.xml_tab.set_status("XML源码与界面字段自动同步")
+
+    def _apply_document(self, text, document, config) -> int:
+        """把解析得到的文档设为当前文档，只更新字段值不同的选项卡，返回更新的选项卡数量。"""
+        self.main_window.current_document = document
+        self._xml_text = text
+        updated = 0
+        for tab in self.form_tabs:
+            ui_values = tab.get_data()
+            if any(normalize_value(key, config.get(key)) != normalize_value(key, ui_values.get(key))
+                   for key in tab.FIELDS):
+                tab.set_data(config)
+                updated += 1
+        # set_data 触发的修改通知与文档一致，不应再写回XML
+        self._form_snapshot = self.main_window._get_current_config_from_ui()
+        self._dirty_tabs.clear()
+        return updated
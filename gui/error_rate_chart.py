@@ -0,0 +1,83 @@
+import time
+import tkinter as tk
+
+# 可选的统计粒度（秒），按日志跨度选择能放下全部柱子的最小粒度
+BUCKET_SIZES = (60, 300, 900, 3600, 6 * 3600, 24 * 3600)
+BUCKET_LABELS = {60: "1 分钟", 300: "5 分钟", 900: "15 分钟", 3600: "1 小时", 6 * 3600: "6 小时", 24 * 3600: "1 天"}
+
+
+class ErrorRateChart(tk.Canvas):
+    """
+    日志错误率柱状图：按时间段显示记录数（灰色）、其中的警告数（橙色）和错误数（红色），
+    数据来自 core.log_parsing.LogColumnStore 的分钟计数。单击柱子调用 on_select(开始时间, 结束时间)。
+    """
+
+    BAR_WIDTH = 6
+    MAX_BARS = 240
+
+    def __init__(self, parent, on_select=None, height=70):
+        super().__init__(parent, height=height, background="white", highlightthickness=0)
+        self.on_select = on_select
+        self.store = None
+        self._drawn = None  # 上次绘制时的 (store, version, 宽, 高)
+        self._bars = []  # [(x0, x1, 开始时间, 结束时间)]
+        self.bind("<Configure>", lambda e: self.refresh(force=True))
+        self.bind("<Button-1>", self._on_click)
+
+    def set_store(self, store):
+        self.store = store
+        self.refresh(force=True)
+
+    def refresh(self, force=False):
+        width, height = self.winfo_width(), self.winfo_height()
+        state = (self.store, self.store.version if self.store is not None else None, width, height)
+        if not force and state == self._drawn:
+            return
+        self._drawn = state
+        self.delete("all")
+        self._bars = []
+        if self.store is None or width <= 1:
+            return
+
+        max_bars = max(1, min(self.MAX_BARS, width // self.BAR_WIDTH))
+        buckets = self.store.rate_buckets(60)
+        if not buckets:
+            self.create_text(6, height // 2, anchor="w", fill="gray",
+                             text="没有识别出带时间的日志记录，无法统计错误率（可在“格式”中指定日志格式）")
+            return
+        span = buckets[-1][0] - buckets[0][0] + 60
+        bucket_seconds = next((size for size in BUCKET_SIZES if span / size <= max_bars), BUCKET_SIZES[-1])
+        counts = {start: (records, warnings, errors)
+                  for start, records, warnings, errors in self.store.rate_buckets(bucket_seconds)}
+        last = max(counts)
+        first = max(min(counts), last - (max_bars - 1) * bucket_seconds)
+
+        top, chart_height = 14, height - 16
+        peak = max(records for start, (records, _, _) in counts.items() if start >= first) or 1
+        total_records = total_errors = 0
+        for i, start in enumerate(range(int(first), int(last) + 1, bucket_seconds)):
+            records, warnings, errors = counts.get(start, (0, 0, 0))
+            total_records += records
+            total_errors += errors
+            x0 = 2 + i * self.BAR_WIDTH
+            x1 = x0 + self.BAR_WIDTH - 1
+            bottom = top + chart_height
+            for value, colour in ((records, "#c8c8c8"), (warnings + errors, "#f0a030"), (errors, "#d03030")):
+                if value:
+                    self.create_rectangle(x0, bottom - max(1, value * chart_height // peak), x1, bottom,
+                                          fill=colour, width=0)
+            self._bars.append((x0, x1 + 1, start, start + bucket_seconds))
+
+        rate = total_errors / total_records if total_records else 0.0
+        since = time.strftime("%m-%d %H:%M", time.localtime(first))
+        self.create_text(4, 1, anchor="nw", font=("TkDefaultFont", 8), text=(
+            f"每 {BUCKET_LABELS[bucket_seconds]}，自 {since} 起共 {total_records} 条记录，错误 {total_errors} 条"
+            f"（{rate:.1%}），单击柱子按该时间段筛选"))
+
+    def _on_click(self, event):
+        if self.on_select is None:
+            return
+        for x0, x1, start, end in self._bars:
+            if x0 <= event.x < x1:
+                self.on_select(start, end)
+                return
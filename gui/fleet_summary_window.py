@@ -0,0 +1,80 @@
+import tkinter as tk
+from tkinter import ttk
+
+
+class FleetSummaryWindow(tk.Toplevel):
+    """
+    批量操作的汇总结果窗口。结果可以在执行过程中逐条追加。
+    """
+
+    COLUMNS = (("service", "服务", 160), ("command", "命令", 80), ("status", "结果", 60),
+               ("returncode", "退出码", 60), ("duration", "耗时(秒)", 80), ("message", "信息", 360))
+
+    def __init__(self, parent, title, total, cancel_callback=None):
+        super().__init__(parent)
+        self.title(title)
+        self.transient(parent)
+        self.geometry("900x420")
+        self.total = total
+        self.cancel_callback = cancel_callback
+        self.counts = {}
+
+        self.create_widgets()
+
+    def create_widgets(self):
+        main_frame = ttk.Frame(self, padding=10)
+        main_frame.pack(expand=True, fill="both")
+        main_frame.rowconfigure(1, weight=1)
+        main_frame.columnconfigure(0, weight=1)
+
+        self.progress_var = tk.StringVar(value=f"正在执行... 0/{self.total}")
+        ttk.Label(main_frame, textvariable=self.progress_var).grid(row=0, column=0, sticky="w", pady=(0, 5))
+
+        self.tree = ttk.Treeview(main_frame, columns=[c[0] for c in self.COLUMNS], show="headings")
+        for column, text, width in self.COLUMNS:
+            self.tree.heading(column, text=text)
+            self.tree.column(column, width=width, anchor="w")
+        v_scroll = ttk.Scrollbar(main_frame, orient="vertical", command=self.tree.yview)
+        self.tree.config(yscrollcommand=v_scroll.set)
+        self.tree.grid(row=1, column=0, sticky="nsew")
+        v_scroll.grid(row=1, column=1, sticky="ns")
+
+        self.tree.tag_configure("失败", foreground="red")
+        self.tree.tag_configure("跳过", foreground="gray")
+        self.tree.tag_configure("取消", foreground="gray")
+
+        button_frame = ttk.Frame(main_frame)
+        button_frame.grid(row=2, column=0, columnspan=2, sticky="ew", pady=(10, 0))
+        ttk.Button(button_frame, text="关闭", command=self.destroy).pack(side="right", padx=5)
+        self.cancel_button = ttk.Button(button_frame, text="取消剩余操作", command=self.cancel)
+        self.cancel_button.pack(side="right")
+        if not self.cancel_callback:
+            self.cancel_button.config(state="disabled")
+
+    def add_result(self, result):
+        """追加一条 FleetResult。"""
+        if not self.winfo_exists():
+            return
+        duration = f"{result.duration:.2f}" if result.duration is not None else ""
+        returncode = "" if result.returncode is None else result.returncode
+        self.tree.insert("", "end", values=(result.service_id, result.command, result.status, returncode,
+                                            duration, result.message), tags=(result.status,))
+        self.counts[result.status] = self.counts.get(result.status, 0) + 1
+        self._update_progress("正在执行...")
+
+    def finish(self):
+        """全部执行完毕。"""
+        if not self.winfo_exists():
+            return
+        self.cancel_button.config(state="disabled")
+        self._update_progress("执行完毕。")
+
+    def cancel(self):
+        if self.cancel_callback:
+            self.cancel_callback()
+        self.cancel_button.config(state="disabled")
+
+    def _update_progress(self, prefix):
+        done = sum(self.counts.values())
+        summary = ", ".join(f"{status} {count}" for status, count in self.counts.items())
+        self.progress_var.set(f"{prefix} {done}/{self.total}  ({summary})")
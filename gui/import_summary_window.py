@@ -0,0 +1,55 @@
+import tkinter as tk
+from tkinter import ttk
+
+
+class ImportSummaryWindow(tk.Toplevel):
+    """
+    批量导入的汇总结果窗口，一次显示所有文件的处理结果。
+    """
+
+    COLUMNS = (("source", "文件", 260), ("service", "服务ID", 160), ("status", "结果", 60), ("message", "信息", 360))
+
+    def __init__(self, parent, title, results):
+        super().__init__(parent)
+        self.title(title)
+        self.transient(parent)
+        self.geometry("880x420")
+
+        self.create_widgets()
+        self.show_results(results)
+
+    def create_widgets(self):
+        main_frame = ttk.Frame(self, padding=10)
+        main_frame.pack(expand=True, fill="both")
+        main_frame.rowconfigure(1, weight=1)
+        main_frame.columnconfigure(0, weight=1)
+
+        self.summary_var = tk.StringVar()
+        ttk.Label(main_frame, textvariable=self.summary_var).grid(row=0, column=0, sticky="w", pady=(0, 5))
+
+        self.tree = ttk.Treeview(main_frame, columns=[c[0] for c in self.COLUMNS], show="headings")
+        for column, text, width in self.COLUMNS:
+            self.tree.heading(column, text=text)
+            self.tree.column(column, width=width, anchor="w")
+        v_scroll = ttk.Scrollbar(main_frame, orient="vertical", command=self.tree.yview)
+        self.tree.config(yscrollcommand=v_scroll.set)
+        self.tree.grid(row=1, column=0, sticky="nsew")
+        v_scroll.grid(row=1, column=1, sticky="ns")
+
+        self.tree.tag_configure("冲突", foreground="red")
+        self.tree.tag_configure("无效", foreground="red")
+        self.tree.tag_configure("跳过", foreground="gray")
+
+        button_frame = ttk.Frame(main_frame)
+        button_frame.grid(row=2, column=0, columnspan=2, sticky="ew", pady=(10, 0))
+        ttk.Button(button_frame, text="关闭", command=self.destroy).pack(side="right", padx=5)
+
+    def show_results(self, results):
+        """显示 ImportResult 列表，并在顶部汇总各结果的数量。"""
+        counts = {}
+        for result in results:
+            self.tree.insert("", "end", values=(result.source, result.service_id or "", result.status, result.message),
+                             tags=(result.status,))
+            counts[result.status] = counts.get(result.status, 0) + 1
+        summary = ", ".join(f"{status} {count}" for status, count in counts.items())
+        self.summary_var.set(f"共处理 {len(results)} 个文件  ({summary})" if results else "没有找到XML文件。")
@@ -0,0 +1,134 @@
+import time
+from tkinter import ttk
+
+
+class LazyTab(ttk.Frame):
+    """
+    选项卡的占位框架。真正的选项卡在第一次显示时才由 factory(parent) 创建并放入占位框架中，
+    程序启动时不必创建所有选项卡的控件。
+    创建之前 bind_change() 注册的回调先保存下来，创建后再绑定；子类负责在创建前暂存其他状态。
+    访问占位框架没有的属性时会先创建选项卡，再转发给它。
+    """
+
+    def __init__(self, parent, factory, on_created=None):
+        super().__init__(parent)
+        self._factory = factory
+        self._on_created = on_created
+        self._tab = None
+        self._change_callbacks = []
+        self.create_seconds = None  # 创建选项卡的耗时，用于启动分析
+
+    @property
+    def created(self) -> bool:
+        return self._tab is not None
+
+    def create(self):
+        """创建真正的选项卡（只创建一次）并返回它。"""
+        if self._tab is None:
+            started = time.perf_counter()
+            tab = self._factory(self)
+            tab.pack(expand=True, fill="both")
+            self._tab = tab
+            self._apply_pending(tab)
+            for callback in self._change_callbacks:
+                tab.bind_change(callback)
+            self._change_callbacks.clear()
+            self.create_seconds = time.perf_counter() - started
+            if self._on_created is not None:
+                self._on_created(self)
+        return self._tab
+
+    def _apply_pending(self, tab):
+        """把创建前暂存的状态应用到新创建的选项卡上。"""
+
+    def bind_change(self, callback):
+        if self._tab is None:
+            self._change_callbacks.append(callback)
+        else:
+            self._tab.bind_change(callback)
+
+    def __getattr__(self, name):
+        # tkinter 内部会探测以下划线开头的属性和 typename，这些访问不应触发创建
+        if name.startswith('_') or name == 'typename':
+            raise AttributeError(name)
+        return getattr(self.create(), name)
+
+
+class LazyFormTab(LazyTab):
+    """
+    表单选项卡的占位框架。创建之前 set_data() 只保存数据，
+    get_data() 返回保存的数据中属于本选项卡的配置项（fields），因此配置同步和切换服务都不会触发创建。
+    """
+
+    def __init__(self, parent, factory, fields, on_created=None):
+        super().__init__(parent, factory, on_created)
+        self.FIELDS = tuple(fields)
+        self._pending_data = {}
+
+    def _apply_pending(self, tab):
+        tab.set_data(self._pending_data)
+
+    def set_data(self, data: dict):
+        if self._tab is None:
+            self._pending_data = dict(data)
+        else:
+            self._tab.set_data(data)
+
+    def get_data(self) -> dict:
+        if self._tab is None:
+            return {key: self._pending_data[key] for key in self.FIELDS if key in self._pending_data}
+        return self._tab.get_data()
+
+
+class LazyXmlEditorTab(LazyTab):
+    """XML源码选项卡的占位框架，创建之前暂存文本和状态。"""
+
+    def __init__(self, parent, factory, on_created=None):
+        super().__init__(parent, factory, on_created)
+        self._pending_text = ""
+        self._pending_status = None
+
+    def _apply_pending(self, tab):
+        tab.set_text(self._pending_text)
+        if self._pending_status is not None:
+            tab.set_status(*self._pending_status)
+
+    def get_text(self) -> str:
+        return self._pending_text if self._tab is None else self._tab.get_text()
+
+    def set_text(self, text: str):
+        if self._tab is None:
+            self._pending_text = text
+        else:
+            self._tab.set_text(text)
+
+    def set_status(self, text: str, error: bool = False):
+        if self._tab is None:
+            self._pending_status = (text, error)
+        else:
+            self._tab.set_status(text, error)
+
+
+class LazyLogViewerTab(LazyTab):
+    """日志查看选项卡的占位框架。创建之前只记住当前服务，创建后才开始读取和轮询日志。"""
+
+    def __init__(self, parent, factory, on_created=None):
+        super().__init__(parent, factory, on_created)
+        self._pending_config = None
+
+    def _apply_pending(self, tab):
+        if self._pending_config is not None:
+            tab.start_monitoring(self._pending_config)
+            self._pending_config = None
+
+    def start_monitoring(self, config: dict):
+        if self._tab is None:
+            self._pending_config = config
+        else:
+            self._tab.start_monitoring(config)
+
+    def stop_monitoring(self):
+        if self._tab is None:
+            self._pending_config = None
+        else:
+            self._tab.stop_monitoring()
@@ -0,0 +1,143 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+from core.log_paths import resolve_log_paths
+from core.log_timeline import MergedTimeline, TimelineMerger
+from gui.scheduler import SLOW
+from gui.virtual_log_view import VirtualLogView
+
+# 服务颜色，按选择顺序循环使用
+SERVICE_COLOURS = ("#1f77b4", "#d62728", "#2ca02c", "#9467bd", "#ff7f0e", "#8c564b", "#e377c2", "#17becf",
+                   "#7f7f7f", "#bcbd22", "#393b79", "#843c39", "#637939", "#7b4173", "#3182bd", "#e6550d",
+                   "#31a354", "#756bb1", "#636363", "#a55194")
+
+
+class LogTimelineWindow(tk.Toplevel):
+    """
+    多服务合并时间线窗口：选择若干服务和日志类型，把它们的日志按解析出的时间合并显示并持续跟踪，
+    每个服务使用不同的颜色。合并和读取在后台线程中进行（见 core.log_timeline）。
+    """
+
+    REFRESH_INTERVAL_MS = 500
+    LOG_TYPES = {"Wrapper": "wrapper.log", "Output": "out.log", "Error": "err.log"}
+
+    def __init__(self, parent, scheduler, configs_provider, selected_ids=(), log_formats=None):
+        super().__init__(parent)
+        self.title("合并时间线")
+        self.geometry("1200x650")
+        self.scheduler = scheduler
+        self.configs_provider = configs_provider
+        self.log_formats = log_formats or {}
+        self.configs = {}
+        self.merger = None
+        self.timeline = MergedTimeline()
+        self.refresh_task = None
+
+        self.create_widgets()
+        self.load_services(selected_ids)
+        # 窗口随主窗口一起销毁时也要停止后台线程和定时任务
+        self.bind("<Destroy>", lambda e: self.stop() if e.widget is self else None)
+
+    def create_widgets(self):
+        paned_window = ttk.PanedWindow(self, orient=tk.HORIZONTAL)
+        paned_window.pack(expand=True, fill="both", padx=5, pady=5)
+
+        left_frame = ttk.Frame(paned_window, padding=(0, 0, 5, 0))
+        paned_window.add(left_frame, weight=0)
+        ttk.Label(left_frame, text="服务 (可多选):").pack(anchor="w")
+        list_frame = ttk.Frame(left_frame)
+        list_frame.pack(expand=True, fill="both", pady=(2, 5))
+        self.service_list = tk.Listbox(list_frame, selectmode="extended", exportselection=False, width=28)
+        scroll = ttk.Scrollbar(list_frame, orient="vertical", command=self.service_list.yview)
+        self.service_list.config(yscrollcommand=scroll.set)
+        scroll.pack(side="right", fill="y")
+        self.service_list.pack(side="left", expand=True, fill="both")
+
+        self.type_vars = {}
+        for name in self.LOG_TYPES:
+            self.type_vars[name] = tk.BooleanVar(value=True)
+            ttk.Checkbutton(left_frame, text=name, variable=self.type_vars[name]).pack(anchor="w")
+
+        button_frame = ttk.Frame(left_frame)
+        button_frame.pack(fill="x", pady=5)
+        ttk.Button(button_frame, text="开始", command=self.start).pack(side="left")
+        ttk.Button(button_frame, text="停止", command=self.stop).pack(side="left", padx=5)
+
+        # 颜色图例，开始合并后填充
+        self.legend = tk.Text(left_frame, height=8, width=28, state="disabled", relief="flat",
+                              background=self.cget("background"))
+        self.legend.pack(fill="x")
+
+        right_frame = ttk.Frame(paned_window)
+        paned_window.add(right_frame, weight=1)
+        self.status_var = tk.StringVar(value="选择服务后点击“开始”")
+        ttk.Label(right_frame, textvariable=self.status_var, anchor="w").pack(fill="x")
+        self.view = VirtualLogView(right_frame)
+        self.view.pack(expand=True, fill="both")
+
+    def load_services(self, selected_ids=()):
+        self.configs = {config.get('id'): config for config in self.configs_provider() if config.get('id')}
+        self.service_list.delete(0, tk.END)
+        for i, service_id in enumerate(sorted(self.configs)):
+            self.service_list.insert(tk.END, service_id)
+            if service_id in selected_ids:
+                self.service_list.selection_set(i)
+
+    def _targets(self, service_ids):
+        suffixes = [suffix for name, suffix in self.LOG_TYPES.items() if self.type_vars[name].get()]
+        targets = []
+        for service_id in service_ids:
+            paths = resolve_log_paths(self.configs[service_id])
+            targets.extend((service_id, suffix, paths[suffix]) for suffix in suffixes if suffix in paths)
+        return targets
+
+    def start(self):
+        service_ids = [self.service_list.get(i) for i in self.service_list.curselection()]
+        targets = self._targets(service_ids)
+        if not targets:
+            messagebox.showinfo("提示", "请至少选择一个服务和一种日志类型。", parent=self)
+            return
+        self.stop()
+        # 每次开始使用新的时间线，已停止的后台线程即使还在写入也不会影响显示
+        self.timeline = MergedTimeline()
+        for i, service_id in enumerate(service_ids):
+            self.view.text.tag_configure(MergedTimeline.tag_for(service_id),
+                                         foreground=SERVICE_COLOURS[i % len(SERVICE_COLOURS)])
+        self._show_legend(service_ids)
+
+        self.merger = TimelineMerger(targets, self.timeline, presets=self.log_formats)
+        self.merger.start()
+        self.view.set_source(self.timeline)
+        self.refresh_task = self.scheduler.add("合并时间线刷新", self.update_view, self.REFRESH_INTERVAL_MS,
+                                               background=SLOW)
+
+    def stop(self):
+        if self.merger is not None:
+            self.merger.stop()
+            self.merger = None
+        if self.refresh_task is not None:
+            self.refresh_task.cancel()
+            self.refresh_task = None
+
+    def _show_legend(self, service_ids):
+        self.legend.config(state="normal")
+        self.legend.delete("1.0", tk.END)
+        for i, service_id in enumerate(service_ids):
+            tag = MergedTimeline.tag_for(service_id)
+            self.legend.tag_configure(tag, foreground=SERVICE_COLOURS[i % len(SERVICE_COLOURS)])
+            self.legend.insert(tk.END, f"■ {service_id}\n", tag)
+        self.legend.config(state="disabled")
+
+    def update_view(self):
+        if self.merger is None:
+            return
+        self.view.refresh()
+        timeline = self.timeline
+        status = f"{len(self.merger.files)} 个文件，{timeline.line_count()} 行"
+        if not self.merger.history_loaded:
+            status += "，正在加载历史..."
+        if timeline.dropped:
+            status += f"，已丢弃最早的 {timeline.dropped} 行"
+        if timeline.late:
+            status += f"，{timeline.late} 行的时间早于前一行（格式不一致或超出重排窗口）"
+        self.status_var.set(status)
@@ -0,0 +1,139 @@
+import threading
+import time
+import tkinter as tk
+from tkinter import ttk
+
+from core.log_archive import format_size
+from gui.tabs.form_utils import sync_tree_rows
+
+
+def describe_policy(policy) -> str:
+    if not policy.get('enabled'):
+        return "已停用"
+    parts = []
+    if policy.get('max_size_mb'):
+        parts.append(f"{policy['max_size_mb']}MB")
+    if policy.get('max_age_days'):
+        parts.append(f"{policy['max_age_days']}天")
+    text = "轮转: " + ("/".join(parts) if parts else "手动")
+    if policy.get('keep_days'):
+        text += f"，保留 {policy['keep_days']} 天"
+    if policy.get('keep_segments'):
+        text += f"，最多 {policy['keep_segments']} 段"
+    if policy.get('max_total_mb'):
+        text += f"，上限 {policy['max_total_mb']}MB"
+    return text
+
+
+class LogUsageWindow(tk.Toplevel):
+    """
+    日志磁盘占用窗口：列出每个服务当前日志和压缩归档占用的空间以及生效的轮转和保留策略，
+    并可立即执行一次日志维护。统计和维护都在后台线程中进行。
+    """
+
+    COLUMNS = (("id", "服务", 150), ("active", "当前日志", 90), ("archived", "归档(压缩后)", 100),
+               ("ratio", "压缩率", 70), ("segments", "归档数", 60), ("oldest", "最早归档", 130),
+               ("policy", "策略", 280), ("log_dir", "日志目录", 260))
+
+    def __init__(self, parent, log_maintenance, configs_provider, call_in_ui):
+        super().__init__(parent)
+        self.title("日志磁盘占用")
+        self.transient(parent)
+        self.geometry("1100x420")
+        self.log_maintenance = log_maintenance
+        self.configs_provider = configs_provider
+        self.call_in_ui = call_in_ui
+
+        self.create_widgets()
+        self.refresh()
+
+    def create_widgets(self):
+        main_frame = ttk.Frame(self, padding=10)
+        main_frame.pack(expand=True, fill="both")
+        main_frame.rowconfigure(1, weight=1)
+        main_frame.columnconfigure(0, weight=1)
+
+        self.summary_var = tk.StringVar()
+        ttk.Label(main_frame, textvariable=self.summary_var).grid(row=0, column=0, sticky="w", pady=(0, 5))
+
+        self.tree = ttk.Treeview(main_frame, columns=[c[0] for c in self.COLUMNS], show="headings")
+        for column, text, width in self.COLUMNS:
+            self.tree.heading(column, text=text)
+            self.tree.column(column, width=width, anchor="w")
+        scroll = ttk.Scrollbar(main_frame, orient="vertical", command=self.tree.yview)
+        self.tree.config(yscrollcommand=scroll.set)
+        self.tree.grid(row=1, column=0, sticky="nsew")
+        scroll.grid(row=1, column=1, sticky="ns")
+
+        button_frame = ttk.Frame(main_frame)
+        button_frame.grid(row=2, column=0, columnspan=2, sticky="ew", pady=(10, 0))
+        self.refresh_button = ttk.Button(button_frame, text="刷新", command=self.refresh)
+        self.refresh_button.pack(side="left")
+        self.maintain_button = ttk.Button(button_frame, text="立即维护", command=self.run_maintenance)
+        self.maintain_button.pack(side="left", padx=5)
+        ttk.Label(button_frame, text="策略可在 settings.json 的 log_rotation 和 log_rotation_overrides 中修改",
+                  foreground="gray").pack(side="left", padx=10)
+        ttk.Button(button_frame, text="关闭", command=self.destroy).pack(side="right")
+
+    def _set_busy(self, busy, message=None):
+        state = "disabled" if busy else "normal"
+        self.refresh_button.config(state=state)
+        self.maintain_button.config(state=state)
+        if message:
+            self.summary_var.set(message)
+
+    def _run_in_background(self, work, message):
+        self._set_busy(True, message)
+
+        def worker():
+            try:
+                result = work()
+            except Exception as e:
+                result = e
+            self.call_in_ui(self._on_done, result)
+
+        threading.Thread(target=worker, name='log-usage', daemon=True).start()
+
+    def refresh(self):
+        self._run_in_background(lambda: (None, self.log_maintenance.disk_usage(self.configs_provider())),
+                                "正在统计...")
+
+    def run_maintenance(self):
+        def work():
+            summary = self.log_maintenance.run_once()
+            return summary, self.log_maintenance.disk_usage(self.configs_provider())
+
+        self._run_in_background(work, "正在轮转和清理日志...")
+
+    def _on_done(self, result):
+        if not self.winfo_exists():
+            return
+        self._set_busy(False)
+        if isinstance(result, Exception):
+            self.summary_var.set(f"统计失败: {result}")
+            return
+        summary, rows = result
+        self._show_rows(rows)
+        if summary is not None:
+            note = f"维护完成: 轮转 {summary['rotated']} 个日志，删除 {summary['removed']} 个过期归档，" \
+                   f"释放 {format_size(summary['freed'])}。"
+            if summary['deferred']:
+                note += f" {summary['deferred']} 个日志所属的服务没有停止，停止后才能轮转。"
+            if summary['errors']:
+                note += f" {len(summary['errors'])} 个错误，详见输出。"
+                for error in summary['errors']:
+                    print(f"日志维护: {error}")
+            self.summary_var.set(note + " " + self.summary_var.get())
+
+    def _show_rows(self, rows):
+        tree_rows = []
+        for row in rows:
+            ratio = f"{row['archived_bytes'] / row['original_bytes']:.0%}" if row['original_bytes'] else ""
+            oldest = time.strftime("%Y-%m-%d %H:%M", time.localtime(row['oldest'])) if row['oldest'] else ""
+            tree_rows.append((row['id'], format_size(row['active_bytes']), format_size(row['archived_bytes']),
+                              ratio, str(row['segments']), oldest, describe_policy(row['policy']), row['log_dir']))
+        sync_tree_rows(self.tree, tree_rows)
+        active = sum(row['active_bytes'] for row in rows)
+        archived = sum(row['archived_bytes'] for row in rows)
+        self.summary_var.set(f"{len(rows)} 个服务，共占用 {format_size(active + archived)}"
+                             f"（当前日志 {format_size(active)}，归档 {format_size(archived)}）")
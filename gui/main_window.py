@@ -1,58 +1,142 @@
 import os
-import shutil
 import sys
+import threading
 import tkinter as tk
-import webbrowser
 from tkinter import ttk, messagebox, filedialog
 
-# 模块导入
+# 模块导入（只在用到时才需要的模块，例如远程控制、压缩包导入导出和各个工具窗口，在对应的方法中导入，加快启动）
+from core.app_paths import app_dir
+from core.audit_log import AuditLog
+from core.config_history import ConfigHistory
 from core.config_manager import ConfigManager
+from core.config_repository import ConfigRepository
+from core.fleet_executor import FleetExecutor
+from core.log_archive import LogMaintenance
+from core.startup_profiler import StartupProfiler
+from core.status_poller import StatusPoller, default_status_backend
 from core.winsw_manager import WinSWManager
 from gui.actions_panel import ActionsPanel
+from gui.config_sync import ConfigSync
+from gui.lazy_tab import LazyFormTab, LazyLogViewerTab, LazyXmlEditorTab
 from gui.output_console import OutputConsole
+from gui.scheduler import ICONIFIED, UiScheduler
 from gui.service_list_view import ServiceListView
-from gui.settings_window import SettingsWindow
 from gui.tabs.account_tab import AccountTab
 from gui.tabs.advanced_tab import AdvancedTab
 from gui.tabs.basic_info_tab import BasicInfoTab
 from gui.tabs.environment_tab import EnvironmentTab
 from gui.tabs.execution_tab import ExecutionTab
-from gui.tabs.log_viewer_tab import LogViewerTab
 from gui.tabs.logging_tab import LoggingTab
 from gui.tabs.recovery_tab import RecoveryTab
 from gui.tabs.xml_editor_tab import XmlEditorTab
 
 
 class MainWindow(ttk.Frame):
-    def __init__(self, parent, settings_manager, app_version):
+    def __init__(self, parent, settings_manager, app_version, profiler=None):
         super().__init__(parent)
         self.parent = parent
         self.settings_manager = settings_manager
         self.app_version = app_version
-
-        self.console = OutputConsole(self)
-        self.config_manager = ConfigManager()
-        self.winsw_manager = WinSWManager(self.console.log, self.settings_manager)
+        # 启动耗时分析（main.py --profile-startup），未启用时不做任何事情
+        self.profiler = profiler or StartupProfiler()
+
+        # 所有周期性的界面工作和后台线程交回的UI操作都由这一个调度器统一运行
+        self.scheduler = UiScheduler(parent)
+        self.scheduler.add_state_listener(self._on_window_state_changed)
+        with self.profiler.phase("创建后台管理对象"):
+            # 所有命令和配置的保存、删除都记录到审计日志中，可在“工具 → 操作历史”中查询
+            self.audit_log = AuditLog()
+            # 每次保存和删除都会在 services/.history 中留下版本，可在“工具 → 配置历史”中比较和回滚
+            self.config_history = ConfigHistory()
+            self.config_manager = ConfigManager(self.audit_log, self.config_history)
+            self.config_repository = ConfigRepository(self.config_manager)
+            self._config_archive = None
+            # 设置了控制守护进程地址时，界面只作为守护进程的一个客户端，命令在守护进程所在主机上执行
+            daemon_url = self.settings_manager.get('control_daemon_url')
+            if daemon_url:
+                # urllib.request 等模块只在远程模式下才需要
+                from core.control_client import ControlClient, RemoteStatusBackend, RemoteWinSWManager
+
+                daemon_client = ControlClient(daemon_url, self.settings_manager.get('control_daemon_token'))
+                self.winsw_manager = RemoteWinSWManager(daemon_client, self.log_threadsafe,
+                                                        self.settings_manager.get('max_parallel_commands') or 8,
+                                                        audit_log=self.audit_log)
+                status_backend = RemoteStatusBackend(daemon_client)
+            else:
+                self.winsw_manager = WinSWManager(self.log_threadsafe, self.settings_manager, self.audit_log)
+                status_backend = default_status_backend(lambda: self.winsw_manager, self._configs_by_id)
+            # 后台按大小和时间轮转、压缩并清理各服务的日志，可在“工具 → 日志磁盘占用”中查看
+            # 只轮转已停止的服务的日志，服务状态与状态列使用同一个查询后端
+            self.log_maintenance = LogMaintenance(self.settings_manager, self.load_all_configs, self.log_threadsafe,
+                                                  status_query=status_backend.query)
+            self.fleet_executor = FleetExecutor(self.winsw_manager,
+                                                max_concurrency=self.settings_manager.get('max_parallel_commands') or 8,
+                                                max_per_host=self.settings_manager.get('fleet_max_per_host') or 8)
 
         self.current_config = self.config_manager.get_default_config()
+        # 当前服务的完整XML文档，界面上的修改以补丁方式应用到其中，未知元素和注释得以保留
+        self.current_document = None
         self.current_filepath = None
 
-        self.create_menu(parent)
-        self.create_widgets()
-        self.apply_stored_settings()
+        # 后台批量轮询服务状态，结果显示在服务列表的状态列中
+        self.status_poller = StatusPoller(
+            status_backend,
+            callback=lambda changes: self.call_in_ui(self.service_list.update_statuses, changes))
+
+        with self.profiler.phase("创建菜单和控件"):
+            self.create_menu(parent)
+            self.create_widgets()
+            self.apply_stored_settings()
 
         # 在UI创建完毕后，设置回调和重定向输出
         self.setup_console_redirect()
-
-        self.service_list.refresh_list()
+        self.scheduler.start()
+        # 以默认配置初始化表单，XML源码选项卡随之显示对应的XML
+        self._set_current_config_to_ui(self.current_config)
+        self.config_sync.reset()
+
+        # 扫描服务目录要等第一帧画出之后再进行，窗口可以尽快显示出来
+        self.after_idle(self._finish_startup)
+
+    def _finish_startup(self):
+        # 先完成窗口的布局和绘制
+        self.update_idletasks()
+        with self.profiler.phase("加载服务配置"):
+            # 并发预加载所有服务配置，之后的首次扫描和选择都直接命中缓存
+            self.config_repository.load_all()
+        with self.profiler.phase("扫描服务目录"):
+            # 首次扫描服务目录，之后定期检查目录变化
+            self.service_list.start_watching()
+        self.status_poller.start()
+        self.log_maintenance.start()
         # 这条 print 现在会安全地输出到UI控制台
         print("WinSW GUI 初始化完成。")
+        self.profiler.report()
+
+    @property
+    def config_archive(self):
+        """压缩包导入导出对象，第一次使用时才创建（同时才导入 zipfile、tarfile 等模块）。"""
+        if self._config_archive is None:
+            from core.config_archive import ConfigArchive
+
+            self._config_archive = ConfigArchive(self.config_manager)
+        return self._config_archive
 
     def create_menu(self, root):
         self.menubar = tk.Menu(root)
         root.config(menu=self.menubar)
 
         tools_menu = tk.Menu(self.menubar, tearoff=0)
+        tools_menu.add_command(label="从目录批量导入...", command=self.import_from_directory)
+        tools_menu.add_command(label="从压缩包批量导入...", command=self.import_from_archive)
+        tools_menu.add_command(label="导出所有配置...", command=self.export_configs)
+        tools_menu.add_separator()
+        tools_menu.add_command(label="命令耗时...", command=self.open_command_timeline)
+        tools_menu.add_command(label="操作历史...", command=self.open_audit_history)
+        tools_menu.add_command(label="配置历史...", command=self.open_config_history)
+        tools_menu.add_command(label="界面任务耗时...", command=self.open_scheduler_stats)
+        tools_menu.add_command(label="日志磁盘占用...", command=self.open_log_usage)
+        tools_menu.add_separator()
         tools_menu.add_command(label="设置...", command=self.open_settings_window)
         self.menubar.add_cascade(label="工具", menu=tools_menu)
 
@@ -67,27 +151,65 @@ class MainWindow(ttk.Frame):
         将标准输出和错误安全地重定向到UI控制台。
         这样可以确保 print() 在任何情况下（包括打包后）都能正常工作。
         """
-        self.winsw_manager.log = self.console.log
+        self.winsw_manager.log = self.log_threadsafe
 
         # 定义一个拥有 write 方法的类，用于替换 sys.stdout
         class ConsoleRedirector:
             def __init__(self, console_log_method):
                 self.console_log_method = console_log_method
+                self.buffer = ""
+                self.lock = threading.Lock()
 
             def write(self, message):
-                # 调用UI控制台的log方法来显示信息
-                self.console_log_method(message)
+                # print() 会把内容和换行符分两次写入，这里按完整行转发给控制台
+                with self.lock:
+                    self.buffer += message
+                    if "\n" not in self.buffer:
+                        return
+                    *lines, self.buffer = self.buffer.split("\n")
+                for line in lines:
+                    self.console_log_method(line)
 
             def flush(self):
-                # 在此场景下，flush方法无需任何操作
-                pass
+                with self.lock:
+                    line, self.buffer = self.buffer, ""
+                if line:
+                    self.console_log_method(line)
 
         # 创建重定向器实例并替换
-        redirector = ConsoleRedirector(self.console.log)
+        redirector = ConsoleRedirector(self.log_threadsafe)
         sys.stdout = redirector
         sys.stderr = redirector
 
+    def call_in_ui(self, func, *args):
+        """从任意线程安排一个函数在Tk主线程中执行。"""
+        self.scheduler.call_soon(func, *args)
+
+    def _on_window_state_changed(self, state):
+        """窗口最小化时暂停服务状态轮询，恢复后立即查询一次。"""
+        if state == ICONIFIED:
+            self.status_poller.pause()
+        else:
+            self.status_poller.resume()
+
+    def log_threadsafe(self, message):
+        """可在任意线程中调用的控制台日志方法。"""
+        self.console.log(message)
+
+    def shutdown(self):
+        """程序退出前释放后台资源。"""
+        self.scheduler.stop()
+        self.service_list.stop_watching()
+        self.status_poller.stop()
+        self.log_maintenance.stop()
+        self.winsw_manager.shutdown()
+        self.log_viewer_tab.stop_monitoring()
+        if self.log_viewer_tab.created:
+            self.log_viewer_tab.search_engine.shutdown()
+
     def open_link(self):
+        import webbrowser
+
         webbrowser.open_new(r"https://github.com/ztxtech/winsw_GUI")
 
     def show_about_dialog(self):
@@ -100,14 +222,52 @@ class MainWindow(ttk.Frame):
         )
 
     def open_settings_window(self):
+        from gui.settings_window import SettingsWindow
+
         SettingsWindow(self.parent, self.settings_manager)
 
+    def open_command_timeline(self):
+        from gui.command_timeline_window import CommandTimelineWindow
+
+        CommandTimelineWindow(self.parent, self.winsw_manager.metrics, self.call_in_ui)
+
+    def open_audit_history(self):
+        from gui.audit_history_window import AuditHistoryWindow
+
+        AuditHistoryWindow(self.parent, self.audit_log)
+
+    def open_scheduler_stats(self):
+        from gui.scheduler_stats_window import SchedulerStatsWindow
+
+        SchedulerStatsWindow(self.parent, self.scheduler)
+
+    def open_log_usage(self):
+        from gui.log_usage_window import LogUsageWindow
+
+        LogUsageWindow(self.parent, self.log_maintenance, self.load_all_configs, self.call_in_ui)
+
+    def open_config_history(self):
+        from gui.config_history_window import ConfigHistoryWindow
+
+        selected_file = self.service_list.get_selected_filename()
+        service_id = os.path.splitext(selected_file)[0] if selected_file else None
+        ConfigHistoryWindow(self.parent, self.config_history, self.config_manager, service_id,
+                            on_restored=self._on_config_restored)
+
+    def _on_config_restored(self, service_id):
+        """回滚或恢复配置后刷新列表；恢复的正是当前打开的服务时重新加载到界面。"""
+        self.refresh_service_list()
+        filename = f"{service_id}.xml"
+        if self.current_filepath == os.path.join("services", filename):
+            self.config_repository.invalidate([filename])
+            self.on_service_selected(filename)
+
     def create_widgets(self):
         self.main_paned_window = ttk.PanedWindow(self, orient=tk.HORIZONTAL)
         self.main_paned_window.pack(expand=True, fill="both")
 
         left_frame = ttk.Frame(self.main_paned_window)
-        self.service_list = ServiceListView(left_frame, self.on_service_selected)
+        self.service_list = ServiceListView(left_frame, self.scheduler, self.on_service_selected, self._on_service_files_changed)
         self.service_list.pack(expand=True, fill="both")
         self.main_paned_window.add(left_frame, weight=1)
 
@@ -132,29 +292,59 @@ class MainWindow(ttk.Frame):
         notebook = ttk.Notebook(right_top_frame)
         notebook.pack(expand=True, fill="both", padx=5, pady=(0, 5))
 
-        # 实例化所有Tab
-        self.basic_info_tab, self.execution_tab, self.environment_tab = BasicInfoTab(notebook), ExecutionTab(notebook,
-                                                                                                             self.autofill_from_executable), EnvironmentTab(
-            notebook)
-        self.logging_tab, self.recovery_tab, self.account_tab = LoggingTab(notebook), RecoveryTab(notebook), AccountTab(
-            notebook)
-        self.advanced_tab = AdvancedTab(notebook)
-        xml_editor_callbacks = {'get_config': self._get_current_config_from_ui,
-                                'set_config': self._set_current_config_to_ui,
-                                'to_xml_string': self.config_manager.save_to_xml_string,
-                                'from_xml_string': self.config_manager.load_from_xml_string}
-        self.xml_editor_tab = XmlEditorTab(notebook, xml_editor_callbacks)
-        self.log_viewer_tab = LogViewerTab(notebook)
-
+        # 所有选项卡都是占位框架，第一次切换到某个选项卡时才创建其中的控件
+        def form_tab(tab_class, *args):
+            return LazyFormTab(notebook, lambda parent: tab_class(parent, *args), tab_class.FIELDS,
+                               on_created=self._on_tab_created)
+
+        self.basic_info_tab = form_tab(BasicInfoTab)
+        self.execution_tab = form_tab(ExecutionTab, self.autofill_from_executable)
+        self.environment_tab = form_tab(EnvironmentTab)
+        self.logging_tab = form_tab(LoggingTab)
+        self.recovery_tab = form_tab(RecoveryTab)
+        self.account_tab = form_tab(AccountTab)
+        self.advanced_tab = form_tab(AdvancedTab)
+        self.xml_editor_tab = LazyXmlEditorTab(notebook, XmlEditorTab, on_created=self._on_tab_created)
+        self.config_sync = ConfigSync(self, [self.basic_info_tab, self.execution_tab, self.environment_tab,
+                                             self.logging_tab, self.recovery_tab, self.account_tab,
+                                             self.advanced_tab], self.xml_editor_tab)
+        self.log_viewer_tab = LazyLogViewerTab(notebook, self._create_log_viewer_tab, on_created=self._on_tab_created)
+
+        self.tab_names = {}
         tabs = {"基本信息": self.basic_info_tab, "执行与参数": self.execution_tab, "环境变量": self.environment_tab,
                 "日志记录": self.logging_tab, "恢复机制": self.recovery_tab,
                 "服务账户": self.account_tab, "高级选项": self.advanced_tab, "XML源码": self.xml_editor_tab,
                 "日志查看": self.log_viewer_tab}
-        for text, tab in tabs.items(): notebook.add(tab, text=text)
-
-        self.console = OutputConsole(self.right_paned_window)
+        for text, tab in tabs.items():
+            notebook.add(tab, text=text)
+            self.tab_names[tab] = text
+        notebook.bind("<<NotebookTabChanged>>", self._on_notebook_tab_changed)
+        # 第一个选项卡随窗口一起显示，直接创建
+        self.basic_info_tab.create()
+
+        self.console = OutputConsole(self.right_paned_window, self.scheduler,
+                                     self.settings_manager.get('console_max_lines'))
         self.right_paned_window.add(self.console, weight=1)
 
+    def _create_log_viewer_tab(self, parent):
+        # 日志索引和搜索相关的模块在第一次打开日志查看时才导入
+        from gui.tabs.log_viewer_tab import LogViewerTab
+
+        callbacks = {'list_configs': self.load_all_configs, 'select_service': self.service_list.select_filename,
+                     'archive_logs': self.log_maintenance.rotate_now,
+                     'delete_archives': self.log_maintenance.delete_archives}
+        return LogViewerTab(parent, self.scheduler, callbacks)
+
+    def _on_notebook_tab_changed(self, event):
+        notebook = event.widget
+        if notebook.select():
+            notebook.nametowidget(notebook.select()).create()
+
+    def _on_tab_created(self, tab):
+        if tab in self.config_sync.form_tabs:
+            self.config_sync.on_tab_created(tab)
+        self.profiler.record(f"创建选项卡“{self.tab_names.get(tab, '')}”", tab.create_seconds)
+
     def apply_stored_settings(self):
         try:
             self.parent.geometry(self.settings_manager.get('window_geometry'))
@@ -192,24 +382,57 @@ class MainWindow(ttk.Frame):
         self.account_tab.set_data(self.current_config)
         self.advanced_tab.set_data(self.current_config)
 
+    def _apply_config_to_document(self, config: dict):
+        """将配置以最小补丁的方式应用到当前文档，没有文档时按配置新建。"""
+        if self.current_document is None:
+            self.current_document = self.config_manager.new_document(config)
+        else:
+            self.current_document.update(config)
+        return self.current_document
+
+    def refresh_service_list(self):
+        """本程序修改了服务目录后调用，立即增量刷新服务列表。"""
+        self.service_list.watcher.reset_interval()
+        self.service_list.refresh_list()
+
+    def _on_service_files_changed(self, added, removed, modified):
+        """服务目录发生变化时使配置缓存失效，并更新状态轮询的服务列表。"""
+        self.config_repository.on_directory_changed(added, removed, modified)
+        service_ids = {}
+        for filename in added + modified:
+            config = self.config_repository.get(filename)
+            service_ids[filename] = config.get('id') or os.path.splitext(filename)[0]
+        self.service_list.forget_service_ids(removed)
+        self.service_list.set_service_ids(service_ids)
+        self.status_poller.set_services(self.service_list.service_ids.values())
+
+    def load_all_configs(self) -> list:
+        """加载 services 目录下所有服务的配置。"""
+        return list(self.config_repository.load_all().values())
+
+    def _configs_by_id(self) -> dict:
+        return {config.get('id'): config for config in self.load_all_configs() if config.get('id')}
+
     def on_service_selected(self, filename: str):
         self.log_viewer_tab.stop_monitoring()
         self.current_filepath = os.path.join("services", filename)
         print(f"已选择服务: {filename}")
-        self.current_config = self.config_manager.load_from_xml(self.current_filepath)
+        self.current_document = self.config_repository.get_document(filename)
+        self.current_config = self.current_document.to_config()
         self._set_current_config_to_ui(self.current_config)
         print("配置已加载到UI。")
-        self.xml_editor_tab.load_from_ui()
+        self.config_sync.reset()
         self.log_viewer_tab.start_monitoring(self.current_config)
 
     def new_service(self):
         print("正在创建新配置...")
         self.log_viewer_tab.stop_monitoring()
         self.current_filepath = None
+        self.current_document = None
         self.current_config = self.config_manager.get_default_config()
         self._set_current_config_to_ui(self.current_config)
-        self.xml_editor_tab.load_from_ui()
-        self.service_list.listbox.selection_clear(0, 'end')
+        self.config_sync.reset()
+        self.service_list.clear_selection()
         print("UI已重置为新配置。")
 
     def autofill_from_executable(self, exe_path: str):
@@ -223,7 +446,9 @@ class MainWindow(ttk.Frame):
                 print(f"自动填充失败: {e}")
 
     def save_service(self):
-        # 1. 从UI收集最新数据
+        # 1. 完成XML源码与界面字段之间尚未完成的同步，再从UI收集最新数据
+        if not self.config_sync.flush():
+            return
         config_data = self._get_current_config_from_ui()
 
         # 2. 验证核心字段
@@ -234,7 +459,7 @@ class MainWindow(ttk.Frame):
 
         # --- 新增逻辑：处理默认日志路径 ---
         if not config_data.get('logpath'):
-            app_root_dir = os.path.abspath(os.path.dirname(sys.argv[0]))
+            app_root_dir = app_dir()
             default_log_path = os.path.join(app_root_dir, 'logs', service_id)
 
             # 更新数据字典和UI
@@ -253,23 +478,26 @@ class MainWindow(ttk.Frame):
 
         # 4. 执行保存 (使用更新后的config_data)
         print(f"正在保存配置到: {self.current_filepath}")
-        self.config_manager.save_to_xml(config_data, self.current_filepath)
-        print("保存成功！")
+        saved = self.config_manager.save_document(self._apply_config_to_document(config_data), self.current_filepath)
+        if saved:
+            print("保存成功！")
+        elif saved is False:
+            print("配置没有变化，无需保存。")
 
         # 5. 刷新UI
-        self.service_list.refresh_list()
-        self.xml_editor_tab.load_from_ui()
+        self.refresh_service_list()
+        self.config_sync.reset()
 
     def delete_service_config(self):
         selected_file = self.service_list.get_selected_filename()
         if not selected_file:
             messagebox.showwarning("操作无效", "请先从列表中选择一个服务配置。")
             return
-        if messagebox.askyesno("确认删除", f"你确定要删除配置文件 '{selected_file}' 吗？\n此操作不可恢复。"):
+        if messagebox.askyesno("确认删除", f"你确定要删除配置文件 '{selected_file}' 吗？\n删除后可以在“工具 → 配置历史”中恢复。"):
             try:
-                os.remove(os.path.join("services", selected_file))
+                self.config_manager.delete_xml(os.path.join("services", selected_file))
                 print(f"配置文件 '{selected_file}' 已删除。")
-                self.service_list.refresh_list()
+                self.refresh_service_list()
                 self.new_service()
             except OSError as e:
                 messagebox.showerror("删除失败", f"无法删除文件: {e}")
@@ -282,13 +510,76 @@ class MainWindow(ttk.Frame):
             if os.path.exists(dest_path) and not messagebox.askyesno("文件已存在",
                                                                      f"'{os.path.basename(filepath)}' 已存在。\n要覆盖它吗？"):
                 return
-            shutil.copy(filepath, dest_path)
+            with open(filepath, "rb") as f:
+                self.config_manager.save_xml_bytes(f.read(), dest_path, detail=f"导入自 {filepath}")
             print(f"成功导入 '{os.path.basename(filepath)}'。")
-            self.service_list.refresh_list()
+            self.refresh_service_list()
         except Exception as e:
             messagebox.showerror("导入失败", f"无法导入文件: {e}")
 
-    def _execute_service_command(self, command_func):
+    def import_from_directory(self):
+        directory = filedialog.askdirectory(title="选择包含WinSW XML配置文件的目录")
+        if directory:
+            self._batch_import(directory)
+
+    def import_from_archive(self):
+        filepath = filedialog.askopenfilename(
+            title="选择包含WinSW XML配置文件的压缩包",
+            filetypes=[("压缩包", "*.zip *.tar *.tar.gz *.tgz *.tar.bz2 *.tar.xz"), ("所有文件", "*.*")])
+        if filepath:
+            self._batch_import(filepath)
+
+    def _batch_import(self, source):
+        """在后台并发校验并导入，完成后显示一个汇总窗口。"""
+        overwrite = messagebox.askyesnocancel("批量导入", "遇到已存在的同ID服务时是否覆盖？\n选择“否”将跳过这些服务。")
+        if overwrite is None:
+            return
+        print(f"正在从 '{source}' 批量导入...")
+
+        def worker():
+            try:
+                results = self.config_archive.import_from(source, overwrite=overwrite)
+            except Exception as e:
+                self.call_in_ui(messagebox.showerror, "导入失败", f"无法导入: {e}")
+                return
+            self.call_in_ui(self._on_batch_import_done, source, results)
+
+        threading.Thread(target=worker, name='config-import', daemon=True).start()
+
+    def _on_batch_import_done(self, source, results):
+        from gui.import_summary_window import ImportSummaryWindow
+
+        imported = sum(1 for r in results if r.status in ('导入', '覆盖'))
+        print(f"批量导入完成: 共 {len(results)} 个文件，成功导入 {imported} 个。")
+        self.refresh_service_list()
+        ImportSummaryWindow(self.parent, f"批量导入 - {os.path.basename(source)}", results)
+
+    def export_configs(self):
+        filepath = filedialog.asksaveasfilename(
+            title="导出所有服务配置", defaultextension=".zip",
+            filetypes=[("zip 压缩包", "*.zip"), ("tar.gz 压缩包", "*.tar.gz")])
+        if not filepath:
+            return
+        include_logs = messagebox.askyesno("导出", "是否同时导出各服务当前的日志文件？")
+        print(f"正在导出所有配置到 '{filepath}'...")
+
+        def worker():
+            try:
+                count = self.config_archive.export_to(filepath, include_logs=include_logs)
+            except Exception as e:
+                self.call_in_ui(messagebox.showerror, "导出失败", f"无法导出: {e}")
+                return
+            print(f"导出完成: 共写入 {count} 个文件到 '{filepath}'。")
+
+        threading.Thread(target=worker, name='config-export', daemon=True).start()
+
+    def _execute_service_command(self, command):
+        # 选中了多个服务时，按批量操作处理
+        selected_files = self.service_list.get_selected_filenames()
+        if len(selected_files) > 1:
+            self._execute_fleet_command(command, selected_files)
+            return
+
         # 修正：在执行命令前，应先调用save_service以确保XML文件是最新的
         self.save_service()
         if not self.current_filepath or not os.path.exists(self.current_filepath):
@@ -298,25 +589,67 @@ class MainWindow(ttk.Frame):
         # save_service已经更新了self.current_config,所以这里直接用
         service_id = self._get_current_config_from_ui().get('id')
         if messagebox.askyesno("确认操作", f"你确定要对服务 '{service_id}' 执行此操作吗？"):
-            command_func(self._get_current_config_from_ui())
+            # 命令在后台执行，输出会实时回传到控制台，不会阻塞界面
+            future = getattr(self.winsw_manager, command)(self._get_current_config_from_ui())
+            self._bump_status_after(future)
+
+    def _bump_status_after(self, future):
+        """命令提交和结束时都加快状态轮询，让状态列尽快反映变化。"""
+        self.status_poller.bump()
+        if future is not None:
+            future.add_done_callback(lambda f: self.status_poller.bump())
+
+    def _execute_fleet_command(self, command, filenames):
+        """对多个选中的服务并发执行同一命令，并在汇总窗口中显示结果。"""
+        from gui.fleet_summary_window import FleetSummaryWindow
+
+        if not messagebox.askyesno("确认批量操作",
+                                   f"你确定要对选中的 {len(filenames)} 个服务执行 '{command}' 吗？\n"
+                                   f"操作将按服务依赖顺序并发执行。"):
+            return
+
+        configs = [self.config_repository.get(filename) for filename in filenames]
+        total = len(configs) * (2 if command == 'restart' else 1)
+        # 取消只作用于这一次批量操作；按钮被点击时 future 已经创建
+        summary = FleetSummaryWindow(self.parent, f"批量操作: {command}", total, lambda: future.cancel())
+        print(f"开始批量执行 '{command}'，共 {len(configs)} 个服务。")
+
+        def on_progress(result):
+            self.status_poller.bump()
+            self.call_in_ui(summary.add_result, result)
+
+        self.status_poller.bump()
+        future = self.fleet_executor.run(command, configs, progress_callback=on_progress)
+        future.add_done_callback(lambda f: self.call_in_ui(self._on_fleet_command_done, command, f, summary))
+
+    def _on_fleet_command_done(self, command, future, summary):
+        try:
+            results = future.result()
+        except Exception as e:
+            print(f"批量执行 '{command}' 出错: {e}")
+            summary.finish()
+            return
+        failed = sum(1 for result in results if result.status != '成功')
+        print(f"批量执行 '{command}' 完成: 成功 {len(results) - failed}，失败/跳过 {failed}。")
+        summary.finish()
 
     def install_service(self):
-        self._execute_service_command(self.winsw_manager.install)
+        self._execute_service_command('install')
 
     def uninstall_service(self):
-        self._execute_service_command(self.winsw_manager.uninstall)
+        self._execute_service_command('uninstall')
 
     def start_service(self):
-        self._execute_service_command(self.winsw_manager.start)
+        self._execute_service_command('start')
 
     def stop_service(self):
-        self._execute_service_command(self.winsw_manager.stop)
+        self._execute_service_command('stop')
 
     def restart_service(self):
-        self._execute_service_command(self.winsw_manager.restart)
+        self._execute_service_command('restart')
 
     def status_service(self):
-        self._execute_service_command(self.winsw_manager.status)
+        self._execute_service_command('status')
 
     def refresh_service(self):
-        self._execute_service_command(self.winsw_manager.refresh)
+        self._execute_service_command('refresh')
@@ -1,19 +1,62 @@
 import tkinter as tk
+from collections import deque
 from tkinter import ttk
 
+from gui.scheduler import HIGH
+
 
 class OutputConsole(ttk.Labelframe):
-    """ 显示程序日志的控制台 """
+    """
+    显示程序日志的控制台。
+    log() 可在任意线程中调用：消息先进入缓冲区，由界面调度器每 FLUSH_INTERVAL_MS 毫秒
+    合并为一次插入，并按 max_lines 裁剪最早的内容。
+    窗口最小化时刷新暂停，缓冲区最多保留 max_lines 条消息，更早的消息被丢弃并在下次刷新时提示丢弃的条数。
+    """
+    FLUSH_INTERVAL_MS = 50
 
-    def __init__(self, parent):
+    def __init__(self, parent, scheduler, max_lines=5000):
         super().__init__(parent, text="程序输出", padding=(10, 5))
+        self.max_lines = max_lines
+        # deque 的 append/popleft 是线程安全的，工作线程只向其中追加消息；
+        # 超出 maxlen 时自动丢弃最早的消息，文本框反正也只保留 max_lines 行
+        self._pending = deque(maxlen=max_lines or None)
+        self._dropped = 0  # 缓冲区溢出丢弃的消息数，多线程同时写入时是近似值
 
         self.text = tk.Text(self, height=8, wrap="word", state="disabled")
         self.text.pack(expand=True, fill="both")
 
+        scheduler.add("程序输出", self._flush, self.FLUSH_INTERVAL_MS, priority=HIGH)
+
     def log(self, message):
-        """向控制台添加一条日志"""
-        self.text.config(state="normal")
-        self.text.insert(tk.END, message + "\n")
-        self.text.see(tk.END)  # 自动滚动到底部
-        self.text.config(state="disabled")
+        """向控制台添加一条日志（线程安全）"""
+        if self._pending.maxlen is not None and len(self._pending) >= self._pending.maxlen:
+            self._dropped += 1
+        self._pending.append(message)
+
+    def _flush(self):
+        """把缓冲的消息一次性写入文本框"""
+        if self._pending:
+            messages = []
+            try:
+                while True:
+                    messages.append(self._pending.popleft())
+            except IndexError:
+                pass
+            if self._dropped:
+                dropped, self._dropped = self._dropped, 0
+                messages.insert(0, f"... 界面暂停期间省略了 {dropped} 条较早的输出 ...")
+
+            self.text.config(state="normal")
+            self.text.insert(tk.END, "\n".join(messages) + "\n")
+            self._trim()
+            self.text.see(tk.END)  # 自动滚动到底部
+            self.text.config(state="disabled")
+
+    def _trim(self):
+        """超过 max_lines 时删除最早的行"""
+        if not self.max_lines:
+            return
+        line_count = int(self.text.index("end-1c").split(".")[0])
+        excess = line_count - self.max_lines
+        if excess > 0:
+            self.text.delete("1.0", f"{excess + 1}.0")
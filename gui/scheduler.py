@@ -0,0 +1,212 @@
+import queue
+import time
+import tkinter as tk
+
+# 窗口状态
+ACTIVE = 'active'  # 窗口有焦点
+UNFOCUSED = 'unfocused'  # 窗口可见但没有焦点
+ICONIFIED = 'iconified'  # 窗口最小化或隐藏
+
+# 窗口不活动时任务的处理方式
+RUN = 'run'  # 照常运行
+SLOW = 'slow'  # 没有焦点时按 SLOW_FACTOR 倍的周期运行，最小化时暂停
+PAUSE = 'pause'  # 没有焦点或最小化时都暂停
+
+# 优先级，数字小的先运行
+HIGH = 0
+NORMAL = 10
+LOW = 20
+
+
+class ScheduledTask:
+    """UiScheduler 中的一个周期任务，由 UiScheduler.add() 创建。"""
+
+    def __init__(self, scheduler, name, callback, period_ms, priority, background):
+        self.scheduler = scheduler
+        self.name = name
+        self.callback = callback
+        self.period_ms = period_ms
+        self.priority = priority
+        self.background = background
+        self.next_run = time.monotonic() + period_ms / 1000
+        self.cancelled = False
+        # 统计
+        self.runs = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.last_seconds = 0.0
+        self.deferred = 0  # 因超出每帧时间预算而推迟到下一轮的次数
+
+    def set_period(self, period_ms):
+        """修改运行周期。新周期更短时提前下一次运行，更长时从下一次运行之后开始生效。"""
+        self.period_ms = period_ms
+        self.next_run = min(self.next_run, time.monotonic() + period_ms / 1000)
+
+    def trigger(self):
+        """在下一轮中尽快运行一次。"""
+        self.next_run = 0.0
+
+    def cancel(self):
+        self.scheduler.remove(self)
+
+    def stats(self) -> dict:
+        return {'name': self.name, 'period_ms': self.period_ms, 'priority': self.priority, 'runs': self.runs,
+                'total_ms': self.total_seconds * 1000, 'max_ms': self.max_seconds * 1000,
+                'last_ms': self.last_seconds * 1000,
+                'avg_ms': self.total_seconds * 1000 / self.runs if self.runs else 0.0, 'deferred': self.deferred}
+
+
+class UiScheduler:
+    """
+    界面线程中所有周期性工作的统一调度器，由 MainWindow 持有，整个程序只使用一个 after 定时器：
+    - 周期任务通过 add() 注册周期和优先级，到期的任务按优先级运行；一轮中已用时间超过
+      FRAME_BUDGET_MS 后，其余到期任务推迟到下一轮，避免一次卡住界面太久；
+    - call_soon() 可在任意线程中调用，后台线程的结果先进入队列，每轮开始时在界面线程中统一执行；
+    - 每轮检查窗口状态：没有焦点时 SLOW 任务放慢、PAUSE 任务暂停，最小化时只有 RUN 任务继续运行，
+      恢复后被暂停的任务立即运行一次；窗口状态变化时通知 add_state_listener() 注册的回调；
+    - 记录每个任务的运行次数和耗时，可通过 stats() 查看哪个任务占用了界面时间。
+    """
+
+    TICK_MS = 50  # 窗口活动时的轮询间隔，也是后台结果的最大延迟
+    BACKGROUND_TICK_MS = 250  # 窗口最小化时的轮询间隔
+    FRAME_BUDGET_MS = 16
+    SLOW_FACTOR = 4
+    QUEUE_TASK = "界面回调队列"  # call_soon() 队列在统计中的名称
+
+    def __init__(self, root):
+        self.root = root
+        self.state = ACTIVE
+        self._tasks = []
+        self._queue = queue.Queue()
+        self._state_listeners = []
+        self._after_id = None
+        self.queue_stats = ScheduledTask(self, self.QUEUE_TASK, None, 0, HIGH, RUN)
+        self.ticks = 0
+        self.overruns = 0  # 超出时间预算的轮数
+
+    # --- 注册 ---
+
+    def add(self, name, callback, period_ms, priority=NORMAL, background=SLOW) -> ScheduledTask:
+        """注册一个周期任务，callback() 每隔 period_ms 毫秒在界面线程中运行一次。"""
+        task = ScheduledTask(self, name, callback, period_ms, priority, background)
+        self._tasks.append(task)
+        self._tasks.sort(key=lambda t: t.priority)
+        return task
+
+    def remove(self, task):
+        task.cancelled = True
+        if task in self._tasks:
+            self._tasks.remove(task)
+
+    def call_soon(self, func, *args):
+        """从任意线程安排一个函数在界面线程中执行（线程安全）。"""
+        self._queue.put((func, args))
+
+    def add_state_listener(self, callback):
+        """注册窗口状态变化的回调 callback(state)，在界面线程中调用。"""
+        self._state_listeners.append(callback)
+
+    # --- 运行 ---
+
+    def start(self):
+        if self._after_id is None:
+            self._after_id = self.root.after(self.TICK_MS, self._tick)
+
+    def stop(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _window_state(self):
+        try:
+            if self.root.state() in ('iconic', 'withdrawn'):
+                return ICONIFIED
+            return ACTIVE if self.root.focus_get() is not None else UNFOCUSED
+        except (tk.TclError, KeyError):
+            # 焦点在某些弹出窗口（例如下拉列表）中时 focus_get() 会出错，视为活动状态
+            return ACTIVE
+
+    def _update_state(self, now):
+        state = self._window_state()
+        if state == self.state:
+            return
+        previous, self.state = self.state, state
+        if state == ACTIVE or (state == UNFOCUSED and previous == ICONIFIED):
+            # 之前被暂停或放慢的任务立即运行一次，让界面尽快显示最新内容
+            for task in self._tasks:
+                if not self._is_running_in(task, previous):
+                    task.next_run = now
+        for listener in list(self._state_listeners):
+            try:
+                listener(state)
+            except Exception as e:
+                print(f"窗口状态回调出错: {e}")
+
+    @staticmethod
+    def _is_running_in(task, state):
+        """任务在给定窗口状态下是否按原周期运行。"""
+        return state == ACTIVE or task.background == RUN
+
+    def _effective_period(self, task):
+        """返回任务在当前窗口状态下的周期（秒），暂停时返回 None。"""
+        if self.state == ACTIVE or task.background == RUN:
+            return task.period_ms / 1000
+        if self.state == UNFOCUSED and task.background == SLOW:
+            return task.period_ms * self.SLOW_FACTOR / 1000
+        return None
+
+    def _run(self, task, func, args):
+        started = time.perf_counter()
+        try:
+            func(*args)
+        except Exception as e:
+            print(f"界面任务“{task.name}”出错: {e}")
+        elapsed = time.perf_counter() - started
+        task.runs += 1
+        task.total_seconds += elapsed
+        task.last_seconds = elapsed
+        task.max_seconds = max(task.max_seconds, elapsed)
+        return elapsed
+
+    def _tick(self):
+        self._after_id = None
+        started = time.monotonic()
+        self.ticks += 1
+        self._update_state(started)
+
+        # 1. 后台线程提交的回调总是全部执行
+        try:
+            while True:
+                func, args = self._queue.get_nowait()
+                self._run(self.queue_stats, func, args)
+        except queue.Empty:
+            pass
+
+        # 2. 到期的周期任务，按优先级运行，超出预算后推迟到下一轮
+        budget = self.FRAME_BUDGET_MS / 1000
+        ran_any = False
+        for task in list(self._tasks):
+            if task.cancelled or task.next_run > started:
+                continue
+            period = self._effective_period(task)
+            if period is None:
+                continue
+            if ran_any and time.monotonic() - started > budget:
+                task.deferred += 1
+                continue
+            task.next_run = time.monotonic() + period
+            self._run(task, task.callback, ())
+            ran_any = True
+
+        if time.monotonic() - started > budget:
+            self.overruns += 1
+        if self.root.winfo_exists():
+            tick_ms = self.BACKGROUND_TICK_MS if self.state == ICONIFIED else self.TICK_MS
+            self._after_id = self.root.after(tick_ms, self._tick)
+
+    # --- 统计 ---
+
+    def stats(self) -> list:
+        """返回每个任务的耗时统计，按总耗时从大到小排列。"""
+        entries = [self.queue_stats.stats()] + [task.stats() for task in self._tasks]
+        return sorted(entries, key=lambda entry: entry['total_ms'], reverse=True)
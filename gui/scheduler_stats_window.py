@@ -0,0 +1,59 @@
+import tkinter as tk
+from tkinter import ttk
+
+from gui.scheduler import RUN
+from gui.tabs.form_utils import sync_tree_rows
+
+
+class SchedulerStatsWindow(tk.Toplevel):
+    """
+    界面任务耗时窗口：显示界面调度器中每个周期任务的运行次数和耗时，
+    用于找出占用界面时间最多的任务。窗口本身的刷新也是调度器中的一个任务。
+    """
+
+    COLUMNS = (("name", "任务", 160), ("period", "周期(毫秒)", 80), ("runs", "次数", 70),
+               ("total", "总耗时(毫秒)", 100), ("avg", "平均(毫秒)", 90), ("max", "最长(毫秒)", 90),
+               ("last", "最近(毫秒)", 90), ("deferred", "推迟次数", 70))
+    REFRESH_INTERVAL_MS = 1000
+
+    def __init__(self, parent, scheduler):
+        super().__init__(parent)
+        self.title("界面任务耗时")
+        self.transient(parent)
+        self.geometry("820x320")
+        self.scheduler = scheduler
+
+        self.create_widgets()
+        self.refresh()
+        self.refresh_task = scheduler.add("界面任务耗时窗口", self.refresh, self.REFRESH_INTERVAL_MS, background=RUN)
+        self.bind("<Destroy>", self._on_destroy)
+
+    def create_widgets(self):
+        main_frame = ttk.Frame(self, padding=10)
+        main_frame.pack(expand=True, fill="both")
+        main_frame.rowconfigure(1, weight=1)
+        main_frame.columnconfigure(0, weight=1)
+
+        self.summary_var = tk.StringVar()
+        ttk.Label(main_frame, textvariable=self.summary_var).grid(row=0, column=0, sticky="w", pady=(0, 5))
+
+        self.tree = ttk.Treeview(main_frame, columns=[c[0] for c in self.COLUMNS], show="headings")
+        for column, text, width in self.COLUMNS:
+            self.tree.heading(column, text=text)
+            self.tree.column(column, width=width, anchor="w")
+        self.tree.grid(row=1, column=0, sticky="nsew")
+
+        ttk.Button(main_frame, text="关闭", command=self.destroy).grid(row=2, column=0, sticky="e", pady=(10, 0))
+
+    def _on_destroy(self, event):
+        if event.widget is self:
+            self.refresh_task.cancel()
+
+    def refresh(self):
+        rows = [(entry['name'], entry['period_ms'] or "", entry['runs'], f"{entry['total_ms']:.1f}",
+                 f"{entry['avg_ms']:.2f}", f"{entry['max_ms']:.1f}", f"{entry['last_ms']:.2f}", entry['deferred'])
+                for entry in self.scheduler.stats()]
+        sync_tree_rows(self.tree, rows)
+        scheduler = self.scheduler
+        self.summary_var.set(f"窗口状态: {scheduler.state}，已运行 {scheduler.ticks} 轮，"
+                             f"其中 {scheduler.overruns} 轮超出 {scheduler.FRAME_BUDGET_MS} 毫秒的预算")
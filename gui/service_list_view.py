@@ -1,50 +1,142 @@
+import bisect
 import os
-import tkinter as tk
 from tkinter import ttk
 
+from core.directory_watcher import DirectoryWatcher
+from gui.scheduler import LOW, PAUSE
+
 
 class ServiceListView(ttk.Frame):
     """ 左侧的服务列表视图 """
 
-    def __init__(self, parent, select_callback):
+    STATUS_TEXT = {
+        'Running': "运行中", 'Stopped': "已停止", 'Starting': "启动中", 'Stopping': "停止中",
+        'NotInstalled': "未安装", 'Unknown': "未知"
+    }
+    STATUS_COLORS = {'Running': "green", 'Stopped': "gray", 'Starting': "orange", 'Stopping': "orange",
+                     'NotInstalled': "#999999", 'Unknown': "black"}
+
+    def __init__(self, parent, scheduler, select_callback, change_callback=None):
         super().__init__(parent)
+        self.scheduler = scheduler
         self.select_callback = select_callback
+        # change_callback(added, removed, modified) 在列表发生变化后调用
+        self.change_callback = change_callback
         self.service_dir = "services"
+        self.watcher = DirectoryWatcher(self.service_dir)
+        self.watch_task = None
+        self.statuses = {}  # 服务ID -> 状态
+        self.service_ids = {}  # 文件名 -> 服务ID
+        self._programmatic_selection = None  # 由代码设置的选中项，其选择事件不再重复回调
 
         # --- UI Elements ---
-        self.listbox = tk.Listbox(self, exportselection=False)
-        self.listbox.pack(expand=True, fill="both", padx=5, pady=5)
-        self.listbox.bind("<<ListboxSelect>>", self.on_select)
+        # 支持 Ctrl/Shift 多选，多选时服务控制按钮作用于所有选中的服务
+        self.tree = ttk.Treeview(self, columns=("status",), show="tree headings", selectmode="extended")
+        self.tree.heading("#0", text="服务配置")
+        self.tree.heading("status", text="状态")
+        self.tree.column("#0", width=180)
+        self.tree.column("status", width=70, stretch=False, anchor="center")
+        for status, color in self.STATUS_COLORS.items():
+            self.tree.tag_configure(status, foreground=color)
+        self.tree.pack(expand=True, fill="both", padx=5, pady=5)
+        self.tree.bind("<<TreeviewSelect>>", self.on_select)
+
+    def refresh_list(self):
+        """
+        扫描services目录，只把新增和删除的文件应用到列表中，
+        因此选中项和滚动位置在刷新后保持不变。
+        """
+        added, removed, modified = self.watcher.check()
+        if self.watch_task is not None:
+            self.watch_task.set_period(int(self.watcher.interval * 1000))
+        if removed:
+            self.tree.delete(*removed)
+        for filename in added:
+            children = self.tree.get_children()
+            self.tree.insert("", bisect.bisect(children, filename), iid=filename, text=filename)
+            self._apply_status(filename)
+        if (added or removed or modified) and self.change_callback:
+            self.change_callback(added, removed, modified)
 
+    def start_watching(self):
+        """
+        开始定期检查services目录，及时发现其他程序对配置文件的修改。
+        窗口没有焦点时暂停检查，回到窗口时立即检查一次，在其他编辑器中做的修改随即显示出来。
+        """
         self.refresh_list()
+        self.watch_task = self.scheduler.add("服务目录检查", self.refresh_list, int(self.watcher.interval * 1000),
+                                             priority=LOW, background=PAUSE)
 
-    def refresh_list(self):
-        """刷新服务列表，扫描services目录"""
-        self.listbox.delete(0, tk.END)
-        try:
-            files = [f for f in os.listdir(self.service_dir) if f.endswith(".xml")]
-            for filename in sorted(files):
-                self.listbox.insert(tk.END, filename)
-        except FileNotFoundError:
-            # services目录可能不存在
-            pass
+    def stop_watching(self):
+        if self.watch_task is not None:
+            self.watch_task.cancel()
+        self.watch_task = None
+
+    def set_service_ids(self, service_ids: dict):
+        """更新文件名到服务ID的映射，用于显示状态"""
+        self.service_ids.update(service_ids)
+        for filename in service_ids:
+            if self.tree.exists(filename):
+                self._apply_status(filename)
+
+    def forget_service_ids(self, filenames):
+        for filename in filenames:
+            self.service_ids.pop(filename, None)
+
+    def update_statuses(self, changes: dict):
+        """更新服务状态列，changes 为 {服务ID: 状态}"""
+        self.statuses.update(changes)
+        for filename in self.tree.get_children():
+            if self._service_id(filename) in changes:
+                self._apply_status(filename)
+
+    def _service_id(self, filename):
+        return self.service_ids.get(filename, os.path.splitext(filename)[0])
+
+    def _apply_status(self, filename):
+        status = self.statuses.get(self._service_id(filename), 'Unknown')
+        self.tree.item(filename, values=(self.STATUS_TEXT.get(status, status),), tags=(status,))
 
     def on_select(self, event):
         """当用户在列表中选择一项时调用"""
-        selection_indices = self.listbox.curselection()
-        if not selection_indices:
+        selection = self.tree.selection()
+        # 多选时不切换编辑中的配置
+        if len(selection) != 1:
             return
 
-        selected_index = selection_indices[0]
-        filename = self.listbox.get(selected_index)
+        filename = selection[0]
+        if filename == self._programmatic_selection:
+            self._programmatic_selection = None
+            return
 
         # 调用主窗口传递的回调函数
         if self.select_callback:
             self.select_callback(filename)
 
     def get_selected_filename(self):
-        """获取当前选中的文件名"""
-        selection_indices = self.listbox.curselection()
-        if not selection_indices:
+        """获取当前选中的文件名（仅在单选时有效）"""
+        selection = self.tree.selection()
+        if len(selection) != 1:
             return None
-        return self.listbox.get(selection_indices[0])
+        return selection[0]
+
+    def get_selected_filenames(self):
+        """获取所有选中的文件名"""
+        return list(self.tree.selection())
+
+    def clear_selection(self):
+        """取消所有选中项"""
+        self.tree.selection_remove(*self.tree.selection())
+
+    def select_filename(self, filename):
+        """在列表中选中指定文件并触发选择回调"""
+        if not self.tree.exists(filename):
+            return False
+        # selection_set 触发的 <<TreeviewSelect>> 是异步派发的，这里直接调用回调，
+        # 以便调用方可以立即使用新选择的服务，并让 on_select 忽略随后的事件
+        self._programmatic_selection = filename
+        self.tree.selection_set(filename)
+        self.tree.see(filename)
+        if self.select_callback:
+            self.select_callback(filename)
+        return True
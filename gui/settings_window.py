@@ -58,6 +58,19 @@ class SettingsWindow(tk.Toplevel):
         self.browse_button = ttk.Button(winsw_frame, text="浏览...", command=self.browse_winsw)
         self.browse_button.grid(row=2, column=2, sticky="w")
 
+        ttk.Label(winsw_frame, text="版本:").grid(row=3, column=0, sticky="w", padx=(20, 5))
+        self.version_var = tk.StringVar()
+        self.version_entry = ttk.Entry(winsw_frame, textvariable=self.version_var)
+        self.version_entry.grid(row=3, column=1, sticky="ew", padx=5, pady=5)
+        ttk.Label(winsw_frame, text="留空使用最新 v3", foreground="gray").grid(row=3, column=2, sticky="w")
+
+        ttk.Label(winsw_frame, text="离线镜像:").grid(row=4, column=0, sticky="w", padx=(20, 5))
+        self.mirror_dir_var = tk.StringVar()
+        self.mirror_dir_entry = ttk.Entry(winsw_frame, textvariable=self.mirror_dir_var)
+        self.mirror_dir_entry.grid(row=4, column=1, sticky="ew", padx=5, pady=5)
+        self.mirror_browse_button = ttk.Button(winsw_frame, text="浏览...", command=self.browse_mirror_dir)
+        self.mirror_browse_button.grid(row=4, column=2, sticky="w")
+
         # --- 底部按钮 ---
         button_frame = ttk.Frame(main_frame)
         button_frame.pack(fill="x", pady=(10, 0))
@@ -73,6 +86,9 @@ class SettingsWindow(tk.Toplevel):
         state = "normal" if self.mode_var.get() == "custom" else "disabled"
         self.custom_path_entry.config(state=state)
         self.browse_button.config(state=state)
+        auto_state = "disabled" if state == "normal" else "normal"
+        for widget in (self.version_entry, self.mirror_dir_entry, self.mirror_browse_button):
+            widget.config(state=auto_state)
 
     def browse_winsw(self):
         """打开文件对话框选择WinSW.exe。"""
@@ -83,10 +99,18 @@ class SettingsWindow(tk.Toplevel):
         if path:
             self.custom_path_var.set(path)
 
+    def browse_mirror_dir(self):
+        """选择WinSW离线镜像目录。"""
+        path = filedialog.askdirectory(title="选择 WinSW 离线镜像目录")
+        if path:
+            self.mirror_dir_var.set(path)
+
     def load_settings_to_ui(self):
         """将当前设置加载到UI控件中。"""
         self.mode_var.set(self.settings_manager.get('winsw_management_mode'))
         self.custom_path_var.set(self.settings_manager.get('winsw_custom_path'))
+        self.version_var.set(self.settings_manager.get('winsw_version'))
+        self.mirror_dir_var.set(self.settings_manager.get('winsw_mirror_dir'))
         self.toggle_custom_path_state()
 
     def save_and_close(self):
@@ -97,9 +121,15 @@ class SettingsWindow(tk.Toplevel):
         if mode == "custom" and not os.path.exists(custom_path):
             messagebox.showerror("错误", "自定义路径无效，请选择一个存在的 WinSW.exe 文件。", parent=self)
             return
+        mirror_dir = self.mirror_dir_var.get().strip()
+        if mode == "auto" and mirror_dir and not os.path.isdir(mirror_dir):
+            messagebox.showerror("错误", "离线镜像目录不存在。", parent=self)
+            return
 
         self.settings_manager.set('winsw_management_mode', mode)
         self.settings_manager.set('winsw_custom_path', custom_path)
+        self.settings_manager.set('winsw_version', self.version_var.get().strip())
+        self.settings_manager.set('winsw_mirror_dir', self.mirror_dir_var.get().strip())
         self.settings_manager.save_settings()
 
         messagebox.showinfo("成功", "设置已保存。", parent=self)
@@ -1,6 +1,8 @@
 import tkinter as tk
 from tkinter import ttk
 
+from gui.tabs.form_utils import bind_vars_changed
+
 
 class AccountTab(ttk.Frame):
     """ “服务账户” 选项卡 """
@@ -9,6 +11,7 @@ class AccountTab(ttk.Frame):
         "Local Service": "NT AUTHORITY\\LocalService",
         "Network Service": "NT AUTHORITY\\NetworkService"
     }
+    FIELDS = ('serviceaccount',)
 
     def __init__(self, parent):
         super().__init__(parent)
@@ -71,6 +74,11 @@ class AccountTab(ttk.Frame):
         for child in self.custom_user_frame.winfo_children():
             child.configure(state=state)
 
+    def bind_change(self, callback):
+        """注册字段被修改时的回调"""
+        bind_vars_changed((self.account_type_var, self.username_var, self.password_var, self.allow_logon_var),
+                          callback)
+
     def set_data(self, data: dict):
         service_account = data.get('serviceaccount', {})
         username = service_account.get('username', 'LocalSystem')
@@ -93,7 +101,7 @@ class AccountTab(ttk.Frame):
         if account_type == "Custom":
             username = self.username_var.get()
             if not username:
-                return {}  # 如果自定义但没填用户名，则不生成该节
+                return {'serviceaccount': {}}  # 如果自定义但没填用户名，则不生成该节
             return {
                 'serviceaccount': {
                     'username': username,
@@ -1,9 +1,12 @@
 import tkinter as tk
 from tkinter import ttk
 
+from gui.tabs.form_utils import bind_vars_changed
+
 
 class AdvancedTab(ttk.Frame):
     """ “高级” 选项卡 """
+    FIELDS = ('priority', 'stoptimeout', 'interactive')
 
     def __init__(self, parent):
         super().__init__(parent)
@@ -45,6 +48,10 @@ class AdvancedTab(ttk.Frame):
         )
         self.interactive_check.grid(row=1, column=0, columnspan=3, sticky="w", padx=5, pady=5)
 
+    def bind_change(self, callback):
+        """注册字段被修改时的回调"""
+        bind_vars_changed((self.priority_var, self.stop_timeout_var, self.interactive_var), callback)
+
     def set_data(self, data: dict):
         self.priority_var.set(data.get('priority', 'normal'))
         self.stop_timeout_var.set(data.get('stoptimeout', '15 sec'))
@@ -1,9 +1,12 @@
 import tkinter as tk
 from tkinter import ttk
 
+from gui.tabs.form_utils import bind_vars_changed, bind_text_modified
+
 
 class BasicInfoTab(ttk.Frame):
     """ “基本信息” 选项卡 """
+    FIELDS = ('id', 'name', 'description')
 
     def __init__(self, parent):
         super().__init__(parent)
@@ -35,12 +38,19 @@ class BasicInfoTab(ttk.Frame):
         self.desc_text.grid(row=2, column=1, sticky="nsew", padx=5, pady=5)
         info_frame.rowconfigure(2, weight=1)
 
+    def bind_change(self, callback):
+        """注册字段被修改时的回调"""
+        bind_vars_changed((self.id_var, self.name_var), callback)
+        bind_text_modified(self.desc_text, callback)
+
     def set_data(self, data: dict):
         """用字典数据填充UI"""
         self.id_var.set(data.get('id', ''))
         self.name_var.set(data.get('name', ''))
-        self.desc_text.delete("1.0", tk.END)
-        self.desc_text.insert("1.0", data.get('description', ''))
+        description = data.get('description', '')
+        if self.desc_text.get("1.0", "end-1c") != description:
+            self.desc_text.delete("1.0", tk.END)
+            self.desc_text.insert("1.0", description)
 
     def get_data(self) -> dict:
         """从UI获取数据到字典"""
@@ -1,12 +1,16 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 
+from gui.tabs.form_utils import sync_tree_rows
+
 
 class EnvironmentTab(ttk.Frame):
     """ “环境变量” 选项卡 """
+    FIELDS = ('environments',)
 
     def __init__(self, parent):
         super().__init__(parent)
+        self.change_callbacks = []
         self.create_widgets()
 
     def create_widgets(self):
@@ -56,6 +60,7 @@ class EnvironmentTab(ttk.Frame):
         self.tree.insert("", "end", values=(name, value))
         self.name_var.set("")
         self.value_var.set("")
+        self._notify_change()
 
     def remove_variable(self):
         selected_items = self.tree.selection()
@@ -64,19 +69,25 @@ class EnvironmentTab(ttk.Frame):
             return
         for item in selected_items:
             self.tree.delete(item)
+        self._notify_change()
 
-    def set_data(self, data: dict):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+    def bind_change(self, callback):
+        """注册变量列表被修改时的回调"""
+        self.change_callbacks.append(callback)
+
+    def _notify_change(self):
+        for callback in self.change_callbacks:
+            callback()
 
+    def set_data(self, data: dict):
         environments = data.get('environments', [])
-        for env in environments:
-            self.tree.insert("", "end", values=(env.get('name', ''), env.get('value', '')))
+        sync_tree_rows(self.tree, [(env.get('name', ''), env.get('value', '')) for env in environments])
 
     def get_data(self) -> dict:
         environments = []
         for item in self.tree.get_children():
             values = self.tree.item(item, 'values')
-            environments.append({'name': values[0], 'value': values[1]})
+            # Treeview 会把数字形式的值转换为 int，这里统一转回字符串
+            environments.append({'name': str(values[0]), 'value': str(values[1])})
 
         return {'environments': environments}
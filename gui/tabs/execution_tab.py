@@ -1,9 +1,12 @@
 import tkinter as tk
 from tkinter import ttk, filedialog
 
+from gui.tabs.form_utils import bind_vars_changed, bind_text_modified
+
 
 class ExecutionTab(ttk.Frame):
     """ “执行与参数” 选项卡 """
+    FIELDS = ('executable', 'workingdirectory', 'arguments')
 
     def __init__(self, parent, autofill_callback):
         super().__init__(parent)
@@ -50,11 +53,18 @@ class ExecutionTab(ttk.Frame):
         if path:
             self.workdir_var.set(path)
 
+    def bind_change(self, callback):
+        """注册字段被修改时的回调"""
+        bind_vars_changed((self.executable_var, self.workdir_var), callback)
+        bind_text_modified(self.args_text, callback)
+
     def set_data(self, data: dict):
         self.executable_var.set(data.get('executable', ''))
         self.workdir_var.set(data.get('workingdirectory', ''))
-        self.args_text.delete("1.0", tk.END)
-        self.args_text.insert("1.0", data.get('arguments', ''))
+        arguments = data.get('arguments', '')
+        if self.args_text.get("1.0", "end-1c") != arguments:
+            self.args_text.delete("1.0", tk.END)
+            self.args_text.insert("1.0", arguments)
 
     def get_data(self) -> dict:
         return {
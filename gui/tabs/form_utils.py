@@ -0,0 +1,33 @@
+import tkinter as tk
+
+
+def bind_vars_changed(variables, callback):
+    """任一变量被写入时调用 callback()"""
+    for var in variables:
+        var.trace_add('write', lambda *args: callback())
+
+
+def bind_text_modified(text_widget: tk.Text, callback):
+    """Text 控件内容被修改时调用 callback()，并重置修改标记以便继续接收通知"""
+
+    def on_modified(event):
+        if text_widget.edit_modified():
+            text_widget.edit_modified(False)
+            callback()
+
+    text_widget.bind("<<Modified>>", on_modified, add="+")
+
+
+def sync_tree_rows(tree, rows):
+    """
+    用 rows（值元组列表）更新 Treeview：复用已有行，只修改值不同的行，
+    多余的删除，不足的追加，避免整表删除重建造成的闪烁。
+    """
+    items = tree.get_children()
+    for item, row in zip(items, rows):
+        if tuple(str(v) for v in tree.item(item, 'values')) != tuple(row):
+            tree.item(item, values=row)
+    if len(items) > len(rows):
+        tree.delete(*items[len(rows):])
+    for row in rows[len(items):]:
+        tree.insert("", "end", values=row)
@@ -1,19 +1,61 @@
 import os
-import sys
+import queue
+import time
 import tkinter as tk
+from datetime import datetime
 from tkinter import ttk, messagebox
 
+from core.line_index import LogIndexer
+from core.log_archive import is_segment_path, list_segments
+from core.log_parsing import (AUTO, DEBUG, ERROR, INFO, PRESET_NAMES, UNKNOWN, WARN, FilteredLines, LogColumnStore,
+                              create_parser)
+from core.log_paths import resolve_log_paths
+from core.log_search import LogSearchEngine
+from gui.error_rate_chart import ErrorRateChart
+from gui.scheduler import PAUSE, RUN
+from gui.virtual_log_view import VirtualLogView
+
 
 class LogViewerTab(ttk.Frame):
     """ 内嵌的日志查看器选项卡 """
+    # 界面从后台索引拉取增量的间隔，由界面调度器定时运行
+    REFRESH_INTERVAL_MS = 500
+    SEARCH_POLL_INTERVAL_MS = 100
+    CHART_INTERVAL_MS = 2000
+    LOG_TYPES = {"Wrapper": "wrapper.log", "Output": "out.log", "Error": "err.log"}
+    LEVEL_FILTERS = {"全部级别": UNKNOWN, "DEBUG 及以上": DEBUG, "INFO 及以上": INFO, "WARN 及以上": WARN,
+                     "ERROR 及以上": ERROR}
+    # 时间筛选 -> 最近多少秒；CUSTOM_TIME 使用输入的起止时间
+    CUSTOM_TIME = "自定义"
+    TIME_FILTERS = {"全部时间": None, "最近 15 分钟": 900, "最近 1 小时": 3600, "最近 24 小时": 86400,
+                    "最近 7 天": 7 * 86400, CUSTOM_TIME: None}
 
-    def __init__(self, parent):
+    def __init__(self, parent, scheduler, callbacks=None):
         super().__init__(parent)
+        self.scheduler = scheduler
+        callbacks = callbacks or {}
+        # list_configs() 返回所有服务的配置；select_service(filename) 在主窗口中切换服务
+        self.list_configs = callbacks.get('list_configs')
+        self.select_service = callbacks.get('select_service')
+        # archive_logs(config) 把服务的日志轮转为归档段并清空；delete_archives(config) 删除服务的所有归档段
+        self.archive_logs = callbacks.get('archive_logs')
+        self.delete_archives = callbacks.get('delete_archives')
         self.log_paths = {}
-        self.log_texts = {}
-        self.last_positions = {}
-        self.after_id = None
+        self.log_views = {}
+        self.indexer = None
+        self.refresh_task = None
         self.current_config = None  # 保存当前服务的配置
+        # 每种日志的解析结果，由索引线程增量写入，供级别/时间筛选和错误率图使用
+        self.stores = {}
+        self.log_formats = {}  # 服务ID -> 指定的日志格式预设，未指定时自动识别
+        self.filter_criteria = None  # (最低级别, 开始时间, 结束时间)，为 None 时显示全部行
+        self.chart_task = None
+
+        self.search_engine = LogSearchEngine()
+        self.search_queue = queue.Queue()
+        self.search_cancel_event = None
+        self.search_task = None
+        self.search_results = {}
         self.create_widgets()
 
     def create_widgets(self):
@@ -23,40 +65,150 @@ class LogViewerTab(ttk.Frame):
 
         clear_button = ttk.Button(top_frame, text="清除当前服务日志", command=self.clear_logs)
         clear_button.pack(side="left")
+        ttk.Button(top_frame, text="合并时间线...", command=self.open_timeline).pack(side="left", padx=5)
+
+        # 搜索栏
+        self.search_var = tk.StringVar()
+        self.regex_var = tk.BooleanVar(value=False)
+        self.ignore_case_var = tk.BooleanVar(value=True)
+        self.scope_var = tk.StringVar(value="当前服务")
+        self.stop_search_button = ttk.Button(top_frame, text="停止", command=self.stop_search, state="disabled")
+        self.stop_search_button.pack(side="right")
+        ttk.Button(top_frame, text="搜索", command=self.start_search).pack(side="right", padx=(5, 5))
+        ttk.Combobox(top_frame, textvariable=self.scope_var, values=["当前服务", "所有服务"], state="readonly",
+                     width=8).pack(side="right")
+        ttk.Checkbutton(top_frame, text="忽略大小写", variable=self.ignore_case_var).pack(side="right", padx=5)
+        ttk.Checkbutton(top_frame, text="正则", variable=self.regex_var).pack(side="right")
+        search_entry = ttk.Entry(top_frame, textvariable=self.search_var, width=30)
+        search_entry.pack(side="right", padx=5)
+        search_entry.bind("<Return>", lambda e: self.start_search())
+        ttk.Label(top_frame, text="搜索:").pack(side="right")
+
+        self.create_filter_bar()
+        self.chart = ErrorRateChart(self, on_select=self.filter_time_range)
+        self.chart.pack(fill="x", padx=5, pady=(5, 0))
+
+        paned_window = ttk.PanedWindow(self, orient=tk.VERTICAL)
+        paned_window.pack(expand=True, fill="both", padx=5, pady=5)
+
+        self.notebook = ttk.Notebook(paned_window)
+        paned_window.add(self.notebook, weight=4)
+        self.notebook.bind("<<NotebookTabChanged>>", lambda e: self.chart.set_store(self._selected_store()))
+
+        for name, suffix in self.LOG_TYPES.items():
+            # 虚拟视图只渲染可见的行，日志再大内存占用也不会增长
+            view = VirtualLogView(self.notebook)
+            self.notebook.add(view, text=name)
+            self.log_views[suffix] = view
 
-        self.notebook = ttk.Notebook(self)
-        self.notebook.pack(expand=True, fill="both", padx=5, pady=5)
+        # 搜索结果列表，双击跳转到对应行
+        results_frame = ttk.Frame(paned_window)
+        paned_window.add(results_frame, weight=1)
+        self.search_status_var = tk.StringVar()
+        ttk.Label(results_frame, textvariable=self.search_status_var, anchor="w").pack(side="top", fill="x")
+        self.results_tree = ttk.Treeview(results_frame, columns=("service", "log", "line"), show="headings", height=5)
+        self.results_tree.heading("service", text="服务")
+        self.results_tree.heading("log", text="日志")
+        self.results_tree.heading("line", text="内容")
+        self.results_tree.column("service", width=120, stretch=False)
+        self.results_tree.column("log", width=110, stretch=False)
+        self.results_tree.column("line", width=600)
+        results_scroll = ttk.Scrollbar(results_frame, orient="vertical", command=self.results_tree.yview)
+        self.results_tree.config(yscrollcommand=results_scroll.set)
+        results_scroll.pack(side="right", fill="y")
+        self.results_tree.pack(expand=True, fill="both")
+        self.results_tree.bind("<Double-1>", self.on_result_activated)
+        self.results_tree.bind("<Return>", self.on_result_activated)
 
-        log_types = {"Wrapper": "wrapper.log", "Output": "out.log", "Error": "err.log"}
-        for name, suffix in log_types.items():
-            frame = ttk.Frame(self.notebook)
-            self.notebook.add(frame, text=name)
+    def create_filter_bar(self):
+        """按级别和时间筛选日志行的控件，以及日志格式的选择。"""
+        filter_frame = ttk.Frame(self)
+        filter_frame.pack(fill="x", padx=5, pady=(5, 0))
 
-            text_widget = tk.Text(frame, wrap="none", state="disabled", font=("Courier New", 9))
-            v_scroll = ttk.Scrollbar(frame, orient="vertical", command=text_widget.yview)
-            h_scroll = ttk.Scrollbar(frame, orient="horizontal", command=text_widget.xview)
-            text_widget.config(yscrollcommand=v_scroll.set, xscrollcommand=h_scroll.set)
+        self.level_filter_var = tk.StringVar(value=next(iter(self.LEVEL_FILTERS)))
+        self.time_filter_var = tk.StringVar(value=next(iter(self.TIME_FILTERS)))
+        self.time_from_var = tk.StringVar()
+        self.time_to_var = tk.StringVar()
+        self.format_var = tk.StringVar(value=PRESET_NAMES[AUTO])
 
-            v_scroll.pack(side="right", fill="y")
-            h_scroll.pack(side="bottom", fill="x")
-            text_widget.pack(side="left", expand=True, fill="both")
+        ttk.Label(filter_frame, text="级别:").pack(side="left")
+        level_combo = ttk.Combobox(filter_frame, textvariable=self.level_filter_var, values=list(self.LEVEL_FILTERS),
+                                   state="readonly", width=13)
+        level_combo.pack(side="left", padx=(5, 10))
+        level_combo.bind("<<ComboboxSelected>>", lambda e: self.apply_filter())
+        ttk.Label(filter_frame, text="时间:").pack(side="left")
+        time_combo = ttk.Combobox(filter_frame, textvariable=self.time_filter_var, values=list(self.TIME_FILTERS),
+                                  state="readonly", width=12)
+        time_combo.pack(side="left", padx=5)
+        time_combo.bind("<<ComboboxSelected>>", lambda e: self._on_time_filter_selected())
+        ttk.Label(filter_frame, text="从").pack(side="left")
+        self.time_from_entry = ttk.Entry(filter_frame, textvariable=self.time_from_var, width=19, state="disabled")
+        self.time_from_entry.pack(side="left", padx=5)
+        ttk.Label(filter_frame, text="到").pack(side="left")
+        self.time_to_entry = ttk.Entry(filter_frame, textvariable=self.time_to_var, width=19, state="disabled")
+        self.time_to_entry.pack(side="left", padx=5)
+        for entry in (self.time_from_entry, self.time_to_entry):
+            entry.bind("<Return>", lambda e: self.apply_filter())
+        ttk.Button(filter_frame, text="筛选", command=self.apply_filter).pack(side="left", padx=(5, 0))
+        ttk.Button(filter_frame, text="清除筛选", command=self.clear_filter).pack(side="left", padx=5)
 
-            self.log_texts[suffix] = text_widget
-            self.last_positions[suffix] = 0
+        format_combo = ttk.Combobox(filter_frame, textvariable=self.format_var, values=list(PRESET_NAMES.values()),
+                                    state="readonly", width=9)
+        format_combo.pack(side="right")
+        format_combo.bind("<<ComboboxSelected>>", lambda e: self._on_format_selected())
+        ttk.Label(filter_frame, text="格式:").pack(side="right", padx=(10, 5))
+        self.format_status_var = tk.StringVar()
+        ttk.Label(filter_frame, textvariable=self.format_status_var, foreground="gray").pack(side="right")
+
+    def open_timeline(self):
+        """打开多服务合并时间线窗口，默认选中当前服务。"""
+        from gui.log_timeline_window import LogTimelineWindow
+
+        if not self.list_configs:
+            return
+        selected = [self.current_config.get('id')] if self.current_config else []
+        LogTimelineWindow(self.winfo_toplevel(), self.scheduler, self.list_configs, selected, self.log_formats)
 
     def clear_logs(self):
-        """清除当前选中服务的所有日志文件"""
+        """清除当前选中服务的日志：归档后清空，或永久删除日志和所有归档"""
         if not self.current_config or not self.log_paths:
             messagebox.showwarning("操作无效", "请先选择一个服务。")
             return
 
         service_id = self.current_config.get('id', '未知服务')
-        if not messagebox.askyesno("确认清除", f"你确定要删除服务 '{service_id}' 的所有日志文件吗？\n此操作不可恢复。"):
-            return
+        if self.archive_logs is not None:
+            answer = messagebox.askyesnocancel(
+                "清除日志", f"如何清除服务 '{service_id}' 的日志？\n\n"
+                           "是：压缩归档后清空（服务需已停止；归档仍可在此查看和搜索）\n"
+                           "否：永久删除所有日志和归档，此操作不可恢复")
+            if answer is None:
+                return
+            archive = answer
+        else:
+            if not messagebox.askyesno("确认清除",
+                                       f"你确定要删除服务 '{service_id}' 的所有日志文件吗？\n此操作不可恢复。"):
+                return
+            archive = False
 
         # 停止监控，避免文件占用
         self.stop_monitoring()
+        if archive:
+            self._archive_current_logs()
+        else:
+            self._delete_current_logs()
+        # 重新开始监控
+        self.start_monitoring(self.current_config)
+
+    def _archive_current_logs(self):
+        summary = self.archive_logs(self.current_config)
+        if summary['errors']:
+            messagebox.showerror("归档失败", "\n".join(summary['errors']))
+        elif summary['rotated']:
+            messagebox.showinfo("成功", f"已将 {summary['rotated']} 个日志文件压缩归档并清空。")
+        else:
+            messagebox.showinfo("完成", "没有需要归档的日志。")
 
+    def _delete_current_logs(self):
         cleared_files = []
         errors = []
         for file_path in self.log_paths.values():
@@ -66,6 +218,9 @@ class LogViewerTab(ttk.Frame):
                     cleared_files.append(os.path.basename(file_path))
                 except OSError as e:
                     errors.append(f"删除 {os.path.basename(file_path)} 失败: {e}")
+        removed_archives = self.delete_archives(self.current_config) if self.delete_archives else 0
+        if removed_archives:
+            cleared_files.append(f"{removed_archives} 个归档段")
 
         # 清空UI显示
         self._clear_all_logs()
@@ -78,73 +233,251 @@ class LogViewerTab(ttk.Frame):
         else:
             messagebox.showinfo("完成", "没有找到需要清除的日志文件。")
 
-        # 重新开始监控
-        self.start_monitoring(self.current_config)
-
     def start_monitoring(self, config: dict):
         self.stop_monitoring()  # 先停止上一个监控
         self.current_config = config  # 保存当前配置
-        self._determine_log_paths(config)
-        self._clear_all_logs()
-        self.log_to_all("--- 开始监控日志 ---\n")
+        self.log_paths = resolve_log_paths(config)
+        self.indexer = LogIndexer(self.log_paths)
+        preset = self.log_formats.get(config.get('id'), AUTO)
+        self.format_var.set(PRESET_NAMES[preset])
+        self.stores = {}
+        for suffix, index in self.indexer.indexes.items():
+            # 解析在索引线程中随读取增量进行
+            store = self.stores[suffix] = LogColumnStore(create_parser(preset))
+            index.chunk_listeners.append(store.on_chunk)
+        self._apply_sources()
+        self.chart.set_store(self._selected_store())
+        self.indexer.start()
+        # 当前服务的日志在后台持续增量建立搜索索引
+        self.search_engine.watch(self.log_paths.values())
         self.update_logs()
+        self.refresh_task = self.scheduler.add("日志查看刷新", self.update_logs, self.REFRESH_INTERVAL_MS)
+        self.chart_task = self.scheduler.add("日志错误率图", self.update_chart, self.CHART_INTERVAL_MS,
+                                             background=PAUSE)
 
     def stop_monitoring(self):
-        if self.after_id:
-            self.after_cancel(self.after_id)
-            self.log_to_all("\n--- 停止监控日志 ---\n")
-        self.after_id = None
-
-    def _determine_log_paths(self, config: dict):
-        service_id = config.get('id')
-        if not service_id:
-            self.log_paths = {}
+        for task in (self.refresh_task, self.chart_task):
+            if task is not None:
+                task.cancel()
+        self.refresh_task = self.chart_task = None
+        # 停止后台索引并关闭文件句柄，避免占用日志文件
+        if self.indexer is not None:
+            self.indexer.stop()
+            self.indexer = None
+
+    def update_logs(self):
+        for view in self.log_views.values():
+            view.refresh()
+
+    def update_chart(self):
+        self.chart.refresh()
+        store = self._selected_store()
+        parser = store.parser if store is not None else None
+        if parser is not None and parser.name == AUTO:
+            detected = PRESET_NAMES.get(parser.matched_name)
+            self.format_status_var.set(f"已识别为 {detected}" if detected else "未识别出格式")
+        else:
+            self.format_status_var.set("")
+
+    def _clear_all_logs(self):
+        for view in self.log_views.values():
+            view.set_source(None)
+
+    # ---------- 筛选 ----------
+
+    def _selected_suffix(self):
+        selected = self.notebook.select()
+        return next((suffix for suffix, view in self.log_views.items() if str(view) == selected), None)
+
+    def _selected_store(self):
+        return self.stores.get(self._selected_suffix())
+
+    def _apply_sources(self):
+        """按当前的筛选条件为每个日志视图设置数据来源。"""
+        if self.indexer is None:
             return
+        for suffix, view in self.log_views.items():
+            index = self.indexer.indexes.get(suffix)
+            store = self.stores.get(suffix)
+            if index is not None and store is not None and self.filter_criteria is not None:
+                view.set_source(FilteredLines(index, store, *self.filter_criteria))
+            else:
+                view.set_source(index)
 
-        log_dir = config.get('logpath')
-        if not log_dir or not os.path.isdir(log_dir):
-            base_deploy_dir = os.path.join(os.path.abspath(os.path.dirname(sys.argv[0])), "deploy")
-            log_dir = os.path.join(base_deploy_dir, service_id)
+    def _on_time_filter_selected(self):
+        custom = self.time_filter_var.get() == self.CUSTOM_TIME
+        for entry in (self.time_from_entry, self.time_to_entry):
+            entry.config(state="normal" if custom else "disabled")
+        if custom:
+            self.time_from_entry.focus_set()
+        else:
+            self.apply_filter()
 
-        self.log_paths = {
-            "wrapper.log": os.path.join(log_dir, f"{service_id}.wrapper.log"),
-            "out.log": os.path.join(log_dir, f"{service_id}.out.log"),
-            "err.log": os.path.join(log_dir, f"{service_id}.err.log"),
-        }
-        self.last_positions = {key: 0 for key in self.log_paths}
+    @staticmethod
+    def _parse_time(text):
+        """解析 YYYY-MM-DD HH:MM[:SS] 格式的本地时间，留空返回 None。"""
+        text = text.strip()
+        return datetime.fromisoformat(text).timestamp() if text else None
 
-    def update_logs(self):
-        for suffix, path in self.log_paths.items():
+    def apply_filter(self):
+        min_level = self.LEVEL_FILTERS.get(self.level_filter_var.get(), UNKNOWN)
+        time_filter = self.time_filter_var.get()
+        start_time = end_time = None
+        if time_filter == self.CUSTOM_TIME:
             try:
+                start_time = self._parse_time(self.time_from_var.get())
+                end_time = self._parse_time(self.time_to_var.get())
+            except ValueError:
+                messagebox.showerror("时间格式错误", "请输入 YYYY-MM-DD HH:MM:SS 格式的时间，例如 2025-01-02 08:30:00。")
+                return
+        elif self.TIME_FILTERS.get(time_filter):
+            start_time = time.time() - self.TIME_FILTERS[time_filter]
+
+        if min_level == UNKNOWN and start_time is None and end_time is None:
+            self.filter_criteria = None
+        else:
+            self.filter_criteria = (min_level, start_time, end_time)
+        self._apply_sources()
+
+    def clear_filter(self):
+        self.level_filter_var.set(next(iter(self.LEVEL_FILTERS)))
+        self.time_filter_var.set(next(iter(self.TIME_FILTERS)))
+        for entry in (self.time_from_entry, self.time_to_entry):
+            entry.config(state="disabled")
+        self.filter_criteria = None
+        self._apply_sources()
+
+    def filter_time_range(self, start_time, end_time):
+        """错误率图中单击柱子时，按该时间段筛选。"""
+        self.time_filter_var.set(self.CUSTOM_TIME)
+        for entry in (self.time_from_entry, self.time_to_entry):
+            entry.config(state="normal")
+        self.time_from_var.set(time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(start_time)))
+        self.time_to_var.set(time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(end_time)))
+        self.apply_filter()
+
+    def _on_format_selected(self):
+        """指定日志格式后重新读取和解析当前服务的日志。"""
+        preset = next((name for name, label in PRESET_NAMES.items() if label == self.format_var.get()), AUTO)
+        if not self.current_config:
+            return
+        service_id = self.current_config.get('id')
+        if preset == AUTO:
+            self.log_formats.pop(service_id, None)
+        else:
+            self.log_formats[service_id] = preset
+        self.start_monitoring(self.current_config)
+
+    # ---------- 搜索 ----------
+
+    def start_search(self):
+        pattern = self.search_var.get()
+        if not pattern:
+            return
+        targets = self._search_targets()
+        if not targets:
+            messagebox.showwarning("操作无效", "没有可搜索的日志，请先选择一个服务。")
+            return
+
+        self.stop_search()
+        self._cancel_search_task()
+        self.results_tree.delete(*self.results_tree.get_children())
+        self.search_results = {}
+        self.search_queue = queue.Queue()
+        self.search_status_var.set(f"正在搜索 {len(targets)} 个日志文件...")
+        self.stop_search_button.config(state="normal")
+
+        results = self.search_queue
+        self.search_cancel_event = self.search_engine.search(
+            targets, pattern, is_regex=self.regex_var.get(), ignore_case=self.ignore_case_var.get(),
+            result_callback=lambda match: results.put(('match', match)),
+            done_callback=lambda count, error: results.put(('done', (count, error))))
+        # 窗口不活动时也继续取回结果，搜索完成后任务随即取消
+        self.search_task = self.scheduler.add("日志搜索结果", lambda: self._drain_search_results(results),
+                                              self.SEARCH_POLL_INTERVAL_MS, background=RUN)
+
+    def stop_search(self):
+        if self.search_cancel_event is not None:
+            self.search_cancel_event.set()
+            self.search_cancel_event = None
+        self.stop_search_button.config(state="disabled")
+
+    def _cancel_search_task(self):
+        if self.search_task is not None:
+            self.search_task.cancel()
+            self.search_task = None
+
+    def _search_targets(self):
+        if self.scope_var.get() == "所有服务" and self.list_configs:
+            configs = self.list_configs()
+        else:
+            configs = [self.current_config] if self.current_config else []
+        targets = []
+        for config in configs:
+            for suffix, path in resolve_log_paths(config).items():
+                # 先搜索归档段（从旧到新），再搜索当前文件，结果按时间顺序排列
+                for segment in list_segments(path):
+                    targets.append((config.get('id'), suffix, segment.path))
                 if os.path.exists(path):
-                    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
-                        if os.path.getsize(path) < self.last_positions[suffix]:
-                            self.last_positions[suffix] = 0  # 日志文件被重置
+                    targets.append((config.get('id'), suffix, path))
+        return targets
 
-                        f.seek(self.last_positions[suffix])
-                        new_content = f.read()
-                        if new_content:
-                            self._log_message(suffix, new_content)
-                        self.last_positions[suffix] = f.tell()
-            except Exception:
-                pass  # 静默处理读取错误
+    def _drain_search_results(self, results):
+        if results is not self.search_queue:
+            return  # 已开始新的搜索，旧任务已被取消
+        finished = False
+        try:
+            while True:
+                kind, payload = results.get_nowait()
+                if kind == 'match':
+                    log_name = f"{payload.suffix} (归档)" if is_segment_path(payload.path) else payload.suffix
+                    iid = self.results_tree.insert("", "end", values=(payload.service_id, log_name,
+                                                                       payload.line[:500]))
+                    self.search_results[iid] = payload
+                else:
+                    count, error = payload
+                    finished = True
+                    if error:
+                        self.search_status_var.set(f"搜索失败: {error}")
+                    else:
+                        limit_note = "（已达到结果数上限）" if count >= self.search_engine.MAX_RESULTS else ""
+                        self.search_status_var.set(f"搜索完成，共 {count} 条结果{limit_note}。")
+        except queue.Empty:
+            pass
+        if finished:
+            self.stop_search_button.config(state="disabled")
+            self.search_cancel_event = None
+            self._cancel_search_task()
 
-        self.after_id = self.after(1000, self.update_logs)
+    def on_result_activated(self, event=None):
+        selection = self.results_tree.selection()
+        if not selection:
+            return
+        match = self.search_results.get(selection[0])
+        if match is None:
+            return
+        if not self.current_config or match.service_id != self.current_config.get('id'):
+            if not self.select_service:
+                return
+            self.select_service(f"{match.service_id}.xml")
+        self._jump_to(match.suffix, match.path, match.offset)
 
-    def _clear_all_logs(self):
-        for text_widget in self.log_texts.values():
-            text_widget.config(state="normal")
-            text_widget.delete("1.0", tk.END)
-            text_widget.config(state="disabled")
-
-    def log_to_all(self, message):
-        for suffix in self.log_texts.keys():
-            self._log_message(suffix, message)
-
-    def _log_message(self, suffix, message):
-        text_widget = self.log_texts.get(suffix)
-        if text_widget:
-            text_widget.config(state="normal")
-            text_widget.insert(tk.END, message)
-            text_widget.see(tk.END)
-            text_widget.config(state="disabled")
+    def _jump_to(self, suffix, path, offset, attempts=50):
+        """
+        跳转到指定日志文件或归档段中的字节偏移处；若行索引尚未建立到该位置（例如归档段还在加载）则稍后重试。
+        """
+        view = self.log_views.get(suffix)
+        index = self.indexer.indexes.get(suffix) if self.indexer else None
+        if view is None or index is None:
+            return
+        self.notebook.select(view)
+        position = index.logical_offset(path, offset)
+        if position is not None and index.indexed_end > position:
+            # 有筛选时跳转到筛选结果中最接近的一行
+            source = view.source if view.source is not None else index
+            view.goto_line(source.line_for_offset(position), highlight=True)
+        elif attempts > 0:
+            self.after(200, self._jump_to, suffix, path, offset, attempts - 1)
+        elif position is None:
+            self.search_status_var.set(f"该结果位于较早的归档 {os.path.basename(path)} 中，"
+                                       "超出了日志查看加载的历史范围。")
@@ -1,9 +1,12 @@
 import tkinter as tk
 from tkinter import ttk, filedialog
 
+from gui.tabs.form_utils import bind_vars_changed
+
 
 class LoggingTab(ttk.Frame):
     """ “日志记录” 选项卡 """
+    FIELDS = ('log_mode', 'logpath')
 
     def __init__(self, parent):
         super().__init__(parent)
@@ -38,6 +41,10 @@ class LoggingTab(ttk.Frame):
         if path:
             self.log_path_var.set(path)
 
+    def bind_change(self, callback):
+        """注册字段被修改时的回调"""
+        bind_vars_changed((self.log_mode_var, self.log_path_var), callback)
+
     def set_data(self, data: dict):
         self.log_mode_var.set(data.get('log_mode', 'append'))
         self.log_path_var.set(data.get('logpath', ''))
@@ -1,12 +1,16 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 
+from gui.tabs.form_utils import bind_vars_changed, sync_tree_rows
+
 
 class RecoveryTab(ttk.Frame):
     """ “恢复机制” 选项卡 """
+    FIELDS = ('onfailure', 'resetfailure')
 
     def __init__(self, parent):
         super().__init__(parent)
+        self.change_callbacks = []
         self.create_widgets()
 
     def create_widgets(self):
@@ -57,6 +61,7 @@ class RecoveryTab(ttk.Frame):
             messagebox.showwarning("警告", "请选择一个操作。")
             return
         self.tree.insert("", "end", values=(action, delay))
+        self._notify_change()
 
     def remove_action(self):
         selected_items = self.tree.selection()
@@ -65,16 +70,21 @@ class RecoveryTab(ttk.Frame):
             return
         for item in selected_items:
             self.tree.delete(item)
+        self._notify_change()
 
-    def set_data(self, data: dict):
-        # 清空现有数据
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+    def bind_change(self, callback):
+        """注册字段被修改时的回调"""
+        self.change_callbacks.append(callback)
+        bind_vars_changed((self.reset_var,), callback)
+
+    def _notify_change(self):
+        for callback in self.change_callbacks:
+            callback()
 
-        # 加载失败操作
+    def set_data(self, data: dict):
+        # 加载失败操作，只更新有变化的行
         on_failure_actions = data.get('onfailure', [])
-        for action in on_failure_actions:
-            self.tree.insert("", "end", values=(action.get('action', ''), action.get('delay', '')))
+        sync_tree_rows(self.tree, [(action.get('action', ''), action.get('delay', '')) for action in on_failure_actions])
 
         # 加载重置周期
         self.reset_var.set(data.get('resetfailure', '1 day'))
@@ -83,7 +93,7 @@ class RecoveryTab(ttk.Frame):
         actions = []
         for item in self.tree.get_children():
             values = self.tree.item(item, 'values')
-            actions.append({'action': values[0], 'delay': values[1]})
+            actions.append({'action': str(values[0]), 'delay': str(values[1])})
 
         return {
             'onfailure': actions,
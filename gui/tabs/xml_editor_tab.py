@@ -1,17 +1,37 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk
+
+from gui.tabs.form_utils import bind_text_modified
+
+
+def changed_lines(old_text, new_text):
+    """
+    逐行比较文本控件中的新旧文本（控件内容末尾总有一个换行），去掉相同的开头和结尾行，
+    返回 (起始行, 旧文本中的结束行, 替换成的行)，行号从 0 开始、不含结束行，每行都带换行符。
+    结尾没有相同的行时返回 None：控件最后的换行不能删除，只能整体替换。
+    """
+    old_lines = [line + '\n' for line in old_text.split('\n')]
+    new_lines = [line + '\n' for line in new_text.split('\n')]
+    start = 0
+    while start < min(len(old_lines), len(new_lines)) and old_lines[start] == new_lines[start]:
+        start += 1
+    old_end, new_end = len(old_lines), len(new_lines)
+    while old_end > start and new_end > start and old_lines[old_end - 1] == new_lines[new_end - 1]:
+        old_end -= 1
+        new_end -= 1
+    if old_end == len(old_lines) or new_end == len(new_lines):
+        return None
+    return start, old_end, new_lines[start:new_end]
 
 
 class XmlEditorTab(ttk.Frame):
-    """ 直接编辑XML源码的选项卡 """
+    """
+    直接编辑XML源码的选项卡。
+    与其他选项卡的同步由 ConfigSync 自动完成，这里只负责显示和编辑文本。
+    """
 
-    def __init__(self, parent, main_window_callbacks):
+    def __init__(self, parent):
         super().__init__(parent)
-        self.get_config_from_ui = main_window_callbacks['get_config']
-        self.set_config_to_ui = main_window_callbacks['set_config']
-        self.config_manager_to_xml_string = main_window_callbacks['to_xml_string']
-        self.config_manager_from_xml_string = main_window_callbacks['from_xml_string']
-
         self.create_widgets()
 
     def create_widgets(self):
@@ -20,16 +40,11 @@ class XmlEditorTab(ttk.Frame):
         main_frame.rowconfigure(1, weight=1)
         main_frame.columnconfigure(0, weight=1)
 
-        button_frame = ttk.Frame(main_frame)
-        button_frame.grid(row=0, column=0, sticky="ew", pady=5)
+        self.status_var = tk.StringVar(value="XML源码与界面字段自动同步")
+        self.status_label = ttk.Label(main_frame, textvariable=self.status_var, anchor="w")
+        self.status_label.grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0, 5))
 
-        load_button = ttk.Button(button_frame, text="从UI字段加载XML", command=self.load_from_ui)
-        load_button.pack(side="left", padx=5)
-
-        apply_button = ttk.Button(button_frame, text="应用XML到UI字段", command=self.apply_to_ui)
-        apply_button.pack(side="left", padx=5)
-
-        self.text_widget = tk.Text(main_frame, wrap="none", font=("Courier New", 10))
+        self.text_widget = tk.Text(main_frame, wrap="none", font=("Courier New", 10), undo=True)
         v_scroll = ttk.Scrollbar(main_frame, orient="vertical", command=self.text_widget.yview)
         h_scroll = ttk.Scrollbar(main_frame, orient="horizontal", command=self.text_widget.xview)
         self.text_widget.config(yscrollcommand=v_scroll.set, xscrollcommand=h_scroll.set)
@@ -38,22 +53,39 @@ class XmlEditorTab(ttk.Frame):
         v_scroll.grid(row=1, column=1, sticky="ns")
         h_scroll.grid(row=2, column=0, columnspan=2, sticky="ew")
 
-    def load_from_ui(self):
-        """根据当前所有UI字段生成XML并显示。"""
-        config = self.get_config_from_ui()
-        xml_string = self.config_manager_to_xml_string(config)
-        self.text_widget.delete("1.0", tk.END)
-        self.text_widget.insert("1.0", xml_string)
+    def bind_change(self, callback):
+        """注册XML文本被修改时的回调"""
+        bind_text_modified(self.text_widget, callback)
+
+    def get_text(self) -> str:
+        return self.text_widget.get("1.0", "end-1c")
 
-    def apply_to_ui(self):
-        """将当前文本框中的XML应用到所有UI字段。"""
-        if not messagebox.askyesno("确认", "此操作将用XML源码覆盖所有UI字段的当前值。\n确定要继续吗？"):
+    def set_text(self, text: str):
+        """
+        替换XML文本。只删除并重新插入发生变化的行，其余行、光标和滚动位置保持不变；
+        无法只替换部分行时才整体替换，并尽量恢复光标和滚动位置。
+        """
+        old_text = self.get_text()
+        if old_text == text:
             return
+        insert_index = self.text_widget.index(tk.INSERT)
+        insert_line = int(insert_index.split('.')[0]) - 1
+        changed = changed_lines(old_text, text)
+        if changed is None:
+            first_visible = self.text_widget.yview()[0]
+            self.text_widget.delete("1.0", tk.END)
+            self.text_widget.insert("1.0", text)
+            self.text_widget.yview_moveto(first_visible)
+            self.text_widget.mark_set(tk.INSERT, insert_index)
+        else:
+            start, old_end, new_lines = changed
+            self.text_widget.delete(f"{start + 1}.0", f"{old_end + 1}.0")
+            self.text_widget.insert(f"{start + 1}.0", ''.join(new_lines))
+            if start <= insert_line < old_end:
+                # 光标所在的行被替换后会移到替换处的开头，放回原来的行列；其他位置由控件自动调整
+                self.text_widget.mark_set(tk.INSERT, insert_index)
+        self.text_widget.edit_reset()
 
-        xml_string = self.text_widget.get("1.0", tk.END)
-        try:
-            config = self.config_manager_from_xml_string(xml_string)
-            self.set_config_to_ui(config)
-            messagebox.showinfo("成功", "XML已成功应用到UI字段。")
-        except Exception as e:
-            messagebox.showerror("解析失败", f"无法解析XML，请检查语法。\n错误: {e}")
+    def set_status(self, text: str, error: bool = False):
+        self.status_var.set(text)
+        self.status_label.config(foreground="red" if error else "")
@@ -0,0 +1,156 @@
+import tkinter as tk
+from tkinter import ttk
+
+
+class VirtualLogView(ttk.Frame):
+    """
+    虚拟化的日志视图：只渲染当前可见的若干行。
+    数据来源 source 需要提供 line_count() 和 read_lines(start, count)，
+    例如 core.line_index.LineIndex。滚动到底部时自动跟随新增内容。
+    source 还提供 line_tags(start, count) 时，按返回的标签名给每一行加上文本标签（颜色等用 text.tag_configure 设置）。
+    """
+
+    def __init__(self, parent, font=("Courier New", 9)):
+        super().__init__(parent)
+        self.source = None
+        self.first_line = 0
+        self.follow = True
+        self._total = 0
+        self._marker = None  # 上次刷新时数据来源的 (行数, 已索引字节数)
+        self._generation = None
+        self._rendered = None  # 上次渲染的 (first_line, total, visible_rows)
+
+        self.status_var = tk.StringVar()
+        ttk.Label(self, textvariable=self.status_var, anchor="w").pack(side="bottom", fill="x")
+
+        self.v_scroll = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.text = tk.Text(self, wrap="none", state="disabled", font=font)
+        h_scroll = ttk.Scrollbar(self, orient="horizontal", command=self.text.xview)
+        self.text.config(xscrollcommand=h_scroll.set)
+
+        self.v_scroll.pack(side="right", fill="y")
+        h_scroll.pack(side="bottom", fill="x")
+        self.text.pack(side="left", expand=True, fill="both")
+
+        self.text.bind("<MouseWheel>", self._on_mousewheel)
+        self.text.bind("<Button-4>", lambda e: self._scroll_lines(-3))
+        self.text.bind("<Button-5>", lambda e: self._scroll_lines(3))
+        self.text.bind("<Prior>", lambda e: self._scroll_lines(-self._visible_rows()))
+        self.text.bind("<Next>", lambda e: self._scroll_lines(self._visible_rows()))
+        self.text.bind("<Control-Home>", lambda e: self.goto_line(0))
+        self.text.bind("<Control-End>", lambda e: self.goto_end())
+        self.text.bind("<Configure>", lambda e: self.render(force=True))
+
+    def set_source(self, source):
+        """切换数据来源并跳到末尾。"""
+        self.source = source
+        self._generation = None
+        self.first_line = 0
+        self.follow = True
+        self.render(force=True)
+
+    def refresh(self):
+        """数据来源有增量时调用，只有可见范围受影响时才重新渲染。"""
+        if self.source is None:
+            return
+        total = self.source.line_count()
+        generation = getattr(self.source, 'generation', None)
+        if generation != self._generation:
+            self._generation = generation
+            self.first_line = 0
+            self.render(force=True)
+            return
+        marker = (total, getattr(self.source, 'indexed_end', None))
+        if marker == self._marker:
+            return
+        self._marker = marker
+        # 可见范围包含末尾时内容可能变化（例如最后一行被追加），需要强制重绘
+        self.render(force=self.follow or self.first_line + self._visible_rows() >= self._total)
+
+    def goto_line(self, line_no, highlight=False):
+        """滚动使指定行位于可见区域顶部。"""
+        self.follow = False
+        self.first_line = max(0, line_no)
+        self.render(force=True)
+        if highlight:
+            # 接近末尾时目标行不一定在第一行，按实际位置高亮
+            row = line_no - self.first_line + 1
+            self.text.tag_remove("highlight", "1.0", tk.END)
+            self.text.tag_add("highlight", f"{row}.0", f"{row}.end")
+            self.text.tag_configure("highlight", background="yellow")
+
+    def goto_end(self):
+        self.follow = True
+        self.render(force=True)
+
+    def render(self, force=False):
+        if self.source is None:
+            self._show_lines([], 0, 0)
+            return
+        total = self.source.line_count()
+        rows = self._visible_rows()
+        max_first = max(0, total - rows)
+        if self.follow:
+            self.first_line = max_first
+        self.first_line = min(max(0, self.first_line), max_first)
+
+        state = (self.first_line, total, rows)
+        if not force and state == self._rendered:
+            return
+        self._rendered = state
+        self._total = total
+        self._show_lines(self.source.read_lines(self.first_line, rows), self.first_line, total)
+        line_tags = getattr(self.source, 'line_tags', None)
+        if line_tags is not None:
+            for row, tag in enumerate(line_tags(self.first_line, rows), start=1):
+                if tag:
+                    self.text.tag_add(tag, f"{row}.0", f"{row}.end")
+
+    def _show_lines(self, lines, first, total):
+        x_position = self.text.xview()[0]
+        self.text.config(state="normal")
+        self.text.delete("1.0", tk.END)
+        self.text.insert("1.0", "\n".join(lines))
+        self.text.config(state="disabled")
+        self.text.xview_moveto(x_position)
+
+        rows = max(1, self._visible_rows())
+        if total:
+            self.v_scroll.set(first / total, min(1.0, (first + rows) / total))
+            self.status_var.set(f"第 {first + 1} - {min(total, first + rows)} 行，共 {total} 行")
+        else:
+            self.v_scroll.set(0.0, 1.0)
+            self.status_var.set("无日志内容")
+
+    def _visible_rows(self) -> int:
+        line_height = self.text.tk.call("font", "metrics", self.text.cget("font"), "-linespace")
+        height = self.text.winfo_height()
+        if height <= 1:
+            height = int(self.text.cget("height")) * int(line_height)
+        return max(1, height // int(line_height))
+
+    def _scroll_lines(self, delta):
+        if self.source is None:
+            return "break"
+        rows = self._visible_rows()
+        self.first_line = max(0, self.first_line + delta)
+        # 滚动到底部时恢复自动跟随
+        self.follow = self.first_line >= self.source.line_count() - rows
+        self.render()
+        return "break"
+
+    def _on_mousewheel(self, event):
+        return self._scroll_lines(-3 if event.delta > 0 else 3)
+
+    def _on_scrollbar(self, *args):
+        if self.source is None:
+            return
+        total = self.source.line_count()
+        rows = self._visible_rows()
+        if args[0] == "moveto":
+            self.first_line = int(float(args[1]) * total)
+            self.follow = self.first_line >= total - rows
+            self.render()
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            self._scroll_lines(amount * rows if args[2] == "pages" else amount)
@@ -1,6 +1,12 @@
 import ctypes
 import os
 import sys
+
+from core.startup_profiler import StartupProfiler
+
+# 启动耗时分析需要在导入其他模块之前开始，才能统计到所有导入
+PROFILER = StartupProfiler.from_command_line()
+
 import tkinter as tk
 
 from core.settings_manager import SettingsManager
@@ -33,13 +39,15 @@ class App:
         self.root = root
         self.root.title(f"WinSW 图形化管理工具 by ztxtech ({self.__version__})")
 
-        self.setup_directories()
-        self.set_app_icon()
+        with PROFILER.phase("创建目录和加载图标"):
+            self.setup_directories()
+            self.set_app_icon()
 
-        self.settings_manager = SettingsManager()
+        with PROFILER.phase("加载设置"):
+            self.settings_manager = SettingsManager()
         self.root.geometry(self.settings_manager.get('window_geometry'))
 
-        self.main_window = MainWindow(self.root, self.settings_manager, self.__version__)
+        self.main_window = MainWindow(self.root, self.settings_manager, self.__version__, PROFILER)
         self.main_window.pack(expand=True, fill="both")
 
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
@@ -64,6 +72,7 @@ class App:
     def on_closing(self):
         """在窗口关闭前保存状态。"""
         self.main_window.save_current_settings()
+        self.main_window.shutdown()
         self.root.destroy()
 
     def setup_directories(self):
@@ -90,6 +99,7 @@ def set_dpi_awareness():
 if __name__ == "__main__":
     set_dpi_awareness()
 
-    root = tk.Tk()
+    with PROFILER.phase("创建 Tk 根窗口"):
+        root = tk.Tk()
     app = App(root)
     root.mainloop()
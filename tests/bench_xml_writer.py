@@ -0,0 +1,31 @@
+"""
+比较 core.xml_writer 与原来的 ElementTree→minidom→splitlines 方式序列化配置的耗时。
+在仓库根目录运行：python -m tests.bench_xml_writer [配置数量]
+"""
+import sys
+import time
+
+from core.config_manager import ConfigManager
+from tests.xml_reference import minidom_pretty_xml, sample_config
+
+
+def best_of(function, repeat=5) -> float:
+    timings = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started_at)
+    return min(timings)
+
+
+def main(count=1000):
+    config_manager = ConfigManager()
+    configs = [sample_config(index) for index in range(count)]
+    minidom_time = best_of(lambda: [minidom_pretty_xml(config_manager._to_xml_root(c)) for c in configs])
+    writer_time = best_of(lambda: [config_manager.save_to_xml_string(c) for c in configs])
+    print(f"{count} 个配置: minidom {minidom_time:.3f}s，xml_writer {writer_time:.3f}s，"
+          f"快 {minidom_time / writer_time:.1f} 倍")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -0,0 +1,120 @@
+import json
+import os
+
+import pytest
+
+import cli
+from core.app_paths import set_app_dir
+
+XML = "<service><id>{}</id><executable>python.exe</executable></service>"
+
+
+@pytest.fixture
+def root(tmp_path, monkeypatch):
+    """程序目录；命令从另一个目录通过 --root 运行。"""
+    app = tmp_path / "app"
+    (app / "services").mkdir(parents=True)
+    (tmp_path / "cwd").mkdir()
+    monkeypatch.chdir(tmp_path / "cwd")
+    yield app
+    set_app_dir(None)
+
+
+def run(root, *argv):
+    return cli.main(['--root', str(root), *argv])
+
+
+def test_save_writes_service_file(root, capsys):
+    source = root / "web.xml"
+    source.write_text(XML.format("web"), encoding='utf-8')
+    assert run(root, 'save', str(source), '--json') == cli.EXIT_OK
+    result = json.loads(capsys.readouterr().out)
+    assert result['id'] == "web" and result['changed'] is True
+    assert (root / "services" / "web.xml").exists()
+
+
+@pytest.mark.parametrize("service_id", ["../escaped", "sub/escaped", ".."])
+def test_save_rejects_ids_outside_service_dir(root, capsys, service_id):
+    source = root / "input.xml"
+    source.write_text(XML.format(service_id), encoding='utf-8')
+    assert run(root, 'save', str(source)) == cli.EXIT_FAILED
+    assert "非法字符" in capsys.readouterr().err
+    assert not (root / "escaped.xml").exists() and not (root.parent / "escaped.xml").exists()
+    assert os.listdir(root / "services") == []
+
+
+def write_service(root, service_id, depend=()):
+    depends = "".join(f"<depend>{dep}</depend>" for dep in depend)
+    (root / "services" / f"{service_id}.xml").write_text(
+        f"<service><id>{service_id}</id><executable>python.exe</executable>{depends}</service>", encoding='utf-8')
+
+
+@pytest.fixture
+def fake_winsw(root):
+    """用一个脚本代替 WinSW.exe，只输出收到的命令。"""
+    script = root / "winsw.sh"
+    script.write_text("#!/bin/sh\necho \"$1 done\"\n", encoding='utf-8')
+    script.chmod(0o755)
+    (root / "settings.json").write_text(json.dumps(
+        {'winsw_management_mode': 'custom', 'winsw_custom_path': str(script)}), encoding='utf-8')
+    return script
+
+
+def test_list_json_reports_malformed_files_as_errors(root, capsys):
+    write_service(root, "web")
+    (root / "services" / "broken.xml").write_text("<service><id>broken", encoding='utf-8')
+    assert run(root, 'list', '--json') == cli.EXIT_FAILED
+    captured = capsys.readouterr()
+    rows = {row['file']: row for row in json.loads(captured.out)}
+    assert rows['web.xml']['id'] == "web" and rows['web.xml']['error'] is None
+    assert rows['broken.xml']['id'] is None and rows['broken.xml']['error'].startswith("无法解析")
+    assert "broken.xml" in captured.err
+
+
+def test_service_command_json_stays_parsable_with_warnings(root, capsys, fake_winsw):
+    # 循环依赖会产生警告，警告必须输出到 stderr
+    write_service(root, "b", depend=["c"])
+    write_service(root, "c", depend=["b"])
+    code = run(root, 'start', 'b', 'c', '--json')
+    captured = capsys.readouterr()
+    rows = json.loads(captured.out)
+    assert code == cli.EXIT_OK, captured.err
+    assert sorted(row['id'] for row in rows) == ["b", "c"]
+    assert all(row['ok'] for row in rows)
+    assert "循环依赖" in captured.err
+
+
+def test_root_is_used_for_all_program_directories(root, capsys, fake_winsw):
+    write_service(root, "web")
+    assert run(root, 'start', 'web', '--json') == cli.EXIT_OK, capsys.readouterr().err
+    assert (root / "audit" / "audit.db").exists()
+    assert (root / "metrics" / "commands.jsonl").exists()
+    assert os.listdir(root.parent / "cwd") == []
+    assert not os.path.exists(os.path.join(os.path.dirname(os.path.abspath(cli.__file__)), "metrics"))
+
+
+def test_parallel_sizes_the_command_runner(root, capsys, fake_winsw, monkeypatch):
+    import core.winsw_manager
+
+    sizes = []
+    original = core.winsw_manager.CommandRunner
+
+    def runner(max_workers):
+        sizes.append(max_workers)
+        return original(max_workers=max_workers)
+
+    monkeypatch.setattr(core.winsw_manager, 'CommandRunner', runner)
+    write_service(root, "web")
+    assert run(root, 'start', 'web', '--parallel', '32') == cli.EXIT_OK
+    assert sizes == [32]
+
+
+def test_status_queries_winsw_instead_of_reporting_unknown(root, capsys):
+    script = root / "winsw.sh"
+    script.write_text("#!/bin/sh\n[ \"$1\" = status ] && echo 'Active (running)'\n", encoding='utf-8')
+    script.chmod(0o755)
+    (root / "settings.json").write_text(json.dumps(
+        {'winsw_management_mode': 'custom', 'winsw_custom_path': str(script)}), encoding='utf-8')
+    write_service(root, "web")
+    assert run(root, 'status', '--all', '--json') == cli.EXIT_OK
+    assert json.loads(capsys.readouterr().out) == [{'id': 'web', 'status': 'Running'}]
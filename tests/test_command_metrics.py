@@ -0,0 +1,72 @@
+from core.command_metrics import CommandMetrics
+from core.command_runner import CommandResult
+
+
+def result(service_id, returncode=0, duration=0.5):
+    command_result = CommandResult(service_id, ['start'])
+    command_result.returncode = returncode
+    command_result.submitted_at = command_result.started_at = 100.0
+    command_result.finished_at = 100.0 + duration
+    return command_result
+
+
+def metric(text, name):
+    values = [line.rsplit(' ', 1) for line in text.splitlines() if line.startswith(name + '{')]
+    assert len(values) == 1, values
+    return float(values[0][1])
+
+
+def test_prometheus_counters_keep_growing_when_the_ring_buffer_wraps():
+    metrics = CommandMetrics(capacity=10)
+    for i in range(25):
+        metrics.record('start', result('web', returncode=1 if i % 5 == 0 else 0))
+    text = metrics.to_prometheus()
+    assert len(metrics.records()) == 10
+    assert metric(text, 'winsw_command_duration_seconds_count') == 25
+    assert metric(text, 'winsw_command_duration_seconds_sum') == 12.5
+    assert metric(text, 'winsw_command_failures_total') == 5
+
+
+def test_prometheus_can_be_limited_to_one_service():
+    metrics = CommandMetrics()
+    metrics.record('start', result('web'))
+    metrics.record('start', result('db'))
+    text = metrics.to_prometheus('db')
+    assert 'service="db"' in text and 'service="web"' not in text
+
+
+def test_prometheus_families_are_contiguous():
+    metrics = CommandMetrics()
+    metrics.record('start', result('web'))
+    metrics.record('stop', result('db', returncode=1))
+    families = [line.split('{')[0].split(' ')[0] for line in metrics.to_prometheus().splitlines()
+                if not line.startswith('#')]
+    families = [name.replace('_sum', '').replace('_count', '') for name in families]
+    assert families == sorted(families, key=families.index)
+    assert families.index('winsw_command_failures_total') == len(families) - 2
+    text = metrics.to_prometheus()
+    assert text.index('# TYPE winsw_command_failures_total') > text.rindex('winsw_command_duration_seconds')
+
+
+def test_record_compacts_the_file(tmp_path):
+    path = tmp_path / "metrics" / "commands.jsonl"
+    metrics = CommandMetrics(str(path), capacity=10)
+    for _ in range(50):
+        metrics.record('start', result('web'))
+    assert len(path.read_text(encoding='utf-8').splitlines()) <= 20
+    assert len(CommandMetrics(str(path), capacity=10).records()) == 10
+
+
+def test_compaction_keeps_records_appended_by_other_processes(tmp_path):
+    path = str(tmp_path / "metrics" / "commands.jsonl")
+    gui, cli = CommandMetrics(path, capacity=5), CommandMetrics(path, capacity=5)
+    gui.records()
+    for _ in range(8):
+        gui.record('start', result('web'))
+    cli.record('stop', result('db'))
+    for _ in range(3):
+        gui.record('start', result('web'))
+    with open(path, encoding='utf-8') as f:
+        lines = f.readlines()
+    assert len(lines) == 5
+    assert [record.service_id for record in CommandMetrics(path, capacity=5).records()].count('db') == 1
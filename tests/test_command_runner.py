@@ -0,0 +1,83 @@
+import sys
+import time
+
+import pytest
+
+from core.command_runner import CommandRunner
+
+# 代替 winsw 的脚本：sleep 在日志中记录开始和结束，count 逐行输出
+FAKE_WINSW = """import sys
+import time
+
+command, *args = sys.argv[1:]
+if command == 'sleep':
+    log, name, seconds = args
+    with open(log, 'a') as f:
+        f.write(f"start {name}\\n")
+    time.sleep(float(seconds))
+    with open(log, 'a') as f:
+        f.write(f"end {name}\\n")
+elif command == 'count':
+    for i in range(int(args[0])):
+        print(f"line {i}", flush=True)
+    print("done", file=sys.stderr, flush=True)
+"""
+
+
+@pytest.fixture
+def fake_winsw(tmp_path):
+    script = tmp_path / "fake_winsw.py"
+    script.write_text(FAKE_WINSW, encoding='utf-8')
+    return lambda *args: [sys.executable, str(script), *map(str, args)]
+
+
+@pytest.fixture
+def runner():
+    runner = CommandRunner()
+    yield runner
+    runner.shutdown()
+
+
+def test_commands_of_one_service_run_serially_in_order(runner, fake_winsw, tmp_path):
+    log = tmp_path / "run.log"
+    web = [runner.submit('web', fake_winsw('sleep', log, name, 0.2)) for name in ('a', 'b', 'c')]
+    db = runner.submit('db', fake_winsw('sleep', tmp_path / "db.log", 'x', 0.2))
+    results = [future.result(timeout=30) for future in web]
+    assert all(result.ok for result in results)
+    assert log.read_text().split("\n")[:-1] == ["start a", "end a", "start b", "end b", "start c", "end c"]
+    # 其他服务的命令不必等待
+    assert db.result(timeout=30).started_at < results[0].finished_at
+
+
+def test_queued_command_can_be_cancelled(runner, fake_winsw, tmp_path):
+    log = tmp_path / "run.log"
+    running = runner.submit('web', fake_winsw('sleep', log, 'a', 0.3))
+    queued = runner.submit('web', fake_winsw('sleep', log, 'b', 0))
+    assert runner.cancel(queued)
+    assert queued.cancelled()
+    assert running.result(timeout=30).ok
+    assert log.read_text() == "start a\nend a\n"
+    # 结果先于队列清理设置，稍等已取消的命令出队
+    deadline = time.monotonic() + 5
+    while runner.is_busy('web') and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not runner.is_busy('web')
+
+
+def test_timed_out_command_is_killed(runner, fake_winsw, tmp_path):
+    log = tmp_path / "run.log"
+    started = time.monotonic()
+    result = runner.submit('web', fake_winsw('sleep', log, 'a', 30), timeout=0.3).result(timeout=30)
+    assert result.timed_out and not result.ok
+    assert time.monotonic() - started < 10
+    assert log.read_text() == "start a\n"
+
+
+def test_output_is_streamed_in_order(runner, fake_winsw):
+    lines = []
+    result = runner.submit('web', fake_winsw('count', 200),
+                           lambda stream, line: lines.append((stream, line))).result(timeout=30)
+    assert [line for stream, line in lines if stream == 'stdout'] == [f"line {i}\n" for i in range(200)]
+    assert ('stderr', "done\n") in lines
+    assert result.stdout == "".join(f"line {i}\n" for i in range(200))
+    assert result.stderr == "done\n"
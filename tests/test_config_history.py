@@ -0,0 +1,43 @@
+from core.config_history import DELETE, ConfigHistory
+from core.config_manager import ConfigManager
+
+SERVICE_XML = """<service>
+  <id>web</id>
+  <name>Web</name>
+  <executable>web.exe</executable>
+  <serviceaccount>
+    <username>svc</username>
+    <password>{password}</password>
+  </serviceaccount>
+</service>
+"""
+
+
+def xml(password):
+    return SERVICE_XML.format(password=password).encode('utf-8')
+
+
+def test_diff_reports_a_changed_password_without_revealing_it(tmp_path):
+    history = ConfigHistory(str(tmp_path))
+    changes = history.diff(ConfigManager(log_callback=lambda message: None), xml('old-secret'), xml('new-secret'))
+    assert len(changes) == 1
+    key, old_value, new_value = changes[0]
+    assert key == 'serviceaccount.password'
+    assert old_value == '******' and new_value.startswith('******') and new_value != old_value
+    assert 'secret' not in f"{old_value}{new_value}"
+
+
+def test_diff_of_identical_configs_is_empty(tmp_path):
+    history = ConfigHistory(str(tmp_path))
+    assert history.diff(ConfigManager(log_callback=lambda message: None), xml('secret'), xml('secret')) == []
+
+
+def test_record_deduplicates_and_keeps_deletions(tmp_path):
+    history = ConfigHistory(str(tmp_path))
+    first = history.record('web', xml('a'))
+    assert history.record('web', xml('a')) is None
+    history.record('web', xml('a'), action=DELETE)
+    versions = history.versions('web')
+    assert [v.number for v in versions] == [1, 2]
+    assert history.is_deleted('web')
+    assert history.read(first.sha256) == xml('a')
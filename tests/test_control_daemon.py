@@ -0,0 +1,95 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import Future
+
+import pytest
+
+from core.command_runner import CommandResult
+from core.config_manager import ConfigManager
+from core.control_daemon import INVALID_PARAMS, ControlDaemon, RpcError
+
+XML = "<service><id>{}</id><executable>python.exe</executable></service>"
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    return ControlDaemon(None, ConfigManager(), port=0, token="secret", service_dir=str(tmp_path / "services"))
+
+
+def test_save_xml_writes_into_service_dir(daemon, tmp_path):
+    result = asyncio.run(daemon.rpc_save_xml(XML.format("web")))
+    assert result['file'] == "web.xml"
+    assert os.path.exists(tmp_path / "services" / "web.xml")
+
+
+@pytest.mark.parametrize("service_id", ["../escaped", "..\\escaped", "a/b", "..", "C:evil"])
+def test_save_xml_rejects_ids_outside_service_dir(daemon, tmp_path, service_id):
+    with pytest.raises(RpcError) as info:
+        asyncio.run(daemon.rpc_save_xml(XML.format(service_id)))
+    assert info.value.code == INVALID_PARAMS
+    assert not os.path.exists(tmp_path / "escaped.xml")
+    assert not any(name != "services" for name in os.listdir(tmp_path))
+
+
+def _http_status(daemon, request_line, authorization=None, body=b""):
+    async def request():
+        await daemon.start()
+        try:
+            reader, writer = await asyncio.open_connection(daemon.host, daemon.port)
+            headers = f"Authorization: {authorization}\r\n" if authorization is not None else ""
+            writer.write(f"{request_line}\r\n{headers}Content-Length: {len(body)}\r\n"
+                         f"Connection: close\r\n\r\n".encode('utf-8') + body)
+            await writer.drain()
+            status_line = await reader.readline()
+            writer.close()
+            return int(status_line.split()[1])
+        finally:
+            daemon.server.close()
+            await daemon.server.wait_closed()
+
+    return asyncio.run(request())
+
+
+def _status_for(daemon, authorization):
+    body = b'{"jsonrpc": "2.0", "id": 1, "method": "ping"}'
+    return _http_status(daemon, "POST /rpc HTTP/1.1", authorization, body)
+
+
+@pytest.mark.parametrize("authorization", [None, "Bearer wrong", "Bearer secre", "Bearer secrét"])
+def test_requests_without_the_token_are_rejected(daemon, authorization):
+    assert _status_for(daemon, authorization) == 401
+
+
+def test_requests_with_the_token_are_accepted(daemon):
+    assert _status_for(daemon, "Bearer secret") == 200
+
+
+@pytest.mark.parametrize("query", ["initial_bytes=abc", "initial_bytes=-1", "suffix=secret.txt"])
+def test_log_stream_rejects_bad_parameters(daemon, query):
+    asyncio.run(daemon.rpc_save_xml(XML.format("web")))
+    assert _http_status(daemon, f"GET /logs/web?{query} HTTP/1.1", "Bearer secret") == 400
+
+
+def test_log_stream_of_a_config_without_id_is_not_found(daemon, tmp_path):
+    (tmp_path / "services").mkdir()
+    (tmp_path / "services" / "noid.xml").write_text("<service><name>x</name></service>", encoding='utf-8')
+    assert _http_status(daemon, "GET /logs/noid.xml HTTP/1.1", "Bearer secret") == 404
+
+
+def test_commands_are_submitted_off_the_event_loop(tmp_path):
+    threads = []
+
+    class Manager:
+        def _execute(self, command, config, timeout=None):
+            threads.append(threading.current_thread())
+            future = Future()
+            result = CommandResult(config['id'], ['winsw', command])
+            result.returncode = 0
+            future.set_result(result)
+            return future
+
+    daemon = ControlDaemon(Manager(), ConfigManager(), port=0, service_dir=str(tmp_path / "services"))
+    asyncio.run(daemon.rpc_save_xml(XML.format("web")))
+    assert asyncio.run(daemon.rpc_command('start', 'web'))['ok']
+    assert threads and threads[0] is not threading.main_thread()
@@ -0,0 +1,89 @@
+import threading
+from concurrent.futures import Future
+
+from core.command_runner import CommandResult
+from core.fleet_executor import FleetExecutor
+
+
+class FakeWinSWManager:
+    """每条命令返回一个挂起的 Future，由测试决定何时完成。"""
+
+    def __init__(self):
+        self.futures = {}
+        self.submitted = threading.Condition()
+
+    def __getattr__(self, command):
+        if command.startswith('_'):
+            raise AttributeError(command)
+
+        def execute(config):
+            future = Future()
+            with self.submitted:
+                self.futures[(config['id'], command)] = future
+                self.submitted.notify_all()
+            return future
+        return execute
+
+    def wait_for(self, key, timeout=5):
+        with self.submitted:
+            assert self.submitted.wait_for(lambda: key in self.futures, timeout)
+            return self.futures[key]
+
+    def complete(self, key, returncode=0):
+        result = CommandResult(key[0], [key[1]])
+        result.returncode = returncode
+        self.wait_for(key).set_result(result)
+
+    def cancel(self, future):
+        return future.cancel()
+
+
+def statuses(future):
+    return {(r.service_id, r.command): r.status for r in future.result(timeout=5)}
+
+
+def test_dependency_levels_orders_by_depend_and_ignores_unselected():
+    configs = [{'id': 'web', 'depend': ['db', 'cache']}, {'id': 'db', 'depend': ['external']}, {'id': 'cache'}]
+    levels = FleetExecutor.dependency_levels(configs)
+    assert [[c['id'] for c in level] for level in levels] == [['cache', 'db'], ['web']]
+
+
+def test_dependency_levels_puts_cycles_last_and_warns():
+    messages = []
+    configs = [{'id': 'a', 'depend': ['b']}, {'id': 'b', 'depend': ['a']}, {'id': 'c'}]
+    levels = FleetExecutor.dependency_levels(configs, messages.append)
+    assert [[c['id'] for c in level] for level in levels] == [['c'], ['a', 'b']]
+    assert len(messages) == 1 and 'a, b' in messages[0]
+
+
+def test_configs_without_id_are_reported_as_failed():
+    manager = FakeWinSWManager()
+    executor = FleetExecutor(manager, log_callback=lambda message: None)
+    reported = []
+    future = executor.run('start', [{'id': 'web'}, {'name': 'Nameless'}], progress_callback=reported.append)
+    manager.complete(('web', 'start'))
+    results = future.result(timeout=5)
+    failed = [r for r in results if r.status == '失败']
+    assert len(results) == 2 and len(failed) == 1
+    assert failed[0].service_id == '' and 'Nameless' in failed[0].message
+    assert len(reported) == 2
+
+
+def test_cancel_only_affects_its_own_run():
+    manager = FakeWinSWManager()
+    executor = FleetExecutor(manager, log_callback=lambda message: None)
+    first = executor.run('start', [{'id': 'a'}, {'id': 'b', 'depend': ['a']}])
+    manager.wait_for(('a', 'start'))
+    second = executor.run('stop', [{'id': 'x'}])
+    manager.wait_for(('x', 'stop'))
+
+    assert first.cancel()
+    assert statuses(first) == {('a', 'start'): '取消', ('b', 'start'): '取消'}
+
+    # 第二次运行不受影响，之后开始的运行也不会继承取消状态
+    manager.complete(('x', 'stop'))
+    assert statuses(second) == {('x', 'stop'): '成功'}
+    third = executor.run('start', [{'id': 'y'}])
+    manager.complete(('y', 'start'))
+    assert statuses(third) == {('y', 'start'): '成功'}
+    assert not third.cancel()
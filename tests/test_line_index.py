@@ -0,0 +1,55 @@
+from core.line_index import LineIndex
+from core.log_archive import GZIP, list_segments, rotate_log
+from core.log_tailer import TailChunk
+
+
+def indexed(path, chunk_size=7):
+    """按小块喂入整个文件，模拟 LogTailer 的增量读取。"""
+    index = LineIndex(str(path))
+    data = path.read_bytes()
+    for offset in range(0, len(data), chunk_size):
+        index.feed(TailChunk(offset, data[offset:offset + chunk_size], False, True))
+    return index
+
+
+def test_lines_are_indexed_across_chunk_boundaries(tmp_path):
+    path = tmp_path / "web.out.log"
+    path.write_bytes(b"first\r\nsecond line\n\nfourth without newline")
+    index = indexed(path)
+    assert index.line_count() == 4
+    assert index.read_lines(0, 10) == ["first", "second line", "", "fourth without newline"]
+    assert index.read_lines(1, 1) == ["second line"]
+    assert index.line_for_offset(index.line_offset(3) + 2) == 3
+
+
+def test_appended_data_extends_the_last_line(tmp_path):
+    path = tmp_path / "web.out.log"
+    path.write_bytes(b"a\nb")
+    index = indexed(path)
+    with open(path, 'ab') as f:
+        f.write(b"c\nd\n")
+    index.feed(TailChunk(3, b"c\nd\n", False, False))
+    assert index.read_lines(0, 10) == ["a", "bc", "d"]
+
+
+def test_discontinuous_chunk_resets_the_index(tmp_path):
+    path = tmp_path / "web.out.log"
+    path.write_bytes(b"one\ntwo\n")
+    index = indexed(path)
+    generation = index.generation
+    index.feed(TailChunk(4, b"two\n", False, False))
+    assert index.generation > generation
+    assert index.read_lines(0, 10) == ["two"]
+
+
+def test_archived_segment_is_read_before_the_current_file(tmp_path):
+    path = tmp_path / "web.out.log"
+    path.write_bytes(b"old 1\nold 2\n")
+    rotate_log(str(path), GZIP)
+    path.write_bytes(b"new 1\n")
+
+    index = LineIndex(str(path))
+    assert index.add_segment(list_segments(str(path))[0])
+    index.feed(TailChunk(0, path.read_bytes(), False, False))
+    assert index.read_lines(0, 10) == ["old 1", "old 2", "new 1"]
+    assert index.logical_offset(str(path), 0) == index.base
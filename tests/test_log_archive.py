@@ -0,0 +1,102 @@
+import os
+import struct
+import time
+
+import pytest
+
+import core.log_archive as log_archive
+from core.log_archive import GZIP, LogMaintenance, LogSegment, list_segments, rotate_log, rotation_reason
+from core.settings_manager import SettingsManager
+from core.status_poller import RUNNING, STOPPED, UNKNOWN
+
+
+@pytest.fixture
+def service(tmp_path):
+    log_dir = tmp_path / "logs"
+    log_dir.mkdir()
+    config = {'id': 'web', 'logpath': str(log_dir), 'log_mode': 'append'}
+    out_log = log_dir / "web.out.log"
+    out_log.write_bytes(b"line\n" * 20000)
+    return config, out_log
+
+
+def maintenance(tmp_path, config, status):
+    settings = SettingsManager(str(tmp_path / "settings.json"))
+    settings.set('log_rotation', {'max_size_mb': 0.05, 'compression': GZIP})
+    return LogMaintenance(settings, lambda: [config], log_callback=lambda message: None,
+                          status_query=lambda service_ids: {service_id: status for service_id in service_ids})
+
+
+def test_rotate_log_archives_and_empties_the_log(service):
+    _, out_log = service
+    segment = rotate_log(str(out_log), GZIP)
+    assert out_log.stat().st_size == 0
+    assert segment.read_all() == b"line\n" * 20000
+    assert [s.path for s in list_segments(str(out_log))] == [segment.path]
+
+
+def test_rotate_log_keeps_the_log_when_it_grows_during_compression(service, monkeypatch):
+    _, out_log = service
+    compress = log_archive._compress
+
+    def compress_while_writing(src, dst, length, codec, created):
+        size = compress(src, dst, length, codec, created)
+        with open(out_log, 'ab') as f:
+            f.write(b"written during rotation\n")
+        return size
+
+    monkeypatch.setattr(log_archive, '_compress', compress_while_writing)
+    with pytest.raises(OSError):
+        rotate_log(str(out_log), GZIP)
+    assert out_log.read_bytes() == b"line\n" * 20000 + b"written during rotation\n"
+    assert list_segments(str(out_log)) == []
+
+
+@pytest.mark.parametrize("status", [RUNNING, UNKNOWN])
+def test_logs_of_services_that_are_not_stopped_are_not_rotated(tmp_path, service, status):
+    config, out_log = service
+    # 模拟 WinSW：自己记录写入位置而不是以追加模式写入
+    with open(out_log, 'r+b') as writer:
+        writer.seek(0, os.SEEK_END)
+        summary = maintenance(tmp_path, config, status).run_once()
+        writer.write(b"next\n")
+    assert summary['rotated'] == 0 and summary['deferred'] == 1
+    assert out_log.read_bytes() == b"line\n" * 20000 + b"next\n"
+    assert list_segments(str(out_log)) == []
+
+
+def test_logs_of_stopped_services_are_rotated(tmp_path, service):
+    config, out_log = service
+    summary = maintenance(tmp_path, config, STOPPED).run_once()
+    assert summary['rotated'] == 1 and summary['deferred'] == 0
+    assert out_log.stat().st_size == 0
+    assert len(list_segments(str(out_log))) == 1
+
+
+def test_manual_rotation_is_refused_while_the_service_runs(tmp_path, service):
+    config, out_log = service
+    summary = maintenance(tmp_path, config, RUNNING).rotate_now(config)
+    assert summary['rotated'] == 0 and summary['errors']
+    assert out_log.stat().st_size == 20000 * 5
+
+
+def test_original_size_is_recorded_in_the_gzip_header(service):
+    _, out_log = service
+    path = rotate_log(str(out_log), GZIP).path
+    assert LogSegment.from_path(path).size == len(b"line\n" * 20000)
+    # 头部记录的是 64 位大小，不会像尾部的 ISIZE 那样在 4GB 处回绕
+    with open(path, 'r+b') as f:
+        f.seek(16)
+        f.write(struct.pack('<Q', 5 * 2 ** 32 + 7))
+    assert LogSegment.from_path(path).size == 5 * 2 ** 32 + 7
+
+
+def test_age_falls_back_to_the_first_record_without_creation_time(tmp_path, monkeypatch):
+    monkeypatch.setattr(log_archive, '_creation_time', lambda stat: None)
+    path = tmp_path / "web.wrapper.log"
+    policy = {'max_size_mb': 0, 'max_age_days': 7}
+    now = time.time()
+    for days, reason in ((10, 'age'), (1, None)):
+        stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(now - days * 86400))
+        path.write_bytes(b"starting\n" + f"{stamp},123 INFO  - Starting service\n".encode('ascii'))
+        assert rotation_reason(str(path), policy, [], now) == reason
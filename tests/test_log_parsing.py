@@ -0,0 +1,109 @@
+import calendar
+import time
+
+import pytest
+
+from core.line_index import LineIndex
+from core.log_parsing import (AUTO, DEBUG, DOTNET, ERROR, INFO, JAVA, JSON_LINES, PYTHON, UNKNOWN, WARN,
+                              FilteredLines, LogColumnStore, create_parser, level_code, parse_timestamp)
+from core.log_tailer import TailChunk
+
+LOG = (b"2024-01-02 03:04:05.100 [main] INFO  app started\n"
+       b"2024-01-02 03:04:06.200 [main] WARN  disk almost full\n"
+       b"2024-01-02 03:05:07.300 [main] ERROR request failed\n"
+       b"java.lang.IllegalStateException: boom\n"
+       b"\tat com.example.App.run(App.java:10)\n"
+       b"2024-01-02 03:06:08.400 [main] DEBUG retrying\n")
+
+
+def local(*fields):
+    return time.mktime(fields + (0, 0, -1))
+
+
+def test_parse_timestamp():
+    assert parse_timestamp("2024-01-02 03:04:05") == local(2024, 1, 2, 3, 4, 5)
+    assert parse_timestamp(b"2024-01-02 03:04:05,250") == local(2024, 1, 2, 3, 4, 5) + 0.25
+    assert parse_timestamp("2024-01-02T03:04:05Z") == calendar.timegm((2024, 1, 2, 3, 4, 5))
+    assert parse_timestamp("2024-01-02T03:04:05+08:00") == calendar.timegm((2024, 1, 1, 19, 4, 5))
+    assert parse_timestamp(1704164645000) == 1704164645.0
+    assert parse_timestamp("yesterday") is None
+
+
+def test_level_code_aliases():
+    assert level_code(b"WRN") == level_code("warning") == WARN
+    assert level_code("fail") == ERROR
+    assert level_code("nonsense") == level_code(None) == UNKNOWN
+
+
+@pytest.mark.parametrize('preset, line, level', [
+    (PYTHON, b"2024-01-02 03:04:05,123 - app.db - ERROR - lost connection", ERROR),
+    (PYTHON, b"WARNING:root:low memory", WARN),
+    (JAVA, b"2024-01-02 03:04:05.123 [main] INFO  started", INFO),
+    (DOTNET, b"[03:04:05 WRN] slow request", WARN),
+    (DOTNET, b"2024-01-02 03:04:05.123 +08:00 [ERR] failed", ERROR),
+    (DOTNET, b"dbug: Microsoft.Hosting[0]", DEBUG),
+    (JSON_LINES, b'{"time": "2024-01-02T03:04:05Z", "level": "warn", "msg": "x"}', WARN),
+])
+def test_presets_and_auto_detection(preset, line, level):
+    assert create_parser(preset).parse(line)[1] == level
+    assert create_parser(AUTO).parse(line)[1] == level
+
+
+def test_continuation_lines_are_not_records():
+    parser = create_parser(AUTO)
+    assert parser.parse(b"\tat com.example.App.run(App.java:10)") is None
+    assert parser.parse(b"plain output") is None
+
+
+def store_of(data, chunk_size=13):
+    store = LogColumnStore(create_parser(AUTO))
+    for offset in range(0, len(data), chunk_size):
+        store.feed(offset, data[offset:offset + chunk_size])
+    return store
+
+
+def test_column_store_inherits_level_for_continuation_lines():
+    store = store_of(LOG)
+    assert len(store) == 6
+    assert list(store.levels) == [INFO, WARN, ERROR, ERROR, ERROR, DEBUG]
+    assert list(store.records) == [1, 1, 1, 0, 0, 1]
+    assert store.times[3] == store.times[2]
+    assert store.record_count() == 4
+
+
+def test_select_by_level_and_time():
+    store = store_of(LOG)
+    offsets, total = store.select(min_level=WARN)
+    assert total == 6 and [LOG[o:o + 23] for o in offsets][:2] == [b"2024-01-02 03:04:06.200",
+                                                                     b"2024-01-02 03:05:07.300"]
+    assert len(offsets) == 4
+    offsets, _ = store.select(start_time=local(2024, 1, 2, 3, 5, 0), end_time=local(2024, 1, 2, 3, 6, 0))
+    assert len(offsets) == 3
+
+
+def test_rate_buckets_count_records_per_minute():
+    buckets = store_of(LOG).rate_buckets(60)
+    assert [(count, warnings, errors) for _, count, warnings, errors in buckets] == [(2, 1, 0), (1, 0, 1),
+                                                                                      (1, 0, 0)]
+
+
+def test_truncation_drops_rows_and_bumps_generation():
+    store = store_of(LOG)
+    generation = store.generation
+    store.feed(0, b"2024-01-03 00:00:00.000 [main] FATAL restarted\n")
+    assert store.generation > generation
+    assert len(store) == 1 and store.record_count() == 1
+
+
+def test_filtered_lines_read_through_the_line_index(tmp_path):
+    path = tmp_path / "app.out.log"
+    path.write_bytes(LOG)
+    index = LineIndex(str(path))
+    store = LogColumnStore(create_parser(AUTO))
+    index.chunk_listeners.append(store.on_chunk)
+    index.feed(TailChunk(0, LOG, False, False))
+    lines = FilteredLines(index, store, min_level=ERROR)
+    assert lines.line_count() == 3
+    assert lines.read_lines(0, 3) == ["2024-01-02 03:05:07.300 [main] ERROR request failed",
+                                      "java.lang.IllegalStateException: boom",
+                                      "\tat com.example.App.run(App.java:10)"]
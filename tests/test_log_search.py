@@ -0,0 +1,85 @@
+import threading
+
+import pytest
+
+from core.log_archive import GZIP, list_segments, rotate_log
+from core.log_search import BlockBloomIndex, LogSearchEngine, required_trigrams
+
+
+@pytest.fixture
+def small_blocks(monkeypatch):
+    monkeypatch.setattr(BlockBloomIndex, 'BLOCK_SIZE', 1024)
+
+
+def log_lines(count, marker_every=None):
+    return b"".join(
+        (b"ERROR needle found in line %d\n" if marker_every and i % marker_every == 0 else b"INFO line %d ok\n") % i
+        for i in range(count))
+
+
+def search(targets, pattern, **kwargs):
+    matches, done = [], threading.Event()
+    outcome = {}
+
+    def finished(count, error):
+        outcome.update(count=count, error=error)
+        done.set()
+
+    LogSearchEngine().search(targets, pattern, result_callback=matches.append, done_callback=finished, **kwargs)
+    assert done.wait(5)
+    return matches, outcome
+
+
+def test_required_trigrams():
+    assert required_trigrams("Needle", False) == {b'nee', b'eed', b'edl', b'dle'}
+    assert required_trigrams("ab", False) == set()
+    assert b'err' in required_trigrams(r"(error|fatal)?\d+ERROR", True)
+    assert required_trigrams(r"[", True) == set()
+
+
+def test_index_is_persisted_and_filters_blocks(tmp_path, small_blocks):
+    path = tmp_path / "web.out.log"
+    path.write_bytes(log_lines(2000) + b"ERROR needle here\n" + log_lines(2000))
+    index = BlockBloomIndex(str(path))
+    assert index.update() > 0
+    ranges, _ = index.candidate_ranges(required_trigrams("needle", False))
+    assert 1 <= len(ranges) < len(index.blocks)
+
+    reloaded = BlockBloomIndex(str(path))
+    assert reloaded.update() == 0
+    assert reloaded.indexed_end == index.indexed_end
+
+
+def test_rewritten_file_rebuilds_the_index(tmp_path, small_blocks):
+    path = tmp_path / "web.out.log"
+    path.write_bytes(log_lines(2000))
+    index = BlockBloomIndex(str(path))
+    index.update()
+    path.write_bytes(b"X" * 10 + log_lines(2000)[10:])
+    index.update()
+    assert index.blocks[0][0] == 0 and index.indexed_end <= path.stat().st_size
+
+
+def test_search_finds_matches_in_logs_and_archived_segments(tmp_path, small_blocks):
+    path = tmp_path / "web.out.log"
+    path.write_bytes(log_lines(500, marker_every=100))
+    rotate_log(str(path), GZIP)
+    path.write_bytes(log_lines(3000, marker_every=1000))
+    segment_path = list_segments(str(path))[0].path
+
+    targets = [('web', 'out.log', segment_path), ('web', 'out.log', str(path))]
+    matches, outcome = search(targets, "NEEDLE")
+    assert outcome == {'count': 8, 'error': None}
+    assert sum(match.path == segment_path for match in matches) == 5
+    current = path.read_bytes()
+    for match in matches:
+        assert match.line.startswith("ERROR needle")
+        if match.path == str(path):
+            assert current[match.offset:].startswith(match.line.encode())
+
+
+def test_invalid_regex_is_reported(tmp_path):
+    path = tmp_path / "web.out.log"
+    path.write_bytes(b"line\n")
+    _, outcome = search([('web', 'out.log', str(path))], "(", is_regex=True)
+    assert outcome['count'] == 0 and outcome['error'].startswith("正则表达式无效")
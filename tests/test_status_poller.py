@@ -0,0 +1,105 @@
+import json
+import threading
+
+import pytest
+
+from core import status_poller
+from core.app_paths import set_app_dir
+from core.settings_manager import SettingsManager
+from core.status_poller import (NOT_INSTALLED, RUNNING, STOPPED, UNKNOWN, FakeStatusBackend, StatusPoller,
+                                WinSWStatusBackend)
+from core.winsw_manager import WinSWManager
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(status_poller.time, 'monotonic', clock)
+    return clock
+
+
+def test_one_query_per_round_reports_only_changes(clock):
+    backend = FakeStatusBackend({'web': RUNNING, 'db': STOPPED})
+    poller = StatusPoller(backend)
+    poller.set_services(['web', 'db', 'web'])
+    assert poller.poll_once() == {'db': STOPPED, 'web': RUNNING}
+    assert backend.query_count == 1
+
+    assert poller.poll_once() == {}
+    backend.statuses['web'] = STOPPED
+    assert poller.poll_once() == {'web': STOPPED}
+    assert backend.query_count == 3
+
+
+def test_cached_status_expires_after_ttl(clock):
+    poller = StatusPoller(FakeStatusBackend({'web': RUNNING}), ttl=60)
+    poller.set_services(['web'])
+    assert poller.get_status('web') is None
+    poller.poll_once()
+    clock.now += 60
+    assert poller.get_status('web') == RUNNING
+    clock.now += 1
+    assert poller.get_status('web') is None
+
+
+def test_failing_backend_reports_unknown(clock):
+    backend = FakeStatusBackend()
+    backend.query = lambda service_ids: 1 / 0
+    poller = StatusPoller(backend)
+    poller.set_services(['web'])
+    assert poller.poll_once() == {'web': UNKNOWN}
+
+
+def test_thread_calls_back_on_change_and_backs_off():
+    backend = FakeStatusBackend({'web': RUNNING})
+    changes, changed = [], threading.Event()
+
+    def callback(statuses):
+        changes.append(statuses)
+        changed.set()
+
+    poller = StatusPoller(backend, callback, min_interval=0.01, max_interval=0.02, backoff=2)
+    poller.set_services(['web'])
+    poller.start()
+    try:
+        assert changed.wait(5)
+        changed.clear()
+        backend.statuses['web'] = STOPPED
+        poller.bump()
+        assert changed.wait(5)
+    finally:
+        poller.stop()
+    assert changes[:2] == [{'web': RUNNING}, {'web': STOPPED}]
+    assert poller.interval <= poller.max_interval
+
+
+def test_winsw_backend_queries_quietly(tmp_path, monkeypatch):
+    (tmp_path / "services").mkdir()
+    (tmp_path / "services" / "web.xml").write_text("<service><id>web</id></service>", encoding='utf-8')
+    script = tmp_path / "winsw.sh"
+    script.write_text("#!/bin/sh\n[ \"$1\" = status ] && echo 'Active (running)'\n", encoding='utf-8')
+    script.chmod(0o755)
+    (tmp_path / "settings.json").write_text(json.dumps({'winsw_management_mode': 'custom',
+                                                        'winsw_custom_path': str(script)}), encoding='utf-8')
+    monkeypatch.chdir(tmp_path)
+    set_app_dir(str(tmp_path))
+    messages, audited = [], []
+    audit_log = type('AuditLog', (), {'record_command': lambda self, *args: audited.append(args)})()
+    manager = WinSWManager(messages.append, SettingsManager(str(tmp_path / "settings.json")), audit_log)
+    try:
+        backend = WinSWStatusBackend(manager, lambda: {'web': {'id': 'web'}})
+        assert backend.query(['web', 'gone']) == {'web': RUNNING, 'gone': UNKNOWN}
+    finally:
+        manager.shutdown()
+        set_app_dir(None)
+    assert messages == [] and audited == []
+    assert manager.metrics.records() == []
+    assert WinSWStatusBackend.parse_status("Service is nonexistent") == NOT_INSTALLED
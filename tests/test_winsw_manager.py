@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+from core.app_paths import set_app_dir
+from core.settings_manager import SettingsManager
+from core.winsw_manager import WinSWManager
+
+
+def fake_winsw(path, version):
+    path.write_text(f"#!/bin/sh\necho \"{version} $1\"\n", encoding='utf-8')
+    path.chmod(0o755)
+    return str(path)
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    (tmp_path / "services").mkdir()
+    (tmp_path / "services" / "web.xml").write_text("<service><id>web</id></service>", encoding='utf-8')
+    (tmp_path / "settings.json").write_text(json.dumps({'winsw_deploy_mode': 'colocated'}), encoding='utf-8')
+    monkeypatch.chdir(tmp_path)
+    set_app_dir(str(tmp_path))
+    manager = WinSWManager(lambda message: None, SettingsManager(str(tmp_path / "settings.json")))
+    yield manager
+    manager.shutdown()
+    set_app_dir(None)
+
+
+def run_status(manager):
+    result = manager.status({'id': 'web'}).result(timeout=10)
+    return result.stdout.strip()
+
+
+def test_colocated_service_picks_up_a_newly_provisioned_latest(manager, tmp_path, monkeypatch):
+    latest = {'path': fake_winsw(tmp_path / "v1.exe", "v1")}
+    lookups = []
+    monkeypatch.setattr(manager.provisioner, 'get_path', lambda version: lookups.append(version) or latest['path'])
+    assert run_status(manager) == "v1 status"
+    assert run_status(manager) == "v1 status"
+    assert len(lookups) == 1
+
+    # provisioner 获取到新的最新版本后通知监听器，下一次命令重新解析并替换 web.exe
+    latest['path'] = fake_winsw(tmp_path / "v2.exe", "v2")
+    for callback in manager.provisioner._listeners:
+        callback()
+    assert run_status(manager) == "v2 status"
+    assert len(lookups) == 2
+    assert (tmp_path / "deploy" / "web" / "web.exe").read_text(encoding='utf-8').startswith("#!/bin/sh\necho \"v2")
+
+
+def test_pin_change_resolves_the_pinned_version(manager, tmp_path, monkeypatch):
+    paths = {'latest': fake_winsw(tmp_path / "v1.exe", "v1"), 'v0': fake_winsw(tmp_path / "v0.exe", "v0")}
+    monkeypatch.setattr(manager.provisioner, 'get_path', lambda version: paths[version])
+    assert run_status(manager) == "v1 status"
+    manager.settings_manager.set('winsw_version_pins', {'web': 'v0'})
+    assert run_status(manager) == "v0 status"
@@ -0,0 +1,204 @@
+import hashlib
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from core.winsw_provisioner import LATEST, ProvisionError, WinSWProvisioner, WinSWRelease
+
+BINARY = bytes(range(256)) * 400
+BINARY_SHA256 = hashlib.sha256(BINARY).hexdigest()
+ETAG = '"releases-v1"'
+
+
+class ReleaseServer(ThreadingHTTPServer):
+    """模拟 GitHub 发布 API 和下载地址，记录每个请求的路径和请求头。"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), ReleaseHandler)
+        self.requests = []
+        self.releases = []
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def paths(self, prefix):
+        return [request for request in self.requests if request[0].startswith(prefix)]
+
+
+class ReleaseHandler(BaseHTTPRequestHandler):
+    binary = BINARY
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.server.requests.append((self.path, dict(self.headers)))
+        if self.path.startswith('/releases'):
+            if self.headers.get('If-None-Match') == ETAG and len(self.server.releases) == 2:
+                self.send_response(304)
+                self.end_headers()
+                return
+            body = json.dumps(self.server.releases).encode('utf-8')
+            self.send_response(200)
+            self.send_header('ETag', ETAG)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif self.path == '/download/WinSW-x64.exe':
+            self._send_binary()
+        else:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+    def _send_binary(self):
+        match = re.fullmatch(r'bytes=(\d+)-', self.headers.get('Range', ''))
+        start = int(match.group(1)) if match else 0
+        binary = self.binary
+        if start >= len(binary) and match:
+            self.send_response(416)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = binary[start:]
+        self.send_response(206 if match else 200)
+        if match:
+            self.send_header('Content-Range', f"bytes {start}-{len(binary) - 1}/{len(binary)}")
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    server = ReleaseServer()
+    server.releases = [
+        {'tag_name': 'v3.0.0-alpha.11', 'assets': [
+            {'name': 'WinSW-x64.exe', 'browser_download_url': f"{server.url}/download/WinSW-x64.exe",
+             'digest': f"sha256:{BINARY_SHA256}", 'size': len(BINARY)}]},
+        {'tag_name': 'v2.12.0', 'assets': [{'name': 'WinSW-x64.exe', 'browser_download_url': 'unused'}]},
+    ]
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def provisioner(tmp_path, server=None, **kwargs):
+    api_url = f"{server.url}/releases" if server else 'http://127.0.0.1:9/releases'
+    return WinSWProvisioner(lambda message: None, str(tmp_path / "cache"), api_url=api_url, **kwargs)
+
+
+def release(server, sha256=BINARY_SHA256):
+    return WinSWRelease('v3.0.0-alpha.11', 'WinSW-x64.exe', f"{server.url}/download/WinSW-x64.exe",
+                        sha256, len(BINARY))
+
+
+def partial_path(tmp_path):
+    return tmp_path / "cache" / "partial" / "v3.0.0-alpha.11-WinSW-x64.exe.part"
+
+
+def test_latest_is_resolved_downloaded_and_cached(tmp_path, server):
+    path = provisioner(tmp_path, server).get_path(LATEST)
+    assert path.endswith(f"{BINARY_SHA256}.exe")
+    with open(path, 'rb') as f:
+        assert f.read() == BINARY
+    assert provisioner(tmp_path, server).installed_versions() == {'v3.0.0-alpha.11': BINARY_SHA256}
+
+
+def test_refresh_revalidates_the_index_with_etag(tmp_path, server):
+    instance = provisioner(tmp_path, server)
+    path = instance.get_path(LATEST)
+    assert instance.refresh() == path
+    conditional = [headers for path, headers in server.paths('/releases') if 'If-None-Match' in headers]
+    assert len(conditional) == 1 and conditional[0]['If-None-Match'] == ETAG
+    assert len(server.paths('/download')) == 1
+
+
+def test_latest_is_served_from_the_cache_without_lookups_or_logging(tmp_path, server):
+    provisioner(tmp_path, server).get_path(LATEST)
+    messages = []
+    instance = WinSWProvisioner(messages.append, str(tmp_path / "cache"), api_url=f"{server.url}/releases")
+    paths = {instance.get_path(LATEST) for _ in range(3)}
+    assert len(paths) == 1
+    assert len(server.paths('/releases')) == 1
+    assert messages == []
+
+
+def test_stale_latest_is_refreshed_in_the_background(tmp_path, server, monkeypatch):
+    instance = provisioner(tmp_path, server, index_max_age=0)
+    old_path = instance.get_path(LATEST)
+    instance._refresh_thread.join(5)
+    notified = []
+    instance.add_listener(lambda: notified.append(True))
+
+    new_binary = BINARY[::-1]
+    server.releases.insert(0, {'tag_name': 'v3.0.0-alpha.12', 'assets': [
+        {'name': 'WinSW-x64.exe', 'browser_download_url': f"{server.url}/download/WinSW-x64.exe",
+         'digest': None, 'size': len(BINARY)}]})
+    monkeypatch.setattr(ReleaseHandler, 'binary', new_binary)
+    # 过期后仍立即返回缓存的文件，新版本在后台获取
+    assert instance.get_path(LATEST) == old_path
+    instance._refresh_thread.join(5)
+    assert notified == [True]
+    assert instance.get_path(LATEST).endswith(f"{hashlib.sha256(new_binary).hexdigest()}.exe")
+
+
+def test_fresh_index_is_not_requested_again(tmp_path, server):
+    provisioner(tmp_path, server).get_path(LATEST)
+    provisioner(tmp_path, server).get_path(LATEST)
+    assert len(server.paths('/releases')) == 1
+
+
+def test_interrupted_download_resumes_with_range(tmp_path, server):
+    instance = provisioner(tmp_path, server)
+    partial_path(tmp_path).write_bytes(BINARY[:1000])
+    path = instance._download(release(server))
+    assert server.paths('/download')[-1][1]['Range'] == 'bytes=1000-'
+    with open(path, 'rb') as f:
+        assert f.read() == BINARY
+    assert not partial_path(tmp_path).exists()
+
+
+def test_complete_partial_file_survives_416(tmp_path, server):
+    instance = provisioner(tmp_path, server)
+    partial_path(tmp_path).write_bytes(BINARY)
+    path = instance._download(WinSWRelease('v3.0.0-alpha.11', 'WinSW-x64.exe',
+                                           f"{server.url}/download/WinSW-x64.exe", BINARY_SHA256))
+    assert path.endswith(f"{BINARY_SHA256}.exe")
+
+
+def test_digest_mismatch_is_rejected_and_not_cached(tmp_path, server):
+    instance = provisioner(tmp_path, server)
+    with pytest.raises(ProvisionError):
+        instance._download(release(server, sha256='0' * 64))
+    assert not partial_path(tmp_path).exists()
+    assert instance.installed_versions() == {}
+
+
+def test_mirror_is_used_without_network(tmp_path):
+    mirror = tmp_path / "mirror" / "v3.0.0"
+    mirror.mkdir(parents=True)
+    (mirror / "WinSW-x64.exe").write_bytes(BINARY)
+    (mirror / "WinSW-x64.exe.sha256").write_text(f"{BINARY_SHA256}  WinSW-x64.exe\n", encoding='utf-8')
+    instance = provisioner(tmp_path, mirror_dir=str(tmp_path / "mirror"))
+    assert instance.get_path(LATEST).endswith(f"{BINARY_SHA256}.exe")
+    assert instance.installed_versions() == {'v3.0.0': BINARY_SHA256}
+
+
+def test_mirror_file_with_wrong_checksum_is_refused(tmp_path):
+    mirror = tmp_path / "mirror" / "v3.0.0"
+    mirror.mkdir(parents=True)
+    (mirror / "WinSW-x64.exe").write_bytes(BINARY)
+    (mirror / "WinSW-x64.exe.sha256").write_text('f' * 64, encoding='utf-8')
+    instance = provisioner(tmp_path, mirror_dir=str(tmp_path / "mirror"))
+    assert instance.get_path('v3.0.0') is None
+    assert instance.installed_versions() == {}
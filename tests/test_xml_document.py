@@ -0,0 +1,52 @@
+import os
+
+from core.config_manager import ConfigManager
+
+# 包含界面不认识的元素、注释和非字母顺序的属性，格式与保存时写出的格式一致
+SERVICE_XML = """<?xml version="1.0" ?>
+<service>
+  <!-- 由运维维护，请勿删除 -->
+  <id>web</id>
+  <name>Web</name>
+  <executable>C:\\app\\web.exe</executable>
+  <arguments>--port 8080</arguments>
+  <download to="%BASE%\\app.zip" from="https://example.com/app.zip" auth="sspi" failOnError="true"/>
+  <env value="1" name="UNBUFFERED"/>
+  <startarguments>--warm</startarguments>
+  <!-- 日志配置 -->
+  <log mode="roll-by-size">
+    <sizeThreshold>10240</sizeThreshold>
+    <keepFiles>8</keepFiles>
+  </log>
+  <extensions>
+    <extension id="killOnStartup" enabled="true" className="winsw.Plugins.RunawayProcessKiller">
+      <pidfile>%BASE%\\pid.txt</pidfile>
+    </extension>
+  </extensions>
+</service>"""
+
+
+def on_disk(text) -> bytes:
+    return text.replace('\n', os.linesep).encode('utf-8')
+
+
+def test_editing_one_field_leaves_the_rest_byte_identical(tmp_path):
+    path = tmp_path / "web.xml"
+    path.write_bytes(on_disk(SERVICE_XML))
+    config_manager = ConfigManager(log_callback=lambda message: None)
+
+    document = config_manager.load_document(str(path))
+    assert document.update({'arguments': '--port 9090'}) == ['arguments']
+    assert config_manager.save_document(document, str(path))
+    assert path.read_bytes() == on_disk(SERVICE_XML.replace('--port 8080', '--port 9090'))
+
+
+def test_saving_an_unchanged_document_does_not_rewrite_the_file(tmp_path):
+    path = tmp_path / "web.xml"
+    path.write_bytes(on_disk(SERVICE_XML))
+    config_manager = ConfigManager(log_callback=lambda message: None)
+
+    document = config_manager.load_document(str(path))
+    assert document.update(document.to_config()) == []
+    assert config_manager.save_document(document, str(path)) is False
+    assert path.read_bytes() == on_disk(SERVICE_XML)
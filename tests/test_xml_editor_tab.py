@@ -0,0 +1,28 @@
+from gui.tabs.xml_editor_tab import changed_lines
+
+OLD = "<service>\n  <id>web</id>\n  <arguments>--port 8080</arguments>\n</service>"
+
+
+def apply(old_text, changed):
+    """按控件中的做法替换行，返回得到的文本。"""
+    start, old_end, new_lines = changed
+    lines = [line + "\n" for line in old_text.split("\n")]
+    return "".join(lines[:start] + new_lines + lines[old_end:])[:-1]
+
+
+def test_only_the_changed_lines_are_replaced():
+    new = OLD.replace("8080", "9090")
+    changed = changed_lines(OLD, new)
+    assert changed == (2, 3, ["  <arguments>--port 9090</arguments>\n"])
+    assert apply(OLD, changed) == new
+
+
+def test_inserted_and_removed_lines():
+    new = OLD.replace("  <id>web</id>\n", "  <id>web</id>\n  <name>Web</name>\n")
+    assert apply(OLD, changed_lines(OLD, new)) == new
+    assert apply(new, changed_lines(new, OLD)) == OLD
+
+
+def test_change_in_the_last_line_needs_a_full_replacement():
+    assert changed_lines(OLD, OLD + "\n<!-- end -->") is None
+    assert changed_lines(OLD, OLD.replace("</service>", "</service >")) is None
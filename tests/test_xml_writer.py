@@ -0,0 +1,48 @@
+import io
+import json
+import os
+import pathlib
+
+import pytest
+
+from core.config_manager import ConfigManager
+from core.xml_document import ServiceDocument
+from core.xml_writer import to_pretty_xml_string
+from tests.xml_reference import minidom_pretty_xml, random_configs
+
+GOLDEN_DIR = pathlib.Path(__file__).parent / "golden"
+TEMPLATE = pathlib.Path(__file__).parent.parent / "templates" / "python.xml"
+
+
+def golden(name) -> bytes:
+    # 期望输出以 \n 换行保存，save_to_xml_string 使用 os.linesep
+    return (GOLDEN_DIR / name).read_bytes().replace(b'\n', os.linesep.encode('ascii'))
+
+
+@pytest.fixture
+def config_manager():
+    return ConfigManager(log_callback=lambda message: None)
+
+
+@pytest.mark.parametrize('name', ['default', 'full'])
+def test_save_to_xml_string_matches_golden_file(config_manager, name):
+    config = json.loads((GOLDEN_DIR / f"{name}.json").read_text(encoding='utf-8'))
+    assert config_manager.save_to_xml_string(config).encode('utf-8') == golden(f"{name}.xml")
+
+
+def test_document_with_comments_matches_golden_file(config_manager):
+    document = ServiceDocument.from_file(config_manager, str(TEMPLATE))
+    assert document.to_string().encode('utf-8') == golden("template_python.xml")
+
+
+def test_write_xml_streams_the_same_bytes(config_manager):
+    config = json.loads((GOLDEN_DIR / "full.json").read_text(encoding='utf-8'))
+    buffer = io.StringIO()
+    config_manager.write_xml(config, buffer)
+    assert buffer.getvalue() == config_manager.save_to_xml_string(config)
+
+
+def test_output_matches_the_minidom_path_on_random_configs(config_manager):
+    for config in random_configs(300):
+        root = config_manager._to_xml_root(config)
+        assert to_pretty_xml_string(root) == minidom_pretty_xml(root)
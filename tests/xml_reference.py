@@ -0,0 +1,36 @@
+import os
+import random
+import xml.etree.ElementTree as ET
+from xml.dom import minidom
+
+
+def minidom_pretty_xml(root) -> str:
+    """改用 core.xml_writer 之前 save_to_xml_string 的实现，作为比较和基准测试的参照。"""
+    parsed_string = minidom.parseString(ET.tostring(root, 'utf-8'))
+    return os.linesep.join([s for s in parsed_string.toprettyxml(indent="  ").splitlines() if s.strip()])
+
+
+def sample_config(index, rng=None) -> dict:
+    """生成一个典型的服务配置；传入 rng 时加入特殊字符和换行等随机内容。"""
+    config = {
+        'id': f"service-{index}", 'name': f"Service {index}", 'description': f"Sample service number {index}",
+        'executable': r"C:\Python\python.exe", 'arguments': rf"C:\apps\service{index}\main.py --port {8000 + index}",
+        'workingdirectory': rf"C:\apps\service{index}", 'resetfailure': '1 day', 'priority': 'normal',
+        'stoptimeout': '15 sec', 'logpath': rf"C:\logs\service{index}", 'log_mode': 'roll', 'interactive': False,
+        'environments': [{'name': 'PYTHONUNBUFFERED', 'value': '1'}, {'name': 'APP_ENV', 'value': 'production'}],
+        'depend': [f"service-{index - 1}"] if index else [],
+        'onfailure': [{'action': 'restart', 'delay': '10 sec'}, {'action': 'none'}],
+        'serviceaccount': {'username': 'LocalSystem'},
+    }
+    if rng is not None:
+        alphabet = "ab &<>\"'\t\n\r\n中文 "
+        for key in ('name', 'description', 'arguments'):
+            config[key] = ''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 20)))
+        config['environments'].append({'name': 'RANDOM', 'value': ''.join(rng.choice(alphabet) for _ in range(8))})
+        config['interactive'] = rng.random() < 0.5
+    return config
+
+
+def random_configs(count, seed=0) -> list:
+    rng = random.Random(seed)
+    return [sample_config(index, rng) for index in range(count)]